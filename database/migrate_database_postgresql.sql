@@ -266,6 +266,18 @@ BEGIN
 END;
 $$;
 
+-- Migration 12: Add token_counts column to messages table if it doesn't exist
+DO $$
+BEGIN
+    IF NOT column_exists('messages', 'token_counts') THEN
+        ALTER TABLE messages ADD COLUMN token_counts JSONB;
+        RAISE NOTICE '✓ Added token_counts column to messages table';
+    ELSE
+        RAISE NOTICE '✓ Skipped: token_counts column already exists in messages table';
+    END IF;
+END;
+$$;
+
 -- Verification: Check that all required columns exist and are populated
 DO $$
 DECLARE
@@ -286,7 +298,8 @@ DECLARE
         ARRAY['procedural_memory', 'user_id'],
         ARRAY['resource_memory', 'user_id'],
         ARRAY['semantic_memory', 'user_id'],
-        ARRAY['messages', 'user_id']
+        ARRAY['messages', 'user_id'],
+        ARRAY['messages', 'token_counts']
     ];
 BEGIN
     RAISE NOTICE '';
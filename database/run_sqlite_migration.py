@@ -4,7 +4,11 @@ Database Migration Script for Mirix
 Migrates old database format to new format with added user_id columns and other schema changes.
 """
 
+import array
+import base64
+import math
 import sqlite3
+import struct
 import sys
 import os
 from pathlib import Path
@@ -79,6 +83,68 @@ def check_column_exists(conn, table_name, column_name):
     return column_name in columns
 
 
+# Embedding columns stored with the CommonVector type on SQLite
+EMBEDDING_COLUMNS = {
+    'episodic_memory': ['details_embedding', 'summary_embedding'],
+    'knowledge_vault': ['caption_embedding'],
+    'procedural_memory': ['summary_embedding', 'steps_embedding'],
+    'resource_memory': ['summary_embedding'],
+    'semantic_memory': ['details_embedding', 'name_embedding', 'summary_embedding'],
+}
+
+# Header of the compact embedding format (see mirix/orm/sqlite_functions.py): 0xFF "MV" + dtype
+# code "F" (float32, followed by the float32 L2 norm of the vector)
+COMPACT_FLOAT32_HEADER = b"\xffMVF"
+
+
+def _legacy_embedding_filter(column_name):
+    """SQL condition matching embeddings still stored as base64-encoded, zero-padded float32 bytes"""
+    return f"{column_name} IS NOT NULL AND substr({column_name}, 1, 1) != X'FF'"
+
+
+def count_legacy_embeddings(conn):
+    """Count embeddings that still use the legacy base64 format"""
+    total = 0
+    for table, columns in EMBEDDING_COLUMNS.items():
+        for column in columns:
+            if not check_column_exists(conn, table, column):
+                continue
+            cursor = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {_legacy_embedding_filter(column)}")
+            total += cursor.fetchone()[0]
+    return total
+
+
+def compact_embeddings(conn, batch_size=500):
+    """Rewrite legacy embeddings as raw little-endian float32 at their native dimensionality"""
+    for table, columns in EMBEDDING_COLUMNS.items():
+        for column in columns:
+            if not check_column_exists(conn, table, column):
+                continue
+            converted = 0
+            while True:
+                rows = conn.execute(
+                    f"SELECT rowid, {column} FROM {table} WHERE {_legacy_embedding_filter(column)} LIMIT ?",
+                    (batch_size,)
+                ).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for rowid, value in rows:
+                    raw = base64.b64decode(bytes(value))
+                    # Drop the zero padding up to MAX_EMBEDDING_DIM, one float32 at a time
+                    end = len(raw) - len(raw) % 4
+                    while end >= 4 and raw[end - 4:end] == b"\x00\x00\x00\x00":
+                        end -= 4
+                    values = array.array('f', raw[:end])
+                    norm = struct.pack('<f', math.sqrt(sum(value * value for value in values)))
+                    updates.append((COMPACT_FLOAT32_HEADER + norm + raw[:end], rowid))
+                conn.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+                conn.commit()
+                converted += len(updates)
+            if converted:
+                print(f"  Compacted {converted} rows of {table}.{column}")
+
+
 def migrate_database(old_db_path, new_db_path):
     """Migrate database from old format to new format"""
     
@@ -204,6 +270,20 @@ def migrate_database(old_db_path, new_db_path):
                     conn.execute("UPDATE messages SET user_id = ? WHERE user_id IS NULL", (default_user_id,)),
                 ]
             },
+            
+            # Add token_counts column to messages table if it doesn't exist
+            {
+                'name': 'Add token_counts column to messages table',
+                'check': lambda: check_column_exists(conn, 'messages', 'token_counts'),
+                'execute': lambda: conn.execute("ALTER TABLE messages ADD COLUMN token_counts JSON")
+            },
+            
+            # Convert base64-encoded, zero-padded embeddings to the compact format
+            {
+                'name': 'Convert embeddings to the compact storage format',
+                'check': lambda: count_legacy_embeddings(conn) == 0,
+                'execute': lambda: compact_embeddings(conn)
+            },
         ]
         
         # Execute migrations
@@ -360,6 +440,20 @@ def migrate_database_inplace(db_path):
                     conn.execute("UPDATE messages SET user_id = ? WHERE user_id IS NULL", (default_user_id,)),
                 ]
             },
+            
+            # Add token_counts column to messages table if it doesn't exist
+            {
+                'name': 'Add token_counts column to messages table',
+                'check': lambda: check_column_exists(conn, 'messages', 'token_counts'),
+                'execute': lambda: conn.execute("ALTER TABLE messages ADD COLUMN token_counts JSON")
+            },
+            
+            # Convert base64-encoded, zero-padded embeddings to the compact format
+            {
+                'name': 'Convert embeddings to the compact storage format',
+                'check': lambda: count_legacy_embeddings(conn) == 0,
+                'execute': lambda: compact_embeddings(conn)
+            },
         ]
         
         # Execute migrations
@@ -414,6 +508,7 @@ def verify_migration(conn):
         ('resource_memory', 'user_id'),
         ('semantic_memory', 'user_id'),
         ('messages', 'user_id'),
+        ('messages', 'token_counts'),
     ]
     
     for table, column in required_columns:
@@ -441,6 +536,13 @@ def verify_migration(conn):
             # Table might not exist or have data
             print(f"⚠️  Could not verify {table}.user_id")
 
+    # Check that no embedding is left in the legacy base64 format
+    legacy_count = count_legacy_embeddings(conn)
+    if legacy_count == 0:
+        print("✓ embeddings use the compact storage format")
+    else:
+        print(f"⚠️  {legacy_count} embeddings still use the legacy base64 format")
+
 
 def main():
     # Default to migrating ~/.mirix/sqlite.db in-place
@@ -409,19 +409,49 @@ const ChatWindow = ({ settings, messages, setMessages, isScreenMonitoring }) =>
                   if (current) {
                     const currentState = { ...current };
                     
-                    if (data.message_type === 'internal_monologue') {
-                      // Handle thinking messages separately
-                      if (!currentState.thinkingSteps) {
-                        currentState.thinkingSteps = [];
+                    const thinkingSteps = [...(currentState.thinkingSteps || [])];
+                    const lastStep = thinkingSteps[thinkingSteps.length - 1];
+
+                    if (data.message_type === 'internal_monologue_delta') {
+                      // Tokens of the thinking step that is being generated
+                      if (lastStep && lastStep.streaming) {
+                        thinkingSteps[thinkingSteps.length - 1] = { ...lastStep, content: lastStep.content + data.content };
+                      } else {
+                        thinkingSteps.push({
+                          id: Date.now() + Math.random(),
+                          content: data.content,
+                          timestamp: new Date().toISOString(),
+                          streaming: true
+                        });
                       }
-                      currentState.thinkingSteps.push({
+                      currentState.thinkingSteps = thinkingSteps;
+                    } else if (data.message_type === 'internal_monologue') {
+                      // Handle thinking messages separately
+                      const step = {
                         id: Date.now() + Math.random(),
                         content: data.content,
                         timestamp: new Date().toISOString()
-                      });
+                      };
+                      if (lastStep && lastStep.streaming) {
+                        // The complete thinking step replaces its streamed tokens
+                        thinkingSteps[thinkingSteps.length - 1] = { ...step, id: lastStep.id };
+                      } else {
+                        thinkingSteps.push(step);
+                      }
+                      currentState.thinkingSteps = thinkingSteps;
                     } else if (data.message_type === 'response') {
                       // Handle response content
                       currentState.streamingContent = (currentState.streamingContent || '') + data.content;
+                    } else if (data.message_type === 'stream_reset') {
+                      // The reply is being retried: drop what the failed attempt streamed
+                      if (lastStep && lastStep.streaming) {
+                        thinkingSteps.pop();
+                      }
+                      currentState.thinkingSteps = thinkingSteps;
+                      const streamingContent = currentState.streamingContent || '';
+                      if (data.content && streamingContent.endsWith(data.content)) {
+                        currentState.streamingContent = streamingContent.slice(0, streamingContent.length - data.content.length);
+                      }
                     }
                     
                     updated.set(requestId, currentState);
@@ -1,6 +1,7 @@
 import re
 import os
 import copy
+import asyncio
 import json
 import time
 import pytz
@@ -12,6 +13,8 @@ import requests
 import numpy as np
 from datetime import datetime
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import List, Optional, Tuple, Union, Callable
 
 from mirix.constants import (
@@ -28,7 +31,9 @@ from mirix.constants import (
     CHAINING_FOR_MEMORY_UPDATE,
     MAX_EMBEDDING_DIM,
     MAX_RETRIEVAL_LIMIT_IN_SYSTEM,
-    MAX_CHAINING_STEPS
+    MEMORY_SEARCH_METHOD,
+    MAX_CHAINING_STEPS,
+    INNER_THOUGHTS_KWARG,
 )
 import logging
 from mirix import LLMConfig
@@ -38,9 +43,9 @@ from mirix.functions.functions import get_function_from_module
 from mirix.helpers import ToolRulesSolver
 from mirix.helpers.message_helpers import prepare_input_message_create
 from mirix.interface import AgentInterface
-from mirix.llm_api.helpers import calculate_summarizer_cutoff, get_token_counts_for_messages, is_context_overflow_error
+from mirix.llm_api.helpers import JSONStringFieldStream, calculate_summarizer_cutoff, get_token_counts_for_messages, is_context_overflow_error
 from mirix.llm_api.llm_api_tools import create
-from mirix.utils import num_tokens_from_functions, num_tokens_from_messages
+from mirix.utils import num_tokens_from_functions
 from mirix.memory import summarize_messages
 from mirix.orm import User
 from mirix.orm.enums import ToolType
@@ -68,6 +73,9 @@ from mirix.services.knowledge_vault_manager import KnowledgeVaultManager
 from mirix.services.procedural_memory_manager import ProceduralMemoryManager
 from mirix.services.resource_memory_manager import ResourceMemoryManager
 from mirix.services.semantic_memory_manager import SemanticMemoryManager
+from mirix.services.hybrid_search_manager import HybridSearchManager
+from mirix.services.memory_stats_manager import MemoryStatsManager
+from mirix.services.retrieval_cache_manager import ALL_MEMORY_TYPES, RetrievalCacheManager
 from mirix.services.step_manager import StepManager
 from mirix.services.user_manager import UserManager
 from mirix.services.tool_execution_sandbox import ToolExecutionSandbox
@@ -92,6 +100,14 @@ from mirix.utils import (
 from mirix.services.file_manager import FileManager
 
 
+class LLMReplyTruncatedError(ValueError):
+    """The LLM reply was cut short (finish reason "length"), e.g. by the maximum number of output tokens."""
+
+
+# Errors of an LLM request that `Agent._get_ai_reply(_async)` retries
+RETRYABLE_LLM_REPLY_ERRORS = (ValueError, KeyError, LLMError, AssertionError, requests.exceptions.HTTPError)
+
+
 class BaseAgent(ABC):
     """
     Abstract class for all agents.
@@ -170,6 +186,9 @@ class Agent(BaseAgent):
         self.procedural_memory_manager = ProceduralMemoryManager()
         self.resource_memory_manager = ResourceMemoryManager()
         self.semantic_memory_manager = SemanticMemoryManager()
+        self.memory_stats_manager = MemoryStatsManager()
+        self.hybrid_search_manager = HybridSearchManager()
+        self.retrieval_cache_manager = RetrievalCacheManager()
 
         # State needed for contine_chaining pausing
 
@@ -180,6 +199,17 @@ class Agent(BaseAgent):
         # When the summarizer is run, set this back to False (to reset)
         self.agent_alerted_about_memory_pressure = False
 
+        # Types of intermediate messages (e.g. "response") that were already streamed to the user
+        # while the last LLM reply was generated, so that they are not displayed again
+        self.streamed_message_types = set()
+        # "response" text streamed by the current attempt, discarded by the client if the attempt is retried
+        self.streamed_response = ""
+
+        # Version of the agent row and core memory (see AgentManager.get_agent_version) this instance is in
+        # sync with: set by SyncServer.load_agent, advanced by the agent's own writes (see `_write_own_state`)
+        # and None once someone else wrote in between, which stops the server from reusing the instance
+        self.synced_version = None
+
         # Load last function response from message history
         self.last_function_response = self.load_last_function_response()
 
@@ -211,7 +241,8 @@ class Agent(BaseAgent):
             modified (bool): whether the topic was updated
         """
         if self.agent_state.topic != topic:
-            self.agent_manager.update_topic(
+            self._write_own_state(
+                self.agent_manager.update_topic,
                 agent_id=self.agent_state.id,
                 topic=topic,
                 actor=self.user,
@@ -220,6 +251,23 @@ class Agent(BaseAgent):
             return True
         return False
 
+    def _write_own_state(self, write: Callable, **kwargs):
+        """
+        Run a write of the agent to its own row or core memory blocks and keep `synced_version` in step with it.
+
+        If the version in the DB no longer matches `synced_version` right before the write, someone else
+        updated the agent during the step: the instance is out of sync and must not be reused.
+        """
+        if self.synced_version is None:
+            return write(**kwargs)
+        version_before = self.agent_manager.get_agent_version(agent_id=self.agent_state.id, actor=self.user)
+        result = write(**kwargs)
+        if version_before == self.synced_version:
+            self.synced_version = self.agent_manager.get_agent_version(agent_id=self.agent_state.id, actor=self.user)
+        else:
+            self.synced_version = None
+        return result
+
     def update_memory_if_changed(self, new_memory: Memory) -> bool:
         """
         Update internal memory object and system prompt if there have been modifications.
@@ -238,7 +286,8 @@ class Agent(BaseAgent):
                     # update the block if it's changed
                     block_id = self.agent_state.memory.get_block(label).id
                     import ipdb; ipdb.set_trace()
-                    block = self.block_manager.update_block(
+                    block = self._write_own_state(
+                        self.block_manager.update_block,
                         block_id=block_id, block_update=BlockUpdate(value=updated_value), actor=self.user
                     )
 
@@ -348,8 +397,8 @@ class Agent(BaseAgent):
                 if function_name in ['send_message', 'send_intermediate_message']:
                     self.update_topic_if_changed(agent_state_copy.topic)
                 if function_name == 'send_intermediate_message':
-                    # send intermediate message to the user
-                    if display_intermediate_message:
+                    # send intermediate message to the user, unless it was streamed already
+                    if display_intermediate_message and "response" not in self.streamed_message_types:
                         display_intermediate_message("response", function_args['message'])
             
             elif target_mirix_tool.tool_type == ToolType.MIRIX_MEMORY_CORE:
@@ -400,24 +449,10 @@ class Agent(BaseAgent):
         return function_response
 
     @trace_method
-    def _get_ai_reply(
-        self,
-        message_sequence: List[Message],
-        function_call: Optional[str] = None,
-        first_message: bool = False,
-        stream: bool = False,  # TODO move to config?
-        empty_response_retry_limit: int = 3,
-        backoff_factor: float = 0.5,  # delay multiplier for exponential backoff
-        max_delay: float = 10.0,  # max delay between retries
-        step_count: Optional[int] = None,
-        last_function_failed: bool = False,
-        put_inner_thoughts_first: bool = True,
-        get_input_data_for_debugging: bool = False,
-        existing_file_uris: Optional[List[str]] = None,
-        second_try: bool = False,
-    ) -> ChatCompletionResponse:
-        """Get response from LLM API with robust retry mechanism."""
-        log_telemetry(self.logger, "_get_ai_reply start")
+    def _get_allowed_functions_and_forced_tool(
+        self, step_count: Optional[int] = None, last_function_failed: bool = False
+    ) -> Optional[Tuple[List[dict], Optional[str]]]:
+        """Get the tool schemas the LLM may call and the tool it must call, if any. Returns None if no tool is left to call."""
         allowed_tool_names = self.tool_rules_solver.get_allowed_tool_names(
             last_function_response=self.last_function_response
         )
@@ -452,17 +487,164 @@ class Agent(BaseAgent):
         elif step_count is not None and step_count > 0 and len(allowed_tool_names) == 1:
             force_tool_call = allowed_tool_names[0]
 
+        return allowed_functions, force_tool_call
+
+    def _get_reply_delta_handler(self, display_intermediate_message: Callable) -> Callable[..., None]:
+        """
+        Get the `on_delta` callback of a streamed LLM reply. It displays the assistant text and the inner
+        thoughts as "internal_monologue_delta" messages, and the `message` argument of `send_message` and
+        `send_intermediate_message` as "response" messages, while they are being generated.
+        """
+        argument_streams = {}
+
+        def on_delta(delta: str, tool_call_index: Optional[int] = None, tool_name: Optional[str] = None):
+            if tool_call_index is None:
+                display_intermediate_message("internal_monologue_delta", delta)
+                self.streamed_message_types.add("internal_monologue_delta")
+                return
+
+            if tool_call_index not in argument_streams:
+                argument_streams[tool_call_index] = [("internal_monologue_delta", JSONStringFieldStream(INNER_THOUGHTS_KWARG))]
+                if tool_name in ['send_message', 'send_intermediate_message']:
+                    argument_streams[tool_call_index].append(("response", JSONStringFieldStream("message")))
+
+            for message_type, field_stream in argument_streams[tool_call_index]:
+                text = field_stream.feed(delta)
+                if text:
+                    display_intermediate_message(message_type, text)
+                    self.streamed_message_types.add(message_type)
+                    if message_type == "response":
+                        self.streamed_response += text
+
+        return on_delta
+
+    def _reset_streamed_reply(self, display_intermediate_message: Optional[Callable]) -> None:
+        """
+        Before an LLM request is retried, send a "stream_reset" message so that the client discards what the
+        failed attempt streamed: its streaming thinking step, and the "response" text sent as the content.
+        """
+        if display_intermediate_message and self.streamed_message_types:
+            display_intermediate_message("stream_reset", self.streamed_response)
+        self.streamed_message_types = set()
+        self.streamed_response = ""
+
+    def _prepare_ai_reply(
+        self,
+        step_count: Optional[int],
+        last_function_failed: bool,
+        put_inner_thoughts_first: bool,
+        second_try: bool,
+        display_intermediate_message: Optional[Callable],
+    ) -> Optional[Tuple[List[dict], Optional[str], Optional[LLMClient]]]:
+        """Set up an LLM request shared by all its attempts: (allowed functions, forced tool, LLM client), or None if no tool is allowed."""
+        if second_try:
+            self._reset_streamed_reply(display_intermediate_message)
+        else:
+            self.streamed_message_types = set()
+            self.streamed_response = ""
+        allowed_functions_and_forced_tool = self._get_allowed_functions_and_forced_tool(step_count, last_function_failed)
+        if allowed_functions_and_forced_tool is None:
+            return None
+        allowed_functions, force_tool_call = allowed_functions_and_forced_tool
+
+        # New LLM client flow. The client is created once for all attempts; it reuses the
+        # process-wide provider connection pool and the cached provider credentials
+        llm_client = LLMClient.create(
+            llm_config=self.agent_state.llm_config,
+            put_inner_thoughts_first=put_inner_thoughts_first,
+        )
+        return allowed_functions, force_tool_call, llm_client
+
+    @staticmethod
+    def _validate_ai_reply(response: ChatCompletionResponse) -> None:
+        """Raise a retryable error if the LLM reply is empty, was cut short or has a bad finish reason."""
+        if len(response.choices) == 0 or response.choices[0] is None:
+            raise ValueError(f"API call returned an empty message: {response}")
+
+        for choice in response.choices:
+            if choice.message.content == '' and len(choice.message.tool_calls) == 0:
+                raise ValueError(f"API call returned an empty message: {response}")
+
+        if response.choices[0].finish_reason == "length":
+            raise LLMReplyTruncatedError("maximum context length exceeded or generated content is too long")
+        if response.choices[0].finish_reason not in ["stop", "function_call", "tool_calls"]:
+            raise ValueError(f"Bad finish reason from API: {response.choices[0].finish_reason}")
+
+    def _get_ai_reply_retry_delay(
+        self,
+        error: Exception,
+        attempt: int,
+        empty_response_retry_limit: int,
+        backoff_factor: float,
+        max_delay: float,
+        second_try: bool,
+    ) -> Optional[float]:
+        """
+        Retry policy of `_get_ai_reply` and `_get_ai_reply_async` for a failed attempt.
+
+        Returns the seconds to wait before the next attempt, or None when an LLMError exhausted the
+        retries and the request should be tried once more with the last message only. Raises the
+        final error otherwise: RuntimeError for a reply cut short, Exception for the other retryable
+        errors, and the error itself when it is not retryable.
+        """
+        if not isinstance(error, RETRYABLE_LLM_REPLY_ERRORS):
+            log_telemetry(self.logger, "_handle_ai_response finish generic Exception")
+            raise error
+
+        if attempt < empty_response_retry_limit:
+            delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
+            self.logger.warning(f"Attempt {attempt} failed: {error}. Retrying in {delay} seconds...")
+            return delay
+
+        self.logger.error(f"Retry limit reached. Final error: {error}")
+        log_telemetry(self.logger, f"_handle_ai_response finish {type(error).__name__}")
+        if isinstance(error, LLMError) and not second_try:
+            return None
+        if isinstance(error, LLMReplyTruncatedError):
+            raise RuntimeError(f"Retries exhausted and no valid response received. Final error: {error}")
+        raise Exception(f"Retries exhausted and no valid response received. Final error: {error}")
+
+    def _get_ai_reply(
+        self,
+        message_sequence: List[Message],
+        function_call: Optional[str] = None,
+        first_message: bool = False,
+        stream: bool = False,  # TODO move to config?
+        empty_response_retry_limit: int = 3,
+        backoff_factor: float = 0.5,  # delay multiplier for exponential backoff
+        max_delay: float = 10.0,  # max delay between retries
+        step_count: Optional[int] = None,
+        last_function_failed: bool = False,
+        put_inner_thoughts_first: bool = True,
+        get_input_data_for_debugging: bool = False,
+        existing_file_uris: Optional[List[str]] = None,
+        second_try: bool = False,
+        display_intermediate_message: Optional[Callable] = None,
+    ) -> ChatCompletionResponse:
+        """Get response from LLM API with robust retry mechanism."""
+        log_telemetry(self.logger, "_get_ai_reply start")
+        prepared = self._prepare_ai_reply(step_count, last_function_failed, put_inner_thoughts_first, second_try, display_intermediate_message)
+        if prepared is None:
+            return None
+        allowed_functions, force_tool_call, llm_client = prepared
+
         for attempt in range(1, empty_response_retry_limit + 1):
+            if attempt > 1:
+                self._reset_streamed_reply(display_intermediate_message)
             try:
                 log_telemetry(self.logger, "_get_ai_reply create start")
 
-                # New LLM client flow
-                llm_client = LLMClient.create(
-                    llm_config=self.agent_state.llm_config,
-                    put_inner_thoughts_first=put_inner_thoughts_first,
-                )
+                if llm_client and not stream and display_intermediate_message and not get_input_data_for_debugging:
+                    # Stream the reply so that the user sees it while it is being generated
+                    response = llm_client.send_llm_request_streaming(
+                        messages=message_sequence,
+                        tools=allowed_functions,
+                        force_tool_call=force_tool_call,
+                        existing_file_uris=existing_file_uris,
+                        on_delta=self._get_reply_delta_handler(display_intermediate_message),
+                    )
 
-                if llm_client and not stream:
+                elif llm_client and not stream:
                     response = llm_client.send_llm_request(
                         messages=message_sequence,
                         tools=allowed_functions,
@@ -493,90 +675,16 @@ class Agent(BaseAgent):
                     )
                 log_telemetry(self.logger, "_get_ai_reply create finish")
 
-                # These bottom two are retryable
-                if len(response.choices) == 0 or response.choices[0] is None:
-                    raise ValueError(f"API call returned an empty message: {response}")
-
-                for choice in response.choices:
-                    if choice.message.content == '' and len(choice.message.tool_calls) == 0:
-                        raise ValueError(f"API call returned an empty message: {response}")
-
-                if response.choices[0].finish_reason not in ["stop", "function_call", "tool_calls"]:
-                    if response.choices[0].finish_reason == "length":
-                        if attempt >= empty_response_retry_limit:
-                            raise RuntimeError("Retries exhausted and no valid response received. Final error: maximum context length exceeded or generated content is too long")
-                        else:
-                            delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                            self.logger.warning(f"Attempt {attempt} failed: {response.choices[0].finish_reason}. Retrying in {delay} seconds...")
-                            time.sleep(delay)
-                            continue
-                    else:
-                        raise ValueError(f"Bad finish reason from API: {response.choices[0].finish_reason}")
+                self._validate_ai_reply(response)
                 log_telemetry(self.logger, "_handle_ai_response finish")
 
-            except ValueError as ve:
-                if attempt >= empty_response_retry_limit:
-                    self.logger.error(f"Retry limit reached. Final error: {ve}")
-                    log_telemetry(self.logger, "_handle_ai_response finish ValueError")
-                    raise Exception(f"Retries exhausted and no valid response received. Final error: {ve}")
-                else:
-                    delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                    self.logger.warning(f"Attempt {attempt} failed: {ve}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue
-
-            except KeyError as ke:
-                # Gemini api sometimes can yield empty response
-                # This is a retryable error
-                if attempt >= empty_response_retry_limit:
-                    self.logger.error(f"Retry limit reached. Final error: {ke}")
-                    log_telemetry(self.logger, "_handle_ai_response finish KeyError")
-                    raise Exception(f"Retries exhausted and no valid response received. Final error: {ke}")
-                else:
-                    delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                    self.logger.warning(f"Attempt {attempt} failed: {ke}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue
-
-            except LLMError as llm_error:
-                if attempt >= empty_response_retry_limit:
-                    self.logger.error(f"Retry limit reached. Final error: {llm_error}")
-                    log_telemetry(self.logger, "_handle_ai_response finish LLMError")
-                    log_telemetry(self.logger, "_get_ai_reply_last_message_hacking start")
-                    if second_try:
-                        raise Exception(f"Retries exhausted and no valid response received. Final error: {llm_error}")
-                    return self._get_ai_reply([message_sequence[-1]], function_call, first_message, stream, empty_response_retry_limit, backoff_factor, max_delay, step_count, last_function_failed, put_inner_thoughts_first, get_input_data_for_debugging, second_try=True)
-                
-                else:
-                    delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                    self.logger.warning(f"Attempt {attempt} failed: {llm_error}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue
-            
-            except AssertionError as ae:
-                if attempt >= empty_response_retry_limit:
-                    self.logger.error(f"Retry limit reached. Final error: {ae}")
-                    raise Exception(f"Retries exhausted and no valid response received. Final error: {ae}")
-                else:
-                    delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                    self.logger.warning(f"Attempt {attempt} failed: {ae}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue
-
-            except requests.exceptions.HTTPError as he:
-                if attempt >= empty_response_retry_limit:
-                    self.logger.error(f"Retry limit reached. Final error: {he}")
-                    raise Exception(f"Retries exhausted and no valid response received. Final error: {he}")
-                else:
-                    delay = min(backoff_factor * (2 ** (attempt - 1)), max_delay)
-                    self.logger.warning(f"Attempt {attempt} failed: {he}. Retrying in {delay} seconds...")
-                    time.sleep(delay)
-
             except Exception as e:
-                log_telemetry(self.logger, "_handle_ai_response finish generic Exception")
-                # For non-retryable errors, exit immediately
-                log_telemetry(self.logger, "_handle_ai_response finish generic Exception")
-                raise e
+                delay = self._get_ai_reply_retry_delay(e, attempt, empty_response_retry_limit, backoff_factor, max_delay, second_try)
+                if delay is None:
+                    log_telemetry(self.logger, "_get_ai_reply_last_message_hacking start")
+                    return self._get_ai_reply([message_sequence[-1]], function_call, first_message, stream, empty_response_retry_limit, backoff_factor, max_delay, step_count, last_function_failed, put_inner_thoughts_first, get_input_data_for_debugging, second_try=True, display_intermediate_message=display_intermediate_message)
+                time.sleep(delay)
+                continue
 
             # check if we are going over the context window: this allows for articifial constraints
             if response.usage.total_tokens > self.agent_state.llm_config.context_window:
@@ -590,6 +698,97 @@ class Agent(BaseAgent):
         log_telemetry(self.logger, "_handle_ai_response finish catch-all exception")
         raise Exception("Retries exhausted and no valid response received.")
 
+    async def _get_ai_reply_async(
+        self,
+        message_sequence: List[Message],
+        function_call: Optional[str] = None,
+        first_message: bool = False,
+        stream: bool = False,
+        empty_response_retry_limit: int = 3,
+        backoff_factor: float = 0.5,  # delay multiplier for exponential backoff
+        max_delay: float = 10.0,  # max delay between retries
+        step_count: Optional[int] = None,
+        last_function_failed: bool = False,
+        put_inner_thoughts_first: bool = True,
+        get_input_data_for_debugging: bool = False,
+        existing_file_uris: Optional[List[str]] = None,
+        second_try: bool = False,
+        display_intermediate_message: Optional[Callable] = None,
+    ) -> ChatCompletionResponse:
+        """
+        Asynchronous version of `_get_ai_reply`, with the same validation and retries.
+
+        The request is awaited with the provider's async client. Token streaming and providers
+        without an LLM client go through the legacy `create` flow in a worker thread.
+        """
+        log_telemetry(self.logger, "_get_ai_reply_async start")
+        prepared = self._prepare_ai_reply(step_count, last_function_failed, put_inner_thoughts_first, second_try, display_intermediate_message)
+        if prepared is None:
+            return None
+        allowed_functions, force_tool_call, llm_client = prepared
+
+        for attempt in range(1, empty_response_retry_limit + 1):
+            if attempt > 1:
+                self._reset_streamed_reply(display_intermediate_message)
+            try:
+                if llm_client and not stream and display_intermediate_message and not get_input_data_for_debugging:
+                    response = await llm_client.send_llm_request_streaming_async(
+                        messages=message_sequence,
+                        tools=allowed_functions,
+                        force_tool_call=force_tool_call,
+                        existing_file_uris=existing_file_uris,
+                        on_delta=self._get_reply_delta_handler(display_intermediate_message),
+                    )
+
+                elif llm_client and not stream:
+                    response = await llm_client.send_llm_request_async(
+                        messages=message_sequence,
+                        tools=allowed_functions,
+                        force_tool_call=force_tool_call,
+                        get_input_data_for_debugging=get_input_data_for_debugging,
+                        existing_file_uris=existing_file_uris,
+                    )
+
+                    if get_input_data_for_debugging:
+                        return response
+
+                else:
+                    response = await asyncio.to_thread(
+                        create,
+                        llm_config=self.agent_state.llm_config,
+                        messages=message_sequence,
+                        user_id=self.agent_state.created_by_id,
+                        functions=allowed_functions,
+                        function_call=function_call,
+                        first_message=first_message,
+                        force_tool_call=force_tool_call,
+                        stream=stream,
+                        stream_interface=self.interface,
+                        put_inner_thoughts_first=put_inner_thoughts_first,
+                        name=self.agent_state.name,
+                    )
+
+                self._validate_ai_reply(response)
+
+            except Exception as e:
+                delay = self._get_ai_reply_retry_delay(e, attempt, empty_response_retry_limit, backoff_factor, max_delay, second_try)
+                if delay is None:
+                    return await self._get_ai_reply_async(
+                        [message_sequence[-1]], function_call, first_message, stream, empty_response_retry_limit, backoff_factor,
+                        max_delay, step_count, last_function_failed, put_inner_thoughts_first, get_input_data_for_debugging, second_try=True,
+                        display_intermediate_message=display_intermediate_message,
+                    )
+                await asyncio.sleep(delay)
+                continue
+
+            # check if we are going over the context window: this allows for articifial constraints
+            if response.usage.total_tokens > self.agent_state.llm_config.context_window:
+                await asyncio.to_thread(self.summarize_messages_inplace, existing_file_uris=existing_file_uris)
+
+            return response
+
+        raise Exception("Retries exhausted and no valid response received.")
+
     def _handle_ai_response(
         self,
         input_message: Message,
@@ -1032,16 +1231,13 @@ class Agent(BaseAgent):
 
         return messages, continue_chaining, function_failed
 
-    def step(
+    def _start_step(
         self,
         input_messages: Union[Message, List[Message]],
-        chaining: bool = True,
-        max_chaining_steps: Optional[int] = None,
         extra_messages: Optional[List[dict]] = None,
         user_id: Optional[str] = None,
-        **kwargs,
-    ) -> MirixUsageStatistics:
-        """Run Agent.step in a loop, handling chaining via contine_chaining requests and function failures"""
+    ) -> Tuple[List[Message], Optional[List[Message]], int]:
+        """Load the acting user and convert the input messages. Returns the messages, the extra messages and the number of in-context messages."""
 
         if user_id:
             self.user = self.user_manager.get_user_by_id(user_id)
@@ -1049,18 +1245,10 @@ class Agent(BaseAgent):
                 blocks=[self.block_manager.get_block_by_id(block.id, actor=self.user) for block in self.block_manager.get_blocks(actor=self.user)]
             )
 
-        max_chaining_steps = max_chaining_steps or MAX_CHAINING_STEPS
-
-        first_input_message = input_messages[0]
-
         # Convert MessageCreate objects to Message objects
         message_objects = [prepare_input_message_create(m, self.agent_state.id, wrap_user_message=False, wrap_system_message=True) for m in input_messages]
-        
+
         extra_message_objects = [prepare_input_message_create(m, self.agent_state.id, wrap_user_message=False, wrap_system_message=True) for m in extra_messages] if extra_messages is not None else None
-        next_input_message = message_objects
-        counter = 0
-        total_usage = UsageStatistics()
-        step_count = 0
 
         initial_message_count = len(self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user))
 
@@ -1070,25 +1258,123 @@ class Agent(BaseAgent):
             in_context_messages = in_context_messages[:1]
             self.agent_manager.set_in_context_messages(agent_id=self.agent_state.id, message_ids=[message.id for message in in_context_messages], actor=self.user)
 
+        return message_objects, extra_message_objects, initial_message_count
+
+    def _extract_step_topics(self, messages: List[Message]) -> Optional[str]:
+        """Extract the topics of the first messages of a step, used to search the memories for the system prompt."""
+        # When the agent first gets the screenshots, we need to extract the topic to search the query.
+        try:
+            topics = self._extract_topics_from_messages(messages)
+
+            if topics is not None:
+                self.update_topic_if_changed(topics)
+            else:
+                self.logger.warning("No topics extracted from screenshots")
+            return topics
+
+        except Exception as e:
+            self.logger.info(f"Error in extracting the topic from the screenshots: {e}")
+            return None
+
+    def _get_chained_message(
+        self,
+        step_response: AgentStepResponse,
+        chaining: bool,
+        counter: int,
+        max_chaining_steps: Optional[int],
+    ) -> Optional[Message]:
+        """Get the message that continues the chain after a step, or None when the chain stops."""
+
+        continue_chaining = step_response.continue_chaining
+        function_failed = step_response.function_failed
+        token_warning = step_response.in_context_memory_warning
+
+        # Chain stops
+        if not chaining and (not function_failed):
+            self.logger.info("No chaining, stopping after one step")
+            return None
+        elif max_chaining_steps is not None and counter == max_chaining_steps:
+            # Add warning message based on agent type
+            if self.agent_state.name == "chat_agent":
+                warning_content = "[System Message] You have reached the maximum chaining steps. Please call 'send_message' to send your response to the user."
+            else:
+                warning_content = "[System Message] You have reached the maximum chaining steps. Please call 'finish_memory_update' to end the chaining."
+            # give agent one more chance to respond
+            return Message.dict_to_message(
+                agent_id=self.agent_state.id,
+                model=self.model,
+                openai_message_dict={
+                    "role": "user",
+                    "content": warning_content,
+                },
+            )
+        elif max_chaining_steps is not None and counter > max_chaining_steps:
+            self.logger.info(f"Hit max chaining steps, stopping after {counter} steps")
+            return None
+        # Chain handlers
+        elif token_warning and summarizer_settings.send_memory_warning_message:
+            assert self.agent_state.created_by_id is not None
+            return Message.dict_to_message(
+                agent_id=self.agent_state.id,
+                model=self.model,
+                openai_message_dict={
+                    "role": "user",  # TODO: change to system?
+                    "content": get_token_limit_warning(),
+                },
+            )
+        elif function_failed:
+            assert self.agent_state.created_by_id is not None
+            return Message.dict_to_message(
+                agent_id=self.agent_state.id,
+                model=self.model,
+                openai_message_dict={
+                    "role": "user",  # TODO: change to system?
+                    "content": get_contine_chaining(FUNC_FAILED_HEARTBEAT_MESSAGE),
+                },
+            )
+        elif continue_chaining:
+            assert self.agent_state.created_by_id is not None
+            return Message.dict_to_message(
+                agent_id=self.agent_state.id,
+                model=self.model,
+                openai_message_dict={
+                    "role": "user",  # TODO: change to system?
+                    "content": get_contine_chaining(REQ_HEARTBEAT_MESSAGE),
+                },
+            )
+        # Mirix no-op / yield
+        else:
+            return None
+
+    def step(
+        self,
+        input_messages: Union[Message, List[Message]],
+        chaining: bool = True,
+        max_chaining_steps: Optional[int] = None,
+        extra_messages: Optional[List[dict]] = None,
+        user_id: Optional[str] = None,
+        **kwargs,
+    ) -> MirixUsageStatistics:
+        """Run Agent.step in a loop, handling chaining via contine_chaining requests and function failures"""
+
+        max_chaining_steps = max_chaining_steps or MAX_CHAINING_STEPS
+
+        first_input_message = input_messages[0]
+
+        next_input_message, extra_message_objects, initial_message_count = self._start_step(input_messages, extra_messages, user_id)
+        counter = 0
+        total_usage = UsageStatistics()
+        step_count = 0
+
         while True:
 
             kwargs["first_message"] = False
             kwargs["step_count"] = step_count
 
             if self.agent_state.name in ['meta_memory_agent', 'chat_agent'] and step_count == 0:
-                # When the agent first gets the screenshots, we need to extract the topic to search the query.
-                try:
-                    topics = self._extract_topics_from_messages(next_input_message)
-                    
-                    if topics is not None:
-                        kwargs['topics'] = topics
-                        self.update_topic_if_changed(topics)
-                    else:
-                        self.logger.warning("No topics extracted from screenshots")
-
-                except Exception as e:
-                    self.logger.info(f"Error in extracting the topic from the screenshots: {e}")
-                    pass
+                topics = self._extract_step_topics(next_input_message)
+                if topics is not None:
+                    kwargs['topics'] = topics
 
             step_response = self.inner_step(
                 first_input_messge=first_input_message,
@@ -1099,80 +1385,76 @@ class Agent(BaseAgent):
                 **kwargs,
             )
 
-            continue_chaining = step_response.continue_chaining
-            function_failed = step_response.function_failed
-            token_warning = step_response.in_context_memory_warning
-            usage = step_response.usage
-
             step_count += 1
-            total_usage += usage
+            total_usage += step_response.usage
             counter += 1
             self.interface.step_complete()
 
-            # logger.debug("Saving agent state")
-            # save updated state
-            save_agent(self)
-
-            # Chain stops
-            if not chaining and (not function_failed):
-                self.logger.info("No chaining, stopping after one step")
-                break
-            elif max_chaining_steps is not None and counter == max_chaining_steps:
-                # Add warning message based on agent type
-                if self.agent_state.name == "chat_agent":
-                    warning_content = "[System Message] You have reached the maximum chaining steps. Please call 'send_message' to send your response to the user."
-                else:
-                    warning_content = "[System Message] You have reached the maximum chaining steps. Please call 'finish_memory_update' to end the chaining."
-                next_input_message = Message.dict_to_message(
-                    agent_id=self.agent_state.id,
-                    model=self.model,
-                    openai_message_dict={
-                        "role": "user",
-                        "content": warning_content,
-                    },
-                )
-                continue  # give agent one more chance to respond
-            elif max_chaining_steps is not None and counter > max_chaining_steps:
-                self.logger.info(f"Hit max chaining steps, stopping after {counter} steps")
+            next_input_message = self._get_chained_message(step_response, chaining, counter, max_chaining_steps)
+            if next_input_message is None:
                 break
-            # Chain handlers
-            elif token_warning and summarizer_settings.send_memory_warning_message:
-                assert self.agent_state.created_by_id is not None
-                next_input_message = Message.dict_to_message(
-                    agent_id=self.agent_state.id,
-                    model=self.model,
-                    openai_message_dict={
-                        "role": "user",  # TODO: change to system?
-                        "content": get_token_limit_warning(),
-                    },
-                )
-                continue  # always chain
-            elif function_failed:
-                assert self.agent_state.created_by_id is not None
-                next_input_message = Message.dict_to_message(
-                    agent_id=self.agent_state.id,
-                    model=self.model,
-                    openai_message_dict={
-                        "role": "user",  # TODO: change to system?
-                        "content": get_contine_chaining(FUNC_FAILED_HEARTBEAT_MESSAGE),
-                    },
-                )
-                continue  # always chain
-            elif continue_chaining:
-                assert self.agent_state.created_by_id is not None
-                next_input_message = Message.dict_to_message(
-                    agent_id=self.agent_state.id,
-                    model=self.model,
-                    openai_message_dict={
-                        "role": "user",  # TODO: change to system?
-                        "content": get_contine_chaining(REQ_HEARTBEAT_MESSAGE),
-                    },
-                )
-                continue  # always chain
-            # Mirix no-op / yield
-            else:
+
+        # save updated state, once for the whole chain
+        save_agent(self)
+
+        return MirixUsageStatistics(**total_usage.model_dump(), step_count=step_count)
+
+    async def step_async(
+        self,
+        input_messages: Union[Message, List[Message]],
+        chaining: bool = True,
+        max_chaining_steps: Optional[int] = None,
+        extra_messages: Optional[List[dict]] = None,
+        user_id: Optional[str] = None,
+        **kwargs,
+    ) -> MirixUsageStatistics:
+        """
+        Asynchronous version of `step`. LLM calls are awaited instead of holding a thread, so one
+        event loop can run many agent steps concurrently.
+        """
+
+        max_chaining_steps = max_chaining_steps or MAX_CHAINING_STEPS
+
+        first_input_message = input_messages[0]
+
+        next_input_message, extra_message_objects, initial_message_count = await asyncio.to_thread(
+            self._start_step, input_messages, extra_messages, user_id
+        )
+        counter = 0
+        total_usage = UsageStatistics()
+        step_count = 0
+
+        while True:
+
+            kwargs["first_message"] = False
+            kwargs["step_count"] = step_count
+
+            if self.agent_state.name in ['meta_memory_agent', 'chat_agent'] and step_count == 0:
+                topics = await asyncio.to_thread(self._extract_step_topics, next_input_message)
+                if topics is not None:
+                    kwargs['topics'] = topics
+
+            step_response = await self.inner_step_async(
+                first_input_messge=first_input_message,
+                messages=next_input_message,
+                extra_messages=extra_message_objects,
+                initial_message_count=initial_message_count,
+                chaining=chaining,
+                **kwargs,
+            )
+
+            step_count += 1
+            total_usage += step_response.usage
+            counter += 1
+            self.interface.step_complete()
+
+            next_input_message = self._get_chained_message(step_response, chaining, counter, max_chaining_steps)
+            if next_input_message is None:
                 break
 
+        # save updated state, once for the whole chain
+        await asyncio.to_thread(save_agent, self)
+
         return MirixUsageStatistics(**total_usage.model_dump(), step_count=step_count)
 
     def build_system_prompt_with_memories(self, raw_system: str, topics: Optional[str] = None, retrieved_memories: Optional[dict] = None) -> Tuple[str, dict]:
@@ -1199,7 +1481,7 @@ class Agent(BaseAgent):
         else:
             retrieved_memories["key_words"] = key_words
 
-        search_method = 'bm25'
+        search_method = MEMORY_SEARCH_METHOD
 
         # Prepare embedding for semantic search
         if key_words != '' and search_method == 'embedding':
@@ -1209,33 +1491,69 @@ class Agent(BaseAgent):
         else:
             embedded_text = None
 
+        agent_name = self.agent_state.name
+        retrieve_core = agent_name == 'core_memory_agent' or "core" not in retrieved_memories
+        retrieve_knowledge_vault = agent_name == 'knowledge_vault' or 'knowledge_vault' not in retrieved_memories
+        retrieve_episodic = agent_name == 'episodic_memory_agent' or 'episodic' not in retrieved_memories
+        retrieve_resource = agent_name == 'resource_memory_agent' or 'resource' not in retrieved_memories
+        retrieve_procedural = agent_name == 'procedural_memory_agent' or 'procedural' not in retrieved_memories
+        retrieve_semantic = agent_name == 'semantic_memory_agent' or 'semantic' not in retrieved_memories
+
+        # Issue every search (each in its own session) and the item counts concurrently, so that
+        # retrieval takes about as long as the slowest query instead of the sum of all of them.
+        # Within an absorption cycle, the memory agents share results through the retrieval cache.
+        def retrieve(memory_type, params, fetch, **kwargs):
+            params = (params, timezone_str, self.agent_state.embedding_config.embedding_model)
+            if kwargs.get('search_method') == 'hybrid':
+                # BM25 and embedding search run concurrently and are fused with reciprocal rank fusion
+                kwargs['list_fn'] = fetch
+                fetch = self.hybrid_search_manager.search
+            return pool.submit(self.retrieval_cache_manager.get_or_fetch, self.user.id, memory_type, params, partial(fetch, **kwargs))
+
+        futures = {}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            if retrieve_core:
+                futures['core'] = retrieve('core', ('blocks',), self.block_manager.get_blocks, actor=self.user)
+            if retrieve_knowledge_vault:
+                if agent_name == 'knowledge_vault' or agent_name == 'reflexion_agent':
+                    futures['knowledge_vault'] = retrieve('knowledge_vault', (key_words, 'caption', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM, None), self.knowledge_vault_manager.list_knowledge, agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+                else:
+                    futures['knowledge_vault'] = retrieve('knowledge_vault', (key_words, 'caption', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM, ('low', 'medium')), self.knowledge_vault_manager.list_knowledge, agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str, sensitivity=['low', 'medium'])
+            if retrieve_episodic:
+                futures['recent_episodic'] = retrieve('episodic', ('', '', 'recent', MAX_RETRIEVAL_LIMIT_IN_SYSTEM), self.episodic_memory_manager.list_episodic_memory, agent_state=self.agent_state, actor=self.user, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+                futures['relevant_episodic'] = retrieve('episodic', (key_words, 'details', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM), self.episodic_memory_manager.list_episodic_memory, agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='details', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+            if retrieve_resource:
+                futures['resource'] = retrieve('resource', (key_words, 'summary', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM), self.resource_memory_manager.list_resources, agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field='summary', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+            if retrieve_procedural:
+                futures['procedural'] = retrieve('procedural', (key_words, 'summary', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM), self.procedural_memory_manager.list_procedures, agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field="summary", search_method=search_method,limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+            if retrieve_semantic:
+                futures['semantic'] = retrieve('semantic', (key_words, 'details', search_method, MAX_RETRIEVAL_LIMIT_IN_SYSTEM), self.semantic_memory_manager.list_semantic_items, agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field="details", search_method=search_method,limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+            if retrieve_knowledge_vault or retrieve_episodic or retrieve_resource or retrieve_procedural or retrieve_semantic:
+                futures['total_number_of_items'] = retrieve(ALL_MEMORY_TYPES, ('counts',), self.memory_stats_manager.get_total_number_of_items, actor=self.user)
+        fetched = {name: future.result() for name, future in futures.items()}
+
         # Retrieve core memory
-        if self.agent_state.name == 'core_memory_agent' or "core" not in retrieved_memories:
-            current_persisted_memory = Memory(
-                blocks=[self.block_manager.get_block_by_id(block.id, actor=self.user) for block in self.block_manager.get_blocks(actor=self.user)]
-            )
+        if retrieve_core:
+            current_persisted_memory = Memory(blocks=fetched['core'])
             core_memory = current_persisted_memory.compile()
             retrieved_memories['core'] = core_memory
 
-        if self.agent_state.name == 'knowledge_vault' or 'knowledge_vault' not in retrieved_memories:
-            if self.agent_state.name == 'knowledge_vault' or self.agent_state.name == 'reflexion_agent':
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
-            else:
-                current_knowledge_vault = self.knowledge_vault_manager.list_knowledge(agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='caption', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str, sensitivity=['low', 'medium'])
+        if retrieve_knowledge_vault:
+            current_knowledge_vault = fetched['knowledge_vault']
             
             knowledge_vault_memory = ''
             if len(current_knowledge_vault) > 0:
                 for idx, knowledge_vault_item in enumerate(current_knowledge_vault):
                     knowledge_vault_memory += f"[{idx}] Knowledge Vault Item ID: {knowledge_vault_item.id}; Caption: {knowledge_vault_item.caption}\n"
             retrieved_memories['knowledge_vault'] = {
-                'total_number_of_items': self.knowledge_vault_manager.get_total_number_of_items(actor=self.user),
+                'total_number_of_items': fetched['total_number_of_items']['knowledge_vault'],
                 'current_count': len(current_knowledge_vault),
                 'text': knowledge_vault_memory
             }
 
         # Retrieve episodic memory
-        if self.agent_state.name == 'episodic_memory_agent' or 'episodic' not in retrieved_memories:
-            current_episodic_memory = self.episodic_memory_manager.list_episodic_memory(agent_state=self.agent_state, actor=self.user, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        if retrieve_episodic:
+            current_episodic_memory = fetched['recent_episodic']
             episodic_memory = ''
             if len(current_episodic_memory) > 0:
                 for idx, event in enumerate(current_episodic_memory):
@@ -1247,7 +1565,7 @@ class Agent(BaseAgent):
                         
             recent_episodic_memory = episodic_memory.strip()
         
-            most_relevant_episodic_memory = self.episodic_memory_manager.list_episodic_memory(agent_state=self.agent_state, actor=self.user, embedded_text=embedded_text, query=key_words, search_field='details', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+            most_relevant_episodic_memory = fetched['relevant_episodic']
             most_relevant_episodic_memory_str = ''
             if len(most_relevant_episodic_memory) > 0:
                 for idx, event in enumerate(most_relevant_episodic_memory):
@@ -1258,7 +1576,7 @@ class Agent(BaseAgent):
                         most_relevant_episodic_memory_str += f"[{idx}] Timestamp: {event.occurred_at.strftime('%Y-%m-%d %H:%M:%S')} - {event.summary}{tree_path_str}  (Details: {len(event.details)} Characters)\n"
             relevant_episodic_memory = most_relevant_episodic_memory_str.strip()
             retrieved_memories['episodic'] = {
-                'total_number_of_items': self.episodic_memory_manager.get_total_number_of_items(actor=self.user),
+                'total_number_of_items': fetched['total_number_of_items']['episodic'],
                 'recent_count': len(current_episodic_memory),
                 'relevant_count': len(most_relevant_episodic_memory),
                 'recent_episodic_memory': recent_episodic_memory,
@@ -1266,8 +1584,8 @@ class Agent(BaseAgent):
             }
 
         # Retrieve resource memory
-        if self.agent_state.name == 'resource_memory_agent' or 'resource' not in retrieved_memories:
-            current_resource_memory = self.resource_memory_manager.list_resources(agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field='summary', search_method=search_method, limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        if retrieve_resource:
+            current_resource_memory = fetched['resource']
             resource_memory = ''
             if len(current_resource_memory) > 0:
                 for idx, resource in enumerate(current_resource_memory):
@@ -1278,14 +1596,14 @@ class Agent(BaseAgent):
                         resource_memory += f"[{idx}] Resource Title: {resource.title}; Resource Summary: {resource.summary} Resource Type: {resource.resource_type}{tree_path_str}\n"
             resource_memory = resource_memory.strip()
             retrieved_memories['resource'] = {
-                'total_number_of_items': self.resource_memory_manager.get_total_number_of_items(actor=self.user),
+                'total_number_of_items': fetched['total_number_of_items']['resource'],
                 'current_count': len(current_resource_memory),
                 'text': resource_memory
             }
 
         # Retrieve procedural memory
-        if self.agent_state.name == 'procedural_memory_agent' or 'procedural' not in retrieved_memories:
-            current_procedural_memory = self.procedural_memory_manager.list_procedures(agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field="summary", search_method=search_method,limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        if retrieve_procedural:
+            current_procedural_memory = fetched['procedural']
             procedural_memory = ''
             if len(current_procedural_memory) > 0:
                 for idx, procedure in enumerate(current_procedural_memory):
@@ -1296,14 +1614,14 @@ class Agent(BaseAgent):
                         procedural_memory += f"[{idx}] Entry Type: {procedure.entry_type}; Summary: {procedure.summary}{tree_path_str}\n"
             procedural_memory = procedural_memory.strip()
             retrieved_memories['procedural'] = {
-                'total_number_of_items': self.procedural_memory_manager.get_total_number_of_items(actor=self.user),
+                'total_number_of_items': fetched['total_number_of_items']['procedural'],
                 'current_count': len(current_procedural_memory),
                 'text': procedural_memory
             }
         
         # Retrieve semantic memory
-        if self.agent_state.name == 'semantic_memory_agent' or 'semantic' not in retrieved_memories:
-            current_semantic_memory = self.semantic_memory_manager.list_semantic_items(agent_state=self.agent_state, actor=self.user, query=key_words, embedded_text=embedded_text, search_field="details", search_method=search_method,limit=MAX_RETRIEVAL_LIMIT_IN_SYSTEM, timezone_str=timezone_str)
+        if retrieve_semantic:
+            current_semantic_memory = fetched['semantic']
             semantic_memory = ''
             if len(current_semantic_memory) > 0:
                 for idx, semantic_memory_item in enumerate(current_semantic_memory):
@@ -1315,7 +1633,7 @@ class Agent(BaseAgent):
                         
             semantic_memory = semantic_memory.strip()
             retrieved_memories['semantic'] = {
-                'total_number_of_items': self.semantic_memory_manager.get_total_number_of_items(actor=self.user),
+                'total_number_of_items': fetched['total_number_of_items']['semantic'],
                 'current_count': len(current_semantic_memory),
                 'text': semantic_memory
             }
@@ -1565,6 +1883,218 @@ These keywords have been used to retrieve relevant memories from the database.
         
         return complete_system_prompt
 
+    def _prepare_step_input(
+        self,
+        messages: Union[Message, List[Message]],
+        step_count: Optional[int] = None,
+        chaining: bool = True,
+        topics: Optional[str] = None,
+        retrieved_memories: Optional[dict] = None,
+        extra_messages: Optional[List[dict]] = None,
+        initial_message_count: Optional[int] = None,
+    ) -> Tuple[List[Message], List[Message], dict]:
+        """Build the message sequence sent to the LLM in a step. Returns the new messages, the sequence and the retrieved memories."""
+        # Log the start of each reasoning step
+        self.logger.info(f"Starting agent step - step_count: {step_count}, chaining: {chaining}")
+        if topics:
+            self.logger.info(f"Step topics: {topics}")
+
+        # Step 0: get in-context messages and get the raw system prompt
+        in_context_messages = self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user)
+
+        assert in_context_messages[0].role == MessageRole.system
+        raw_system = in_context_messages[0].content[0].text
+
+        # Build the complete system prompt with memories
+        complete_system_prompt, retrieved_memories = self.build_system_prompt_with_memories(
+            raw_system=raw_system,
+            topics=topics,
+            retrieved_memories=retrieved_memories
+        )
+
+        in_context_messages[0].content[0].text = complete_system_prompt
+
+        # Step 1: add user message
+        if isinstance(messages, Message):
+            messages = [messages]
+
+        if not all(isinstance(m, Message) for m in messages):
+            raise ValueError(f"messages should be a Message or a list of Message, got {type(messages)}")
+
+        input_message_sequence = in_context_messages + messages
+
+        if extra_messages is not None:
+            input_message_sequence = input_message_sequence[:initial_message_count] + extra_messages + input_message_sequence[initial_message_count:]
+
+        if len(input_message_sequence) > 1 and input_message_sequence[-1].role != "user":
+            self.logger.warning(f"{CLI_WARNING_PREFIX}Attempting to run ChatCompletion without user as the last message in the queue")
+
+        return messages, input_message_sequence, retrieved_memories
+
+    def _handle_step_response(
+        self,
+        response: ChatCompletionResponse,
+        first_input_messge: Message,
+        messages: List[Message],
+        stream: bool = False,
+        force_response: bool = False,
+        retrieved_memories: Optional[dict] = None,
+        display_intermediate_message: any = None,
+        request_user_confirmation: Optional[Callable] = None,
+        existing_file_uris: Optional[List[str]] = None,
+        return_memory_types_without_update: bool = False,
+        message_queue: Optional[any] = None,
+        chaining: bool = True,
+    ) -> AgentStepResponse:
+        """Run the tool calls of an LLM response and persist the messages of the step."""
+        # Log the raw AI response for debugging and analysis
+        self.logger.info(f"AI response received - choices: {len(response.choices)}")
+        for i, choice in enumerate(response.choices):
+            if choice.message.content:
+                self.logger.info(f"Choice {i} reasoning content: {choice.message.content}")
+            if choice.message.tool_calls:
+                self.logger.info(f"Choice {i} has {len(choice.message.tool_calls)} tool calls")
+                for j, tool_call in enumerate(choice.message.tool_calls):
+                    self.logger.info(f"Tool call {j}: {tool_call.function.name} with args: {tool_call.function.arguments}")
+
+        # Step 3: check if LLM wanted to call a function
+        # (if yes) Step 4: call the function
+        # (if yes) Step 5: send the info on the function call and function response to LLM
+        all_response_messages = []
+        for response_choice in response.choices:
+            response_message = response_choice.message
+            tmp_response_messages, continue_chaining, function_failed = self._handle_ai_response(
+                first_input_messge, # give the last message to the function so that other agents can see this message through funciton_calls
+                response_message,
+                existing_file_uris=existing_file_uris,
+                # TODO this is kind of hacky, find a better way to handle this
+                # the only time we set up message creation ahead of time is when streaming is on
+                response_message_id=response.id if stream else None,
+                force_response=force_response,
+                retrieved_memories=retrieved_memories,
+                display_intermediate_message=display_intermediate_message,
+                request_user_confirmation=request_user_confirmation,
+                return_memory_types_without_update=return_memory_types_without_update,
+                message_queue=message_queue,
+                chaining=chaining
+            )
+            all_response_messages.extend(tmp_response_messages)
+
+        if function_failed:
+            self.logger.info(f"Function failed with error: {all_response_messages[-1].content[0].text if all_response_messages else 'Unknown error'}")
+
+        # if function_failed:
+
+        #     inputs = self._get_ai_reply(
+        #         message_sequence=input_message_sequence,
+        #         first_message=first_message,
+        #         stream=stream,
+        #         step_count=step_count,
+        #         # extra_messages=extra_messages,
+        #         get_input_data_for_debugging=True
+        #     )
+
+        #     try:
+        #         error = json.loads(all_response_messages[-1].content[0].text)
+        #     except:
+        #         error = 'Not Known'
+
+        #     response_json = response.model_dump()
+        #     response_json.pop('created', None)
+        #     results_to_log = {
+        #         'input': inputs,
+        #         'output': response_json,
+        #         'error': error
+        #     }
+
+        #     if not os.path.exists("debug"):
+        #         os.makedirs("debug")
+        #     count = 0
+        #     while os.path.exists(f"debug/debug_{count}.json"):
+        #         count += 1
+        #     with open(f"debug/debug_{count}.json", "w") as f:
+        #         json.dump(results_to_log, f, indent=2)
+            
+        # Step 6: extend the message history
+        if len(messages) > 0:
+            all_new_messages = messages + all_response_messages
+        else:
+            all_new_messages = all_response_messages
+
+        # Check the memory pressure and potentially issue a memory pressure warning
+        current_total_tokens = response.usage.total_tokens
+        active_memory_warning = False
+
+        # We can't do summarize logic properly if context_window is undefined
+        if self.agent_state.llm_config.context_window is None:
+            # Fallback if for some reason context_window is missing, just set to the default
+            self.logger.warning(f"Could not find context_window in config, setting to default {LLM_MAX_TOKENS['DEFAULT']}")
+            self.logger.debug(f"Agent state: {self.agent_state}")
+            self.agent_state.llm_config.context_window = (
+                LLM_MAX_TOKENS[self.model] if (self.model is not None and self.model in LLM_MAX_TOKENS) else LLM_MAX_TOKENS["DEFAULT"]
+            )
+
+        if current_total_tokens > summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window):
+            self.logger.info(
+                f"Memory pressure detected: last response total_tokens ({current_total_tokens}) > {summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window)}"
+            )
+
+            # Only deliver the alert if we haven't already (this period)
+            if not self.agent_alerted_about_memory_pressure:
+                active_memory_warning = True
+                self.agent_alerted_about_memory_pressure = True  # it's up to the outer loop to handle this
+
+            # if it is too long then run summarization here.
+            self.summarize_messages_inplace(existing_file_uris=existing_file_uris)
+
+        else:
+            self.logger.debug(
+                f"Memory usage acceptable: last response total_tokens ({current_total_tokens}) < {summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window)}"
+            )
+
+        # Log step - this must happen before messages are persisted
+        step = self.step_manager.log_step(
+            actor=self.user,
+            provider_name=self.agent_state.llm_config.model_endpoint_type,
+            model=self.agent_state.llm_config.model,
+            context_window_limit=self.agent_state.llm_config.context_window,
+            usage=response.usage,
+        )
+        for message in all_new_messages:
+            message.step_id = step.id
+
+        # Persisting into Messages
+        self.agent_state = self.agent_manager.append_to_in_context_messages(
+            all_new_messages, agent_id=self.agent_state.id, actor=self.user
+        )
+
+        # Log step completion and results
+        self.logger.info(f"Agent step completed - continue_chaining: {continue_chaining}, function_failed: {function_failed}, messages_generated: {len(all_new_messages)}")
+
+        return AgentStepResponse(
+            messages=all_new_messages,
+            continue_chaining=continue_chaining,
+            function_failed=function_failed,
+            in_context_memory_warning=active_memory_warning,
+            usage=response.usage,
+        )
+
+    def _context_window_exceeded_error(self, summarize_attempt_count: int) -> ContextWindowExceededError:
+        in_context_messages = self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user)
+        err_msg = f"Ran summarizer {summarize_attempt_count - 1} times for agent id={self.agent_state.id}, but messages are still overflowing the context window."
+        token_counts = (get_token_counts_for_messages(in_context_messages),)
+        self.logger.error(err_msg)
+        self.logger.error(f"num_in_context_messages: {len(in_context_messages)}")
+        self.logger.error(f"token_counts: {token_counts}")
+        return ContextWindowExceededError(
+            err_msg,
+            details={
+                "num_in_context_messages": len(in_context_messages),
+                "in_context_messages_text": [m.text for m in in_context_messages],
+                "token_counts": token_counts,
+            },
+        )
+
     def inner_step(
         self,
         first_input_messge: Message,
@@ -1593,41 +2123,16 @@ These keywords have been used to retrieve relevant memories from the database.
         """Runs a single step in the agent loop (generates at most one LLM call)"""
 
         try:
-            # Log the start of each reasoning step
-            self.logger.info(f"Starting agent step - step_count: {step_count}, chaining: {chaining}")
-            if topics:
-                self.logger.info(f"Step topics: {topics}")
-
-            # Step 0: get in-context messages and get the raw system prompt
-            in_context_messages = self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user)
-
-            assert in_context_messages[0].role == MessageRole.system
-            raw_system = in_context_messages[0].content[0].text
-
-            # Build the complete system prompt with memories
-            complete_system_prompt, retrieved_memories = self.build_system_prompt_with_memories(
-                raw_system=raw_system,
+            messages, input_message_sequence, retrieved_memories = self._prepare_step_input(
+                messages,
+                step_count=step_count,
+                chaining=chaining,
                 topics=topics,
-                retrieved_memories=retrieved_memories
+                retrieved_memories=retrieved_memories,
+                extra_messages=extra_messages,
+                initial_message_count=initial_message_count,
             )
 
-            in_context_messages[0].content[0].text = complete_system_prompt
-
-            # Step 1: add user message
-            if isinstance(messages, Message):
-                messages = [messages]
-
-            if not all(isinstance(m, Message) for m in messages):
-                raise ValueError(f"messages should be a Message or a list of Message, got {type(messages)}")
-
-            input_message_sequence = in_context_messages + messages
-
-            if extra_messages is not None:
-                input_message_sequence = input_message_sequence[:initial_message_count] + extra_messages + input_message_sequence[initial_message_count:]
-
-            if len(input_message_sequence) > 1 and input_message_sequence[-1].role != "user":
-                self.logger.warning(f"{CLI_WARNING_PREFIX}Attempting to run ChatCompletion without user as the last message in the queue")
-
             # Step 2: send the conversation and available functions to the LLM
             response = self._get_ai_reply(
                 message_sequence=input_message_sequence,
@@ -1636,138 +2141,133 @@ These keywords have been used to retrieve relevant memories from the database.
                 step_count=step_count,
                 put_inner_thoughts_first=put_inner_thoughts_first,
                 existing_file_uris=existing_file_uris,
+                display_intermediate_message=display_intermediate_message,
             )
 
-            # Log the raw AI response for debugging and analysis
-            self.logger.info(f"AI response received - choices: {len(response.choices)}")
-            for i, choice in enumerate(response.choices):
-                if choice.message.content:
-                    self.logger.info(f"Choice {i} reasoning content: {choice.message.content}")
-                if choice.message.tool_calls:
-                    self.logger.info(f"Choice {i} has {len(choice.message.tool_calls)} tool calls")
-                    for j, tool_call in enumerate(choice.message.tool_calls):
-                        self.logger.info(f"Tool call {j}: {tool_call.function.name} with args: {tool_call.function.arguments}")
-
-            # Step 3: check if LLM wanted to call a function
-            # (if yes) Step 4: call the function
-            # (if yes) Step 5: send the info on the function call and function response to LLM
-            all_response_messages = []
-            for response_choice in response.choices:
-                response_message = response_choice.message
-                tmp_response_messages, continue_chaining, function_failed = self._handle_ai_response(
-                    first_input_messge, # give the last message to the function so that other agents can see this message through funciton_calls
-                    response_message,
-                    existing_file_uris=existing_file_uris,
-                    # TODO this is kind of hacky, find a better way to handle this
-                    # the only time we set up message creation ahead of time is when streaming is on
-                    response_message_id=response.id if stream else None,
-                    force_response=force_response,
-                    retrieved_memories=retrieved_memories,
-                    display_intermediate_message=display_intermediate_message,
-                    request_user_confirmation=request_user_confirmation,
-                    return_memory_types_without_update=return_memory_types_without_update,
-                    message_queue=message_queue,
-                    chaining=chaining
-                )
-                all_response_messages.extend(tmp_response_messages)
-
-            if function_failed:
-                self.logger.info(f"Function failed with error: {all_response_messages[-1].content[0].text if all_response_messages else 'Unknown error'}")
-
-            # if function_failed:
-
-            #     inputs = self._get_ai_reply(
-            #         message_sequence=input_message_sequence,
-            #         first_message=first_message,
-            #         stream=stream,
-            #         step_count=step_count,
-            #         # extra_messages=extra_messages,
-            #         get_input_data_for_debugging=True
-            #     )
-
-            #     try:
-            #         error = json.loads(all_response_messages[-1].content[0].text)
-            #     except:
-            #         error = 'Not Known'
-
-            #     response_json = response.model_dump()
-            #     response_json.pop('created', None)
-            #     results_to_log = {
-            #         'input': inputs,
-            #         'output': response_json,
-            #         'error': error
-            #     }
-
-            #     if not os.path.exists("debug"):
-            #         os.makedirs("debug")
-            #     count = 0
-            #     while os.path.exists(f"debug/debug_{count}.json"):
-            #         count += 1
-            #     with open(f"debug/debug_{count}.json", "w") as f:
-            #         json.dump(results_to_log, f, indent=2)
-                
-            # Step 6: extend the message history
-            if len(messages) > 0:
-                all_new_messages = messages + all_response_messages
-            else:
-                all_new_messages = all_response_messages
-
-            # Check the memory pressure and potentially issue a memory pressure warning
-            current_total_tokens = response.usage.total_tokens
-            active_memory_warning = False
-
-            # We can't do summarize logic properly if context_window is undefined
-            if self.agent_state.llm_config.context_window is None:
-                # Fallback if for some reason context_window is missing, just set to the default
-                self.logger.warning(f"Could not find context_window in config, setting to default {LLM_MAX_TOKENS['DEFAULT']}")
-                self.logger.debug(f"Agent state: {self.agent_state}")
-                self.agent_state.llm_config.context_window = (
-                    LLM_MAX_TOKENS[self.model] if (self.model is not None and self.model in LLM_MAX_TOKENS) else LLM_MAX_TOKENS["DEFAULT"]
-                )
+            return self._handle_step_response(
+                response,
+                first_input_messge,
+                messages,
+                stream=stream,
+                force_response=force_response,
+                retrieved_memories=retrieved_memories,
+                display_intermediate_message=display_intermediate_message,
+                request_user_confirmation=request_user_confirmation,
+                existing_file_uris=existing_file_uris,
+                return_memory_types_without_update=return_memory_types_without_update,
+                message_queue=message_queue,
+                chaining=chaining,
+            )
 
-            if current_total_tokens > summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window):
-                self.logger.info(
-                    f"Memory pressure detected: last response total_tokens ({current_total_tokens}) > {summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window)}"
-                )
+        except Exception as e:
+            self.logger.error(f"step() failed\nmessages = {messages}\nerror = {e}")
 
-                # Only deliver the alert if we haven't already (this period)
-                if not self.agent_alerted_about_memory_pressure:
-                    active_memory_warning = True
-                    self.agent_alerted_about_memory_pressure = True  # it's up to the outer loop to handle this
+            # If we got a context alert, try trimming the messages length, then try again
+            if is_context_overflow_error(e):
+                if summarize_attempt_count <= summarizer_settings.max_summarizer_retries:
+                    self.logger.warning(
+                        f"context window exceeded with limit {self.agent_state.llm_config.context_window}, attempting to summarize ({summarize_attempt_count}/{summarizer_settings.max_summarizer_retries}"
+                    )
+                    # A separate API call to run a summarizer
+                    self.summarize_messages_inplace(existing_file_uris=existing_file_uris)
 
-                # if it is too long then run summarization here.
-                self.summarize_messages_inplace(existing_file_uris=existing_file_uris)
+                    # Try step again
+                    return self.inner_step(
+                        messages=messages,
+                        first_message=first_message,
+                        first_input_messge=first_input_messge,
+                        first_message_retry_limit=first_message_retry_limit,
+                        skip_verify=skip_verify,
+                        stream=stream,
+                        metadata=metadata,
+                        summarize_attempt_count=summarize_attempt_count + 1,
+                        force_response=force_response,
+                        extra_messages=extra_messages,
+                        topics=topics,
+                        retrieved_memories=retrieved_memories,
+                        chaining=chaining,
+                        message_queue=message_queue,
+                        initial_message_count=initial_message_count,
+                        return_memory_types_without_update=return_memory_types_without_update,
+                        display_intermediate_message=display_intermediate_message,
+                        request_user_confirmation=request_user_confirmation,
+                        put_inner_thoughts_first=put_inner_thoughts_first,
+                        existing_file_uris=existing_file_uris,
+                    )
+                else:
+                    raise self._context_window_exceeded_error(summarize_attempt_count)
 
             else:
-                self.logger.debug(
-                    f"Memory usage acceptable: last response total_tokens ({current_total_tokens}) < {summarizer_settings.memory_warning_threshold * int(self.agent_state.llm_config.context_window)}"
-                )
+                self.logger.error(f"step() failed with an unrecognized exception: '{str(e)}'")
+                raise e
 
-            # Log step - this must happen before messages are persisted
-            step = self.step_manager.log_step(
-                actor=self.user,
-                provider_name=self.agent_state.llm_config.model_endpoint_type,
-                model=self.agent_state.llm_config.model,
-                context_window_limit=self.agent_state.llm_config.context_window,
-                usage=response.usage,
-            )
-            for message in all_new_messages:
-                message.step_id = step.id
+    async def inner_step_async(
+        self,
+        first_input_messge: Message,
+        messages: Union[Message, List[Message]],
+        first_message: bool = False,
+        first_message_retry_limit: int = FIRST_MESSAGE_ATTEMPTS,
+        skip_verify: bool = False,
+        stream: bool = False,  # TODO move to config?
+        step_count: Optional[int] = None,
+        metadata: Optional[dict] = None,
+        summarize_attempt_count: int = 0,
+        force_response: bool = False,
+        topics: Optional[str] = None,
+        retrieved_memories: Optional[dict] = None,
+        display_intermediate_message: any = None,
+        request_user_confirmation: Optional[Callable] = None,
+        put_inner_thoughts_first: bool = True,
+        existing_file_uris: Optional[List[str]] = None,
+        extra_messages: Optional[List[dict]] = None,
+        initial_message_count: Optional[int] = None,
+        return_memory_types_without_update: bool = False,
+        message_queue: Optional[any] = None,
+        chaining: bool = True,
+        **kwargs,
+    ) -> AgentStepResponse:
+        """
+        Asynchronous version of `inner_step`: the LLM call is awaited on the event loop, while
+        database access and tool execution run in worker threads.
+        """
 
-            # Persisting into Messages
-            self.agent_state = self.agent_manager.append_to_in_context_messages(
-                all_new_messages, agent_id=self.agent_state.id, actor=self.user
+        try:
+            messages, input_message_sequence, retrieved_memories = await asyncio.to_thread(
+                self._prepare_step_input,
+                messages,
+                step_count=step_count,
+                chaining=chaining,
+                topics=topics,
+                retrieved_memories=retrieved_memories,
+                extra_messages=extra_messages,
+                initial_message_count=initial_message_count,
             )
 
-            # Log step completion and results
-            self.logger.info(f"Agent step completed - continue_chaining: {continue_chaining}, function_failed: {function_failed}, messages_generated: {len(all_new_messages)}")
+            # Step 2: send the conversation and available functions to the LLM
+            response = await self._get_ai_reply_async(
+                message_sequence=input_message_sequence,
+                first_message=first_message,
+                stream=stream,
+                step_count=step_count,
+                put_inner_thoughts_first=put_inner_thoughts_first,
+                existing_file_uris=existing_file_uris,
+                display_intermediate_message=display_intermediate_message,
+            )
 
-            return AgentStepResponse(
-                messages=all_new_messages,
-                continue_chaining=continue_chaining,
-                function_failed=function_failed,
-                in_context_memory_warning=active_memory_warning,
-                usage=response.usage,
+            return await asyncio.to_thread(
+                self._handle_step_response,
+                response,
+                first_input_messge,
+                messages,
+                stream=stream,
+                force_response=force_response,
+                retrieved_memories=retrieved_memories,
+                display_intermediate_message=display_intermediate_message,
+                request_user_confirmation=request_user_confirmation,
+                existing_file_uris=existing_file_uris,
+                return_memory_types_without_update=return_memory_types_without_update,
+                message_queue=message_queue,
+                chaining=chaining,
             )
 
         except Exception as e:
@@ -1775,17 +2275,15 @@ These keywords have been used to retrieve relevant memories from the database.
 
             # If we got a context alert, try trimming the messages length, then try again
             if is_context_overflow_error(e):
-                in_context_messages = self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user)
-
                 if summarize_attempt_count <= summarizer_settings.max_summarizer_retries:
                     self.logger.warning(
                         f"context window exceeded with limit {self.agent_state.llm_config.context_window}, attempting to summarize ({summarize_attempt_count}/{summarizer_settings.max_summarizer_retries}"
                     )
                     # A separate API call to run a summarizer
-                    self.summarize_messages_inplace(existing_file_uris=existing_file_uris)
+                    await asyncio.to_thread(self.summarize_messages_inplace, existing_file_uris=existing_file_uris)
 
                     # Try step again
-                    return self.inner_step(
+                    return await self.inner_step_async(
                         messages=messages,
                         first_message=first_message,
                         first_input_messge=first_input_messge,
@@ -1808,19 +2306,7 @@ These keywords have been used to retrieve relevant memories from the database.
                         existing_file_uris=existing_file_uris,
                     )
                 else:
-                    err_msg = f"Ran summarizer {summarize_attempt_count - 1} times for agent id={self.agent_state.id}, but messages are still overflowing the context window."
-                    token_counts = (get_token_counts_for_messages(in_context_messages),)
-                    self.logger.error(err_msg)
-                    self.logger.error(f"num_in_context_messages: {len(self.agent_state.message_ids)}")
-                    self.logger.error(f"token_counts: {token_counts}")
-                    raise ContextWindowExceededError(
-                        err_msg,
-                        details={
-                            "num_in_context_messages": len(self.agent_state.message_ids),
-                            "in_context_messages_text": [m.text for m in in_context_messages],
-                            "token_counts": token_counts,
-                        },
-                    )
+                    raise self._context_window_exceeded_error(summarize_attempt_count)
 
             else:
                 self.logger.error(f"step() failed with an unrecognized exception: '{str(e)}'")
@@ -1954,10 +2440,8 @@ These keywords have been used to retrieve relevant memories from the database.
         core_memory = self.agent_state.memory.compile()
         num_tokens_core_memory = count_tokens(core_memory)
 
-        # Grab the in-context messages
-        # conversion of messages to OpenAI dict format, which is passed to the token counter
+        # Grab the in-context messages, whose token counts were stored when they were created
         in_context_messages = self.agent_manager.get_in_context_messages(agent_id=self.agent_state.id, actor=self.user)
-        in_context_messages_openai = [m.to_openai_dict() for m in in_context_messages]
 
         # Check if there's a summary message in the message queue
         if (
@@ -1973,8 +2457,8 @@ These keywords have been used to retrieve relevant memories from the database.
             num_tokens_summary_memory = count_tokens(in_context_messages[1].text)
             # with a summary message, the real messages start at index 2
             num_tokens_messages = (
-                num_tokens_from_messages(messages=in_context_messages_openai[2:], model=self.model)
-                if len(in_context_messages_openai) > 2
+                sum(m.get_token_count(self.model) for m in in_context_messages[2:]) + 3  # every reply is primed with 3 tokens
+                if len(in_context_messages) > 2
                 else 0
             )
 
@@ -1983,8 +2467,8 @@ These keywords have been used to retrieve relevant memories from the database.
             num_tokens_summary_memory = 0
             # with no summary message, the real messages start at index 1
             num_tokens_messages = (
-                num_tokens_from_messages(messages=in_context_messages_openai[1:], model=self.model)
-                if len(in_context_messages_openai) > 1
+                sum(m.get_token_count(self.model) for m in in_context_messages[1:]) + 3  # every reply is primed with 3 tokens
+                if len(in_context_messages) > 1
                 else 0
             )
 
@@ -2044,15 +2528,19 @@ These keywords have been used to retrieve relevant memories from the database.
 
 
 def save_agent(agent: Agent):
-    """Save agent to metadata store"""
+    """Save the fields of the agent state that changed since it was loaded or last saved to metadata store"""
     agent_state = agent.agent_state
     assert isinstance(agent_state.memory, Memory), f"Memory is not a Memory object: {type(agent_state.memory)}"
 
+    changed_fields = agent_state.get_changed_fields()
+    if not changed_fields:
+        return
+
     # TODO: move this to agent manager
     # TODO: Completely strip out metadata
     # convert to persisted model
     agent_manager = AgentManager()
-    update_agent = UpdateAgent(
+    update_values = dict(
         name=agent_state.name,
         tool_ids=[t.id for t in agent_state.tools],
         block_ids=[b.id for b in agent_state.memory.blocks],
@@ -2061,13 +2549,14 @@ def save_agent(agent: Agent):
         tool_rules=agent_state.tool_rules,
         llm_config=agent_state.llm_config,
         embedding_config=agent_state.embedding_config,
-        message_ids=agent_state.message_ids,
         description=agent_state.description,
         metadata_=agent_state.metadata_,
         # TODO: Add this back in later
         # tool_exec_environment_variables=agent_state.get_agent_env_vars_as_dict(),
     )
-    agent_manager.update_agent(agent_id=agent_state.id, agent_update=update_agent, actor=agent.user)
+    update_agent = UpdateAgent(**{field: value for field, value in update_values.items() if field in changed_fields})
+    agent._write_own_state(agent_manager.update_agent, agent_id=agent_state.id, agent_update=update_agent, actor=agent.user)
+    agent_state.mark_persisted()
 
 
 def strip_name_field_from_user_message(user_message_text: str) -> Tuple[str, Optional[str]]:
@@ -29,6 +29,7 @@ from PIL import Image
 import logging
 from ..voice_utils import process_voice_files, convert_base64_to_audio_segment
 from .app_utils import encode_image_from_pil, encode_image
+from mirix.image_cache import encode_image_data_url
 
 # Import the separated components
 from mirix.agent.message_queue import MessageQueue
@@ -44,6 +45,7 @@ from mirix import LLMConfig, EmbeddingConfig
 from mirix.schemas.agent import AgentType
 from mirix.prompts import gpt_system
 from mirix.schemas.memory import ChatMemory
+from mirix.services.memory_stats_manager import MemoryStatsManager
 from mirix.settings import model_settings
 
 logging.basicConfig(level=logging.INFO, format='[%(name)s] %(levelname)s: %(message)s')
@@ -1301,79 +1303,58 @@ Please perform this analysis and create new memories as appropriate. Provide a d
         redundancy_results = {}
         
         try:
-            # Analyze episodic memory redundancy
-            episodic_memories = self.client.server.episodic_memory_manager.list_episodic_memory(
-                self.agent_states.episodic_memory_agent_state, limit=None
-            )
-            redundancy_results['episodic'] = self._analyze_redundancy(episodic_memories, 'episodic')
+            actor = self.client.user
+            total_counts = MemoryStatsManager().get_total_number_of_items(actor)
             
-            # Analyze semantic memory redundancy
-            semantic_memories = self.client.server.semantic_memory_manager.list_semantic_items(
-                self.agent_states.semantic_memory_agent_state, limit=None
-            )
-            redundancy_results['semantic'] = self._analyze_redundancy(semantic_memories, 'semantic')
+            # Analyze episodic, semantic, resource, procedural and knowledge vault redundancy
+            for memory_type in ['episodic', 'semantic', 'resource', 'procedural', 'knowledge_vault']:
+                redundancy_results[memory_type] = self._analyze_redundancy(memory_type, actor, total_counts[memory_type])
             
             # Analyze core memory redundancy
-            core_blocks = self.client.server.block_manager.get_blocks(self.client.user)
+            core_blocks = self.client.server.block_manager.get_blocks(actor)
             redundancy_results['core'] = self._analyze_core_redundancy(core_blocks)
             
-            # Analyze resource memory redundancy
-            resource_memories = self.client.server.resource_memory_manager.list_resources(
-                self.agent_states.resource_memory_agent_state, limit=None
-            )
-            redundancy_results['resource'] = self._analyze_redundancy(resource_memories, 'resource')
-            
-            # Analyze procedural memory redundancy
-            procedural_memories = self.client.server.procedural_memory_manager.list_procedures(
-                self.agent_states.procedural_memory_agent_state, limit=None
-            )
-            redundancy_results['procedural'] = self._analyze_redundancy(procedural_memories, 'procedural')
-            
-            # Analyze knowledge vault redundancy
-            knowledge_vault_items = self.client.server.knowledge_vault_manager.list_knowledge(
-                self.agent_states.knowledge_vault_agent_state, limit=None
-            )
-            redundancy_results['knowledge_vault'] = self._analyze_redundancy(knowledge_vault_items, 'knowledge_vault')
-            
         except Exception as e:
             self.logger.error(f"Error analyzing redundancy: {e}")
             redundancy_results['error'] = str(e)
         
         return redundancy_results
 
-    def _analyze_redundancy(self, memories, memory_type):
-        """Analyze redundancy within a specific memory type"""
-        if not memories:
+    def _analyze_redundancy(self, memory_type, actor, total_count):
+        """
+        Analyze redundancy within a specific memory type.
+        
+        Only the pairs colliding in the MinHash/LSH index of the memory type are compared, with the
+        Jaccard similarity of their word sets estimated from their signatures.
+        """
+        if not total_count:
             return f"No {memory_type} memories found."
         
         redundancy_info = {
-            'total_count': len(memories),
+            'total_count': total_count,
             'potential_duplicates': [],
             'similar_items': [],
             'recommendations': []
         }
         
-        # Compare memories for similarity
-        for i, memory1 in enumerate(memories):
-            for j, memory2 in enumerate(memories[i+1:], i+1):
-                similarity_score = self._calculate_similarity(memory1, memory2, memory_type)
-                
-                if similarity_score > 0.9:  # Very high similarity - potential duplicate
-                    redundancy_info['potential_duplicates'].append({
-                        'memory1_id': getattr(memory1, 'id', i),
-                        'memory2_id': getattr(memory2, 'id', j),
-                        'similarity': similarity_score,
-                        'content1': self._get_memory_content(memory1, memory_type),
-                        'content2': self._get_memory_content(memory2, memory_type)
-                    })
-                elif similarity_score > 0.7:  # High similarity - could be merged
-                    redundancy_info['similar_items'].append({
-                        'memory1_id': getattr(memory1, 'id', i),
-                        'memory2_id': getattr(memory2, 'id', j),
-                        'similarity': similarity_score,
-                        'content1': self._get_memory_content(memory1, memory_type),
-                        'content2': self._get_memory_content(memory2, memory_type)
-                    })
+        duplicate_index_manager = self.client.server.duplicate_index_manager
+        pairs = duplicate_index_manager.find_duplicate_pairs(memory_type, actor, threshold=0.7)
+        contents = duplicate_index_manager.get_contents(
+            memory_type, {item_id for pair in pairs for item_id in pair[:2]}, actor
+        )
+        
+        for memory1_id, memory2_id, similarity_score in pairs:
+            pair_info = {
+                'memory1_id': memory1_id,
+                'memory2_id': memory2_id,
+                'similarity': similarity_score,
+                'content1': contents.get(memory1_id, ''),
+                'content2': contents.get(memory2_id, '')
+            }
+            if similarity_score > 0.9:  # Very high similarity - potential duplicate
+                redundancy_info['potential_duplicates'].append(pair_info)
+            elif similarity_score > 0.7:  # High similarity - could be merged
+                redundancy_info['similar_items'].append(pair_info)
         
         # Generate recommendations
         if redundancy_info['potential_duplicates']:
@@ -1499,45 +1480,6 @@ Please perform this analysis and create new memories as appropriate. Provide a d
         
         return pattern_results
 
-    def _calculate_similarity(self, memory1, memory2, memory_type):
-        """Calculate similarity between two memories (simplified implementation)"""
-        try:
-            content1 = self._get_memory_content(memory1, memory_type).lower()
-            content2 = self._get_memory_content(memory2, memory_type).lower()
-            
-            # Simple similarity based on common words (in real implementation, would use embeddings)
-            words1 = set(content1.split())
-            words2 = set(content2.split())
-            
-            if not words1 and not words2:
-                return 0.0
-            
-            intersection = len(words1.intersection(words2))
-            union = len(words1.union(words2))
-            
-            return intersection / union if union > 0 else 0.0
-            
-        except Exception:
-            return 0.0
-
-    def _get_memory_content(self, memory, memory_type):
-        """Extract relevant content from memory based on type"""
-        try:
-            if memory_type == 'episodic':
-                return f"{getattr(memory, 'summary', '')} {getattr(memory, 'details', '')}"
-            elif memory_type == 'semantic':
-                return f"{getattr(memory, 'name', '')} {getattr(memory, 'summary', '')} {getattr(memory, 'details', '')}"
-            elif memory_type == 'procedural':
-                return f"{getattr(memory, 'summary', '')} {' '.join(getattr(memory, 'steps', []))}"
-            elif memory_type == 'resource':
-                return f"{getattr(memory, 'title', '')} {getattr(memory, 'summary', '')} {getattr(memory, 'content', '')}"
-            elif memory_type == 'knowledge_vault':
-                return f"{getattr(memory, 'caption', '')} {getattr(memory, 'secret_value', '')}"
-            else:
-                return str(memory)
-        except Exception:
-            return ""
-
     def _check_core_overlap(self, block1, block2):
         """Check if two core memory blocks have overlapping content"""
         try:
@@ -1720,7 +1662,7 @@ Please perform this analysis and create new memories as appropriate. Provide a d
                     message = [{'type': 'text', 'text': message}]
                 for image_uri in image_uris:
                     mime_type = get_image_mime_type(image_uri)
-                    message.append({'type': 'image_data', 'image_data': {'data': f"data:{mime_type};base64,{encode_image(image_uri)}", 'detail': 'auto'}})
+                    message.append({'type': 'image_data', 'image_data': {'data': encode_image_data_url(image_uri, mime_type), 'detail': 'auto'}})
 
             # Only get recent images for chat context if user has enabled this feature
             if self.include_recent_screenshots:
@@ -1760,11 +1702,10 @@ Please perform this analysis and create new memories as appropriate. Provide a d
                                     'text': f"Timestamp: {timestamp}; Image Index {idx}" + source_text
                                 })
                                 mime_type = get_image_mime_type(file_ref)
-                                base64_data = encode_image(file_ref)
                                 extra_messages.append({
                                     'type': 'image_data',
                                     'image_data': {
-                                        'data': f"data:{mime_type};base64,{base64_data}",
+                                        'data': encode_image_data_url(file_ref, mime_type),
                                         'detail': 'auto'
                                     }
                                 })
@@ -2288,294 +2229,103 @@ Please perform this analysis and create new memories as appropriate. Provide a d
             
         return info
 
-    def export_memories_to_csv(self, csv_file_path: str, include_embeddings: bool = False) -> dict:
+    def export_memories_to_csv(self, csv_file_path: str, include_embeddings: bool = False, actor: PydanticUser = None,
+                               memory_types: list = None, progress_callback=None) -> dict:
         """
         Export all memories from all memory types to a CSV file.
         
+        Rows are streamed from the database and written in chunks, so the export runs in constant memory.
+        
         Args:
             csv_file_path: Path where the CSV file will be saved
             include_embeddings: Whether to include embedding vectors in the CSV (default: False)
+            actor: User whose memories are exported (default: the current user of the client)
+            memory_types: List of memory types to export. If None, exports all types.
+            progress_callback: Optional callable(memory_type, exported_so_far) called after each chunk
             
         Returns:
             Dictionary with export status and statistics
         """
-        import pandas as pd
-        from pathlib import Path
-        import json
+        from mirix.services.memory_export_manager import CsvMemoryExportWriter
         
-        result = {
-            'success': False,
-            'message': '',
-            'exported_counts': {},
-            'total_exported': 0,
-            'file_path': csv_file_path
-        }
+        if memory_types is None:
+            memory_types = ['episodic', 'semantic', 'procedural', 'resource', 'knowledge_vault']
         
-        try:
-            # Ensure the output directory exists
-            Path(csv_file_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            all_memories = []
-            memory_counts = {}
-            
-            # 1. Export Episodic Memory
-            try:
-                episodic_memories = self.client.server.episodic_memory_manager.list_episodic_memory(
-                    agent_state=self.agent_states.episodic_memory_agent_state,
-                    limit=None
-                )
-                memory_counts['episodic'] = len(episodic_memories)
-                
-                for memory in episodic_memories:
-                    row = {
-                        'memory_type': 'episodic',
-                        'id': memory.id,
-                        'created_at': memory.created_at,
-                        'occurred_at': getattr(memory, 'occurred_at', None),
-                        'event_type': getattr(memory, 'event_type', None),
-                        'actor': getattr(memory, 'actor', None),
-                        'summary': getattr(memory, 'summary', None),
-                        'details': getattr(memory, 'details', None),
-                        'organization_id': memory.organization_id,
-                        'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                        'metadata': json.dumps(memory.metadata_),
-                        'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {})))
-                    }
-                    
-                    # Add embeddings if requested
-                    if include_embeddings:
-                        row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                        row['details_embedding'] = json.dumps(getattr(memory, 'details_embedding', None))
-                    
-                    all_memories.append(row)
-                    
-                self.logger.info(f"Exported {len(episodic_memories)} episodic memories")
-                
-            except Exception as e:
-                self.logger.error(f"Error exporting episodic memories: {e}")
-                memory_counts['episodic'] = 0
-            
-            # 2. Export Semantic Memory
-            try:
-                semantic_memories = self.client.server.semantic_memory_manager.list_semantic_items(
-                    agent_state=self.agent_states.semantic_memory_agent_state,
-                    limit=None
-                )
-                memory_counts['semantic'] = len(semantic_memories)
-                
-                for memory in semantic_memories:
-                    row = {
-                        'memory_type': 'semantic',
-                        'id': memory.id,
-                        'created_at': memory.created_at,
-                        'occurred_at': None,  # Semantic memories don't have occurred_at
-                        'event_type': None,
-                        'actor': None,
-                        'summary': getattr(memory, 'summary', None),
-                        'details': getattr(memory, 'details', None),
-                        'name': getattr(memory, 'name', None),
-                        'source': getattr(memory, 'source', None),
-                        'organization_id': memory.organization_id,
-                        'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                        'metadata': json.dumps(memory.metadata_),
-                        'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {})))
-                    }
-                    
-                    # Add embeddings if requested
-                    if include_embeddings:
-                        row['name_embedding'] = json.dumps(getattr(memory, 'name_embedding', None))
-                        row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                        row['details_embedding'] = json.dumps(getattr(memory, 'details_embedding', None))
-                    
-                    all_memories.append(row)
-                    
-                self.logger.info(f"Exported {len(semantic_memories)} semantic memories")
-                
-            except Exception as e:
-                self.logger.error(f"Error exporting semantic memories: {e}")
-                memory_counts['semantic'] = 0
-            
-            # 3. Export Procedural Memory
-            try:
-                procedural_memories = self.client.server.procedural_memory_manager.list_procedures(
-                    agent_state=self.agent_states.procedural_memory_agent_state,
-                    limit=None
-                )
-                memory_counts['procedural'] = len(procedural_memories)
-                
-                for memory in procedural_memories:
-                    row = {
-                        'memory_type': 'procedural',
-                        'id': memory.id,
-                        'created_at': memory.created_at,
-                        'occurred_at': None,
-                        'event_type': None,
-                        'actor': None,
-                        'summary': getattr(memory, 'summary', None),
-                        'details': None,
-                        'entry_type': getattr(memory, 'entry_type', None),
-                        'steps': getattr(memory, 'steps', None),
-                        'organization_id': memory.organization_id,
-                        'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                        'metadata': json.dumps(memory.metadata_),
-                        'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {})))
-                    }
-                    
-                    # Add embeddings if requested
-                    if include_embeddings:
-                        row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                        row['steps_embedding'] = json.dumps(getattr(memory, 'steps_embedding', None))
-                    
-                    all_memories.append(row)
-                    
-                self.logger.info(f"Exported {len(procedural_memories)} procedural memories")
-                
-            except Exception as e:
-                self.logger.error(f"Error exporting procedural memories: {e}")
-                memory_counts['procedural'] = 0
-            
-            # 4. Export Resource Memory
-            try:
-                resource_memories = self.client.server.resource_memory_manager.list_resources(
-                    agent_state=self.agent_states.resource_memory_agent_state,
-                    limit=None
-                )
-                memory_counts['resource'] = len(resource_memories)
-                
-                for memory in resource_memories:
-                    row = {
-                        'memory_type': 'resource',
-                        'id': memory.id,
-                        'created_at': memory.created_at,
-                        'occurred_at': None,
-                        'event_type': None,
-                        'actor': None,
-                        'summary': getattr(memory, 'summary', None),
-                        'details': None,
-                        'title': getattr(memory, 'title', None),
-                        'content': getattr(memory, 'content', None),
-                        'resource_type': getattr(memory, 'resource_type', None),
-                        'organization_id': memory.organization_id,
-                        'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                        'metadata': json.dumps(memory.metadata_),
-                        'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {})))
-                    }
-                    
-                    # Add embeddings if requested
-                    if include_embeddings:
-                        row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                    
-                    all_memories.append(row)
-                    
-                self.logger.info(f"Exported {len(resource_memories)} resource memories")
-                
-            except Exception as e:
-                self.logger.error(f"Error exporting resource memories: {e}")
-                memory_counts['resource'] = 0
-            
-            # 5. Export Knowledge Vault
-            try:
-                knowledge_vault_items = self.client.server.knowledge_vault_manager.list_knowledge(
-                    agent_state=self.agent_states.knowledge_vault_agent_state,
-                    limit=None
-                )
-                memory_counts['knowledge_vault'] = len(knowledge_vault_items)
-                
-                for memory in knowledge_vault_items:
-                    row = {
-                        'memory_type': 'knowledge_vault',
-                        'id': memory.id,
-                        'created_at': memory.created_at,
-                        'occurred_at': None,
-                        'event_type': None,
-                        'actor': None,
-                        'summary': None,
-                        'details': None,
-                        'entry_type': getattr(memory, 'entry_type', None),
-                        'source': getattr(memory, 'source', None),
-                        'sensitivity': getattr(memory, 'sensitivity', None),
-                        'secret_value': getattr(memory, 'secret_value', None),
-                        'caption': getattr(memory, 'caption', None),
-                        'organization_id': memory.organization_id,
-                        'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                        'metadata': json.dumps(memory.metadata_),
-                        'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {})))
-                    }
-                    
-                    # Add embeddings if requested
-                    if include_embeddings:
-                        row['caption_embedding'] = json.dumps(getattr(memory, 'caption_embedding', None))
-                    
-                    all_memories.append(row)
-                    
-                self.logger.info(f"Exported {len(knowledge_vault_items)} knowledge vault items")
-                
-            except Exception as e:
-                self.logger.error(f"Error exporting knowledge vault items: {e}")
-                memory_counts['knowledge_vault'] = 0
-            
-            # Create DataFrame and export to CSV
-            if all_memories:
-                df = pd.DataFrame(all_memories)
-                
-                # Ensure columns are not treated as categorical to avoid sorting issues
-                df['memory_type'] = df['memory_type'].astype(str)
-                if 'created_at' in df.columns:
-                    # Convert created_at to string to avoid timezone/datetime issues
-                    df['created_at'] = df['created_at'].astype(str)
-                
-                # Sort by memory type and creation date
-                df = df.sort_values(['memory_type', 'created_at'], ascending=[True, False])
-                
-                # Export to CSV
-                df.to_csv(csv_file_path, index=False, encoding='utf-8')
-                
-                result['success'] = True
-                result['exported_counts'] = memory_counts
-                result['total_exported'] = sum(memory_counts.values())
-                result['message'] = f'Successfully exported {result["total_exported"]} memories to {csv_file_path}'
-                result['columns'] = list(df.columns)
-                
-                self.logger.info(f"✅ Memory export completed: {result['message']}")
-                
-            else:
-                result['message'] = 'No memories found to export'
-                result['exported_counts'] = memory_counts
-                result['total_exported'] = 0
-                self.logger.warning("⚠️ No memories found to export")
-                
-        except Exception as e:
-            error_msg = f"Failed to export memories to CSV: {str(e)}"
-            self.logger.error(f"❌ {error_msg}")
-            result['message'] = error_msg
-            
+        def open_writer(file_path):
+            return CsvMemoryExportWriter(file_path, memory_types, include_embeddings=include_embeddings)
+        
+        result = self._export_memories(actor or self.client.user, csv_file_path, open_writer, memory_types,
+                                       include_embeddings, progress_callback, 'CSV')
+        if result['success'] and result['total_exported'] == 0:
+            result['success'] = False
+            result['message'] = 'No memories found to export'
+            self.logger.warning("⚠️ No memories found to export")
         return result
             
-    def export_memories_to_excel(self, actor: PydanticUser, file_path: str, memory_types: list = None, include_embeddings: bool = False) -> dict:
+    def export_memories_to_excel(self, actor: PydanticUser, file_path: str, memory_types: list = None, include_embeddings: bool = False,
+                                 progress_callback=None) -> dict:
         """
         Export selected memory types to an Excel file with separate sheets for each memory type.
         
+        Rows are streamed from the database and appended to write-only sheets in chunks, so the export runs
+        in constant memory.
+        
         Args:
             file_path: Path where the Excel file will be saved
             memory_types: List of memory types to export. If None, exports all types.
             include_embeddings: Whether to include embedding vectors in the export (default: False)
+            progress_callback: Optional callable(memory_type, exported_so_far) called after each chunk
             
         Returns:
             Dictionary with export status and statistics
         """
-        import pandas as pd
-        from pathlib import Path
-        import json
+        from mirix.services.memory_export_manager import ExcelMemoryExportWriter
         
         # Default to all memory types if none specified
         if memory_types is None:
             memory_types = ['episodic', 'semantic', 'procedural', 'resource']
         
+        return self._export_memories(actor, file_path, ExcelMemoryExportWriter, memory_types,
+                                     include_embeddings, progress_callback, 'Excel')
+    
+    def export_memories_to_parquet(self, actor: PydanticUser, file_path: str, memory_types: list = None, include_embeddings: bool = False,
+                                   progress_callback=None) -> dict:
+        """
+        Export selected memory types to a single Parquet file with a `memory_type` column (requires pyarrow).
+        
+        Each chunk of rows read from the database is written as its own row group, so the export runs in
+        constant memory.
+        
+        Args:
+            file_path: Path where the Parquet file will be saved
+            memory_types: List of memory types to export. If None, exports all types.
+            include_embeddings: Whether to include embedding vectors in the export (default: False)
+            progress_callback: Optional callable(memory_type, exported_so_far) called after each chunk
+            
+        Returns:
+            Dictionary with export status and statistics
+        """
+        from mirix.services.memory_export_manager import ParquetMemoryExportWriter
+        
+        if memory_types is None:
+            memory_types = ['episodic', 'semantic', 'procedural', 'resource', 'knowledge_vault']
+        
+        def open_writer(file_path):
+            return ParquetMemoryExportWriter(file_path, memory_types, include_embeddings=include_embeddings)
+        
+        return self._export_memories(actor, file_path, open_writer, memory_types,
+                                     include_embeddings, progress_callback, 'Parquet')
+    
+    def _export_memories(self, actor, file_path, open_writer, memory_types, include_embeddings, progress_callback, file_format) -> dict:
+        """Stream the memories of `memory_types` to the writer returned by `open_writer(file_path)`"""
+        from pathlib import Path
+        
         result = {
             'success': False,
             'message': '',
             'exported_counts': {},
             'total_exported': 0,
+            'errors': {},
             'file_path': file_path
         }
         
@@ -2583,227 +2333,40 @@ Please perform this analysis and create new memories as appropriate. Provide a d
             # Ensure the output directory exists
             Path(file_path).parent.mkdir(parents=True, exist_ok=True)
             
-            # Create Excel writer
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                total_exported = 0
-                
-                # Export each memory type to its own sheet
-                for memory_type in memory_types:
-                    try:
-                        if memory_type == 'episodic':
-                            memories, count = self._export_episodic_memories(actor=actor, include_embeddings=include_embeddings)
-                        elif memory_type == 'semantic':
-                            memories, count = self._export_semantic_memories(actor=actor, include_embeddings=include_embeddings)
-                        elif memory_type == 'procedural':
-                            memories, count = self._export_procedural_memories(actor=actor, include_embeddings=include_embeddings)
-                        elif memory_type == 'resource':
-                            memories, count = self._export_resource_memories(actor=actor, include_embeddings=include_embeddings)
-                        else:
-                            self.logger.warning(f"Unknown memory type: {memory_type}")
-                            continue
-                        
-                        result['exported_counts'][memory_type] = count
-                        total_exported += count
-                        
-                        if memories:
-                            df = pd.DataFrame(memories)
-                            
-                            # Sort by creation date if available
-                            if 'created_at' in df.columns:
-                                df['created_at'] = df['created_at'].astype(str)
-                                df = df.sort_values('created_at', ascending=False)
-                            
-                            # Write to Excel sheet
-                            sheet_name = memory_type.capitalize()
-                            df.to_excel(writer, sheet_name=sheet_name, index=False)
-                            
-                            self.logger.info(f"Exported {count} {memory_type} memories to '{sheet_name}' sheet")
-                        else:
-                            # Create empty sheet with headers
-                            self.logger.info(f"No {memory_type} memories found, creating empty sheet")
-                            
-                    except Exception as e:
-                        self.logger.error(f"Error exporting {memory_type} memories: {e}")
-                        result['exported_counts'][memory_type] = 0
-                
-                result['total_exported'] = total_exported
-                
-                if total_exported > 0:
-                    result['success'] = True
-                    result['message'] = f'Successfully exported {total_exported} memories to {file_path} with {len(memory_types)} sheets'
-                else:
-                    result['success'] = True  # Still success even if no memories
-                    result['message'] = f'No memories found to export, created empty Excel file at {file_path}'
-                
-                self.logger.info(f"✅ Memory export completed: {result['message']}")
+            with open_writer(file_path) as writer:
+                result['exported_counts'], result['errors'] = self.client.server.memory_export_manager.export(
+                    actor=actor,
+                    writer=writer,
+                    memory_types=memory_types,
+                    include_embeddings=include_embeddings,
+                    progress_callback=progress_callback,
+                )
+            
+            result['total_exported'] = sum(result['exported_counts'].values())
+            if result['errors']:
+                # The file holds the rows written before each failure, which are counted in exported_counts
+                failures = ', '.join(
+                    f"{memory_type} ({result['exported_counts'][memory_type]} exported before: {error})"
+                    for memory_type, error in result['errors'].items()
+                )
+                result['message'] = f'Failed to export {failures} to {file_path}'
+                self.logger.error(f"❌ Memory export failed: {result['message']}")
+                return result
+
+            result['success'] = True  # Still success even if no memories
+            if result['total_exported'] > 0:
+                result['message'] = f'Successfully exported {result["total_exported"]} memories to {file_path}'
+            else:
+                result['message'] = f'No memories found to export, created empty {file_format} file at {file_path}'
+            
+            self.logger.info(f"✅ Memory export completed: {result['message']}")
                 
         except Exception as e:
-            error_msg = f"Failed to export memories to Excel: {str(e)}"
+            error_msg = f"Failed to export memories to {file_format}: {str(e)}"
             self.logger.error(f"❌ {error_msg}")
             result['message'] = error_msg
             
         return result
-    
-    def _serialize_last_modify(self, last_modify_dict):
-        """Helper function to properly serialize last_modify field with datetime objects"""
-        if not last_modify_dict:
-            return {}
-        
-        serialized = last_modify_dict.copy()
-        if 'timestamp' in serialized and serialized['timestamp'] is not None:
-            # Check if timestamp is a datetime object and convert to ISO string
-            timestamp = serialized['timestamp']
-            if hasattr(timestamp, 'isoformat'):
-                serialized['timestamp'] = timestamp.isoformat()
-        return serialized
-    
-    def _export_episodic_memories(self, actor: PydanticUser, include_embeddings: bool = False) -> tuple:
-        """Export episodic memories and return (memories_list, count)"""
-        try:
-            episodic_memories = self.client.server.episodic_memory_manager.list_episodic_memory(
-                actor=actor,
-                agent_state=self.agent_states.episodic_memory_agent_state,
-                limit=None
-            )
-            
-            memories = []
-            for memory in episodic_memories:
-                row = {
-                    'id': memory.id,
-                    'created_at': memory.created_at.isoformat() if memory.created_at else None,
-                    'occurred_at': getattr(memory, 'occurred_at', None).isoformat() if getattr(memory, 'occurred_at', None) else None,
-                    'event_type': getattr(memory, 'event_type', None),
-                    'actor': getattr(memory, 'actor', None),
-                    'summary': getattr(memory, 'summary', None),
-                    'details': getattr(memory, 'details', None),
-                    'organization_id': memory.organization_id,
-                    'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                    'metadata': json.dumps(memory.metadata_),
-                    'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {}))),
-                    'user_id': memory.user_id
-                }
-                
-                if include_embeddings:
-                    row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                    row['details_embedding'] = json.dumps(getattr(memory, 'details_embedding', None))
-                
-                memories.append(row)
-            
-            return memories, len(episodic_memories)
-            
-        except Exception as e:
-            self.logger.error(f"Error exporting episodic memories: {e}")
-            return [], 0
-    
-    def _export_semantic_memories(self, actor: PydanticUser, include_embeddings: bool = False) -> tuple:
-        """Export semantic memories and return (memories_list, count)"""
-        try:
-            semantic_memories = self.client.server.semantic_memory_manager.list_semantic_items(
-                actor=actor,
-                agent_state=self.agent_states.semantic_memory_agent_state,
-                limit=None
-            )
-            
-            memories = []
-            for memory in semantic_memories:
-                row = {
-                    'id': memory.id,
-                    'created_at': memory.created_at.isoformat() if memory.created_at else None,
-                    'name': getattr(memory, 'name', None),
-                    'summary': getattr(memory, 'summary', None),
-                    'details': getattr(memory, 'details', None),
-                    'source': getattr(memory, 'source', None),
-                    'organization_id': memory.organization_id,
-                    'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                    'metadata': json.dumps(memory.metadata_),
-                    'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {}))),
-                    'user_id': memory.user_id
-                }
-                
-                if include_embeddings:
-                    row['name_embedding'] = json.dumps(getattr(memory, 'name_embedding', None))
-                    row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                    row['details_embedding'] = json.dumps(getattr(memory, 'details_embedding', None))
-                
-                memories.append(row)
-            
-            return memories, len(semantic_memories)
-            
-        except Exception as e:
-            self.logger.error(f"Error exporting semantic memories: {e}")
-            return [], 0
-    
-    def _export_procedural_memories(self, actor: PydanticUser, include_embeddings: bool = False) -> tuple:
-        """Export procedural memories and return (memories_list, count)"""
-        try:
-            procedural_memories = self.client.server.procedural_memory_manager.list_procedures(
-                actor=actor,
-                agent_state=self.agent_states.procedural_memory_agent_state,
-                limit=None
-            )
-            
-            memories = []
-            for memory in procedural_memories:
-                row = {
-                    'id': memory.id,
-                    'created_at': memory.created_at.isoformat() if memory.created_at else None,
-                    'entry_type': getattr(memory, 'entry_type', None),
-                    'summary': getattr(memory, 'summary', None),
-                    'steps': getattr(memory, 'steps', None),
-                    'organization_id': memory.organization_id,
-                    'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                    'metadata': json.dumps(memory.metadata_),
-                    'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {}))),
-                    'user_id': memory.user_id
-                }
-                
-                if include_embeddings:
-                    row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                    row['steps_embedding'] = json.dumps(getattr(memory, 'steps_embedding', None))
-                
-                memories.append(row)
-            
-            return memories, len(procedural_memories)
-            
-        except Exception as e:
-            self.logger.error(f"Error exporting procedural memories: {e}")
-            return [], 0
-    
-    def _export_resource_memories(self, actor: PydanticUser, include_embeddings: bool = False) -> tuple:
-        """Export resource memories and return (memories_list, count)"""
-        try:
-            resource_memories = self.client.server.resource_memory_manager.list_resources(
-                actor=actor,
-                agent_state=self.agent_states.resource_memory_agent_state,
-                limit=None
-            )
-            
-            memories = []
-            for memory in resource_memories:
-                row = {
-                    'id': memory.id,
-                    'created_at': memory.created_at.isoformat() if memory.created_at else None,
-                    'title': getattr(memory, 'title', None),
-                    'summary': getattr(memory, 'summary', None),
-                    'content': getattr(memory, 'content', None),
-                    'resource_type': getattr(memory, 'resource_type', None),
-                    'organization_id': memory.organization_id,
-                    'tree_path': json.dumps(getattr(memory, 'tree_path', [])),
-                    'metadata': json.dumps(memory.metadata_),
-                    'last_modify': json.dumps(self._serialize_last_modify(getattr(memory, 'last_modify', {}))),
-                    'user_id': memory.user_id
-                }
-                
-                if include_embeddings:
-                    row['summary_embedding'] = json.dumps(getattr(memory, 'summary_embedding', None))
-                
-                memories.append(row)
-            
-            return memories, len(resource_memories)
-            
-        except Exception as e:
-            self.logger.error(f"Error exporting resource memories: {e}")
-            return [], 0
 
     def create_user(self, name: str, set_as_active: bool = False) -> dict:
         """
@@ -14,4 +14,11 @@ SKIP_META_MEMORY_MANAGER = False
 WITH_REFLEXION_AGENT = False
 
 # Whether to use the background agent
-WITH_BACKGROUND_AGENT = False
\ No newline at end of file
+WITH_BACKGROUND_AGENT = False
+# Screenshots whose perceptual hash differs in at most this many cells from the last kept screenshot
+# of the same source are dropped at ingestion. A couple of cells absorb a blinking cursor or a clock
+# tick (None keeps every screenshot)
+SCREENSHOT_DEDUP_HAMMING_THRESHOLD = 2
+SCREENSHOT_DEDUP_GRID_SIZE = 64  # the hash has SCREENSHOT_DEDUP_GRID_SIZE ** 2 cells
+SCREENSHOT_DEDUP_TOLERANCE = 4  # gray levels a cell may move by without counting as changed
+SCREENSHOT_DEDUP_WINDOW = 300  # seconds during which a kept screenshot stands for its duplicates
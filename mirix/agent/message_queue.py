@@ -2,17 +2,24 @@ import uuid
 import time
 import threading
 import traceback
+from collections import deque
 
 
 class MessageQueue:
     """
     Handles queueing and ordering of messages to different agent types.
     Ensures that messages of the same type are processed in order.
+
+    Each agent type has its own FIFO lane. A message waits on its own event, which is set
+    by the message ahead of it when that one finishes, so waking up the next message of a
+    type is O(1) and does not depend on polling.
     """
     
     def __init__(self):
         self.message_queue = {}
         self._message_queue_lock = threading.Lock()
+        self._lanes = {}
+        self._metrics = {}
     
     def send_message_in_queue(self, client, agent_id, kwargs, agent_type='chat'):
         """
@@ -28,61 +35,75 @@ class MessageQueue:
             Tuple of (response, agent_type)
         """
         message_uuid = uuid.uuid4()
+        message = {
+            'kwargs': kwargs,
+            'started': False,
+            'finished': False,
+            'type': agent_type,
+            'ready': threading.Event(),
+            'enqueued_at': time.monotonic(),
+        }
 
         with self._message_queue_lock:
-            self.message_queue[message_uuid] = {
-                'kwargs': kwargs,
-                'started': False,
-                'finished': False,
-                'type': agent_type,
-            }
+            self.message_queue[message_uuid] = message
+            lane = self._lanes.setdefault(agent_type, deque())
+            lane.append(message)
+            if len(lane) == 1:
+                message['ready'].set()
 
         # Wait for earlier requests of the same type to finish
-        while not self._check_if_earlier_requests_are_finished(message_uuid):
-            time.sleep(0.1)
+        message['ready'].wait()
 
+        started_at = time.monotonic()
         with self._message_queue_lock:
-            self.message_queue[message_uuid]['started'] = True
+            message['started'] = True
 
+        failed = False
         try:
             response = client.send_message(
                 agent_id=agent_id,
                 role='user',
-                **self.message_queue[message_uuid]['kwargs']
+                **message['kwargs']
             )
         except Exception as e:
             print(f"Error sending message: {e}")
             print(traceback.format_exc())
             print("agent_type: ", agent_type, "gets error. agent_id: ", agent_id, "ERROR")
             response = "ERROR"
-
-        with self._message_queue_lock:
-            self.message_queue[message_uuid]['finished'] = True
-            del self.message_queue[message_uuid]
+            failed = True
+        finally:
+            finished_at = time.monotonic()
+            with self._message_queue_lock:
+                message['finished'] = True
+                del self.message_queue[message_uuid]
+                lane = self._lanes[agent_type]
+                lane.popleft()
+                if lane:
+                    lane[0]['ready'].set()
+                self._record_metrics(agent_type, started_at - message['enqueued_at'], finished_at - started_at, failed)
         
         return response, agent_type
     
-    def _check_if_earlier_requests_are_finished(self, message_uuid):
-        """Check if all earlier requests of the same type have finished."""
-        with self._message_queue_lock:
-            if message_uuid not in self.message_queue:
-                raise ValueError("Message not found in the queue.")
-            
-            # Get current message type
-            current_message_type = self.message_queue[message_uuid]['type']
-            
-            # Find index of current message
-            message_keys = list(self.message_queue.keys())
-            idx = message_keys.index(message_uuid)
-            
-            # Check earlier messages of the same type
-            for i in range(idx):
-                earlier_message = self.message_queue[message_keys[i]]
-                if earlier_message['type'] == current_message_type:
-                    if not earlier_message['finished']:
-                        return False
-            
-            return True
+    @staticmethod
+    def _empty_metrics():
+        return {
+            'processed': 0,
+            'errors': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'total_service_time': 0.0,
+            'max_service_time': 0.0,
+        }
+    
+    def _record_metrics(self, agent_type, wait_time, service_time, failed):
+        """Accumulate the wait and service time of a finished message. Must hold the queue lock."""
+        metrics = self._metrics.setdefault(agent_type, self._empty_metrics())
+        metrics['processed'] += 1
+        metrics['errors'] += int(failed)
+        metrics['total_wait_time'] += wait_time
+        metrics['max_wait_time'] = max(metrics['max_wait_time'], wait_time)
+        metrics['total_service_time'] += service_time
+        metrics['max_service_time'] = max(metrics['max_service_time'], service_time)
     
     def _get_agent_id_for_type(self, agent_states, agent_type):
         """Get the agent ID for the specified agent type."""
@@ -111,3 +132,29 @@ class MessageQueue:
         """Get the current length of the message queue."""
         with self._message_queue_lock:
             return len(self.message_queue)
+    
+    def get_queue_metrics(self):
+        """
+        Get per agent type queue metrics.
+
+        Returns:
+            Dict mapping agent type to its current queue depth (including the message being
+            processed), the number of processed and failed messages, and the average and
+            maximum wait and service times in seconds.
+        """
+        with self._message_queue_lock:
+            agent_types = set(self._lanes) | set(self._metrics)
+            result = {}
+            for agent_type in agent_types:
+                metrics = self._metrics.get(agent_type) or self._empty_metrics()
+                processed = metrics['processed']
+                result[agent_type] = {
+                    'depth': len(self._lanes.get(agent_type, ())),
+                    'processed': processed,
+                    'errors': metrics['errors'],
+                    'avg_wait_time': metrics['total_wait_time'] / processed if processed else 0.0,
+                    'max_wait_time': metrics['max_wait_time'],
+                    'avg_service_time': metrics['total_service_time'] / processed if processed else 0.0,
+                    'max_service_time': metrics['max_service_time'],
+                }
+            return result
@@ -0,0 +1,99 @@
+import time
+import threading
+
+import numpy as np
+from PIL import Image
+
+from mirix.agent.app_constants import (
+    SCREENSHOT_DEDUP_GRID_SIZE,
+    SCREENSHOT_DEDUP_HAMMING_THRESHOLD,
+    SCREENSHOT_DEDUP_TOLERANCE,
+    SCREENSHOT_DEDUP_WINDOW,
+)
+
+
+def perceptual_hash(image_path, grid_size=SCREENSHOT_DEDUP_GRID_SIZE):
+    """
+    Block-mean hash of a screenshot: the mean gray level of each cell of a `grid_size` x `grid_size` grid.
+
+    Gradient hashes such as dHash are blind to a line of text typed on a plain background, which is
+    most of what changes on a screen, so each cell keeps its mean instead of a single bit.
+    """
+    with Image.open(image_path) as image:
+        return np.asarray(image.convert("L").resize((grid_size, grid_size), Image.BOX), dtype=np.int16)
+
+
+def hamming_distance(hash_a, hash_b, tolerance=SCREENSHOT_DEDUP_TOLERANCE):
+    """Number of cells whose mean gray level differs by more than `tolerance` (compression noise)."""
+    return int((np.abs(hash_a - hash_b) > tolerance).sum())
+
+
+class ScreenshotDeduplicator:
+    """
+    Collapses near-duplicate screenshots (e.g. an idle screen) at ingestion.
+
+    For each source, the last kept screenshot is remembered with its perceptual hash. A new screenshot
+    of the same source within `window` seconds whose hash differs in at most `threshold` cells is a
+    duplicate: it is dropped and only counted on the record of the kept screenshot.
+    """
+
+    def __init__(self, threshold=SCREENSHOT_DEDUP_HAMMING_THRESHOLD, window=SCREENSHOT_DEDUP_WINDOW,
+                 grid_size=SCREENSHOT_DEDUP_GRID_SIZE):
+        self.threshold = threshold
+        self.window = window
+        self.grid_size = grid_size
+        self._lock = threading.Lock()
+        self._last_kept = {}  # source -> record of the last kept screenshot
+        self.kept_count = 0
+        self.dropped_count = 0
+
+    def add(self, image_path, timestamp, source=None):
+        """
+        Check a new screenshot against the last kept one of its source.
+
+        Returns:
+            Tuple of (is_duplicate, record). `record` describes the kept screenshot: its `image_uri`,
+            `timestamp`, the number of duplicates collapsed into it (`count`) and the timestamp of
+            the last one (`last_timestamp`).
+        """
+        try:
+            image_hash = perceptual_hash(image_path, self.grid_size)
+        except Exception:
+            # Unreadable image: keep it, the memory agents will report it
+            with self._lock:
+                self.kept_count += 1
+            return False, {'image_uri': image_path, 'timestamp': timestamp, 'count': 0, 'last_timestamp': None}
+
+        now = time.time()
+        with self._lock:
+            last = self._last_kept.get(source)
+            if (
+                last is not None
+                and now - last['first_seen'] <= self.window
+                and hamming_distance(image_hash, last['hash']) <= self.threshold
+            ):
+                last['count'] += 1
+                last['last_timestamp'] = timestamp
+                self.dropped_count += 1
+                return True, last
+
+            record = {
+                'image_uri': image_path,
+                'timestamp': timestamp,
+                'hash': image_hash,
+                'first_seen': now,
+                'count': 0,
+                'last_timestamp': None,
+            }
+            self._last_kept[source] = record
+            self.kept_count += 1
+            return False, record
+
+    def get_stats(self):
+        with self._lock:
+            total = self.kept_count + self.dropped_count
+            return {
+                'kept': self.kept_count,
+                'dropped': self.dropped_count,
+                'drop_rate': self.dropped_count / total if total else 0.0,
+            }
@@ -7,10 +7,12 @@ import logging
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from mirix.agent.app_constants import TEMPORARY_MESSAGE_LIMIT, GEMINI_MODELS, SKIP_META_MEMORY_MANAGER
+from mirix.agent.app_constants import TEMPORARY_MESSAGE_LIMIT, GEMINI_MODELS, SKIP_META_MEMORY_MANAGER, SCREENSHOT_DEDUP_HAMMING_THRESHOLD
+from mirix.agent.screenshot_deduplicator import ScreenshotDeduplicator
 from mirix.constants import CHAINING_FOR_MEMORY_UPDATE
+from mirix.services.retrieval_cache_manager import RetrievalCacheManager
 from mirix.voice_utils import process_voice_files, convert_base64_to_audio_segment
-from mirix.agent.app_utils import encode_image
+from mirix.image_cache import encode_image_data_url
 
 def get_image_mime_type(image_path):
     """Get MIME type for image files."""
@@ -32,7 +34,8 @@ class TemporaryMessageAccumulator:
     """
     
     def __init__(self, client, google_client, timezone, upload_manager, message_queue, 
-                 model_name, temporary_message_limit=TEMPORARY_MESSAGE_LIMIT):
+                 model_name, temporary_message_limit=TEMPORARY_MESSAGE_LIMIT,
+                 screenshot_dedup_threshold=SCREENSHOT_DEDUP_HAMMING_THRESHOLD):
         self.client = client
         self.google_client = google_client
         self.timezone = timezone
@@ -60,9 +63,50 @@ class TemporaryMessageAccumulator:
         
         # Upload tracking for cleanup
         self.upload_start_times = {}  # Track when uploads started for cleanup purposes
+
+        # Near-duplicate screenshots are dropped before they are uploaded or stored
+        self.screenshot_deduplicator = ScreenshotDeduplicator(threshold=screenshot_dedup_threshold) if screenshot_dedup_threshold is not None else None
     
+    def _deduplicate_screenshots(self, full_message, timestamp, delete_after_upload):
+        """
+        Drop the screenshots of a message that are near-duplicates of the last kept screenshot of their source.
+
+        Returns a copy of the message with the remaining `image_uris` and `sources`, and `image_repeats`:
+        for each remaining screenshot, the record counting the duplicates collapsed into it.
+        """
+        image_uris = full_message.get('image_uris') or []
+        sources = full_message.get('sources')
+        has_sources = sources is not None and len(sources) == len(image_uris)
+
+        kept_uris, kept_sources, image_repeats = [], [], []
+        for idx, image_uri in enumerate(image_uris):
+            source = sources[idx] if has_sources else None
+            is_duplicate, record = self.screenshot_deduplicator.add(image_uri, timestamp, source)
+            if is_duplicate:
+                if delete_after_upload and image_uri != record['image_uri']:
+                    self._delete_local_image_file(image_uri)
+                continue
+            kept_uris.append(image_uri)
+            kept_sources.append(source)
+            image_repeats.append(record)
+
+        if len(kept_uris) < len(image_uris):
+            self.logger.debug(f"Dropped {len(image_uris) - len(kept_uris)} duplicate screenshot(s), stats: {self.screenshot_deduplicator.get_stats()}")
+
+        full_message = dict(full_message)
+        full_message['image_uris'] = kept_uris
+        full_message['sources'] = kept_sources if has_sources else sources
+        full_message['image_repeats'] = image_repeats
+        return full_message
+
     def add_message(self, full_message, timestamp, delete_after_upload=True, async_upload=True):
         """Add a message to temporary storage."""
+        if self.screenshot_deduplicator is not None and full_message.get('image_uris'):
+            full_message = self._deduplicate_screenshots(full_message, timestamp, delete_after_upload)
+            # Nothing left to memorize if every screenshot was a duplicate
+            if not full_message['image_uris'] and not full_message.get('voice_files') and not full_message.get('message'):
+                return
+
         if self.needs_upload and self.upload_manager is not None:
             if 'image_uris' in full_message and full_message['image_uris']:
                 # Handle image uploads with optional sources information
@@ -101,6 +145,7 @@ class TemporaryMessageAccumulator:
                 self.temporary_messages.append(
                     (timestamp, {'image_uris': image_file_ref_placeholders,
                                  'sources': sources,
+                                 'image_repeats': full_message.get('image_repeats'),
                                  'audio_segments': audio_segment,
                                  'message': full_message['message']})
                 )
@@ -135,6 +180,7 @@ class TemporaryMessageAccumulator:
                     (timestamp, {
                         'image_uris': image_uris,
                         'sources': sources,
+                        'image_repeats': full_message.get('image_repeats'),
                         'audio_segments': full_message.get('voice_files', []),
                         'message': full_message['message'],
                         'delete_after_upload': delete_after_upload  # Store delete flag for OpenAI models
@@ -464,12 +510,14 @@ class TemporaryMessageAccumulator:
         })
 
         t1 = time.time()
-        if SKIP_META_MEMORY_MANAGER:
-            # Send to memory agents in parallel
-            self._send_to_memory_agents_separately(message, set(list(self.uri_to_create_time.keys())), agent_states, user_id=user_id)
-        else:
-            # Send to meta memory agent
-            response, agent_type = self._send_to_meta_memory_agent(message, set(list(self.uri_to_create_time.keys())), agent_states, user_id=user_id)
+        # All memory agents of this cycle share memory retrievals until one of them writes
+        with RetrievalCacheManager.cycle():
+            if SKIP_META_MEMORY_MANAGER:
+                # Send to memory agents in parallel
+                self._send_to_memory_agents_separately(message, set(list(self.uri_to_create_time.keys())), agent_states, user_id=user_id)
+            else:
+                # Send to meta memory agent
+                response, agent_type = self._send_to_meta_memory_agent(message, set(list(self.uri_to_create_time.keys())), agent_states, user_id=user_id)
 
         t2 = time.time()
         self.logger.info(f"Time taken to send to memory agents: {t2 - t1} seconds")
@@ -496,7 +544,7 @@ class TemporaryMessageAccumulator:
         """Build the message content for memory agents."""
 
         # Collect content organized by source
-        images_by_source = {}  # source_name -> [(timestamp, file_refs)]
+        images_by_source = {}  # source_name -> [(timestamp, file_ref, repeat_record)]
         text_content = []
         audio_content = []
 
@@ -505,20 +553,24 @@ class TemporaryMessageAccumulator:
             if 'image_uris' in item and item['image_uris']:
                 sources = item.get('sources', [])
                 image_uris = item['image_uris']
+                image_repeats = item.get('image_repeats') or []
+                if len(image_repeats) != len(image_uris):
+                    # Failed uploads are skipped, so the records can no longer be matched
+                    image_repeats = [None] * len(image_uris)
                 
                 # If we have sources, group images by source
                 if sources and len(sources) == len(image_uris):
-                    for source, file_ref in zip(sources, image_uris):
+                    for source, file_ref, repeat in zip(sources, image_uris, image_repeats):
                         if source not in images_by_source:
                             images_by_source[source] = []
-                        images_by_source[source].append((timestamp, file_ref))
+                        images_by_source[source].append((timestamp, file_ref, repeat))
                 else:
                     # Fallback: if no sources or mismatch, group under generic name
                     generic_source = "Screenshots"
                     if generic_source not in images_by_source:
                         images_by_source[generic_source] = []
-                    for file_ref in image_uris:
-                        images_by_source[generic_source].append((timestamp, file_ref))
+                    for file_ref, repeat in zip(image_uris, image_repeats):
+                        images_by_source[generic_source].append((timestamp, file_ref, repeat))
             
             # Handle text messages
             if 'message' in item and item['message']:
@@ -558,10 +610,13 @@ class TemporaryMessageAccumulator:
                 })
                 
                 # Add each image with its timestamp
-                for timestamp, file_ref in source_images:
+                for timestamp, file_ref, repeat in source_images:
+                    timestamp_text = f"Timestamp: {timestamp}"
+                    if repeat and repeat.get('count'):
+                        timestamp_text += f" (the screen stayed the same in the next {repeat['count']} screenshot(s), until {repeat['last_timestamp']})"
                     message_parts.append({
                         'type': 'text',
-                        'text': f"Timestamp: {timestamp}"
+                        'text': timestamp_text
                     })
                     
                     # Handle different types of file references
@@ -575,11 +630,10 @@ class TemporaryMessageAccumulator:
                         # OpenAI models: convert to base64
                         try:
                             mime_type = get_image_mime_type(file_ref)
-                            base64_data = encode_image(file_ref)
                             message_parts.append({
                                 'type': 'image_data',
                                 'image_data': {
-                                    'data': f"data:{mime_type};base64,{base64_data}",
+                                    'data': encode_image_data_url(file_ref, mime_type),
                                     'detail': 'auto'
                                 }
                             })
@@ -4,6 +4,7 @@ import os
 import base64
 import hashlib
 import shutil
+import threading
 from pathlib import Path
 from typing import Callable, Dict, Generator, List, Optional, Union
 from urllib.parse import urlparse
@@ -48,6 +49,25 @@ def create_client():
     return LocalClient()
 
 
+_shared_client: Optional["LocalClient"] = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client() -> "LocalClient":
+    """
+    Get the `LocalClient` shared within the process, created on first use.
+
+    Used by tools that message other agents (e.g. the meta memory agent triggering the memory agents), which
+    would otherwise bootstrap a new server on every call with `create_client`.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = LocalClient()
+    return _shared_client
+
+
 class AbstractClient(object):
     def __init__(
         self,
@@ -406,6 +426,9 @@ class LocalClient(AbstractClient):
 
         self.user = self.server.user_manager.get_user_or_default(self.user_id)
         self.organization = self.server.get_organization_or_default(self.org_id)
+
+        # agent type -> ID of the first agent of that type, see `get_agent_by_type`
+        self._agent_ids_by_type: Dict[str, str] = {}
         
         # get images directory from settings and ensure it exists
         # Can be customized via MIRIX_IMAGES_DIR environment variable
@@ -693,6 +716,31 @@ class LocalClient(AbstractClient):
 
         return self.server.agent_manager.list_agents(actor=self.server.user_manager.get_user_by_id(self.user.id), tags=tags, query_text=query_text, limit=limit, cursor=cursor)
 
+    def get_agent_by_type(self, agent_type: Union[AgentType, str]) -> Optional[AgentState]:
+        """
+        Get the first agent of a type, e.g. "episodic_memory_agent"
+
+        Args:
+            agent_type (AgentType): Type of the agent
+
+        Returns:
+            agent_state (AgentState): State of the agent, or None if there is no agent of this type
+        """
+        agent_type = AgentType(agent_type).value
+        agent_id = self._agent_ids_by_type.get(agent_type)
+        if agent_id is not None:
+            try:
+                return self.get_agent(agent_id)
+            except NoResultFound:
+                # The agent was deleted, e.g. by another client: list the agents again
+                pass
+
+        agents_by_type = {}
+        for agent in self.list_agents():
+            agents_by_type.setdefault(AgentType(agent.agent_type).value, agent)
+        self._agent_ids_by_type = {cached_type: agent.id for cached_type, agent in agents_by_type.items()}
+        return agents_by_type.get(agent_type)
+
     def agent_exists(self, agent_id: Optional[str] = None, agent_name: Optional[str] = None) -> bool:
         """
         Check if an agent exists
@@ -941,6 +989,8 @@ class LocalClient(AbstractClient):
             agent_id (str): ID of the agent to delete
         """
         self.server.agent_manager.delete_agent(agent_id=agent_id, actor=self.server.user_manager.get_user_by_id(self.user.id))
+        self.server.evict_agent(agent_id)
+        self._agent_ids_by_type = {agent_type: cached_id for agent_type, cached_id in self._agent_ids_by_type.items() if cached_id != agent_id}
 
     def get_agent_by_name(self, agent_name: str) -> AgentState:
         """
@@ -0,0 +1,213 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from mirix.constants import (
+    EMBEDDING_CACHE_DISK_TTL,
+    EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_PRUNE_INTERVAL,
+)
+from mirix.log import get_logger
+from mirix.schemas.embedding_config import EmbeddingConfig
+
+logger = get_logger(__name__)
+
+
+def embedding_cache_key(config: EmbeddingConfig, text: str) -> str:
+    """Content address of an embedding: (provider, endpoint, model, dimension, sha256(text))."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{config.embedding_endpoint_type}:{config.embedding_endpoint}:{config.embedding_model}:{config.embedding_dim}:{digest}"
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: a bounded in-process LRU in front of a SQLite file.
+
+    Vectors are stored on disk as raw float32 bytes, with the time they were last read or written.
+    The disk tier is pruned every `prune_interval` writes: entries unused for `disk_ttl` seconds are
+    dropped, then the least recently used ones beyond `max_disk_entries`. A failure of the disk tier
+    (read-only home, corrupt file, ...) only disables that tier, the LRU keeps working.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        max_disk_entries: int = EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+        disk_ttl: float = EMBEDDING_CACHE_DISK_TTL,
+        prune_interval: int = EMBEDDING_CACHE_PRUNE_INTERVAL,
+    ):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_ttl = disk_ttl
+        self.prune_interval = prune_interval
+        self._writes_since_prune = 0
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+                if columns and "last_used" not in columns:
+                    # Written before the keys included the endpoint: none of its keys can match anymore
+                    self._conn.execute("DROP TABLE embeddings")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+                self._conn.commit()
+                self._prune()
+            except sqlite3.Error as e:
+                logger.warning("Embedding cache disk tier disabled: %s", e)
+                self._conn = None
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors of the given keys, skipping the ones that are not cached."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self._stats["memory_hits"] += len(found)
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self._conn is not None:
+                try:
+                    placeholders = ",".join("?" * len(missing))
+                    rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing).fetchall()
+                    if rows:
+                        self._conn.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE key = ?", [(time.time(), key) for key, _ in rows]
+                        )
+                        self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Embedding cache read failed: %s", e)
+                    rows = []
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    self._remember(key, vector)
+                    found[key] = vector
+                self._stats["disk_hits"] += len(rows)
+
+            self._stats["misses"] += len([key for key in missing if key not in found])
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._conn is not None and items:
+                try:
+                    now = time.time()
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                        [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()],
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Embedding cache write failed: %s", e)
+                    return
+                self._writes_since_prune += len(items)
+                if self._writes_since_prune >= self.prune_interval:
+                    self._prune()
+
+    def _prune(self) -> None:
+        """Drop the expired entries of the disk tier, then the least recently used ones beyond its size bound."""
+        self._writes_since_prune = 0
+        try:
+            self._conn.execute("DELETE FROM embeddings WHERE last_used < ?", (time.time() - self.disk_ttl,))
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache prune failed: %s", e)
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+
+class CachedEmbeddingModel:
+    """Wraps an embedding model so that every text is only embedded once per (provider, endpoint, model, dimension)."""
+
+    def __init__(self, model, config: EmbeddingConfig, cache: Optional[EmbeddingCache] = None):
+        self.model = model
+        self.config = config
+        self.cache = cache or get_embedding_cache()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _lookup(self, texts: List[str]):
+        keys = [embedding_cache_key(self.config, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        return keys, found, missing
+
+    def _store(self, keys: List[str], found: Dict[str, List[float]], missing: List[str], embeddings: List[List[float]]) -> List[List[float]]:
+        computed = {embedding_cache_key(self.config, text): list(embedding) for text, embedding in zip(missing, embeddings)}
+        self.cache.put_many(computed)
+        found.update(computed)
+        return [found[key] for key in keys]
+
+    def get_text_embedding(self, text: str) -> List[float]:
+        keys, found, missing = self._lookup([text])
+        embeddings = [self.model.get_text_embedding(text)] if missing else []
+        return self._store(keys, found, missing, embeddings)[0]
+
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        from mirix.embeddings import get_text_embeddings
+
+        keys, found, missing = self._lookup(texts)
+        embeddings = get_text_embeddings(self.model, missing) if missing else []
+        return self._store(keys, found, missing, embeddings)
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        keys, found, missing = self._lookup([text])
+        embeddings = [await self.model.aget_text_embedding(text)] if missing else []
+        return self._store(keys, found, missing, embeddings)[0]
+
+    async def aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        from mirix.embeddings import aget_text_embeddings
+
+        keys, found, missing = self._lookup(texts)
+        embeddings = await aget_text_embeddings(self.model, missing) if missing else []
+        return self._store(keys, found, missing, embeddings)
@@ -1,10 +1,13 @@
+import threading
 import uuid
-from typing import Any, List, Optional
+import weakref
+from typing import Any, List, Optional, Union
 
 import numpy as np
 import tiktoken
 
-from mirix.constants import EMBEDDING_TO_TOKENIZER_DEFAULT, EMBEDDING_TO_TOKENIZER_MAP, MAX_EMBEDDING_DIM
+from mirix.constants import EMBEDDING_TO_TOKENIZER_DEFAULT, EMBEDDING_TO_TOKENIZER_MAP, MAX_EMBEDDING_DIM, USE_EMBEDDING_CACHE
+from mirix.embedding_cache import CachedEmbeddingModel
 from mirix.schemas.embedding_config import EmbeddingConfig
 from mirix.utils import is_valid_url, printd
 
@@ -56,6 +59,63 @@ def check_and_split_text(text: str, embedding_model: str) -> List[str]:
     return [text]
 
 
+_http_client = None
+_http_client_lock = threading.Lock()
+_async_http_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _http_limits():
+    import httpx
+
+    from mirix.settings import settings
+
+    limits = httpx.Limits(
+        max_connections=settings.httpx_max_connections,
+        max_keepalive_connections=settings.httpx_max_keepalive_connections,
+        keepalive_expiry=settings.httpx_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.httpx_timeout_connect,
+        read=settings.httpx_timeout_read,
+        write=settings.httpx_timeout_write,
+        pool=settings.httpx_timeout_pool,
+    )
+    return limits, timeout
+
+
+def get_http_client():
+    """Return the process-wide keep-alive httpx client used by the embedding endpoints."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                import httpx
+
+                limits, timeout = _http_limits()
+                _http_client = httpx.Client(limits=limits, timeout=timeout)
+    return _http_client
+
+
+def get_async_http_client():
+    """Return the keep-alive httpx.AsyncClient of the running event loop (async clients cannot be shared across loops)."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        import httpx
+
+        limits, timeout = _http_limits()
+        client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        _async_http_clients[loop] = client
+    return client
+
+
+def batched(texts: List[str], batch_size: int) -> List[List[str]]:
+    """Split texts into consecutive micro-batches of at most batch_size items."""
+    return [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+
 class EmbeddingEndpoint:
     """Implementation for OpenAI compatible endpoint"""
 
@@ -65,6 +125,9 @@ class EmbeddingEndpoint:
     # _timeout: float = PrivateAttr()
     # _base_url: str = PrivateAttr()
 
+    # text-embeddings-inference rejects requests with more inputs than --max-client-batch-size (32 by default)
+    batch_size = 32
+
     def __init__(
         self,
         model: str,
@@ -85,56 +148,110 @@ class EmbeddingEndpoint:
         self._base_url = base_url
         self._timeout = timeout
 
-    def _call_api(self, text: str) -> List[float]:
+    def _request(self, texts: Union[str, List[str]]) -> dict:
         if not is_valid_url(self._base_url):
             raise ValueError(
                 f"Embeddings endpoint does not have a valid URL (set to: '{self._base_url}'). Make sure embedding_endpoint is set correctly in your Mirix config."
             )
-        import httpx
-
-        headers = {"Content-Type": "application/json"}
-        json_data = {"input": text, "model": self.model_name, "user": self._user}
-
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self._base_url}/embeddings",
-                headers=headers,
-                json=json_data,
-                timeout=self._timeout,
-            )
-
-        response_json = response.json()
-
+        return {
+            "url": f"{self._base_url}/embeddings",
+            "headers": {"Content-Type": "application/json"},
+            "json": {"input": texts, "model": self.model_name, "user": self._user},
+            "timeout": self._timeout,
+        }
+
+    def _parse_response(self, response_json, num_inputs: Optional[int]) -> Union[List[float], List[List[float]]]:
+        """Parse a TEI or openai-style response. num_inputs is None for a single (non-list) input."""
         if isinstance(response_json, list):
-            # embedding directly in response
-            embedding = response_json
+            # embedding(s) directly in response
+            embeddings = response_json
         elif isinstance(response_json, dict):
             # TEI embedding packaged inside openai-style response
             try:
-                embedding = response_json["data"][0]["embedding"]
-            except (KeyError, IndexError):
+                data = sorted(response_json["data"], key=lambda item: item.get("index", 0))
+                embeddings = [item["embedding"] for item in data]
+            except (KeyError, IndexError, TypeError):
                 raise TypeError(f"Got back an unexpected payload from text embedding function, response=\n{response_json}")
+            if num_inputs is None:
+                if not embeddings:
+                    raise TypeError(f"Got back an unexpected payload from text embedding function, response=\n{response_json}")
+                return embeddings[0]
         else:
             # unknown response, can't parse
             raise TypeError(f"Got back an unexpected payload from text embedding function, response=\n{response_json}")
 
-        return embedding
+        if num_inputs is not None and len(embeddings) != num_inputs:
+            raise TypeError(f"Expected {num_inputs} embeddings from text embedding function, got {len(embeddings)}")
+        return embeddings
+
+    def _call_api(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        response = get_http_client().post(**self._request(text))
+        return self._parse_response(response.json(), len(text) if isinstance(text, list) else None)
+
+    async def _acall_api(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        response = await get_async_http_client().post(**self._request(text))
+        return self._parse_response(response.json(), len(text) if isinstance(text, list) else None)
 
     def get_text_embedding(self, text: str) -> List[float]:
         return self._call_api(text)
 
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batched(texts, self.batch_size):
+            embeddings.extend(self._call_api(batch))
+        return embeddings
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        return await self._acall_api(text)
+
+    async def aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        import asyncio
+
+        results = await asyncio.gather(*[self._acall_api(batch) for batch in batched(texts, self.batch_size)])
+        return [embedding for batch in results for embedding in batch]
+
 
 class AzureOpenAIEmbedding:
+
+    # Azure OpenAI accepts at most 2048 inputs per embeddings request
+    batch_size = 2048
+
     def __init__(self, api_endpoint: str, api_key: str, api_version: str, model: str):
         from openai import AzureOpenAI
 
-        self.client = AzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=api_endpoint)
+        self.client = AzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=api_endpoint, http_client=get_http_client())
         self.model = model
+        self._client_kwargs = {"api_key": api_key, "api_version": api_version, "azure_endpoint": api_endpoint}
+        self._async_client = None
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            from openai import AsyncAzureOpenAI
+
+            self._async_client = AsyncAzureOpenAI(**self._client_kwargs, http_client=get_async_http_client())
+        return self._async_client
 
     def get_text_embedding(self, text: str):
         embeddings = self.client.embeddings.create(input=[text], model=self.model).data[0].embedding
         return embeddings
 
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batched(texts, self.batch_size):
+            data = self.client.embeddings.create(input=batch, model=self.model).data
+            embeddings.extend(item.embedding for item in sorted(data, key=lambda item: item.index))
+        return embeddings
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        return (await self.aget_text_embeddings([text]))[0]
+
+    async def aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        import asyncio
+
+        client = self._get_async_client()
+        responses = await asyncio.gather(*[client.embeddings.create(input=batch, model=self.model) for batch in batched(texts, self.batch_size)])
+        return [item.embedding for response in responses for item in sorted(response.data, key=lambda item: item.index)]
+
 
 class OllamaEmbeddings:
 
@@ -143,29 +260,68 @@ class OllamaEmbeddings:
     #   "model": "mxbai-embed-large",
     #   "prompt": "Llamas are members of the camelid family"
     # }'
+    #
+    # Batches go to /api/embed, which takes a list of strings as "input" and returns "embeddings"
+
+    batch_size = 512
 
     def __init__(self, model: str, base_url: str, ollama_additional_kwargs: dict):
         self.model = model
         self.base_url = base_url
         self.ollama_additional_kwargs = ollama_additional_kwargs
 
-    def get_text_embedding(self, text: str):
-        import httpx
-
-        headers = {"Content-Type": "application/json"}
+    def _single_request(self, text: str) -> dict:
         json_data = {"model": self.model, "prompt": text}
         json_data.update(self.ollama_additional_kwargs)
+        return {"url": f"{self.base_url}/api/embeddings", "headers": {"Content-Type": "application/json"}, "json": json_data}
 
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self.base_url}/api/embeddings",
-                headers=headers,
-                json=json_data,
-            )
+    def _batch_request(self, texts: List[str]) -> dict:
+        json_data = {"model": self.model, "input": texts}
+        json_data.update(self.ollama_additional_kwargs)
+        return {"url": f"{self.base_url}/api/embed", "headers": {"Content-Type": "application/json"}, "json": json_data}
 
+    def get_text_embedding(self, text: str):
+        response = get_http_client().post(**self._single_request(text))
         response_json = response.json()
         return response_json["embedding"]
 
+    def get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for batch in batched(texts, self.batch_size):
+            response = get_http_client().post(**self._batch_request(batch))
+            embeddings.extend(response.json()["embeddings"])
+        return embeddings
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        response = await get_async_http_client().post(**self._single_request(text))
+        return response.json()["embedding"]
+
+    async def aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        import asyncio
+
+        client = get_async_http_client()
+        responses = await asyncio.gather(*[client.post(**self._batch_request(batch)) for batch in batched(texts, self.batch_size)])
+        return [embedding for response in responses for embedding in response.json()["embeddings"]]
+
+
+def get_text_embeddings(embed_model, texts: List[str]) -> List[List[float]]:
+    """Embed a list of texts with as few requests as the provider allows."""
+    if not texts:
+        return []
+    if hasattr(embed_model, "get_text_embeddings"):
+        return embed_model.get_text_embeddings(texts)
+    # LlamaIndex embedding models micro-batch internally (embed_batch_size)
+    return embed_model.get_text_embedding_batch(texts)
+
+
+async def aget_text_embeddings(embed_model, texts: List[str]) -> List[List[float]]:
+    """Async variant of get_text_embeddings."""
+    if not texts:
+        return []
+    if hasattr(embed_model, "aget_text_embeddings"):
+        return await embed_model.aget_text_embeddings(texts)
+    return await embed_model.aget_text_embedding_batch(texts)
+
 
 def query_embedding(embedding_model, query_text: str):
     """Generate padded embedding for querying database"""
@@ -177,6 +333,14 @@ def query_embedding(embedding_model, query_text: str):
 
 def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
     """Return LlamaIndex embedding model to use for embeddings"""
+    model = _create_embedding_model(config, user_id)
+    if USE_EMBEDDING_CACHE:
+        # Identical texts (topics, queries, unchanged fields) are served from the embedding cache
+        return CachedEmbeddingModel(model, config)
+    return model
+
+
+def _create_embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None):
 
     endpoint_type = config.embedding_endpoint_type
 
@@ -196,6 +360,8 @@ def embedding_model(config: EmbeddingConfig, user_id: Optional[uuid.UUID] = None
             api_base=config.embedding_endpoint,
             api_key=api_key,
             additional_kwargs=additional_kwargs,
+            # OpenAI accepts up to 2048 inputs per request, LlamaIndex defaults to 10
+            embed_batch_size=512,
         )
         return model
 
@@ -92,18 +92,22 @@ def episodic_memory_insert(self: "Agent", items: List[EpisodicEventForLLM]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.episodic_memory_manager.insert_event(
-            actor=self.user,
-            agent_state=self.agent_state,
-            timestamp=item['occurred_at'],
-            event_type=item['event_type'],
-            event_actor=item['actor'],
-            summary=item['summary'],
-            details=item['details'],
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.episodic_memory_manager.insert_events(
+        actor=self.user,
+        agent_state=self.agent_state,
+        events=[
+            dict(
+                timestamp=item['occurred_at'],
+                event_type=item['event_type'],
+                event_actor=item['actor'],
+                summary=item['summary'],
+                details=item['details'],
+                tree_path=item.get('tree_path')
+            )
+            for item in items
+        ],
+        organization_id=self.user.organization_id
+    )
     response = "Events inserted! Now you need to check if there are repeated events shown in the system prompt."
     return response
 
@@ -145,18 +149,22 @@ def episodic_memory_replace(self: "Agent", event_ids: List[str], new_items: List
     for event_id in event_ids:
         self.episodic_memory_manager.delete_event_by_id(event_id, actor=self.user)
 
-    for new_item in new_items:
-        self.episodic_memory_manager.insert_event(
-            actor=self.user,
-            agent_state=self.agent_state,
-            timestamp=new_item['occurred_at'],
-            event_type=new_item['event_type'],
-            event_actor=new_item['actor'],
-            summary=new_item['summary'],
-            details=new_item['details'],
-            organization_id=self.user.organization_id,
-            tree_path=new_item.get('tree_path')
-        )
+    self.episodic_memory_manager.insert_events(
+        actor=self.user,
+        agent_state=self.agent_state,
+        events=[
+            dict(
+                timestamp=item['occurred_at'],
+                event_type=item['event_type'],
+                event_actor=item['actor'],
+                summary=item['summary'],
+                details=item['details'],
+                tree_path=item.get('tree_path')
+            )
+            for item in new_items
+        ],
+        organization_id=self.user.organization_id
+    )
 
 def check_episodic_memory(self: "Agent", event_ids: List[str], timezone_str: str) -> List[EpisodicEventForLLM]:
     """
@@ -187,17 +195,15 @@ def resource_memory_insert(self: "Agent", items: List[ResourceMemoryItemBase]):
         Optional[str]: None is always returned as this function does not produce a response.
     """
 
-    for item in items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item['title'],
-            summary=item['summary'],
-            resource_type=item['resource_type'],
-            content=item['content'],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.resource_memory_manager.insert_resources(
+        agent_state=self.agent_state,
+        resources=[
+            dict(title=item['title'], summary=item['summary'], resource_type=item['resource_type'], content=item['content'], tree_path=item.get('tree_path'))
+            for item in items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def resource_memory_update(self: "Agent", old_ids: List[str], new_items: List[ResourceMemoryItemBase]):
     """
@@ -214,17 +220,15 @@ def resource_memory_update(self: "Agent", old_ids: List[str], new_items: List[Re
             actor=self.user
         )
     
-    for item in new_items:
-        self.resource_memory_manager.insert_resource(
-            agent_state=self.agent_state,
-            title=item['title'],
-            summary=item['summary'],
-            resource_type=item['resource_type'],
-            content=item['content'],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.resource_memory_manager.insert_resources(
+        agent_state=self.agent_state,
+        resources=[
+            dict(title=item['title'], summary=item['summary'], resource_type=item['resource_type'], content=item['content'], tree_path=item.get('tree_path'))
+            for item in new_items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase]):
     """
@@ -236,16 +240,15 @@ def procedural_memory_insert(self: "Agent", items: List[ProceduralMemoryItemBase
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            summary=item['summary'],
-            steps=item['steps'],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        procedures=[
+            dict(entry_type=item['entry_type'], summary=item['summary'], steps=item['steps'], tree_path=item.get('tree_path'))
+            for item in items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def procedural_memory_update(self: "Agent", old_ids: List[str], new_items: List[ProceduralMemoryItemBase]):
     """
@@ -264,16 +267,15 @@ def procedural_memory_update(self: "Agent", old_ids: List[str], new_items: List[
             actor=self.user
         )
     
-    for item in new_items:
-        self.procedural_memory_manager.insert_procedure(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            summary=item['summary'],
-            steps=item['steps'],
-            actor=self.user,
-            organization_id=self.user.organization_id,
-            tree_path=item.get('tree_path')
-        )
+    self.procedural_memory_manager.insert_procedures(
+        agent_state=self.agent_state,
+        procedures=[
+            dict(entry_type=item['entry_type'], summary=item['summary'], steps=item['steps'], tree_path=item.get('tree_path'))
+            for item in new_items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def check_semantic_memory(self: "Agent", semantic_item_ids: List[str], timezone_str: str) -> List[SemanticMemoryItemBase]:
     """
@@ -303,17 +305,15 @@ def semantic_memory_insert(self: "Agent", items: List[SemanticMemoryItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item['name'],
-            summary=item['summary'],
-            details=item['details'],
-            source=item['source'],
-            tree_path=item['tree_path'],
-            organization_id=self.user.organization_id,
-            actor=self.user
-        )
+    self.semantic_memory_manager.insert_semantic_items(
+        agent_state=self.agent_state,
+        items=[
+            dict(name=item['name'], summary=item['summary'], details=item['details'], source=item['source'], tree_path=item['tree_path'])
+            for item in items
+        ],
+        organization_id=self.user.organization_id,
+        actor=self.user
+    )
 
 def semantic_memory_update(self: "Agent", old_semantic_item_ids: List[str], new_items: List[SemanticMemoryItemBase]):
     """
@@ -333,19 +333,16 @@ def semantic_memory_update(self: "Agent", old_semantic_item_ids: List[str], new_
             actor=self.user
         )
     
-    new_ids = []
-    for item in new_items:
-        inserted_item = self.semantic_memory_manager.insert_semantic_item(
-            agent_state=self.agent_state,
-            name=item['name'],
-            summary=item['summary'],
-            details=item['details'],
-            source=item['source'],
-            actor=self.user,
-            tree_path=item['tree_path'],
-            organization_id=self.user.organization_id
-        )
-        new_ids.append(inserted_item.id)
+    inserted_items = self.semantic_memory_manager.insert_semantic_items(
+        agent_state=self.agent_state,
+        items=[
+            dict(name=item['name'], summary=item['summary'], details=item['details'], source=item['source'], tree_path=item['tree_path'])
+            for item in new_items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
+    new_ids = [inserted_item.id for inserted_item in inserted_items]
     
     message_to_return = "Semantic memory with the following ids have been deleted: " + str(old_semantic_item_ids) + f". New semantic memory items are created: {str(new_ids)}"
     return message_to_return
@@ -360,17 +357,15 @@ def knowledge_vault_insert(self: "Agent", items: List[KnowledgeVaultItemBase]):
     Returns:
         Optional[str]: None is always returned as this function does not produce a response.
     """
-    for item in items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            source=item['source'],
-            sensitivity=item['sensitivity'],
-            secret_value=item['secret_value'],
-            caption=item['caption'],
-            actor=self.user,
-            organization_id=self.user.organization_id
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        agent_state=self.agent_state,
+        items=[
+            dict(entry_type=item['entry_type'], source=item['source'], sensitivity=item['sensitivity'], secret_value=item['secret_value'], caption=item['caption'])
+            for item in items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def knowledge_vault_update(self: "Agent", old_ids: List[str], new_items: List[KnowledgeVaultItemBase]):
     """
@@ -389,17 +384,15 @@ def knowledge_vault_update(self: "Agent", old_ids: List[str], new_items: List[Kn
             actor=self.user
         )
     
-    for item in new_items:
-        self.knowledge_vault_manager.insert_knowledge(
-            agent_state=self.agent_state,
-            entry_type=item['entry_type'],
-            source=item['source'],
-            sensitivity=item['sensitivity'],
-            secret_value=item['secret_value'],
-            caption=item['caption'],
-            actor=self.user,
-            organization_id=self.user.organization_id
-        )
+    self.knowledge_vault_manager.insert_knowledge_items(
+        agent_state=self.agent_state,
+        items=[
+            dict(entry_type=item['entry_type'], source=item['source'], sensitivity=item['sensitivity'], secret_value=item['secret_value'], caption=item['caption'])
+            for item in new_items
+        ],
+        actor=self.user,
+        organization_id=self.user.organization_id
+    )
 
 def trigger_memory_update_with_instruction(self: "Agent", user_message: object, instruction: str, memory_type: str) -> Optional[str]:
     """
@@ -413,10 +406,9 @@ def trigger_memory_update_with_instruction(self: "Agent", user_message: object,
         Optional[str]: None is always returned as this function does not produce a response.
     """
 
-    from mirix import create_client
+    from mirix.client.client import get_shared_client
 
-    client = create_client()
-    agents = client.list_agents()
+    client = get_shared_client()
 
     # Validate that user_message is a dictionary
     if not isinstance(user_message, dict):
@@ -440,11 +432,7 @@ def trigger_memory_update_with_instruction(self: "Agent", user_message: object,
     else:
         raise ValueError(f"Memory type '{memory_type}' is not supported. Please choose from 'core', 'episodic', 'resource', 'procedural', 'knowledge_vault', 'semantic'.")
 
-    matching_agent = None
-    for agent in agents:
-        if agent.agent_type == agent_type:
-            matching_agent = agent
-            break
+    matching_agent = client.get_agent_by_type(agent_type)
     
     if matching_agent is None:
         raise ValueError(f"No agent found with type '{agent_type}'")
@@ -472,10 +460,9 @@ def trigger_memory_update(self: "Agent", user_message: object, memory_types: Lis
         Optional[str]: None is always returned as this function does not produce a response.
     """
 
-    from mirix import create_client
+    from mirix.client.client import get_shared_client
 
-    client = create_client()
-    agents = client.list_agents()
+    client = get_shared_client()
 
     # Validate that user_message is a dictionary
     if not isinstance(user_message, dict):
@@ -530,12 +517,12 @@ def trigger_memory_update(self: "Agent", user_message: object, memory_types: Lis
             with ThreadPoolExecutor(max_workers=len(valid_agent_types)) as pool:
                 futures = []
                 for agent_type in valid_agent_types:
-                    matching_agents = [agent for agent in agents if agent.agent_type == agent_type]
-                    if not matching_agents:
+                    matching_agent = client.get_agent_by_type(agent_type)
+                    if matching_agent is None:
                         raise ValueError(f"No agent found with type '{agent_type}'")
                     futures.append(
                         pool.submit(message_queue.send_message_in_queue, 
-                                client, matching_agents[0].id, payloads, agent_type)
+                                client, matching_agent.id, payloads, agent_type)
                     )
                 
                 for future in tqdm(as_completed(futures), total=len(futures)):
@@ -571,11 +558,7 @@ def trigger_memory_update(self: "Agent", user_message: object, memory_types: Lis
             else:
                 raise ValueError(f"Memory type '{memory_type}' is not supported. Please choose from 'core', 'episodic', 'resource', 'procedural', 'knowledge_vault', 'semantic'.")
 
-            matching_agent = None
-            for agent in agents:
-                if agent.agent_type == agent_type:
-                    matching_agent = agent
-                    break
+            matching_agent = client.get_agent_by_type(agent_type)
             
             if matching_agent is None:
                 raise ValueError(f"No agent found with type '{agent_type}'")
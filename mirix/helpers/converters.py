@@ -7,6 +7,7 @@ from mirix.schemas.openai.openai import ToolCall as OpenAIToolCall
 from mirix.schemas.openai.openai import Function as OpenAIFunction
 from sqlalchemy import Dialect
 
+from mirix.orm.sqlite_functions import decode_vector, encode_vector
 from mirix.schemas.agent import AgentStepState
 from mirix.schemas.embedding_config import EmbeddingConfig
 from mirix.schemas.enums import ProviderType, ToolRuleType
@@ -264,22 +265,20 @@ def deserialize_message_content(data: Optional[List[Dict]]) -> List[MessageConte
 
 
 def serialize_vector(vector: Optional[Union[List[float], np.ndarray]]) -> Optional[bytes]:
-    """Convert a NumPy array or list into a base64-encoded byte string."""
+    """Convert a NumPy array or list into the compact byte format used on SQLite."""
     if vector is None:
         return None
-    if isinstance(vector, list):
-        vector = np.array(vector, dtype=np.float32)
 
-    return base64.b64encode(vector.tobytes())
+    return encode_vector(vector)
 
 
 def deserialize_vector(data: Optional[bytes], dialect: Dialect) -> Optional[np.ndarray]:
-    """Convert a base64-encoded byte string back into a NumPy array."""
+    """Convert stored bytes (compact or legacy base64 on SQLite, raw float32 otherwise) back into a NumPy array."""
     if not data:
         return None
 
     if dialect.name == "sqlite":
-        data = base64.b64decode(data)
+        return decode_vector(data)
 
     return np.frombuffer(data, dtype=np.float32)
 
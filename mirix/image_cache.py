@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from mirix.constants import IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_MAX_PATHS, USE_IMAGE_CACHE
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def _target_size(width: int, height: int, detail: Optional[str]) -> Tuple[int, int]:
+    """The size the provider would scale an image to for the given detail level (OpenAI vision rules)."""
+    if detail == "low":
+        scale = min(1.0, 512 / max(width, height))
+    elif detail == "high":
+        # Fit in a 2048x2048 square, then make the shortest side at most 768px
+        scale = min(1.0, 2048 / max(width, height), 768 / min(width, height))
+    else:
+        scale = 1.0
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _encode(content: bytes, mime_type: str, detail: Optional[str]) -> str:
+    """Base64-encode an image as a data URL, downscaling it first if the detail level allows."""
+    if detail in ("low", "high"):
+        try:
+            from PIL import Image
+
+            with Image.open(io.BytesIO(content)) as image:
+                size = _target_size(image.width, image.height, detail)
+                if size != image.size:
+                    image = image.resize(size, Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    if mime_type == "image/jpeg":
+                        image.convert("RGB").save(buffer, format="JPEG", quality=90)
+                    else:
+                        image.save(buffer, format="PNG")
+                        mime_type = "image/png"
+                    content = buffer.getvalue()
+        except Exception as e:
+            logger.warning("Could not downscale image, sending it as is: %s", e)
+    return f"data:{mime_type};base64,{base64.b64encode(content).decode('utf-8')}"
+
+
+class EncodedImageCache:
+    """
+    Bounded LRU of base64 data URLs, keyed by (sha256 of the file content, mime type, detail level).
+
+    The same screenshot is sent to every memory agent of an absorption cycle and again on each chained
+    step. With this cache it is read and encoded once. The content digest of a path is remembered as long
+    as its size and modification time do not change, so unchanged files are not even re-read.
+    """
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES, max_paths: int = IMAGE_CACHE_MAX_PATHS):
+        self.max_bytes = max_bytes
+        self.max_paths = max_paths
+        self._entries: "OrderedDict[Tuple[str, str, Optional[str]], str]" = OrderedDict()
+        self._digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _digest(self, image_path: str) -> Tuple[str, Optional[bytes]]:
+        """Return the content digest of a file, and its content if it had to be read."""
+        stat = os.stat(image_path)
+        path_key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(path_key)
+            if digest is not None:
+                self._digests.move_to_end(path_key)
+                return digest, None
+
+        with open(image_path, "rb") as img_file:
+            content = img_file.read()
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            self._digests[path_key] = digest
+            while len(self._digests) > self.max_paths:
+                self._digests.popitem(last=False)
+        return digest, content
+
+    def get_data_url(self, image_path: str, mime_type: str, detail: Optional[str] = None) -> str:
+        digest, content = self._digest(image_path)
+        key = (digest, mime_type, detail)
+        with self._lock:
+            data_url = self._entries.get(key)
+            if data_url is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return data_url
+            self._stats["misses"] += 1
+
+        if content is None:
+            with open(image_path, "rb") as img_file:
+                content = img_file.read()
+        data_url = _encode(content, mime_type, detail)
+
+        with self._lock:
+            if key not in self._entries and len(data_url) <= self.max_bytes:
+                self._entries[key] = data_url
+                self._size += len(data_url)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+                    self._stats["evictions"] += 1
+        return data_url
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._size
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[EncodedImageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> EncodedImageCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EncodedImageCache()
+    return _cache
+
+
+def encode_image_data_url(image_path: str, mime_type: str, detail: Optional[str] = None) -> str:
+    """
+    Encode an image file as a data URL (e.g. "data:image/png;base64,..."), scaled down for `detail`
+    "low" or "high" to the size the provider would use anyway.
+    """
+    if USE_IMAGE_CACHE:
+        return get_image_cache().get_data_url(image_path, mime_type, detail)
+    with open(image_path, "rb") as img_file:
+        return _encode(img_file.read(), mime_type, detail)
@@ -23,6 +23,7 @@ from mirix.errors import (
     LLMUnprocessableEntityError,
 )
 from mirix.helpers.datetime_helpers import get_utc_time
+from mirix.llm_api.client_registry import get_async_client, get_client
 from mirix.llm_api.helpers import add_inner_thoughts_to_functions, unpack_all_inner_thoughts_from_kwargs
 from mirix.llm_api.llm_client_base import LLMClientBase
 from mirix.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION
@@ -113,9 +114,10 @@ class AnthropicClient(LLMClientBase):
     @trace_method
     def _get_anthropic_client(self, async_client: bool = False) -> Union[anthropic.AsyncAnthropic, anthropic.Anthropic]:
         override_key = ProviderManager().get_anthropic_override_key()
+        kwargs = {"api_key": override_key} if override_key else {}
         if async_client:
-            return anthropic.AsyncAnthropic(api_key=override_key) if override_key else anthropic.AsyncAnthropic()
-        return anthropic.Anthropic(api_key=override_key) if override_key else anthropic.Anthropic()
+            return get_async_client(anthropic.AsyncAnthropic, http_client_factory=anthropic.DefaultAsyncHttpxClient, **kwargs)
+        return get_client(anthropic.Anthropic, http_client_factory=anthropic.DefaultHttpxClient, **kwargs)
 
     @trace_method
     def build_request_data(
@@ -1,10 +1,11 @@
 import os
 from typing import List, Optional
 
-from openai import AsyncAzureOpenAI, AsyncStream, AzureOpenAI, Stream
+from openai import AsyncAzureOpenAI, AsyncStream, AzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, Stream
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
+from mirix.llm_api.client_registry import get_async_client, get_client
 from mirix.llm_api.openai_client import OpenAIClient
 from mirix.log import get_logger
 from mirix.schemas.llm_config import LLMConfig
@@ -57,6 +58,13 @@ class AzureOpenAIClient(OpenAIClient):
         logger.debug(f"Azure OpenAI client initialized with endpoint: {azure_endpoint}, deployment: {azure_deployment}")
         return kwargs
 
+    def _get_client(self) -> AzureOpenAI:
+        """Get the shared, keep-alive client for this endpoint, API version and key."""
+        return get_client(AzureOpenAI, http_client_factory=DefaultHttpxClient, **self._prepare_client_kwargs())
+
+    def _get_async_client(self) -> AsyncAzureOpenAI:
+        return get_async_client(AsyncAzureOpenAI, http_client_factory=DefaultAsyncHttpxClient, **self._prepare_client_kwargs())
+
     def build_request_data(
         self,
         messages: List[PydanticMessage],
@@ -90,7 +98,7 @@ class AzureOpenAIClient(OpenAIClient):
         """
         Performs synchronous request to Azure OpenAI API.
         """
-        client = AzureOpenAI(**self._prepare_client_kwargs())
+        client = self._get_client()
         response: ChatCompletion = client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -98,7 +106,7 @@ class AzureOpenAIClient(OpenAIClient):
         """
         Performs asynchronous request to Azure OpenAI API.
         """
-        client = AsyncAzureOpenAI(**self._prepare_client_kwargs())
+        client = self._get_async_client()
         response: ChatCompletion = await client.chat.completions.create(**request_data)
         return response.model_dump()
 
@@ -106,7 +114,7 @@ class AzureOpenAIClient(OpenAIClient):
         """
         Performs streaming request to Azure OpenAI API.
         """
-        client = AzureOpenAI(**self._prepare_client_kwargs())
+        client = self._get_client()
         response_stream: Stream[ChatCompletionChunk] = client.chat.completions.create(**request_data, stream=True)
         return response_stream
 
@@ -114,6 +122,6 @@ class AzureOpenAIClient(OpenAIClient):
         """
         Performs asynchronous streaming request to Azure OpenAI API.
         """
-        client = AsyncAzureOpenAI(**self._prepare_client_kwargs())
+        client = self._get_async_client()
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(**request_data, stream=True)
         return response_stream 
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from mirix.constants import LLM_CLIENT_CACHE_SIZE
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP/2 lets concurrent requests of all agents share a single connection per provider, but
+# httpx only supports it when the optional `h2` package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Process-wide provider SDK clients, keyed by (client class, endpoint, credentials, ...). Each
+# client owns a keep-alive connection pool, so reusing it skips the TCP and TLS handshakes. The least
+# recently used clients beyond LLM_CLIENT_CACHE_SIZE are closed, e.g. after many credential rotations
+_clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+# Async clients are bound to the event loop they were first used on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, OrderedDict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+_requests_session = None
+
+
+def _client_key(factory: Callable, kwargs: Dict[str, Any]) -> Hashable:
+    return (factory, tuple(sorted(kwargs.items())))
+
+
+def _build(factory: Callable, http_client_factory: Optional[Callable], kwargs: Dict[str, Any]) -> Any:
+    if http_client_factory is not None and HTTP2_AVAILABLE:
+        kwargs = dict(kwargs, http_client=http_client_factory(http2=True))
+    logger.debug(f"Creating {factory.__name__} client for {kwargs.get('base_url') or kwargs.get('azure_endpoint') or 'default endpoint'}")
+    return factory(**kwargs)
+
+
+def _close(client: Any) -> None:
+    try:
+        client.close()
+    except Exception as e:
+        logger.warning(f"Failed to close {type(client).__name__} client: {e}")
+
+
+async def _aclose(client: Any) -> None:
+    try:
+        await client.close()
+    except Exception as e:
+        logger.warning(f"Failed to close {type(client).__name__} client: {e}")
+
+
+def _close_async(loop: asyncio.AbstractEventLoop, client: Any) -> None:
+    """Close an async client on the event loop it is bound to, unless that loop is already closed."""
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(loop.create_task, _aclose(client))
+
+
+def _remember(clients: "OrderedDict[Hashable, Any]", key: Hashable, client: Any) -> List[Any]:
+    """Cache `client` under `key` and return the least recently used clients evicted to make room."""
+    clients[key] = client
+    evicted = []
+    while len(clients) > LLM_CLIENT_CACHE_SIZE:
+        evicted.append(clients.popitem(last=False)[1])
+    return evicted
+
+
+def get_client(factory: Callable, http_client_factory: Optional[Callable] = None, **kwargs) -> Any:
+    """
+    Get the shared client built by `factory(**kwargs)`, creating it on first use.
+
+    Args:
+        factory: Provider SDK client class, e.g. `openai.OpenAI`
+        http_client_factory: Class of the SDK's default httpx client (e.g. `openai.DefaultHttpxClient`),
+            used to enable HTTP/2 when available
+        **kwargs: Client arguments (endpoint, api key, ...). Different arguments get different clients,
+            so a changed credential transparently gets a new client.
+    """
+    key = _client_key(factory, kwargs)
+    evicted = []
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _build(factory, http_client_factory, kwargs)
+            evicted = _remember(_clients, key, client)
+        else:
+            _clients.move_to_end(key)
+    # Requests already running on an evicted client fail, new ones get a fresh client
+    for evicted_client in evicted:
+        _close(evicted_client)
+    return client
+
+
+def get_async_client(factory: Callable, http_client_factory: Optional[Callable] = None, **kwargs) -> Any:
+    """Same as `get_client` for async SDK clients, with one client per running event loop."""
+    loop = asyncio.get_running_loop()
+    key = _client_key(factory, kwargs)
+    evicted = []
+    with _lock:
+        clients = _async_clients.setdefault(loop, OrderedDict())
+        client = clients.get(key)
+        if client is None:
+            client = _build(factory, http_client_factory, kwargs)
+            evicted = _remember(clients, key, client)
+        else:
+            clients.move_to_end(key)
+    for evicted_client in evicted:
+        _close_async(loop, evicted_client)
+    return client
+
+
+def get_requests_session():
+    """Get the shared keep-alive `requests.Session` used for plain REST calls to providers."""
+    global _requests_session
+    if _requests_session is None:
+        with _lock:
+            if _requests_session is None:
+                import requests
+
+                _requests_session = requests.Session()
+    return _requests_session
+
+
+def clear_clients() -> None:
+    """Close and drop every cached client, e.g. after credentials were changed or revoked."""
+    with _lock:
+        clients = list(_clients.values())
+        async_clients = [(loop, client) for loop, loop_clients in _async_clients.items() for client in loop_clients.values()]
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        _close(client)
+    for loop, client in async_clients:
+        _close_async(loop, client)
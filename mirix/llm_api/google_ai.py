@@ -5,12 +5,11 @@ from typing import List, Optional, Tuple
 
 import requests
 
-import tiktoken
 from mirix.constants import NON_USER_MSG_PREFIX, MAX_IMAGES_TO_PROCESS
 from mirix.llm_api.helpers import make_post_request
 from mirix.schemas.openai.chat_completion_request import Tool
 from mirix.schemas.openai.chat_completion_response import ChatCompletionResponse, Choice, FunctionCall, Message, ToolCall, UsageStatistics
-from mirix.utils import get_tool_call_id, get_utc_time, json_dumps, clean_json_string_extra_backslash, count_tokens
+from mirix.utils import get_tool_call_id, get_utc_time, json_dumps, clean_json_string_extra_backslash, count_tokens, get_encoding
 
 
 def get_gemini_endpoint_and_headers(
@@ -496,5 +495,4 @@ def google_ai_chat_completions_request(
     )
 
 def count_tokens(s: str, model: str = "gpt-4") -> int:
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(s))
\ No newline at end of file
+    return len(get_encoding(model).encode(s))
\ No newline at end of file
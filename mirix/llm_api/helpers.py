@@ -1,5 +1,6 @@
 import copy
 import json
+import re
 import warnings
 from collections import OrderedDict
 from typing import Any, List, Union
@@ -7,10 +8,11 @@ from typing import Any, List, Union
 import requests
 
 from mirix.constants import OPENAI_CONTEXT_WINDOW_ERROR_SUBSTRING
+from mirix.llm_api.client_registry import get_requests_session
 from mirix.schemas.message import Message
 from mirix.schemas.openai.chat_completion_response import ChatCompletionResponse, Choice
 from mirix.settings import summarizer_settings
-from mirix.utils import count_tokens, json_dumps, printd
+from mirix.utils import json_dumps, printd
 from mirix.schemas.enums import MessageRole
 
 
@@ -138,7 +140,7 @@ def make_post_request(url: str, headers: dict[str, str], data: dict[str, Any]) -
     printd(f"Sending request to {url}")
     try:
 
-        response = requests.post(url, headers=headers, json=data)
+        response = get_requests_session().post(url, headers=headers, json=data)
         printd(f"Response status code: {response.status_code}")
 
         # Raise for 4XX/5XX HTTP errors
@@ -301,6 +303,58 @@ def unpack_inner_thoughts_from_kwargs(choice: Choice, inner_thoughts_key: str) -
     return rewritten_choice
 
 
+class JSONStringFieldStream:
+    """
+    Incrementally decodes the value of a string field of a JSON object that is being streamed,
+    e.g. the `message` argument of a tool call whose arguments are still being generated.
+    """
+
+    def __init__(self, field: str):
+        self.field_pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self.buffer = ""
+        self.position = None  # index of the next undecoded character of the value
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add the next chunk of the JSON object and return the newly decoded part of the value."""
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.position is None:
+            match = self.field_pattern.search(self.buffer)
+            if match is None:
+                return ""
+            self.position = match.end()
+
+        # Find the longest prefix of the remaining value that does not end in an incomplete
+        # escape sequence (or in the first half of a UTF-16 surrogate pair)
+        end = self.position
+        while end < len(self.buffer):
+            char = self.buffer[end]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                end += 1
+                continue
+            if end + 1 >= len(self.buffer):
+                break
+            if self.buffer[end + 1] != "u":
+                end += 2
+                continue
+            if end + 6 > len(self.buffer):
+                break
+            if 0xD800 <= int(self.buffer[end + 2 : end + 6], 16) <= 0xDBFF:
+                if end + 12 > len(self.buffer):
+                    break
+                end += 6
+            end += 6
+
+        decoded = json.loads('"' + self.buffer[self.position : end] + '"')
+        self.position = end
+        return decoded
+
+
 def calculate_summarizer_cutoff(in_context_messages: List[Message], token_counts: List[int], logger: "logging.Logger") -> int:
     if len(in_context_messages) != len(token_counts):
         raise ValueError(
@@ -347,9 +401,8 @@ def calculate_summarizer_cutoff(in_context_messages: List[Message], token_counts
 
 
 def get_token_counts_for_messages(in_context_messages: List[Message]) -> List[int]:
-    in_context_messages_openai = [m.to_openai_dict() for m in in_context_messages]
-    token_counts = [count_tokens(str(msg)) for msg in in_context_messages_openai]
-    return token_counts
+    # Counted once when each message was created, see Message.get_token_count
+    return [m.get_token_count() for m in in_context_messages]
 
 
 def is_context_overflow_error(exception: Union[requests.exceptions.RequestException, Exception]) -> bool:
@@ -1,5 +1,6 @@
+import asyncio
 from abc import abstractmethod
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Union
 
 from mirix.errors import LLMError
 from mirix.schemas.llm_config import LLMConfig
@@ -52,6 +53,62 @@ class LLMClientBase:
         
         return chat_completion_data
 
+    async def send_llm_request_async(
+        self,
+        messages: List[Message],
+        tools: Optional[List[dict]] = None,
+        force_tool_call: Optional[str] = None,
+        get_input_data_for_debugging: bool = False,
+        existing_file_uris: Optional[List[str]] = None,
+    ) -> ChatCompletionResponse:
+        """
+        Asynchronous version of `send_llm_request`.
+
+        Building the request may read files and the database, so it runs in a worker thread;
+        the request itself is awaited on the event loop.
+        """
+        request_data = await asyncio.to_thread(
+            self.build_request_data, messages, self.llm_config, tools, force_tool_call, existing_file_uris=existing_file_uris
+        )
+
+        if get_input_data_for_debugging:
+            return request_data
+
+        try:
+            response_data = await self.request_async(request_data)
+        except Exception as e:
+            raise self.handle_llm_error(e)
+
+        return self.convert_response_to_chat_completion(response_data, messages)
+
+    def send_llm_request_streaming(
+        self,
+        messages: List[Message],
+        tools: Optional[List[dict]] = None,
+        force_tool_call: Optional[str] = None,
+        existing_file_uris: Optional[List[str]] = None,
+        on_delta: Optional[Callable[..., None]] = None,
+    ) -> ChatCompletionResponse:
+        """
+        Issues a streaming request to the downstream model endpoint and returns the complete response.
+
+        `on_delta(delta, tool_call_index=None, tool_name=None)` is called with each piece of assistant
+        text, and with each piece of tool call arguments along with the index and name of the tool call.
+        Clients without streaming support return the complete response without calling it.
+        """
+        return self.send_llm_request(messages, tools, force_tool_call=force_tool_call, existing_file_uris=existing_file_uris)
+
+    async def send_llm_request_streaming_async(
+        self,
+        messages: List[Message],
+        tools: Optional[List[dict]] = None,
+        force_tool_call: Optional[str] = None,
+        existing_file_uris: Optional[List[str]] = None,
+        on_delta: Optional[Callable[..., None]] = None,
+    ) -> ChatCompletionResponse:
+        """Asynchronous version of `send_llm_request_streaming`."""
+        return await self.send_llm_request_async(messages, tools, force_tool_call=force_tool_call, existing_file_uris=existing_file_uris)
+
     @abstractmethod
     def build_request_data(
         self,
@@ -73,6 +130,13 @@ class LLMClientBase:
         """
         raise NotImplementedError
 
+    async def request_async(self, request_data: dict) -> dict:
+        """
+        Performs underlying asynchronous request to llm and returns raw response.
+        Clients without an async SDK run `request` in a worker thread.
+        """
+        return await asyncio.to_thread(self.request, request_data)
+
     @abstractmethod
     def convert_response_to_chat_completion(
         self,
@@ -1,11 +1,12 @@
 import os
 import json
-import base64
-from typing import List, Optional
+import asyncio
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
 from mirix.utils import parse_json
 
 import openai
-from openai import AsyncOpenAI, AsyncStream, OpenAI, Stream
+from openai import AsyncOpenAI, AsyncStream, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI, Stream
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 
@@ -20,6 +21,8 @@ from mirix.errors import (
     LLMServerError,
     LLMUnprocessableEntityError,
 )
+from mirix.image_cache import encode_image_data_url
+from mirix.llm_api.client_registry import get_async_client, get_client
 from mirix.llm_api.helpers import add_inner_thoughts_to_functions, convert_to_structured_output, unpack_all_inner_thoughts_from_kwargs
 from mirix.llm_api.llm_client_base import LLMClientBase
 from mirix.constants import INNER_THOUGHTS_KWARG, INNER_THOUGHTS_KWARG_DESCRIPTION, INNER_THOUGHTS_KWARG_DESCRIPTION_GO_FIRST
@@ -39,12 +42,13 @@ from mirix.settings import model_settings
 logger = get_logger(__name__)
 
 
-def encode_image(image_path: str) -> str:
+def encode_image(image_path: str, detail: Optional[str] = None) -> str:
     """
     Encode an image file to base64 format with data URL prefix.
     
     Args:
         image_path: Path to the image file
+        detail: Detail level the image is sent with, used to scale it down to the size the API would use
         
     Returns:
         Base64 encoded image with data URL prefix (e.g., "data:image/jpeg;base64,...")
@@ -57,9 +61,70 @@ def encode_image(image_path: str) -> str:
         # Default to jpeg if we can't determine the type
         mime_type = 'image/jpeg'
     
-    with open(image_path, "rb") as img_file:
-        base64_string = base64.b64encode(img_file.read()).decode("utf-8")
-        return f"data:{mime_type};base64,{base64_string}"
+    # Encoded once per file content and detail level, then served from the shared image cache
+    return encode_image_data_url(image_path, mime_type, detail)
+
+
+class ChatCompletionChunkAccumulator:
+    """
+    Rebuilds a chat completion from its streamed chunks, reporting each piece of assistant text
+    and tool call arguments to `on_delta` as it arrives (see `LLMClientBase.send_llm_request_streaming`).
+    """
+
+    def __init__(self, on_delta: Optional[Callable[..., None]] = None):
+        self.on_delta = on_delta
+        self.completion: Optional[dict] = None
+        self.choices: Dict[int, dict] = {}
+        self.usage: Optional[dict] = None
+
+    def add(self, chunk: ChatCompletionChunk) -> None:
+        if self.completion is None:
+            self.completion = {"id": chunk.id, "created": chunk.created, "model": chunk.model, "system_fingerprint": chunk.system_fingerprint}
+        # With `stream_options.include_usage`, the last chunk has the usage and no choices
+        if chunk.usage is not None:
+            self.usage = chunk.usage.model_dump()
+
+        for chunk_choice in chunk.choices:
+            choice = self.choices.setdefault(
+                chunk_choice.index,
+                {"index": chunk_choice.index, "finish_reason": None, "message": {"role": "assistant", "content": None, "tool_calls": None}},
+            )
+            if chunk_choice.finish_reason is not None:
+                choice["finish_reason"] = chunk_choice.finish_reason
+
+            message = choice["message"]
+            delta = chunk_choice.delta
+            if delta.content:
+                message["content"] = (message["content"] or "") + delta.content
+                if self.on_delta:
+                    self.on_delta(delta.content)
+
+            for tool_call_delta in delta.tool_calls or []:
+                tool_calls = message["tool_calls"] = message["tool_calls"] or []
+                while len(tool_calls) <= tool_call_delta.index:
+                    tool_calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+                tool_call = tool_calls[tool_call_delta.index]
+                if tool_call_delta.id:
+                    tool_call["id"] = tool_call_delta.id
+                if tool_call_delta.function is None:
+                    continue
+                if tool_call_delta.function.name:
+                    tool_call["function"]["name"] = tool_call_delta.function.name
+                if tool_call_delta.function.arguments:
+                    tool_call["function"]["arguments"] += tool_call_delta.function.arguments
+                    if self.on_delta:
+                        self.on_delta(tool_call_delta.function.arguments, tool_call_delta.index, tool_call["function"]["name"])
+
+    def response_data(self) -> dict:
+        """The accumulated response, in the format of `ChatCompletion.model_dump()`."""
+        if self.completion is None:
+            raise ValueError("API call returned an empty stream")
+        return dict(
+            self.completion,
+            object="chat.completion",
+            choices=[self.choices[index] for index in sorted(self.choices)],
+            usage=self.usage or {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        )
 
 
 class OpenAIClient(LLMClientBase):
@@ -77,6 +142,13 @@ class OpenAIClient(LLMClientBase):
         kwargs = {"api_key": api_key, "base_url": self.llm_config.model_endpoint}
         return kwargs
 
+    def _get_client(self) -> OpenAI:
+        """Get the shared, keep-alive client for this endpoint and key."""
+        return get_client(OpenAI, http_client_factory=DefaultHttpxClient, **self._prepare_client_kwargs())
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        return get_async_client(AsyncOpenAI, http_client_factory=DefaultAsyncHttpxClient, **self._prepare_client_kwargs())
+
     def build_request_data(
         self,
         messages: List[PydanticMessage],
@@ -213,7 +285,7 @@ class OpenAIClient(LLMClientBase):
                         elif file.file_path is not None:
                             message_content.append({
                                 'type': 'image_url',
-                                'image_url': {'url': encode_image(file.file_path), 'detail': m['detail']},
+                                'image_url': {'url': encode_image(file.file_path, m['detail']), 'detail': m['detail']},
                             })
                         else:
                             raise ValueError(f"File {file.file_path} has no source_url or file_path")
@@ -257,7 +329,7 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying synchronous request to OpenAI API and returns raw response dict.
         """
-        client = OpenAI(**self._prepare_client_kwargs())
+        client = self._get_client()
         response: ChatCompletion = client.chat.completions.create(**request_data)
         if not response.object:
             response.object = 'chat.completion'
@@ -267,8 +339,10 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying asynchronous request to OpenAI API and returns raw response dict.
         """
-        client = AsyncOpenAI(**self._prepare_client_kwargs())
+        client = self._get_async_client()
         response: ChatCompletion = await client.chat.completions.create(**request_data)
+        if not response.object:
+            response.object = 'chat.completion'
         return response.model_dump()
 
     def convert_response_to_chat_completion(
@@ -296,7 +370,7 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying streaming request to OpenAI and returns the stream iterator.
         """
-        client = OpenAI(**self._prepare_client_kwargs())
+        client = self._get_client()
         response_stream: Stream[ChatCompletionChunk] = client.chat.completions.create(**request_data, stream=True)
         return response_stream
 
@@ -304,10 +378,67 @@ class OpenAIClient(LLMClientBase):
         """
         Performs underlying asynchronous streaming request to OpenAI and returns the async stream iterator.
         """
-        client = AsyncOpenAI(**self._prepare_client_kwargs())
+        client = self._get_async_client()
         response_stream: AsyncStream[ChatCompletionChunk] = await client.chat.completions.create(**request_data, stream=True)
         return response_stream
 
+    def _add_stream_options(self, request_data: dict) -> None:
+        """
+        Ask for the token usage in the last chunk of the stream. Only the official OpenAI API is sent
+        `stream_options`: OpenAI-compatible servers may reject it with a 400, and their streamed
+        responses then report no usage.
+        """
+        if urlparse(self.llm_config.model_endpoint or "").hostname == "api.openai.com":
+            request_data["stream_options"] = {"include_usage": True}
+
+    def send_llm_request_streaming(
+        self,
+        messages: List[PydanticMessage],
+        tools: Optional[List[dict]] = None,
+        force_tool_call: Optional[str] = None,
+        existing_file_uris: Optional[List[str]] = None,
+        on_delta: Optional[Callable[..., None]] = None,
+    ) -> ChatCompletionResponse:
+        """
+        Streams the completion, reporting text and tool argument deltas to `on_delta`, and returns the complete response.
+        """
+        request_data = self.build_request_data(messages, self.llm_config, tools, force_tool_call, existing_file_uris=existing_file_uris)
+        self._add_stream_options(request_data)
+
+        accumulator = ChatCompletionChunkAccumulator(on_delta)
+        try:
+            for chunk in self.stream(request_data):
+                accumulator.add(chunk)
+        except Exception as e:
+            raise self.handle_llm_error(e)
+
+        return self.convert_response_to_chat_completion(accumulator.response_data(), messages)
+
+    async def send_llm_request_streaming_async(
+        self,
+        messages: List[PydanticMessage],
+        tools: Optional[List[dict]] = None,
+        force_tool_call: Optional[str] = None,
+        existing_file_uris: Optional[List[str]] = None,
+        on_delta: Optional[Callable[..., None]] = None,
+    ) -> ChatCompletionResponse:
+        """
+        Asynchronous version of `send_llm_request_streaming`.
+        """
+        request_data = await asyncio.to_thread(
+            self.build_request_data, messages, self.llm_config, tools, force_tool_call, existing_file_uris=existing_file_uris
+        )
+        self._add_stream_options(request_data)
+
+        accumulator = ChatCompletionChunkAccumulator(on_delta)
+        try:
+            async for chunk in await self.stream_async(request_data):
+                accumulator.add(chunk)
+        except Exception as e:
+            raise self.handle_llm_error(e)
+
+        return self.convert_response_to_chat_completion(accumulator.response_data(), messages)
+
     def handle_llm_error(self, e: Exception) -> Exception:
         """
         Maps OpenAI-specific errors to common LLMError types.
@@ -5,6 +5,7 @@ from mirix.orm.block import Block
 from mirix.orm.blocks_agents import BlocksAgents
 from mirix.orm.file import FileMetadata
 from mirix.orm.message import Message
+from mirix.orm.messages_agents import MessagesAgents
 from mirix.orm.organization import Organization
 from mirix.orm.provider import Provider
 from mirix.orm.sandbox_config import AgentEnvironmentVariable, SandboxConfig, SandboxEnvironmentVariable
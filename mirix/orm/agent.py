@@ -44,10 +44,9 @@ class Agent(SqlalchemyBase, OrganizationMixin):
     # Current Topic
     topic: Mapped[Optional[str]] = mapped_column(String, nullable=True, doc="The current topic between the agent and the user.")
 
-    # In context memory
-    # TODO: This should be a separate mapping table
-    # This is dangerously flexible with the JSON type
-    message_ids: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True, doc="List of message IDs in in-context memory.")
+    # In context memory: only the shared system message, the in-context messages of each user
+    # are stored in the messages_agents table
+    message_ids: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True, doc="ID of the system message of the agent, as a one-element list.")
 
     # Metadata and configs
     metadata_: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, doc="metadata for the agent.")
@@ -78,7 +77,7 @@ class Agent(SqlalchemyBase, OrganizationMixin):
     messages: Mapped[List["Message"]] = relationship(
         "Message",
         back_populates="agent",
-        lazy="selectin",
+        lazy="select",  # The full history is only loaded when accessed
         cascade="all, delete-orphan",  # Ensure messages are deleted when the agent is deleted
         passive_deletes=True,
     )
@@ -115,4 +114,6 @@ class Agent(SqlalchemyBase, OrganizationMixin):
             "tool_exec_environment_variables": self.tool_exec_environment_variables,
             "mcp_tools": self.mcp_tools,
         }
-        return self.__pydantic_model__(**state)
+        agent_state = self.__pydantic_model__(**state)
+        agent_state.mark_persisted()
+        return agent_state
@@ -1,7 +1,7 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from mirix.schemas.openai.openai import ToolCall as OpenAIToolCall
-from sqlalchemy import BigInteger, FetchedValue, ForeignKey, Index, event, text
+from sqlalchemy import JSON, BigInteger, FetchedValue, ForeignKey, Index, event, text
 from sqlalchemy.orm import Mapped, Session, mapped_column, relationship, declared_attr
 
 from mirix.orm.custom_columns import MessageContentColumn, ToolCallColumn, ToolReturnColumn
@@ -43,6 +43,9 @@ class Message(SqlalchemyBase, OrganizationMixin, UserMixin, AgentMixin):
     sender_id: Mapped[Optional[str]] = mapped_column(
         nullable=True, doc="The id of the sender of the message, can be an identity id or agent id"
     )
+    token_counts: Mapped[Optional[Dict[str, int]]] = mapped_column(
+        JSON, nullable=True, doc="Number of tokens of the message in its OpenAI format, by tokenizer encoding name"
+    )
 
     # Relationships
     agent: Mapped["Agent"] = relationship("Agent", back_populates="messages", lazy="selectin")
@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from mirix.orm.base import Base
+
+
+class MessagesAgents(Base):
+    """
+    The in-context messages of an agent, as one ordered window per user.
+
+    The system message is shared by every user of the agent and is kept in `agents.message_ids`.
+    """
+
+    __tablename__ = "messages_agents"
+    __table_args__ = (Index("ix_messages_agents_message_id", "message_id"),)
+
+    # Each (agent, user) window is ordered by position, which is not necessarily contiguous
+    agent_id: Mapped[str] = mapped_column(String, ForeignKey("agents.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    position: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    message_id: Mapped[str] = mapped_column(String, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False)
@@ -400,6 +400,40 @@ class SqlalchemyBase(CommonSqlalchemyMetaMixins, Base):
                 logger.error(f"Unexpected error creating {self.__class__.__name__} with ID {self.id}: {e}")
                 raise
 
+    @classmethod
+    @handle_db_timeout
+    @transaction_retry(max_retries=5, base_delay=0.1, max_delay=3.0)
+    def batch_create(cls, items: List["SqlalchemyBase"], db_session: "Session", actor: Optional["User"] = None) -> List["SqlalchemyBase"]:
+        """
+        Create many records in a single transaction.
+
+        The rows are flushed together, which SQLAlchemy sends as batched multi-row INSERT statements
+        (with RETURNING where the backend supports it), committed once, and reloaded with one SELECT.
+        """
+        logger.debug(f"Batch creating {len(items)} {cls.__name__} items with actor={actor}")
+        if not items:
+            return []
+
+        if actor:
+            for item in items:
+                item._set_created_and_updated_by_fields(actor.id)
+
+        with db_session as session:
+            try:
+                session.add_all(items)
+                session.commit()
+                # Refresh the expired instances in place with a single query
+                session.execute(select(cls).where(cls.id.in_([item.id for item in items]))).scalars().all()
+                return items
+            except (DBAPIError, IntegrityError) as e:
+                session.rollback()
+                logger.error(f"Failed to batch create {len(items)} {cls.__name__} items: {e}")
+                cls._handle_dbapi_error(e)
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Unexpected error batch creating {len(items)} {cls.__name__} items: {e}")
+                raise
+
     @handle_db_timeout
     @retry_db_operation(max_retries=3, base_delay=0.1, max_delay=2.0)
     def delete(self, db_session: "Session", actor: Optional["User"] = None) -> "SqlalchemyBase":
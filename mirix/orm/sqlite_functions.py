@@ -1,12 +1,90 @@
 import base64
 import sqlite3
-from typing import Optional, Union
+import threading
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
-from mirix.constants import MAX_EMBEDDING_DIM
+from mirix.constants import EMBEDDING_STORAGE_DTYPE, MAX_EMBEDDING_DIM
+
+
+# Embeddings are stored on SQLite in a compact format: a 4-byte header (COMPACT_VECTOR_MAGIC
+# followed by a dtype code) and the little-endian vector at its native dimensionality, without
+# the zero padding up to MAX_EMBEDDING_DIM. int8 vectors carry a float32 scale after the header.
+# Rows written before this format hold base64-encoded, padded float32 bytes and are still read;
+# the magic starts with 0xFF, which never appears in base64 text, so the two cannot be confused.
+COMPACT_VECTOR_MAGIC = b"\xffMV"
+COMPACT_VECTOR_DTYPES = {"float32": b"f", "float16": b"h", "int8": b"b"}
+# Upper-case dtype codes additionally carry the float32 L2 norm of the vector right after the
+# header, computed at write time so that cosine_distance never has to recompute it per row
+COMPACT_VECTOR_NORM_DTYPES = {dtype: code.upper() for dtype, code in COMPACT_VECTOR_DTYPES.items()}
+
+
+def encode_vector(vector: Union[List[float], np.ndarray], dtype: str = EMBEDDING_STORAGE_DTYPE) -> bytes:
+    """Encode a vector in the compact storage format, trimming trailing zero padding."""
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    nonzero = np.flatnonzero(vector)
+    vector = vector[: nonzero[-1] + 1] if nonzero.size else vector[:0]
+
+    if dtype == "float16":
+        stored = vector.astype("<f2")
+        payload = stored.tobytes()
+    elif dtype == "int8":
+        scale = float(np.abs(vector).max()) / 127.0 if vector.size else 0.0
+        stored = (np.round(vector / scale) if scale > 0 else np.zeros_like(vector)).astype(np.int8)
+        payload = np.array([scale], dtype="<f4").tobytes() + stored.tobytes()
+        stored = stored.astype(np.float32) * np.float32(scale)
+    elif dtype == "float32":
+        stored = vector
+        payload = vector.astype("<f4").tobytes()
+    else:
+        raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+
+    # Norm of the vector as it will be decoded, so that quantized vectors stay consistent
+    norm = np.array([np.linalg.norm(stored.astype(np.float32))], dtype="<f4").tobytes()
+    return COMPACT_VECTOR_MAGIC + COMPACT_VECTOR_NORM_DTYPES[dtype] + norm + payload
+
+
+def decode_vector_with_norm(data: Optional[bytes]) -> Tuple[Optional[np.ndarray], float]:
+    """
+    Decode a vector stored in the compact format or in the legacy base64 format into float32,
+    together with its L2 norm. The norm is read from the header when it was stored at write time.
+    """
+    if not data:
+        return None, 0.0
+    data = bytes(data)
+
+    if data[:3] == COMPACT_VECTOR_MAGIC:
+        code = data[3:4]
+        offset = 4
+        norm = None
+        if code.isupper():
+            norm = float(np.frombuffer(data, dtype="<f4", count=1, offset=offset)[0])
+            offset += 4
+            code = code.lower()
+        if code == b"f":
+            vector = np.frombuffer(data, dtype="<f4", offset=offset).astype(np.float32, copy=False)
+        elif code == b"h":
+            vector = np.frombuffer(data, dtype="<f2", offset=offset).astype(np.float32)
+        elif code == b"b":
+            scale = np.frombuffer(data, dtype="<f4", count=1, offset=offset)[0]
+            vector = np.frombuffer(data, dtype=np.int8, offset=offset + 4).astype(np.float32) * scale
+        else:
+            raise ValueError(f"Unknown compact vector dtype code: {code!r}")
+    else:
+        vector = np.frombuffer(base64.b64decode(data), dtype=np.float32)
+        norm = None
+
+    if norm is None:
+        norm = float(np.linalg.norm(vector))
+    return vector, norm
+
+
+def decode_vector(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Decode a vector stored in the compact format or in the legacy base64 format into float32."""
+    return decode_vector_with_norm(data)[0]
 
 
 def adapt_array(arr):
@@ -21,10 +99,8 @@ def adapt_array(arr):
     elif not isinstance(arr, np.ndarray):
         raise ValueError(f"Unsupported type: {type(arr)}")
 
-    # Convert to bytes and then base64 encode
-    bytes_data = arr.tobytes()
-    base64_data = base64.b64encode(bytes_data)
-    return sqlite3.Binary(base64_data)
+    # Compact format: native dimensionality, raw little-endian bytes
+    return sqlite3.Binary(encode_vector(arr))
 
 
 def convert_array(text):
@@ -38,14 +114,9 @@ def convert_array(text):
     if isinstance(text, np.ndarray):
         return text
 
-    # Handle both bytes and sqlite3.Binary
-    binary_data = bytes(text) if isinstance(text, sqlite3.Binary) else text
-
     try:
-        # First decode base64
-        decoded_data = base64.b64decode(binary_data)
-        # Then convert to numpy array
-        return np.frombuffer(decoded_data, dtype=np.float32)
+        # Handles both the compact format and legacy base64-encoded rows
+        return decode_vector(text)
     except Exception:
         return None
 
@@ -103,13 +174,32 @@ def validate_and_transform_embedding(
     return vec
 
 
+# Last query vector decoded by cosine_distance on this thread. The query is the same constant
+# for every row of a statement, so it is decoded and normalized once instead of once per row.
+_query_vector_cache = threading.local()
+
+
+def _decode_query_vector(embedding) -> Tuple[Optional[np.ndarray], float]:
+    if not isinstance(embedding, (bytes, sqlite3.Binary)):
+        vec = convert_array(embedding)
+        return vec, float(np.linalg.norm(vec)) if vec is not None else 0.0
+
+    cached = getattr(_query_vector_cache, "entry", None)
+    if cached is not None and cached[0] == embedding:
+        return cached[1], cached[2]
+
+    vec, norm = decode_vector_with_norm(embedding)
+    _query_vector_cache.entry = (bytes(embedding), vec, norm)
+    return vec, norm
+
+
 def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
     """
     Calculate cosine distance between two embeddings
 
     Args:
-        embedding1: First embedding
-        embedding2: Second embedding
+        embedding1: First embedding (the stored column when used from SQL)
+        embedding2: Second embedding (the query vector when used from SQL)
         expected_dim: Expected embedding dimension (default 4096)
 
     Returns:
@@ -120,12 +210,24 @@ def cosine_distance(embedding1, embedding2, expected_dim=MAX_EMBEDDING_DIM):
         return 0.0  # Maximum distance if either embedding is None
 
     try:
-        vec1 = validate_and_transform_embedding(embedding1, expected_dim)
-        vec2 = validate_and_transform_embedding(embedding2, expected_dim)
+        if isinstance(embedding1, (bytes, sqlite3.Binary)):
+            vec1, norm1 = decode_vector_with_norm(embedding1)
+        else:
+            vec1 = convert_array(embedding1)
+            norm1 = float(np.linalg.norm(vec1)) if vec1 is not None else 0.0
+        vec2, norm2 = _decode_query_vector(embedding2)
     except ValueError:
         return 0.0
+    if vec1 is None or vec2 is None or vec1.shape[0] > expected_dim or vec2.shape[0] > expected_dim:
+        return 0.0
 
-    similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+    # Compact vectors are stored without their zero padding, which contributes nothing to the
+    # dot product or the norms, so comparing the common prefix is exact
+    dim = min(vec1.shape[0], vec2.shape[0])
+    norm = norm1 * norm2
+    if norm == 0:
+        return 1.0
+    similarity = np.dot(vec1[:dim], vec2[:dim]) / norm
     distance = float(1.0 - similarity)
 
     return distance
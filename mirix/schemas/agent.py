@@ -1,7 +1,8 @@
+import copy
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 from mirix.constants import DEFAULT_EMBEDDING_CHUNK_SIZE
 from mirix.schemas.block import CreateBlock
@@ -44,7 +45,7 @@ class AgentState(OrmMetadataBase, validate_assignment=True):
         id (str): The unique identifier of the agent.
         name (str): The name of the agent (must be unique to the user).
         created_at (datetime): The datetime the agent was created.
-        message_ids (List[str]): The ids of the messages in the agent's in-context memory.
+        message_ids (List[str]): The id of the agent's system message. The rest of the in-context memory is kept per user.
         memory (Memory): The in-context memory of the agent.
         tools (List[str]): The tools used by the agent. This includes any memory editing functions specified in `memory`.
         system (str): The system prompt used by the agent.
@@ -63,7 +64,7 @@ class AgentState(OrmMetadataBase, validate_assignment=True):
     tool_rules: Optional[List[ToolRule]] = Field(default=None, description="The list of tool rules.")
 
     # in-context memory
-    message_ids: Optional[List[str]] = Field(default=None, description="The ids of the messages in the agent's in-context memory.")
+    message_ids: Optional[List[str]] = Field(default=None, description="The id of the agent's system message, as a one-element list.")
 
     # system prompt
     system: str = Field(..., description="The system prompt used by the agent.")
@@ -93,6 +94,35 @@ class AgentState(OrmMetadataBase, validate_assignment=True):
         default_factory=list, description="List of connected MCP server names (e.g., ['gmail-native'])"
     )
 
+    # Snapshot of the persisted fields as they are in the database, see `get_changed_fields`
+    _persisted_fields: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def _snapshot_persisted_fields(self) -> Dict[str, Any]:
+        """Comparable copies of the fields written back by `save_agent`, keyed by their `UpdateAgent` name."""
+        return {
+            "name": self.name,
+            "system": self.system,
+            "description": self.description,
+            "metadata_": copy.deepcopy(self.metadata_),
+            "tool_rules": [rule.model_dump() for rule in self.tool_rules] if self.tool_rules is not None else None,
+            "llm_config": self.llm_config.model_dump(),
+            "embedding_config": self.embedding_config.model_dump(),
+            "tool_ids": [tool.id for tool in self.tools],
+            "block_ids": [block.id for block in self.memory.blocks],
+            "tags": list(self.tags),
+        }
+
+    def mark_persisted(self) -> None:
+        """Record the current values of the fields as the ones stored in the database."""
+        self._persisted_fields = self._snapshot_persisted_fields()
+
+    def get_changed_fields(self) -> Set[str]:
+        """Names of the `UpdateAgent` fields that changed since `mark_persisted`, or all of them if it was never called."""
+        current = self._snapshot_persisted_fields()
+        if self._persisted_fields is None:
+            return set(current)
+        return {field for field, value in current.items() if value != self._persisted_fields[field]}
+
     def get_agent_env_vars_as_dict(self) -> Dict[str, str]:
         # Get environment variables for this agent specifically
         per_agent_env_vars = {}
@@ -213,7 +243,7 @@ class UpdateAgent(BaseModel):
     tool_rules: Optional[List[ToolRule]] = Field(None, description="The tool rules governing the agent.")
     llm_config: Optional[LLMConfig] = Field(None, description="The LLM configuration used by the agent.")
     embedding_config: Optional[EmbeddingConfig] = Field(None, description="The embedding configuration used by the agent.")
-    message_ids: Optional[List[str]] = Field(None, description="The ids of the messages in the agent's in-context memory.")
+    message_ids: Optional[List[str]] = Field(None, description="The ids of the messages in the acting user's in-context memory, starting with the system message.")
     description: Optional[str] = Field(None, description="The description of the agent.")
     metadata_: Optional[Dict] = Field(None, description="The metadata of the agent.", alias="metadata_")
     tool_exec_environment_variables: Optional[Dict[str, str]] = Field(
@@ -40,7 +40,7 @@ from mirix.schemas.mirix_message_content import (
     get_mirix_message_content_union_str_json_schema,
 )
 from mirix.system import unpack_message
-from mirix.utils import parse_json
+from mirix.utils import get_message_encoding, num_tokens_from_message, parse_json
 
 
 def add_inner_thoughts_to_tool_call(
@@ -164,6 +164,9 @@ class Message(BaseMessage):
     tool_returns: Optional[List[ToolReturn]] = Field(None, description="Tool execution return information for prior tool calls")
     group_id: Optional[str] = Field(None, description="The multi-agent group that the message was sent in")
     sender_id: Optional[str] = Field(None, description="The id of the sender of the message, can be an identity id or agent id")
+    token_counts: Optional[Dict[str, int]] = Field(
+        None, description="Number of tokens of the message in its OpenAI format, by tokenizer encoding name."
+    )
     # This overrides the optional base orm schema, created_at MUST exist on all messages objects
     created_at: datetime = Field(default_factory=get_utc_time, description="The timestamp when the object was created.")
 
@@ -615,6 +618,24 @@ class Message(BaseMessage):
                     group_id=group_id,
                 )
 
+    def get_token_count(self, model: str = "gpt-4") -> int:
+        """
+        Number of tokens of the message in its OpenAI format for the tokenizer of `model`.
+
+        Counts are computed once per tokenizer and kept in `token_counts`, which is persisted
+        with the message, so counting the tokens of a context does not re-tokenize it.
+        """
+        encoding = get_message_encoding(model)
+        if self.token_counts and encoding.name in self.token_counts:
+            return self.token_counts[encoding.name]
+        try:
+            count = num_tokens_from_message(self.to_openai_dict(), model=model)
+        except Exception:
+            # Message that has no OpenAI form (e.g. unsupported content part): estimate from its content
+            count = len(encoding.encode(str(self.content)))
+        self.token_counts = {**(self.token_counts or {}), encoding.name: count}
+        return count
+
     def to_openai_dict_search_results(self, max_tool_id_length: int = TOOL_CALL_ID_MAX_LEN) -> dict:
         result_json = self.to_openai_dict()
         search_result_json = {"timestamp": self.created_at, "message": {"content": result_json["content"], "role": result_json["role"]}}
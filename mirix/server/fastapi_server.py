@@ -621,12 +621,17 @@ async def send_streaming_message_endpoint(request: MessageRequest):
     
     agent.update_chat_agent_system_prompt(request.is_screen_monitoring)
 
-    # Create a queue to collect intermediate messagess
-    message_queue = queue.Queue()
+    # Events for the client, in order. The agent runs in a worker thread and hands its events
+    # over to this event loop, so that each one is sent as soon as it is produced
+    loop = asyncio.get_running_loop()
+    event_queue: asyncio.Queue = asyncio.Queue()
+
+    def put_event(event: dict):
+        loop.call_soon_threadsafe(event_queue.put_nowait, event)
     
     def display_intermediate_message(message_type: str, message: str):
         """Callback function to capture intermediate messages"""
-        message_queue.put({
+        put_event({
             "type": "intermediate",
             "message_type": message_type,
             "content": message
@@ -641,8 +646,8 @@ async def send_streaming_message_endpoint(request: MessageRequest):
         confirmation_result_queue = queue.Queue()
         confirmation_queues[confirmation_id] = confirmation_result_queue
         
-        # Put confirmation request in message queue
-        message_queue.put({
+        # Send the confirmation request to the client
+        put_event({
             "type": "confirmation_request",
             "confirmation_type": confirmation_type,
             "confirmation_id": confirmation_id,
@@ -663,9 +668,6 @@ async def send_streaming_message_endpoint(request: MessageRequest):
     async def generate_stream():
         """Generator function for streaming responses"""
         try:
-            # Start the agent processing in a separate thread
-            result_queue = queue.Queue()
-            
             async def run_agent():
                 try:
                     
@@ -675,7 +677,6 @@ async def send_streaming_message_endpoint(request: MessageRequest):
                     current_user_id = active_user.id if active_user else None
 
                     # Run agent.send_message in a background thread to avoid blocking
-                    loop = asyncio.get_event_loop()
                     response = await loop.run_in_executor(
                         None,  # Use default ThreadPoolExecutor
                         lambda: agent.send_message(
@@ -693,91 +694,67 @@ async def send_streaming_message_endpoint(request: MessageRequest):
                     # Handle various response cases
                     if response is None:
                         if request.memorizing:
-                            result_queue.put({"type": "final", "response": ""})
+                            await event_queue.put({"type": "final", "response": ""})
                         else:
                             print("[DEBUG] Agent returned None response")
-                            result_queue.put({"type": "error", "error": "Agent returned no response"})
+                            await event_queue.put({"type": "error", "error": "Agent returned no response"})
                     elif isinstance(response, str) and response.startswith("ERROR_"):
                         # Handle specific error types from agent wrapper
                         print(f"[DEBUG] Agent returned specific error: {response}")
                         if response == "ERROR_RESPONSE_FAILED":
                             print("[DEBUG] - Message queue response failed")
-                            result_queue.put({"type": "error", "error": "Message processing failed in agent queue"})
+                            await event_queue.put({"type": "error", "error": "Message processing failed in agent queue"})
                         elif response == "ERROR_INVALID_RESPONSE_STRUCTURE":
                             print("[DEBUG] - Response structure invalid (missing messages or insufficient count)")
-                            result_queue.put({"type": "error", "error": "Invalid response structure from agent"})
+                            await event_queue.put({"type": "error", "error": "Invalid response structure from agent"})
                         elif response == "ERROR_NO_TOOL_CALL":
                             print("[DEBUG] - Expected message missing tool_call attribute")
-                            result_queue.put({"type": "error", "error": "Agent response missing required tool call"})
+                            await event_queue.put({"type": "error", "error": "Agent response missing required tool call"})
                         elif response == "ERROR_NO_MESSAGE_IN_ARGS":
                             print("[DEBUG] - Tool call arguments missing 'message' key")
-                            result_queue.put({"type": "error", "error": "Agent tool call missing message content"})
+                            await event_queue.put({"type": "error", "error": "Agent tool call missing message content"})
                         elif response == "ERROR_PARSING_EXCEPTION":
                             print("[DEBUG] - Exception occurred during response parsing")
-                            result_queue.put({"type": "error", "error": "Failed to parse agent response"})
+                            await event_queue.put({"type": "error", "error": "Failed to parse agent response"})
                         else:
                             print(f"[DEBUG] - Unknown error type: {response}")
-                            result_queue.put({"type": "error", "error": f"Unknown agent error: {response}"})
+                            await event_queue.put({"type": "error", "error": f"Unknown agent error: {response}"})
                     elif response == "ERROR":
                         print("[DEBUG] Agent returned generic ERROR string")
-                        result_queue.put({"type": "error", "error": "Agent processing failed"})
+                        await event_queue.put({"type": "error", "error": "Agent processing failed"})
                     elif not response or (isinstance(response, str) and response.strip() == ""):
                         if request.memorizing:
                             print("[DEBUG] Agent returned empty response - expected for memorizing=True")
-                            result_queue.put({"type": "final", "response": ""})
+                            await event_queue.put({"type": "final", "response": ""})
                         else:
                             print("[DEBUG] Agent returned empty response unexpectedly")
-                            result_queue.put({"type": "error", "error": "Agent returned empty response"})
+                            await event_queue.put({"type": "error", "error": "Agent returned empty response"})
                     else:
                         print(f"[DEBUG] Agent returned successful response (length: {len(str(response))})")
-                        result_queue.put({"type": "final", "response": response})
+                        await event_queue.put({"type": "final", "response": response})
                         
                 except Exception as e:
                     print(f"[DEBUG] Exception in run_agent: {str(e)}")
                     print(f"Traceback: {traceback.format_exc()}")
-                    result_queue.put({"type": "error", "error": str(e)})
+                    await event_queue.put({"type": "error", "error": str(e)})
             
             # Start agent processing as async task
             agent_task = asyncio.create_task(run_agent())
+
+            def on_agent_done(task: asyncio.Task):
+                # run_agent reports its own errors, so this only happens if it was cancelled or failed unexpectedly
+                if task.cancelled() or task.exception() is not None:
+                    error = "cancelled" if task.cancelled() else str(task.exception())
+                    event_queue.put_nowait({"type": "error", "error": f"Agent processing failed: {error}"})
+
+            agent_task.add_done_callback(on_agent_done)
             
-            # Keep track of whether we've sent the final result
-            final_result_sent = False
-            
-            # Stream intermediate messages and wait for final result
-            while not final_result_sent:
-                # Check for intermediate messages first
-                try:
-                    intermediate_msg = message_queue.get_nowait()
-                    yield f"data: {json.dumps(intermediate_msg)}\n\n"
-                    continue  # Continue to next iteration to check for more messages
-                except queue.Empty:
-                    pass
-                
-                # Check for final result with timeout
-                try:
-                    # Use a short timeout to allow for intermediate messages
-                    final_result = result_queue.get(timeout=0.1)
-                    if final_result["type"] == "error":
-                        yield f"data: {json.dumps({'type': 'error', 'error': final_result['error']})}\n\n"
-                    else:
-                        yield f"data: {json.dumps({'type': 'final', 'response': final_result['response']})}\n\n"
-                    final_result_sent = True
+            # Stream intermediate messages until the final result
+            while True:
+                event = await event_queue.get()
+                yield f"data: {json.dumps(event)}\n\n"
+                if event["type"] in ("final", "error"):
                     break
-                except queue.Empty:
-                    # If no result yet, check if task is still running
-                    if agent_task.done():
-                        # Task is done but no result - this shouldn't happen, but handle it
-                        try:
-                            # Check if the task raised an exception
-                            agent_task.result()
-                        except Exception as e:
-                            yield f"data: {json.dumps({'type': 'error', 'error': f'Agent processing failed: {str(e)}'})}\n\n"
-                        else:
-                            yield f"data: {json.dumps({'type': 'error', 'error': 'Agent processing completed unexpectedly without result'})}\n\n"
-                        final_result_sent = True
-                        break
-                    # Otherwise continue the loop to check for more intermediate messages
-                    await asyncio.sleep(0.1)  # Yield control to allow other operations
             
             # Make sure task completes
             if not agent_task.done():
@@ -1,11 +1,13 @@
 # inspecting tools
 import asyncio
 import os
+import threading
 import traceback
 import warnings
 from abc import abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 # from composio.client import Composio
 # from composio.client.collections import ActionModel, AppModel
@@ -20,6 +22,7 @@ from mirix.agent import Agent, save_agent
 # TODO use custom interface
 from mirix.interface import AgentInterface  # abstract
 from mirix.interface import CLIInterface  # for printing to terminal
+from mirix.helpers import ToolRulesSolver
 from mirix.log import get_logger
 from mirix.agent import EpisodicMemoryAgent, ProceduralMemoryAgent, ResourceMemoryAgent, KnowledgeVaultAgent, MetaMemoryAgent, SemanticMemoryAgent, CoreMemoryAgent, ReflexionAgent, BackgroundAgent
 from mirix.orm import Base
@@ -62,6 +65,9 @@ from mirix.services.message_manager import MessageManager
 from mirix.services.organization_manager import OrganizationManager
 from mirix.services.knowledge_vault_manager import KnowledgeVaultManager
 from mirix.services.episodic_memory_manager import EpisodicMemoryManager
+from mirix.services.fulltext_index_manager import create_sqlite_fts_tables
+from mirix.services.duplicate_index_manager import DuplicateIndexManager
+from mirix.services.memory_export_manager import MemoryExportManager
 from mirix.services.procedural_memory_manager import ProceduralMemoryManager
 from mirix.services.resource_memory_manager import ResourceMemoryManager
 from mirix.services.semantic_memory_manager import SemanticMemoryManager
@@ -336,6 +342,9 @@ elif not USE_PGLITE:
 
     Base.metadata.create_all(bind=engine)
 
+    # Full-text indexes for BM25 search over the memory tables
+    create_sqlite_fts_tables(engine)
+
 if not USE_PGLITE:
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -404,6 +413,8 @@ class SyncServer(Server):
         self.procedural_memory_manager = ProceduralMemoryManager()
         self.resource_memory_manager = ResourceMemoryManager()
         self.semantic_memory_manager = SemanticMemoryManager()
+        self.memory_export_manager = MemoryExportManager()
+        self.duplicate_index_manager = DuplicateIndexManager()
 
         # API Key Manager
         self.provider_manager = ProviderManager()
@@ -414,6 +425,11 @@ class SyncServer(Server):
         # Managers that interface with parallelism
         self.per_agent_lock_manager = PerAgentLockManager()
 
+        # Hydrated agents that are not running a step, keyed by (agent_id, user_id of the load), each with the
+        # agent version it is in sync with (see `load_agent`, `release_agent` and Agent.synced_version)
+        self._agent_cache: "OrderedDict[Tuple[str, str], Agent]" = OrderedDict()
+        self._agent_cache_lock = threading.Lock()
+
         # Make default user and org
         if init_with_default_org_and_user:
             self.default_org = self.organization_manager.create_default_organization()
@@ -516,12 +532,31 @@ class SyncServer(Server):
             )
 
     def load_agent(self, agent_id: str, actor: User, interface: Union[AgentInterface, None] = None) -> Agent:
-        """Updated method to load agents from persisted storage"""
+        """
+        Updated method to load agents from persisted storage
+
+        An agent given back with `release_agent` is reused as long as neither the agent nor its core memory
+        was updated since, other than by the instance itself. The agent is taken out of the cache until it is
+        released again, so that concurrent steps never share an instance.
+        """
+        interface = interface or self.default_interface_factory()
+
+        if constants.USE_AGENT_CACHE:
+            with self._agent_cache_lock:
+                agent = self._agent_cache.pop((agent_id, actor.id), None)
+            if agent is not None and agent.synced_version == self.agent_manager.get_agent_version(agent_id=agent_id, actor=actor):
+                agent.user = actor
+                agent.cache_actor = actor
+                agent.interface = interface
+                agent.tool_rules_solver = ToolRulesSolver(tool_rules=agent.agent_state.tool_rules)
+                return agent
+
         agent_lock = self.per_agent_lock_manager.get_lock(agent_id)
         with agent_lock:
+            # Read before the state, so that a write in between shows up as a newer version
+            version = self.agent_manager.get_agent_version(agent_id=agent_id, actor=actor) if constants.USE_AGENT_CACHE else None
             agent_state = self.agent_manager.get_agent_by_id(agent_id=agent_id, actor=actor)
 
-            interface = interface or self.default_interface_factory()
             if agent_state.agent_type == AgentType.chat_agent:
                 agent = Agent(agent_state=agent_state, interface=interface, user=actor)
             elif agent_state.agent_type == AgentType.episodic_memory_agent:
@@ -545,8 +580,34 @@ class SyncServer(Server):
             else:
                 raise ValueError(f"Invalid agent type {agent_state.agent_type}")
 
+            agent.synced_version = version
+            agent.cache_actor = actor
             return agent
 
+    def release_agent(self, agent: Agent) -> None:
+        """Give back an agent obtained with `load_agent` once it is no longer used, so that it can be reused."""
+        if not constants.USE_AGENT_CACHE or agent.synced_version is None:
+            return
+
+        # The step may have switched `agent.user` (see Agent._start_step): cache under the user it was loaded for
+        actor = agent.cache_actor
+        # Any write the agent did not make itself leaves the DB at another version than the instance
+        if self.agent_manager.get_agent_version(agent_id=agent.agent_state.id, actor=actor) != agent.synced_version:
+            return
+
+        with self._agent_cache_lock:
+            key = (agent.agent_state.id, actor.id)
+            self._agent_cache[key] = agent
+            self._agent_cache.move_to_end(key)
+            while len(self._agent_cache) > constants.AGENT_CACHE_MAX_SIZE:
+                self._agent_cache.popitem(last=False)
+
+    def evict_agent(self, agent_id: str) -> None:
+        """Drop the cached instances of an agent, e.g. once it is deleted."""
+        with self._agent_cache_lock:
+            for key in [key for key in self._agent_cache if key[0] == agent_id]:
+                del self._agent_cache[key]
+
     def _step(
         self,
         actor: User,
@@ -601,6 +662,7 @@ class SyncServer(Server):
                 message_queue=message_queue,
                 user_id=user_id
             )
+            self.release_agent(mirix_agent)
 
         except Exception as e:
             logger.error(f"Error in server._step: {e}")
@@ -613,6 +675,67 @@ class SyncServer(Server):
 
         return usage_stats
 
+    async def _step_async(
+        self,
+        actor: User,
+        agent_id: str,
+        input_messages: Union[Message, List[Message]],
+        interface: Union[AgentInterface, None] = None,  # needed to getting responses
+        put_inner_thoughts_first: bool = True,
+        existing_file_uris: Optional[List[str]] = None,
+        force_response: bool = False,
+        display_intermediate_message: any = None,
+        request_user_confirmation: any = None,
+        chaining: Optional[bool] = None,
+        extra_messages: Optional[List[dict]] = None,
+        message_queue: Optional[any] = None,
+        retrieved_memories: Optional[dict] = None,
+        user_id: Optional[str] = None,
+    ) -> MirixUsageStatistics:
+        """Send the input message through the agent with `Agent.step_async`"""
+        logger.debug(f"Got input messages: {input_messages}")
+        mirix_agent = None
+        try:
+            mirix_agent = await asyncio.to_thread(self.load_agent, agent_id=agent_id, interface=interface, actor=actor)
+
+            if mirix_agent is None:
+                raise KeyError(f"Agent (user={actor.id}, agent={agent_id}) is not loaded")
+
+            # Determine whether or not to token stream based on the capability of the interface
+            token_streaming = mirix_agent.interface.streaming_mode if hasattr(mirix_agent.interface, "streaming_mode") else False
+
+            metadata = interface.metadata if interface and hasattr(interface, "metadata") else None
+
+            # Use provided chaining value or fall back to server default
+            effective_chaining = chaining if chaining is not None else self.chaining
+
+            usage_stats = await mirix_agent.step_async(
+                input_messages=input_messages,
+                chaining=effective_chaining,
+                max_chaining_steps=self.max_chaining_steps,
+                stream=token_streaming,
+                skip_verify=True,
+                metadata=metadata,
+                force_response=force_response,
+                existing_file_uris=existing_file_uris,
+                display_intermediate_message=display_intermediate_message,
+                request_user_confirmation=request_user_confirmation,
+                put_inner_thoughts_first=put_inner_thoughts_first,
+                extra_messages=extra_messages,
+                message_queue=message_queue,
+                user_id=user_id
+            )
+            await asyncio.to_thread(self.release_agent, mirix_agent)
+
+        except Exception as e:
+            logger.error(f"Error in server._step_async: {e}")
+            raise
+        finally:
+            if mirix_agent:
+                mirix_agent.interface.step_yield()
+
+        return usage_stats
+
     def _command(self, user_id: str, agent_id: str, command: str) -> MirixUsageStatistics:
         """Process a CLI command"""
         # TODO: Thread actor directly through this function, since the top level caller most likely already retrieved the user
@@ -840,7 +963,10 @@ class SyncServer(Server):
         mirix_agent = self.load_agent(agent_id=agent_id, actor=actor)
         if mirix_agent is None:
             raise KeyError(f"Agent (user={actor.id}, agent={agent_id}) is not loaded")
-        return mirix_agent.construct_system_message(message=message)
+        try:
+            return mirix_agent.construct_system_message(message=message)
+        finally:
+            self.release_agent(mirix_agent)
 
     def extract_memory_for_system_prompt(self, agent_id: str, message: str, actor: User) -> str:
         """
@@ -851,7 +977,10 @@ class SyncServer(Server):
         mirix_agent = self.load_agent(agent_id=agent_id, actor=actor)
         if mirix_agent is None:
             raise KeyError(f"Agent (user={actor.id}, agent={agent_id}) is not loaded")
-        return mirix_agent.extract_memory_for_system_prompt(message=message)
+        try:
+            return mirix_agent.extract_memory_for_system_prompt(message=message)
+        finally:
+            self.release_agent(mirix_agent)
 
     def send_messages(
         self,
@@ -895,6 +1024,47 @@ class SyncServer(Server):
             user_id=user_id
         )
 
+    async def send_messages_async(
+        self,
+        actor: User,
+        agent_id: str,
+        input_messages: List[MessageCreate],
+        interface: Union[AgentInterface, None] = None,  # needed for responses
+        metadata: Optional[dict] = None,  # Pass through metadata to interface
+        put_inner_thoughts_first: bool = True,
+        display_intermediate_message: callable = None,
+        request_user_confirmation: callable = None,
+        force_response: bool = False,
+        chaining: Optional[bool] = True,
+        existing_file_uris: Optional[List[str]] = None,
+        extra_messages: Optional[List[dict]] = None,
+        message_queue: Optional[any] = None,
+        retrieved_memories: Optional[dict] = None,
+        user_id: Optional[str] = None,
+    ) -> MirixUsageStatistics:
+        """Send a list of messages to the agent without blocking the event loop on LLM calls."""
+
+        # Store metadata in interface if provided
+        if metadata and hasattr(interface, "metadata"):
+            interface.metadata = metadata
+
+        return await self._step_async(
+            actor=actor,
+            agent_id=agent_id,
+            input_messages=input_messages,
+            interface=interface,
+            force_response=force_response,
+            put_inner_thoughts_first=put_inner_thoughts_first,
+            display_intermediate_message=display_intermediate_message,
+            request_user_confirmation=request_user_confirmation,
+            chaining=chaining,
+            existing_file_uris=existing_file_uris,
+            extra_messages=extra_messages,
+            message_queue=message_queue,
+            retrieved_memories=retrieved_memories,
+            user_id=user_id
+        )
+
     # @LockingServer.agent_lock_decorator
     def run_command(self, user_id: str, agent_id: str, command: str) -> MirixUsageStatistics:
         """Run a command on the agent"""
@@ -1117,7 +1287,10 @@ class SyncServer(Server):
 
     def get_agent_context_window(self, agent_id: str, actor: User) -> ContextWindowOverview:
         mirix_agent = self.load_agent(agent_id=agent_id, actor=actor)
-        return mirix_agent.get_context_window()
+        try:
+            return mirix_agent.get_context_window()
+        finally:
+            self.release_agent(mirix_agent)
 
     def run_tool_from_source(
         self,
@@ -1268,14 +1441,13 @@ class SyncServer(Server):
             #     llm_config.put_inner_thoughts_in_kwargs if llm_config.put_inner_thoughts_in_kwargs is not None else False
             # )
 
-            # Offload the synchronous message_func to a separate thread
+            # Run the agent on this event loop, concurrently with the stream consumer
             streaming_interface.stream_start()
             task = asyncio.create_task(
-                asyncio.to_thread(
-                    self.send_messages,
+                self.send_messages_async(
                     actor=actor,
                     agent_id=agent_id,
-                    messages=messages,
+                    input_messages=messages,
                     interface=streaming_interface,
                     metadata=metadata,
                 )
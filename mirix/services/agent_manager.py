@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
-from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy import Select, delete, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.exc import IntegrityError
 
 from mirix.constants import (
     CORE_MEMORY_TOOLS, BASE_TOOLS, MAX_EMBEDDING_DIM,
@@ -13,6 +14,9 @@ from mirix.embeddings import embedding_model
 from mirix.log import get_logger
 from mirix.orm import Agent as AgentModel
 from mirix.orm import Block as BlockModel
+from mirix.orm import BlocksAgents as BlocksAgentsModel
+from mirix.orm import Message as MessageModel
+from mirix.orm import MessagesAgents as MessagesAgentsModel
 from mirix.orm import Tool as ToolModel
 from mirix.orm.errors import NoResultFound
 from mirix.orm.sandbox_config import AgentEnvironmentVariable as AgentEnvironmentVariableModel
@@ -38,12 +42,20 @@ from mirix.services.helpers.agent_manager_helper import (
     package_initial_message_sequence,
 )
 from mirix.services.message_manager import MessageManager
+from mirix.services.per_agent_lock_manager import PerAgentLockManager
 from mirix.services.tool_manager import ToolManager
 from mirix.settings import settings
 from mirix.utils import enforce_types, get_utc_time, united_diff
 
 logger = get_logger(__name__)
 
+# Serializes the writes to the in-context window of an agent within the process; writers in other processes
+# taking the same positions are caught by the primary key of messages_agents and retried.
+_window_locks = PerAgentLockManager()
+_WINDOW_WRITE_ATTEMPTS = 3
+# Rows per INSERT ... SELECT, below the compound SELECT limit of SQLite
+_WINDOW_INSERT_CHUNK_SIZE = 200
+
 
 # Agent Manager Class
 class AgentManager:
@@ -365,12 +377,15 @@ class AgentManager:
         Returns:
             PydanticAgentState: The updated agent as a Pydantic model.
         """
+        if agent_update.message_ids is not None:
+            self.set_in_context_messages(agent_id=agent_id, message_ids=agent_update.message_ids, actor=actor)
+
         with self.session_maker() as session:
             # Retrieve the existing agent
             agent = AgentModel.read(db_session=session, identifier=agent_id, actor=actor)
 
             # Update scalar fields directly
-            scalar_fields = {"name", "system", "topic", "llm_config", "embedding_config", "message_ids", "tool_rules", "description", "metadata_", "mcp_tools"}
+            scalar_fields = {"name", "system", "topic", "llm_config", "embedding_config", "tool_rules", "description", "metadata_", "mcp_tools"}
             for field in scalar_fields:
                 value = getattr(agent_update, field, None)
                 if value is not None:
@@ -432,6 +447,23 @@ class AgentManager:
             agent = AgentModel.read(db_session=session, name=agent_name, actor=actor)
             return agent.to_pydantic()
 
+    @enforce_types
+    def get_agent_version(self, agent_id: str, actor: PydanticUser) -> Optional[Tuple[datetime, Optional[datetime]]]:
+        """
+        Version of an agent, used to validate cached agent instances: the last update time of the agent row
+        and of its core memory blocks. Returns None if the agent does not exist.
+        """
+        with self.session_maker() as session:
+            blocks_updated_at = (
+                select(func.max(BlockModel.updated_at))
+                .join(BlocksAgentsModel, BlocksAgentsModel.block_id == BlockModel.id)
+                .where(BlocksAgentsModel.agent_id == agent_id)
+                .scalar_subquery()
+            )
+            query = select(AgentModel.updated_at, blocks_updated_at).where(AgentModel.id == agent_id, AgentModel.is_deleted == False)
+            row = session.execute(AgentModel.apply_access_predicate(query, actor, ["read"])).first()
+            return tuple(row) if row is not None else None
+
     @enforce_types
     def delete_agent(self, agent_id: str, actor: PydanticUser) -> None:
         """
@@ -509,21 +541,109 @@ class AgentManager:
     # ======================================================================================================================
     # In Context Messages Management
     # ======================================================================================================================
-    # TODO: There are several assumptions here that are not explicitly checked
-    # TODO: 1) These message ids are valid
-    # TODO: 2) These messages are ordered from oldest to newest
-    # TODO: This can be fixed by having an actual relationship in the ORM for message_ids
-    # TODO: This can also be made more efficient, instead of getting, setting, we can do it all in one db session for one query.
+    # The system message is shared by all users of an agent and kept in agents.message_ids. The other in-context
+    # messages form one window per (agent, user) in the messages_agents table, so reading, appending to and trimming
+    # a window are indexed statements whose cost does not depend on the rest of the history.
+    def _get_system_message_ids(self, session, agent_id: str, actor: PydanticUser) -> List[str]:
+        """Get agents.message_ids, first moving the in-context messages of agents that predate messages_agents out of it."""
+        query = AgentModel.apply_access_predicate(select(AgentModel.message_ids).where(AgentModel.id == agent_id), actor, ["read"])
+        row = session.execute(query).first()
+        if row is None:
+            raise NoResultFound(f"Agent not found with id='{agent_id}'")
+        message_ids = row[0] or []
+        if len(message_ids) > 1:
+            message_ids = self._migrate_legacy_message_ids(session, agent_id, message_ids)
+        return message_ids
+
+    def _migrate_legacy_message_ids(self, session, agent_id: str, message_ids: List[str]) -> List[str]:
+        # Lock the agent row with a no-op UPDATE, then re-read it: a concurrent reader may have migrated it already
+        session.execute(update(AgentModel).where(AgentModel.id == agent_id).values(message_ids=AgentModel.message_ids))
+        message_ids = session.execute(select(AgentModel.message_ids).where(AgentModel.id == agent_id)).scalar() or []
+        if len(message_ids) <= 1:
+            session.commit()
+            return message_ids
+        user_ids = dict(session.execute(select(MessageModel.id, MessageModel.user_id).where(MessageModel.id.in_(message_ids[1:]))).all())
+        positions: Dict[str, int] = {}
+        rows = []
+        for message_id in message_ids[1:]:
+            user_id = user_ids.get(message_id)
+            if user_id is None:
+                continue
+            positions[user_id] = positions.get(user_id, 0) + 1
+            rows.append({"agent_id": agent_id, "user_id": user_id, "position": positions[user_id], "message_id": message_id})
+        if rows:
+            session.execute(insert(MessagesAgentsModel), rows)
+        self._set_system_message_ids(session, agent_id, message_ids[:1])
+        session.commit()
+        return message_ids[:1]
+
+    @staticmethod
+    def _set_system_message_ids(session, agent_id: str, message_ids: List[str]) -> None:
+        session.execute(update(AgentModel).where(AgentModel.id == agent_id).values(message_ids=message_ids))
+
+    @staticmethod
+    def _window(agent_id: str, actor: PydanticUser) -> tuple:
+        """WHERE clause of the in-context window of `actor` with an agent."""
+        return (MessagesAgentsModel.agent_id == agent_id, MessagesAgentsModel.user_id == actor.id)
+
+    def _insert_into_window(self, session, agent_id: str, message_ids: List[str], actor: PydanticUser, prepend: bool = False) -> None:
+        """
+        Insert messages at the end (or the start) of the window of `actor`. Positions are computed by the
+        INSERT ... SELECT itself from the current MAX (or MIN) position, not read by a separate query first.
+        """
+        chunks = [message_ids[start:start + _WINDOW_INSERT_CHUNK_SIZE] for start in range(0, len(message_ids), _WINDOW_INSERT_CHUNK_SIZE)]
+        # Prepended chunks go in last to first, each before the previous one
+        for chunk in reversed(chunks) if prepend else chunks:
+            if prepend:
+                base = func.coalesce(func.min(MessagesAgentsModel.position), 1) - (len(chunk) + 1)
+            else:
+                base = func.coalesce(func.max(MessagesAgentsModel.position), 0)
+            base = select(base).where(*self._window(agent_id, actor)).scalar_subquery()
+            rows = [
+                select(literal(agent_id), literal(actor.id), base + offset, literal(message_id))
+                for offset, message_id in enumerate(chunk, start=1)
+            ]
+            session.execute(
+                insert(MessagesAgentsModel).from_select(
+                    ["agent_id", "user_id", "position", "message_id"], union_all(*rows) if len(rows) > 1 else rows[0]
+                )
+            )
+
+    def _write_window(self, agent_id: str, write: Callable) -> None:
+        """Run `write(session)` and commit, under the window lock of the agent, retrying on position conflicts."""
+        with _window_locks.get_lock(agent_id):
+            for attempt in range(_WINDOW_WRITE_ATTEMPTS):
+                with self.session_maker() as session:
+                    try:
+                        write(session)
+                        session.commit()
+                        return
+                    except IntegrityError:
+                        session.rollback()
+                        if attempt == _WINDOW_WRITE_ATTEMPTS - 1:
+                            raise
+                        logger.debug(f"Retrying the in-context window write of agent {agent_id} after a position conflict")
+
     @enforce_types
     def get_in_context_messages(self, agent_id: str, actor: PydanticUser) -> List[PydanticMessage]:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
-        messages = self.message_manager.get_messages_by_ids(message_ids=message_ids, actor=actor)
-        messages = [messages[0]] + [message for message in messages[1:] if message.user_id == actor.id]
-        return messages
+        with self.session_maker() as session:
+            system_message_ids = self._get_system_message_ids(session, agent_id, actor)
+            messages = session.execute(
+                select(MessageModel)
+                .join(MessagesAgentsModel, MessagesAgentsModel.message_id == MessageModel.id)
+                .where(*self._window(agent_id, actor))
+                .order_by(MessagesAgentsModel.position)
+            ).scalars().all()
+            if system_message_ids:
+                system_message = session.get(MessageModel, system_message_ids[0])
+                if system_message is not None:
+                    messages = [system_message] + list(messages)
+            return [message.to_pydantic() for message in messages]
 
     @enforce_types
     def get_system_message(self, agent_id: str, actor: PydanticUser) -> PydanticMessage:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
+        with self.session_maker() as session:
+            message_ids = self._get_system_message_ids(session, agent_id, actor)
         return self.message_manager.get_message_by_id(message_id=message_ids[0], actor=actor)
 
     @enforce_types
@@ -539,8 +659,11 @@ class AgentManager:
             openai_message_dict={"role": "system", "content": system_prompt},
         )
         message = self.message_manager.create_message(message, actor=actor)
-        message_ids = [message.id] + agent_state.message_ids[1:]  # swap index 0 (system)
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        with self.session_maker() as session:
+            self._get_system_message_ids(session, agent_id, actor)
+            self._set_system_message_ids(session, agent_id, [message.id])
+            session.commit()
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
     @enforce_types
     def update_topic(self, agent_id: str, topic: str, actor: PydanticUser) -> PydanticAgentState:
@@ -548,58 +671,75 @@ class AgentManager:
 
     @enforce_types
     def set_in_context_messages(self, agent_id: str, message_ids: List[str], actor: PydanticUser) -> PydanticAgentState:
-        return self.update_agent(agent_id=agent_id, agent_update=UpdateAgent(message_ids=message_ids), actor=actor)
+        """Set the system message (`message_ids[0]`) and replace the in-context window of `actor` with the rest."""
 
-    @enforce_types
-    def trim_older_in_context_messages(self, num: int, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
-        system_message_id = message_ids[0]
-        message_ids = message_ids[1:]
+        def write(session):
+            if self._get_system_message_ids(session, agent_id, actor) != message_ids[:1]:
+                self._set_system_message_ids(session, agent_id, message_ids[:1])
+            session.execute(delete(MessagesAgentsModel).where(*self._window(agent_id, actor)))
+            self._insert_into_window(session, agent_id, message_ids[1:], actor)
 
-        message_id_indices_belonging_to_actor = [idx for idx, message_id in enumerate(message_ids) if self.message_manager.get_message_by_id(message_id=message_id, actor=actor).user_id == actor.id]
-        message_ids_belonging_to_actor = [message_ids[idx] for idx in message_id_indices_belonging_to_actor]
-        message_ids_to_keep = [message_ids[idx] for idx in message_id_indices_belonging_to_actor[num-1:]]
+        self._write_window(agent_id, write)
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
-        message_ids_belonging_to_actor = set(message_ids_belonging_to_actor)
-        message_ids_to_keep = set(message_ids_to_keep)
-
-        # new_messages = [message_ids[0]] + message_ids[num:]  # 0 is system message
-        new_messages = [system_message_id] + [msg_id for msg_id in message_ids if (msg_id not in message_ids_belonging_to_actor or msg_id in message_ids_to_keep)]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=new_messages, actor=actor)
+    @enforce_types
+    def trim_older_in_context_messages(self, num: int, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
+        """Remove the `num - 1` oldest in-context messages of `actor`, keeping the system message."""
+        with self.session_maker() as session:
+            self._get_system_message_ids(session, agent_id, actor)
+            oldest_positions = (
+                select(MessagesAgentsModel.position)
+                .where(*self._window(agent_id, actor))
+                .order_by(MessagesAgentsModel.position)
+                .limit(max(num - 1, 0))
+            )
+            session.execute(
+                delete(MessagesAgentsModel).where(*self._window(agent_id, actor), MessagesAgentsModel.position.in_(oldest_positions))
+            )
+            session.commit()
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
     @enforce_types
     def trim_all_in_context_messages_except_system(self, agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
-        system_message_id = message_ids[0]  # 0 is system message
-        
-        # Keep system message and only filter out messages belonging to the current actor
-        new_message_ids = [system_message_id]
-        for message_id in message_ids[1:]:  # Skip system message
-            message = self.message_manager.get_message_by_id(message_id=message_id, actor=actor)
-            if message.user_id != actor.id:
-                new_message_ids.append(message_id)
-        
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=new_message_ids, actor=actor)
+        # Keep system message and only remove messages belonging to the current actor
+        with self.session_maker() as session:
+            self._get_system_message_ids(session, agent_id, actor)
+            session.execute(delete(MessagesAgentsModel).where(*self._window(agent_id, actor)))
+            session.commit()
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
     @enforce_types
     def prepend_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids
         new_messages = self.message_manager.create_many_messages(messages, actor=actor)
-        message_ids = [message_ids[0]] + [m.id for m in new_messages] + message_ids[1:]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+
+        def write(session):
+            self._get_system_message_ids(session, agent_id, actor)
+            self._insert_into_window(session, agent_id, [m.id for m in new_messages], actor, prepend=True)
+
+        self._write_window(agent_id, write)
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
     @enforce_types
     def append_to_in_context_messages(self, messages: List[PydanticMessage], agent_id: str, actor: PydanticUser) -> PydanticAgentState:
         messages = self.message_manager.create_many_messages(messages, actor=actor)
-        message_ids = self.get_agent_by_id(agent_id=agent_id, actor=actor).message_ids or []
-        message_ids += [m.id for m in messages]
-        return self.set_in_context_messages(agent_id=agent_id, message_ids=message_ids, actor=actor)
+        message_ids = [m.id for m in messages]
+
+        def write(session):
+            window_ids = message_ids
+            if not self._get_system_message_ids(session, agent_id, actor) and window_ids:
+                # The first message of an agent is its system message
+                self._set_system_message_ids(session, agent_id, window_ids[:1])
+                window_ids = window_ids[1:]
+            self._insert_into_window(session, agent_id, window_ids, actor)
+
+        self._write_window(agent_id, write)
+        return self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
     @enforce_types
     def reset_messages(self, agent_id: str, actor: PydanticUser, add_default_initial_messages: bool = False) -> PydanticAgentState:
         """
         Removes messages belonging to the specified actor from the agent's conversation history.
-        Preserves system messages and messages from other actors.
+        Preserves messages from other actors, but not the system message, which is rebuilt.
 
         This action is destructive and cannot be undone once committed.
 
@@ -612,35 +752,21 @@ class AgentManager:
             PydanticAgentState: The updated agent state with actor's messages removed.
         """
         with self.session_maker() as session:
-            # Retrieve the existing agent (will raise NoResultFound if invalid)
-            agent = AgentModel.read(db_session=session, identifier=agent_id, actor=actor)
-
-            # Get current messages to filter
-            current_messages = agent.messages
-            
-            # Filter out messages belonging to the specific actor, but keep:
-            # 1. System messages (role='system')
-            # 2. Messages from other actors (user_id != actor.id)
-            messages_to_keep = []
-            messages_to_remove = []
-            
-            for message in current_messages:
-                if message.role == 'system' or message.user_id == actor.id:
-                    messages_to_remove.append(message)
-                else:
-                    messages_to_keep.append(message)
-
-            # Update the agent's messages relationship to only keep filtered messages
-            agent.messages = messages_to_keep
-
-            # Update message_ids to reflect the remaining messages
-            # Keep the order based on created_at timestamp
-            agent.message_ids = [msg.id for msg in messages_to_keep]
-
-            # Commit the update
-            agent.update(db_session=session, actor=actor)
+            # Will raise NoResultFound if the agent is invalid
+            self._get_system_message_ids(session, agent_id, actor)
+
+            # Delete the system messages and the messages of the actor; the windows of the other actors are untouched
+            session.execute(delete(MessagesAgentsModel).where(*self._window(agent_id, actor)))
+            session.execute(
+                delete(MessageModel).where(
+                    MessageModel.agent_id == agent_id,
+                    or_(MessageModel.role == "system", MessageModel.user_id == actor.id),
+                )
+            )
+            self._set_system_message_ids(session, agent_id, [])
+            session.commit()
 
-            agent_state = agent.to_pydantic()
+        agent_state = self.get_agent_by_id(agent_id=agent_id, actor=actor)
 
         if add_default_initial_messages:
             return self.append_initial_message_sequence_to_in_context_messages(actor, agent_state)
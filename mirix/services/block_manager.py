@@ -7,6 +7,7 @@ from mirix.schemas.block import Block
 from mirix.schemas.block import Block as PydanticBlock
 from mirix.schemas.block import BlockUpdate, Human, Persona
 from mirix.schemas.user import User as PydanticUser
+from mirix.services.retrieval_cache_manager import RetrievalCacheManager
 from mirix.utils import enforce_types, list_human_files, list_persona_files
 
 
@@ -18,6 +19,7 @@ class BlockManager:
         from mirix.server.server import db_context
 
         self.session_maker = db_context
+        self.retrieval_cache_manager = RetrievalCacheManager()
 
     @enforce_types
     def create_or_update_block(self, block: Block, actor: PydanticUser) -> PydanticBlock:
@@ -31,6 +33,7 @@ class BlockManager:
                 data = block.model_dump(exclude_none=True)
                 block = BlockModel(**data, organization_id=actor.organization_id)
                 block.create(session, actor=actor)
+            self.retrieval_cache_manager.invalidate(actor.id, "core")
             return block.to_pydantic()
 
     @enforce_types
@@ -46,6 +49,7 @@ class BlockManager:
                 setattr(block, key, value)
 
             block.update(db_session=session, actor=actor)
+            self.retrieval_cache_manager.invalidate(actor.id, "core")
             return block.to_pydantic()
 
     @enforce_types
@@ -54,6 +58,7 @@ class BlockManager:
         with self.session_maker() as session:
             block = BlockModel.read(db_session=session, identifier=block_id)
             block.hard_delete(db_session=session, actor=actor)
+            self.retrieval_cache_manager.invalidate(actor.id, "core")
             return block.to_pydantic()
 
     @enforce_types
@@ -0,0 +1,241 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from mirix.constants import (
+    DUPLICATE_INDEX_BANDS,
+    DUPLICATE_INDEX_NUM_PERM,
+    MEMORY_EXPORT_CHUNK_SIZE,
+    USE_DUPLICATE_INDEX,
+)
+from mirix.log import get_logger
+from mirix.schemas.user import User as PydanticUser
+from mirix.services.helpers.index_registry import IndexRegistry
+from mirix.services.memory_stats_manager import MEMORY_TABLES
+
+logger = get_logger(__name__)
+
+# Columns whose words make up the content compared for each memory type
+DUPLICATE_TEXT_FIELDS = {
+    "episodic": ["summary", "details"],
+    "semantic": ["name", "summary", "details"],
+    "procedural": ["summary", "steps"],
+    "resource": ["title", "summary", "content"],
+    "knowledge_vault": ["caption", "secret_value"],
+}
+
+_MEMORY_TYPES_BY_TABLE = {memory_class.__tablename__: memory_type for memory_type, memory_class in MEMORY_TABLES.items()}
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_TOKEN_CHUNK_SIZE = 4096
+
+
+def memory_text(values: Iterable) -> str:
+    """Join the text columns of a memory (lists such as procedure steps are joined word by word)."""
+    parts = []
+    for value in values:
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value)
+        else:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+class MinHashLSHIndex:
+    """
+    Near-duplicate index over the word sets of memories.
+
+    Each item is summarized by a MinHash signature of `num_perm` values: the fraction of equal values of two
+    signatures estimates the Jaccard similarity of their word sets. Signatures are split into `bands` bands,
+    and items sharing a band are candidate duplicates, so a lookup only compares an item with the few
+    items it collides with instead of the whole collection.
+
+    Tokens are hashed with Python's `hash`, which is salted per process: the index lives in memory and is
+    rebuilt from the database in each process, never persisted.
+    """
+
+    def __init__(self, num_perm: int = DUPLICATE_INDEX_NUM_PERM, bands: int = DUPLICATE_INDEX_BANDS):
+        assert num_perm % bands == 0, "num_perm must be a multiple of bands"
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(1)
+        # a * hash + b stays below 2**64 with 32-bit hashes and 32-bit coefficients
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(bands)]
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of the lowercase word set of `text`, or None if it has no words."""
+        tokens = set(text.lower().split())
+        if not tokens:
+            return None
+        hashes = np.fromiter((hash(token) & 0xFFFFFFFF for token in tokens), dtype=np.uint64, count=len(tokens))
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, hashes.shape[0], _TOKEN_CHUNK_SIZE):
+            block = hashes[start:start + _TOKEN_CHUNK_SIZE, None]
+            permuted = ((block * self._a + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def upsert(self, item_id: str, text: str) -> None:
+        """Insert or replace the signature of `item_id`. Items without any word are not indexed."""
+        signature = self.signature(text)
+        with self.lock:
+            self.remove(item_id)
+            if signature is None:
+                return
+            self.signatures[item_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band][key].append(item_id)
+
+    def remove(self, item_id: str) -> bool:
+        """Remove `item_id` from the index. Returns False if it was not indexed."""
+        with self.lock:
+            signature = self.signatures.pop(item_id, None)
+            if signature is None:
+                return False
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band][key]
+                bucket.remove(item_id)
+                if not bucket:
+                    del self._buckets[band][key]
+            return True
+
+    def similarity(self, id_a: str, id_b: str) -> float:
+        """Estimated Jaccard similarity of two indexed items."""
+        return float(np.mean(self.signatures[id_a] == self.signatures[id_b]))
+
+    def candidates(self, item_id: str, threshold: float = 0.0) -> List[Tuple[str, float]]:
+        """Items colliding with `item_id` in at least one band, with an estimated similarity >= `threshold`."""
+        with self.lock:
+            signature = self.signatures.get(item_id)
+            if signature is None:
+                return []
+            colliding = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                colliding.update(self._buckets[band].get(key, ()))
+            colliding.discard(item_id)
+            scored = [(other_id, self.similarity(item_id, other_id)) for other_id in colliding]
+        scored = [(other_id, score) for other_id, score in scored if score >= threshold]
+        scored.sort(key=lambda pair: -pair[1])
+        return scored
+
+    def pairs(self, threshold: float) -> List[Tuple[str, str, float]]:
+        """Every pair of colliding items with an estimated similarity >= `threshold`, most similar first."""
+        with self.lock:
+            seen = set()
+            results = []
+            for buckets in self._buckets:
+                for bucket in buckets.values():
+                    for i, id_a in enumerate(bucket):
+                        for id_b in bucket[i + 1:]:
+                            pair = (id_a, id_b) if id_a < id_b else (id_b, id_a)
+                            if pair in seen:
+                                continue
+                            seen.add(pair)
+                            score = self.similarity(id_a, id_b)
+                            if score >= threshold:
+                                results.append((pair[0], pair[1], score))
+        results.sort(key=lambda triple: -triple[2])
+        return results
+
+
+# Indexes are shared by every manager instance in the process, keyed by (memory_type, user_id)
+_registry: IndexRegistry[MinHashLSHIndex] = IndexRegistry()
+
+
+class DuplicateIndexManager:
+    """Manager class that keeps per-user, per-memory-type near-duplicate indexes in sync with the memory tables."""
+
+    def __init__(self):
+        from mirix.server.server import db_context
+
+        self.session_maker = db_context
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return USE_DUPLICATE_INDEX
+
+    def _text_columns(self, memory_type: str):
+        memory_class = MEMORY_TABLES[memory_type]
+        return [getattr(memory_class, field) for field in DUPLICATE_TEXT_FIELDS[memory_type]]
+
+    def _build_from_db(self, memory_type: str, user_id: str) -> MinHashLSHIndex:
+        memory_class = MEMORY_TABLES[memory_type]
+        index = MinHashLSHIndex()
+        query = (
+            select(memory_class.id, *self._text_columns(memory_type))
+            .where(memory_class.user_id == user_id)
+            .execution_options(yield_per=MEMORY_EXPORT_CHUNK_SIZE)
+        )
+        with self.session_maker() as session:
+            for item_id, *values in session.execute(query):
+                index.upsert(item_id, memory_text(values))
+        logger.info(f"Built near-duplicate index of {len(index)} {memory_type} memories")
+        return index
+
+    def get_index(self, memory_type: str, user_id: str) -> MinHashLSHIndex:
+        """Return the live index, building it from the database on first use (on every use when disabled)."""
+        if not self.is_enabled():
+            return self._build_from_db(memory_type, user_id)
+        return _registry.get_or_build((memory_type, user_id), lambda: self._build_from_db(memory_type, user_id))
+
+    def _apply(self, target_class, user_id: str, write: Callable[[MinHashLSHIndex], None]) -> None:
+        """Apply `write` to the index of the memory type of `target_class` if it is loaded or being built."""
+        if self.is_enabled():
+            _registry.apply((_MEMORY_TYPES_BY_TABLE.get(target_class.__tablename__), user_id), write)
+
+    def index_item(self, item) -> None:
+        """
+        Upsert a freshly created or updated ORM memory item. Indexes that were never queried are not loaded,
+        so writes skip them until the first duplicate lookup, which builds the index with every item. Writes
+        that arrive while that build runs are replayed on the index before it is used.
+        """
+        memory_type = _MEMORY_TYPES_BY_TABLE[type(item).__tablename__]
+        item_id = item.id
+        text = memory_text(getattr(item, field) for field in DUPLICATE_TEXT_FIELDS[memory_type])
+        self._apply(type(item), item.user_id, lambda index: index.upsert(item_id, text))
+
+    def remove_item(self, target_class, item_id: str, user_id: str) -> None:
+        """Drop a deleted memory item from the index of its memory type."""
+        self._apply(target_class, user_id, lambda index: index.remove(item_id))
+
+    def find_candidate_duplicates(
+        self, memory_type: str, item_id: str, actor: PydanticUser, threshold: float = 0.7
+    ) -> List[Tuple[str, float]]:
+        """Return (id, estimated similarity) of the candidate duplicates of a memory, most similar first."""
+        return self.get_index(memory_type, actor.id).candidates(item_id, threshold)
+
+    def find_duplicate_pairs(self, memory_type: str, actor: PydanticUser, threshold: float = 0.7) -> List[Tuple[str, str, float]]:
+        """Return (id, id, estimated similarity) for every pair of memories of a type above `threshold`."""
+        return self.get_index(memory_type, actor.id).pairs(threshold)
+
+    def get_contents(self, memory_type: str, item_ids: List[str], actor: PydanticUser) -> Dict[str, str]:
+        """Text of the given memories, as compared by the index."""
+        memory_class = MEMORY_TABLES[memory_type]
+        contents = {}
+        item_ids = list(item_ids)
+        with self.session_maker() as session:
+            # Chunked to stay below the bound parameter limit of SQLite
+            for start in range(0, len(item_ids), 500):
+                query = select(memory_class.id, *self._text_columns(memory_type)).where(
+                    memory_class.user_id == actor.id, memory_class.id.in_(item_ids[start:start + 500])
+                )
+                for item_id, *values in session.execute(query):
+                    contents[item_id] = memory_text(values)
+        return contents
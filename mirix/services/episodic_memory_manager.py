@@ -11,24 +11,28 @@ from mirix.orm.episodic_memory import EpisodicEvent
 from mirix.schemas.user import User as PydanticUser
 from sqlalchemy import Select, func, literal, select, union_all, text
 from mirix.schemas.episodic_memory import EpisodicEvent as PydanticEpisodicEvent
-from mirix.utils import enforce_types
+from mirix.utils import enforce_types, generate_unique_short_ids
 from pydantic import BaseModel, Field
 from sqlalchemy import select
 from rapidfuzz import fuzz 
 from rank_bm25 import BM25Okapi
 from mirix.settings import settings
 from mirix.schemas.agent import AgentState
-from mirix.embeddings import embedding_model, parse_and_chunk_text
+from mirix.embeddings import embedding_model, get_text_embeddings, parse_and_chunk_text
 from mirix.services.utils import build_query, update_timezone
+from mirix.services.helpers.memory_write_hooks import MemoryWriteHooksMixin
 from mirix.helpers.converters import deserialize_vector
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
-class EpisodicMemoryManager:
+class EpisodicMemoryManager(MemoryWriteHooksMixin):
     """Manager class to handle business logic related to Episodic episodic_memory items."""
 
+    memory_type = "episodic"
+
     def __init__(self):
         from mirix.server.server import db_context
         self.session_maker = db_context
+        self._init_memory_indexes()
 
     def _clean_text_for_search(self, text: str) -> str:
         """
@@ -167,6 +171,15 @@ class EpisodicMemoryManager:
             from mirix.utils import generate_unique_short_id
             episodic_memory.id = generate_unique_short_id(self.session_maker, EpisodicEvent, "ep")
 
+        # Create the episodic episodic_memory item
+        with self.session_maker() as session:
+            episodic_memory_item = self._build_episodic_event(episodic_memory, actor)
+            episodic_memory_item.create(session)
+            self._on_items_written([episodic_memory_item])
+            return episodic_memory_item.to_pydantic()
+
+    def _build_episodic_event(self, episodic_memory: PydanticEpisodicEvent, actor: PydanticUser) -> EpisodicEvent:
+        """Validate an episodic event and convert it to its ORM model, owned by `actor`."""
         # Convert the Pydantic model into a dict
         episodic_memory_dict = episodic_memory.model_dump()
 
@@ -184,19 +197,21 @@ class EpisodicMemoryManager:
         
         # Other fields like occurred_at, created_at, etc. 
         # might be auto-generated by the model or the DB
-
-        # Create the episodic episodic_memory item
-        with self.session_maker() as session:
-            episodic_memory_item = EpisodicEvent(**episodic_memory_dict)
-            episodic_memory_item.create(session)
-            return episodic_memory_item.to_pydantic()
+        return EpisodicEvent(**episodic_memory_dict)
 
     @enforce_types
     def create_many_episodic_memory(self, episodic_memory: List[PydanticEpisodicEvent], actor: PydanticUser) -> List[PydanticEpisodicEvent]:
         """
-        Create multiple episodic episodic_memory records in one go.
+        Create multiple episodic episodic_memory records in one go, in a single transaction.
         """
-        return [self.create_episodic_memory(e, actor) for e in episodic_memory]
+        without_id = [e for e in episodic_memory if not e.id]
+        for e, event_id in zip(without_id, generate_unique_short_ids(self.session_maker, EpisodicEvent, len(without_id), "ep")):
+            e.id = event_id
+
+        with self.session_maker() as session:
+            episodic_memory_items = EpisodicEvent.batch_create([self._build_episodic_event(e, actor) for e in episodic_memory], session)
+            self._on_items_written(episodic_memory_items)
+            return [episodic_memory_item.to_pydantic() for episodic_memory_item in episodic_memory_items]
 
     @enforce_types
     def delete_event_by_id(self, id: str, actor: PydanticUser) -> None:
@@ -209,6 +224,7 @@ class EpisodicMemoryManager:
                 episodic_memory_item.hard_delete(session)
             except NoResultFound:
                 raise NoResultFound(f"Episodic episodic_memory record with id {id} not found.")
+        self._on_item_deleted(EpisodicEvent, id, actor.id)
 
     @enforce_types
     def insert_event(self, 
@@ -222,42 +238,57 @@ class EpisodicMemoryManager:
                      organization_id: str,
                      tree_path: Optional[List[str]] = None) -> PydanticEpisodicEvent:
 
-        try:
+        return self.insert_events(
+            actor=actor,
+            agent_state=agent_state,
+            events=[dict(event_type=event_type, timestamp=timestamp, event_actor=event_actor, details=details, summary=summary, tree_path=tree_path)],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                details_embedding = embed_model.get_text_embedding(details)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                embedding_config = agent_state.embedding_config
-            else:
-                details_embedding = None
-                summary_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_events(self,
+                      actor: PydanticUser,
+                      agent_state: AgentState,
+                      events: List[dict],
+                      organization_id: str) -> List[PydanticEpisodicEvent]:
+        """
+        Insert several events, embedding all of them in one batch and writing them in one transaction.
+
+        Args:
+            events: The arguments of `insert_event` for each event (event_type, timestamp, event_actor,
+                details, summary and optionally tree_path)
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            # TODO: need to check if we need to chunk the text
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = get_text_embeddings(embed_model, [text for event in events for text in (event["details"], event["summary"])])
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = [None] * (2 * len(events))
+            embedding_config = None
 
-            event = self.create_episodic_memory(
+        last_modify = {"timestamp": datetime.now(dt.timezone.utc).isoformat(), "operation": "created"}
+        return self.create_many_episodic_memory(
+            [
                 PydanticEpisodicEvent(
-                    occurred_at=timestamp,
-                    event_type=event_type,
+                    occurred_at=event["timestamp"],
+                    event_type=event["event_type"],
                     user_id=actor.id,
-                    actor=event_actor,
-                    summary=summary,
-                    details=details,
-                    tree_path=tree_path or [],
+                    actor=event["event_actor"],
+                    summary=event["summary"],
+                    details=event["details"],
+                    tree_path=event.get("tree_path") or [],
                     organization_id=organization_id,
-                    summary_embedding=summary_embedding,
-                    details_embedding=details_embedding,
+                    summary_embedding=embeddings[2 * i + 1],
+                    details_embedding=embeddings[2 * i],
                     embedding_config=embedding_config,
-                    last_modify={"timestamp": datetime.now(dt.timezone.utc).isoformat(), "operation": "created"},
-                ),
-                actor=actor
-            )
-
-            return event
-        
-        except Exception as e:
-            raise e
+                    last_modify=dict(last_modify),
+                )
+                for i, event in enumerate(events)
+            ],
+            actor=actor
+        )
     
     @update_timezone
     @enforce_types
@@ -317,7 +348,7 @@ class EpisodicMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the trigger-maintained FTS5 index on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
@@ -330,12 +361,13 @@ class EpisodicMemoryManager:
             PostgreSQL's native full-text search with ts_rank_cd for BM25-like scoring. This is much more efficient 
             than loading all documents into memory and leverages your existing GIN indexes.
             
-            **For SQLite users**: 'fts5_match' is recommended for text-based searches as it's efficient and uses 
-            proper BM25 ranking. 'fts5_match' requires SQLite compiled with FTS5 support.
+            **For SQLite users**: 'bm25' queries an FTS5 table kept in sync by triggers and ranked with FTS5's
+            bm25(). If SQLite was compiled without FTS5, it falls back to the legacy in-memory BM25.
             
             Performance comparison:
             - PostgreSQL 'bm25': Native DB search, very fast, scales well
-            - Legacy 'bm25' (SQLite): In-memory processing, slow for large datasets
+            - SQLite 'bm25': FTS5 index, only reads the postings of the query terms
+            - Legacy 'bm25' (SQLite without FTS5): In-memory processing, slow for large datasets
         """
 
         with self.session_maker() as session:
@@ -374,20 +406,36 @@ class EpisodicMemoryManager:
                     EpisodicEvent.user_id == actor.id
                 )
 
+                ranked_ids = None
+
                 if search_method == 'embedding':
 
                     embed_query = True
                     embedding_config = agent_state.embedding_config
 
-                    main_query = build_query(
-                        base_query=base_query,
+                    # On SQLite, rank with the in-process ANN index and only hydrate the top-k rows
+                    ranked_ids = self.vector_index_manager.search(
+                        target_class=EpisodicEvent,
+                        field_name=search_field + "_embedding",
+                        actor=actor,
                         query_text=query,
                         embedded_text=embedded_text,
-                        embed_query=embed_query,
                         embedding_config=embedding_config,
-                        search_field = eval("EpisodicEvent." + search_field + "_embedding"),
-                        target_class=EpisodicEvent,
+                        limit=limit,
                     )
+
+                    if ranked_ids is not None:
+                        main_query = base_query.where(EpisodicEvent.id.in_(ranked_ids))
+                    else:
+                        main_query = build_query(
+                            base_query=base_query,
+                            query_text=query,
+                            embedded_text=embedded_text,
+                            embed_query=embed_query,
+                            embedding_config=embedding_config,
+                            search_field = eval("EpisodicEvent." + search_field + "_embedding"),
+                            target_class=EpisodicEvent,
+                        )
             
                 elif search_method == 'string_match':
 
@@ -403,7 +451,17 @@ class EpisodicMemoryManager:
                             session, base_query, query, search_field, limit, actor
                         )
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
+                        # Rank with the FTS5 index kept in sync by triggers, reading only the query terms' postings
+                        ranked_ids = self.fulltext_index_manager.search(
+                            session, EpisodicEvent, search_field, query, actor.id, limit
+                        )
+                        if ranked_ids is not None:
+                            result = session.execute(select(EpisodicEvent).where(EpisodicEvent.id.in_(ranked_ids)))
+                            rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                            top_events = sorted(result.scalars().all(), key=lambda event: rank[event.id])
+                            return [event.to_pydantic() for event in top_events]
+
+                        # Fallback to in-memory BM25 (legacy method) when the FTS5 index is unavailable
                         # Load all candidate events (memory-intensive, kept for compatibility)
                         result = session.execute(select(EpisodicEvent).where(
                             EpisodicEvent.user_id == actor.id
@@ -490,7 +548,7 @@ class EpisodicMemoryManager:
                     # Return the list after converting to Pydantic.
                     return [event.to_pydantic() for event in episodic_memory]
 
-                if limit:
+                if limit and ranked_ids is None:
                     main_query = main_query.limit(limit)
 
                 results = list(session.execute(main_query))
@@ -500,6 +558,10 @@ class EpisodicMemoryManager:
                     data = dict(row._mapping)
                     episodic_memory.append(EpisodicEvent(**data))
 
+                if ranked_ids is not None:
+                    rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                    episodic_memory.sort(key=lambda event: rank[event.id])
+
                 return [event.to_pydantic() for event in episodic_memory]
 
     def _postgresql_fulltext_search(self, session, base_query, query_text, search_field, limit, actor):
@@ -731,6 +793,7 @@ class EpisodicMemoryManager:
             }
             
             selected_event.update(session)
+            self._on_items_written([selected_event])
             return selected_event.to_pydantic()
     
     def _parse_embedding_field(self, embedding_value):
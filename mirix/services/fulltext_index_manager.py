@@ -0,0 +1,145 @@
+import re
+import string
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from mirix.log import get_logger
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+
+# Memory table -> (indexed text columns, column searched when no usable search_field is given).
+# A default of None searches across every indexed column.
+FTS_TABLES: Dict[str, Tuple[List[str], Optional[str]]] = {
+    "episodic_memory": (["summary", "details", "actor", "event_type"], "summary"),
+    "semantic_memory": (["name", "summary", "details", "source"], "name"),
+    "procedural_memory": (["summary", "entry_type", "steps"], None),
+    "resource_memory": (["title", "summary", "content", "resource_type"], "content"),
+    "knowledge_vault": (["caption", "entry_type", "source", "sensitivity"], "caption"),
+}
+
+
+def _fts_table(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def _fts_statements(table_name: str, columns: List[str]) -> List[str]:
+    """DDL for the FTS5 table of a memory table and the triggers that keep it in sync."""
+    fts_table = _fts_table(table_name)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"id UNINDEXED, user_id UNINDEXED, {column_list}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, id, user_id, {column_list}) VALUES (new.rowid, new.id, new.user_id, {new_values}); "
+        f"END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"DELETE FROM {fts_table} WHERE rowid = old.rowid; "
+        f"END",
+        # Only re-tokenize when an indexed column changes, not on embedding or metadata updates
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF user_id, {column_list} ON {table_name} BEGIN "
+        f"DELETE FROM {fts_table} WHERE rowid = old.rowid; "
+        f"INSERT INTO {fts_table}(rowid, id, user_id, {column_list}) VALUES (new.rowid, new.id, new.user_id, {new_values}); "
+        f"END",
+    ]
+
+
+def create_sqlite_fts_tables(engine) -> None:
+    """
+    Create the FTS5 tables and sync triggers for the memory tables on a SQLite engine.
+
+    Existing rows are backfilled the first time a table is created, and an index whose
+    row count drifted from its memory table is rebuilt. Failures (e.g. SQLite built
+    without FTS5) are logged and leave the managers on the in-memory BM25 path.
+    """
+    try:
+        with engine.begin() as connection:
+            for table_name, (columns, _) in FTS_TABLES.items():
+                fts_table = _fts_table(table_name)
+                column_list = ", ".join(columns)
+
+                for statement in _fts_statements(table_name, columns):
+                    connection.exec_driver_sql(statement)
+
+                indexed = connection.exec_driver_sql(f"SELECT count(*) FROM {fts_table}").scalar()
+                total = connection.exec_driver_sql(f"SELECT count(*) FROM {table_name}").scalar()
+                if indexed != total:
+                    logger.info("Rebuilding full-text index %s (%d of %d rows indexed)", fts_table, indexed, total)
+                    connection.exec_driver_sql(f"DELETE FROM {fts_table}")
+                    connection.exec_driver_sql(
+                        f"INSERT INTO {fts_table}(rowid, id, user_id, {column_list}) "
+                        f"SELECT rowid, id, user_id, {column_list} FROM {table_name}"
+                    )
+        FullTextIndexManager.available = True
+    except Exception as e:
+        logger.warning("Could not set up SQLite full-text indexes, falling back to in-memory BM25: %s", e)
+        FullTextIndexManager.available = False
+
+
+class FullTextIndexManager:
+    """Ranks memory items with the SQLite FTS5 indexes maintained by the triggers above."""
+
+    # Set by create_sqlite_fts_tables once the indexes exist on the SQLite engine
+    available: bool = False
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.available and not settings.mirix_pg_uri_no_default
+
+    @staticmethod
+    def tokenize_query(query: str) -> List[str]:
+        """Tokenize a query the same way the in-memory BM25 path does, dropping duplicates."""
+        translator = str.maketrans(string.punctuation, " " * len(string.punctuation))
+        cleaned = re.sub(r"\s+", " ", (query or "").translate(translator).lower().strip())
+        return list(dict.fromkeys(token for token in cleaned.split() if len(token) > 1))
+
+    def search(self, session, target_class, search_field: str, query: str, user_id: str, limit: Optional[int]) -> Optional[List[str]]:
+        """
+        Return the ids of the best matching items of `target_class` for `user_id`, best first.
+
+        Only the postings of the query terms are read. Returns None when the index cannot
+        serve the request (disabled, unknown table or field, or no usable query terms) so the
+        caller can fall back to its in-memory BM25 path.
+        """
+        if not self.is_enabled():
+            return None
+
+        table_name = target_class.__tablename__
+        if table_name not in FTS_TABLES:
+            return None
+        columns, default_field = FTS_TABLES[table_name]
+
+        if search_field:
+            if search_field not in columns:
+                return None
+            searched = [search_field]
+        else:
+            searched = [default_field] if default_field else columns
+
+        query_tokens = self.tokenize_query(query)
+        if not query_tokens:
+            return None
+
+        fts_table = _fts_table(table_name)
+        terms = " OR ".join('"' + token.replace('"', '""') + '"' for token in query_tokens)
+        match_expression = "{" + " ".join(searched) + "} : (" + terms + ")"
+        # One bm25() weight per column: id and user_id, then the indexed columns
+        weights = ", ".join(["0.0", "0.0"] + ["1.0" if column in searched else "0.0" for column in columns])
+
+        statement = (
+            f"SELECT id FROM {fts_table} WHERE {fts_table} MATCH :match AND user_id = :user_id "
+            f"ORDER BY bm25({fts_table}, {weights})"
+        )
+        params = {"match": match_expression, "user_id": user_id}
+        if limit:
+            statement += " LIMIT :limit"
+            params["limit"] = limit
+
+        try:
+            return [row[0] for row in session.execute(text(statement), params)]
+        except Exception as e:
+            logger.warning("Full-text search on %s failed, falling back to in-memory BM25: %s", fts_table, e)
+            return None
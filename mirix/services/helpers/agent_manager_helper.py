@@ -43,22 +43,25 @@ def _process_relationship(
             setattr(agent, relationship_name, [])
         return
 
-    # Retrieve models for the provided IDs
-    found_items = session.query(model_class).filter(model_class.id.in_(item_ids)).all()
+    # Only retrieve the models that are not already in the relationship
+    current_ids = {item.id for item in current_relationship}
+    new_ids = set(item_ids) - current_ids
+    found_items = session.query(model_class).filter(model_class.id.in_(new_ids)).all() if new_ids else []
 
     # Validate all items are found if allow_partial is False
-    if not allow_partial and len(found_items) != len(item_ids):
-        missing = set(item_ids) - {item.id for item in found_items}
+    if not allow_partial and len(found_items) != len(new_ids):
+        missing = new_ids - {item.id for item in found_items}
         raise NoResultFound(f"Items not found in {relationship_name}: {missing}")
 
     if replace:
-        # Replace the relationship
-        setattr(agent, relationship_name, found_items)
+        # Replace the relationship, keeping the items that stay so that only the difference is written
+        kept_ids = set(item_ids)
+        kept_items = [item for item in current_relationship if item.id in kept_ids]
+        if len(kept_items) != len(current_relationship) or found_items:
+            setattr(agent, relationship_name, kept_items + found_items)
     else:
         # Extend the relationship (only add new items)
-        current_ids = {item.id for item in current_relationship}
-        new_items = [item for item in found_items if item.id not in current_ids]
-        current_relationship.extend(new_items)
+        current_relationship.extend(found_items)
 
 
 def _process_tags(agent: AgentModel, tags: List[str], replace=True):
@@ -75,13 +78,13 @@ def _process_tags(agent: AgentModel, tags: List[str], replace=True):
             agent.tags = []
         return
 
-    # Ensure tags are unique and prepare for replacement/extension
-    new_tags = {AgentsTags(agent_id=agent.id, tag=tag) for tag in set(tags)}
+    # Ensure tags are unique, and keep the existing rows so that only the difference is written
+    existing_tags = {t.tag: t for t in agent.tags}
     if replace:
-        agent.tags = list(new_tags)
+        if set(tags) != set(existing_tags):
+            agent.tags = [existing_tags.get(tag) or AgentsTags(agent_id=agent.id, tag=tag) for tag in set(tags)]
     else:
-        existing_tags = {t.tag for t in agent.tags}
-        agent.tags.extend([tag for tag in new_tags if tag.tag not in existing_tags])
+        agent.tags.extend([AgentsTags(agent_id=agent.id, tag=tag) for tag in set(tags) if tag not in existing_tags])
 
 
 def derive_system_message(agent_type: AgentType, system: Optional[str] = None):
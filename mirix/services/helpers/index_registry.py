@@ -0,0 +1,85 @@
+import threading
+from typing import Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+IndexT = TypeVar("IndexT")
+
+
+class _IndexBuild:
+    """An index being built, and the writes to apply to it before it is published."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.index = None
+        self.error: Optional[BaseException] = None
+        self.writes: List[Callable] = []
+
+
+class IndexRegistry(Generic[IndexT]):
+    """
+    Process-wide registry of in-memory indexes, each built on first use.
+
+    Builds run outside the registry lock, so that reading an index from the database does not block
+    the lookups of and writes to other indexes. Concurrent lookups of a key being built wait for that
+    build, and writes to it are queued and replayed on the index right before it is published.
+    """
+
+    def __init__(self):
+        self.indexes: Dict[Hashable, IndexT] = {}
+        self.lock = threading.Lock()
+        self._builds: Dict[Hashable, _IndexBuild] = {}
+
+    def get(self, key: Hashable) -> Optional[IndexT]:
+        """The published index of `key`, or None."""
+        with self.lock:
+            return self.indexes.get(key)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], IndexT]) -> IndexT:
+        """Return the index of `key`, calling `build()` to create it unless another thread already is."""
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is not None:
+                return index
+            pending = self._builds.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._builds[key] = _IndexBuild()
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.index
+
+        try:
+            index = build()
+        except BaseException as e:
+            with self.lock:
+                del self._builds[key]
+            pending.error = e
+            pending.done.set()
+            raise
+
+        with self.lock:
+            for write in pending.writes:
+                write(index)
+            self.indexes[key] = index
+            del self._builds[key]
+        pending.index = index
+        pending.done.set()
+        return index
+
+    def apply(self, key: Hashable, write: Callable[[IndexT], None]) -> bool:
+        """
+        Run `write(index)` on the index of `key`, or queue it if the index is being built.
+        Returns False, without running it, if the index is neither published nor being built.
+        """
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                pending = self._builds.get(key)
+                if pending is None:
+                    return False
+                pending.writes.append(write)
+                return True
+        write(index)
+        return True
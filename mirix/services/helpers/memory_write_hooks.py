@@ -0,0 +1,39 @@
+from typing import Iterable
+
+from mirix.services.duplicate_index_manager import DuplicateIndexManager
+from mirix.services.fulltext_index_manager import FullTextIndexManager
+from mirix.services.retrieval_cache_manager import RetrievalCacheManager
+from mirix.services.vector_index_manager import VectorIndexManager
+
+
+class MemoryWriteHooksMixin:
+    """
+    Keeps the in-memory indexes and the retrieval cache of a memory manager in sync with its writes.
+
+    Managers set `memory_type`, call `_init_memory_indexes()` from `__init__`, and call
+    `_on_items_written` / `_on_item_deleted` from every path that writes or deletes memory items.
+    """
+
+    memory_type: str
+
+    def _init_memory_indexes(self) -> None:
+        self.vector_index_manager = VectorIndexManager()
+        self.duplicate_index_manager = DuplicateIndexManager()
+        self.fulltext_index_manager = FullTextIndexManager()
+        self.retrieval_cache_manager = RetrievalCacheManager()
+
+    def _on_items_written(self, items: Iterable) -> None:
+        """Index freshly created or updated ORM memory items and invalidate the cached retrievals of their users."""
+        user_ids = set()
+        for item in items:
+            self.vector_index_manager.index_item(item)
+            self.duplicate_index_manager.index_item(item)
+            user_ids.add(item.user_id)
+        for user_id in user_ids:
+            self.retrieval_cache_manager.invalidate(user_id, self.memory_type)
+
+    def _on_item_deleted(self, target_class, item_id: str, user_id: str) -> None:
+        """Drop a deleted memory item from the indexes and invalidate the cached retrievals of its user."""
+        self.vector_index_manager.remove_item(target_class, item_id, user_id)
+        self.duplicate_index_manager.remove_item(target_class, item_id, user_id)
+        self.retrieval_cache_manager.invalidate(user_id, self.memory_type)
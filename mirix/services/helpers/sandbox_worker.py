@@ -0,0 +1,130 @@
+"""
+Long-lived sandbox worker, run by the sandbox virtual environment's interpreter.
+
+Reads tool invocations from stdin and writes their results to stdout, both framed as an
+8-byte big-endian length followed by a pickle. Only depends on the standard library, since
+the sandbox venv may not have mirix installed; mirix is imported once up front when it is
+available so that agent states can be unpickled without paying the import on every call.
+
+Each call gets a fresh namespace and environment, and the working directory, sys.path and
+sys.modules are restored after it. A call that raised or imported new modules (whose state
+cannot be safely unloaded, e.g. C extensions) asks to be recycled, and the pool then replaces
+the worker with a fresh interpreter.
+
+Do not import this module from mirix: it is executed as a script by SandboxWorkerPool.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import pickle
+import struct
+import sys
+import traceback
+from collections import OrderedDict
+
+HEADER = struct.Struct(">Q")
+# Preamble of every tool execution, matching ToolExecutionSandbox.generate_execution_script
+PREAMBLE = "from typing import *\nimport pickle\nimport sys\nimport base64\n"
+
+# Compiled code objects, keyed by content hash, least recently used first
+COMPILE_CACHE_SIZE = 256
+_compiled = OrderedDict()
+
+
+def compile_cached(source, mode="exec"):
+    """Compile source code once per content hash, keeping the COMPILE_CACHE_SIZE most recently used."""
+    key = (hashlib.sha256(source.encode("utf-8")).hexdigest(), mode)
+    code = _compiled.get(key)
+    if code is None:
+        code = compile(source, "<tool>", mode)
+        _compiled[key] = code
+        if len(_compiled) > COMPILE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(key)
+    return code
+
+
+def read_exactly(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def execute(request):
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    exec(compile_cached(PREAMBLE), namespace)
+    if request["agent_state"] is not None:
+        exec(compile_cached("import mirix\nfrom mirix import *\n"), namespace)
+        namespace["agent_state"] = pickle.loads(request["agent_state"])
+    else:
+        namespace["agent_state"] = None
+    exec(compile_cached(request["params"]), namespace)
+    exec(compile_cached(request["tool_source"]), namespace)
+    results = eval(compile_cached(request["call"], "eval"), namespace)
+    return base64.b64encode(pickle.dumps({"results": results, "agent_state": namespace["agent_state"]})).decode("utf-8")
+
+
+def handle(request):
+    original_env = os.environ.copy()
+    original_cwd = os.getcwd()
+    original_path = list(sys.path)
+    original_modules = dict(sys.modules)
+    original_stdout, original_stderr = sys.stdout, sys.stderr
+    captured_stdout, captured_stderr = io.StringIO(), io.StringIO()
+    sys.stdout, sys.stderr = captured_stdout, captured_stderr
+    os.environ.clear()
+    os.environ.update(request["env"])
+    response = {}
+    try:
+        response["result"] = execute(request)
+    except Exception as e:
+        response["error"] = (type(e).__name__, str(e))
+        traceback.print_exc(file=captured_stderr)
+    finally:
+        sys.stdout, sys.stderr = original_stdout, original_stderr
+        os.environ.clear()
+        os.environ.update(original_env)
+        os.chdir(original_cwd)
+        sys.path[:] = original_path
+        imported = set(sys.modules) - set(original_modules)
+        sys.modules.clear()
+        sys.modules.update(original_modules)
+    response["recycle"] = "error" in response or bool(imported)
+    response["stdout"] = captured_stdout.getvalue()
+    response["stderr"] = captured_stderr.getvalue()
+    return response
+
+
+def main():
+    # Keep the protocol on a private copy of stdout, and send anything else that writes to
+    # file descriptor 1 (e.g. subprocesses started by a tool) to stderr instead
+    requests = os.fdopen(os.dup(sys.stdin.fileno()), "rb")
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        import mirix  # noqa: F401
+    except Exception:
+        pass
+
+    while True:
+        header = read_exactly(requests, HEADER.size)
+        if header is None:
+            return
+        payload = read_exactly(requests, HEADER.unpack(header)[0])
+        if payload is None:
+            return
+        data = pickle.dumps(handle(pickle.loads(payload)))
+        responses.write(HEADER.pack(len(data)) + data)
+        responses.flush()
+
+
+if __name__ == "__main__":
+    main()
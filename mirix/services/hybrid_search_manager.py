@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY, HYBRID_SEARCH_LATENCY_BUDGET, HYBRID_SEARCH_RRF_K
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+# Retrievers fused by the hybrid search, in tie-breaking order
+HYBRID_RETRIEVERS = ("bm25", "embedding")
+
+# Shared by every hybrid search, so that late retrievers that overran their budget keep
+# running in the background without holding up the caller's own thread pool
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hybrid-search")
+
+
+class HybridSearchManager:
+    """
+    Runs the full-text (BM25) and vector retrievers of a memory manager concurrently and
+    fuses their rankings with reciprocal rank fusion.
+    """
+
+    @staticmethod
+    def retrievers() -> tuple:
+        """The retrievers to run: without memory embeddings (BUILD_EMBEDDINGS_FOR_MEMORY off), BM25 only."""
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            return HYBRID_RETRIEVERS
+        return tuple(retriever for retriever in HYBRID_RETRIEVERS if retriever != "embedding")
+
+    @staticmethod
+    def reciprocal_rank_fusion(rankings: List[List[Any]], limit: Optional[int], k: int = HYBRID_SEARCH_RRF_K) -> List[Any]:
+        """
+        Fuse ranked lists of items (deduplicated by `id`) into one list, best first.
+
+        Each item scores sum(1 / (k + rank)) over the lists it appears in. Ties keep the order
+        in which items were first seen, so earlier rankings win them.
+        """
+        scores: Dict[str, float] = {}
+        items: Dict[str, Any] = {}
+        for ranking in rankings:
+            for rank, item in enumerate(ranking, start=1):
+                items.setdefault(item.id, item)
+                scores[item.id] = scores.get(item.id, 0.0) + 1.0 / (k + rank)
+        fused = sorted(items, key=lambda item_id: scores[item_id], reverse=True)
+        if limit:
+            fused = fused[:limit]
+        return [items[item_id] for item_id in fused]
+
+    def search(self,
+               list_fn: Callable[..., List[Any]],
+               query: str = '',
+               limit: Optional[int] = 50,
+               latency_budget: Optional[float] = HYBRID_SEARCH_LATENCY_BUDGET,
+               **kwargs) -> List[Any]:
+        """
+        Search a memory type with every retriever of `retrievers()` and fuse the results.
+
+        Args:
+            list_fn: The `list_*` method of a memory manager, e.g. `EpisodicMemoryManager.list_episodic_memory`
+            query: Search query string. An empty query lists the most recent items as `list_fn` does.
+            limit: Maximum number of results to return
+            latency_budget: Seconds to wait for the retrievers. The results of the retrievers that
+                finished in time are fused; if none did, the first one to finish is used.
+                None waits for all of them.
+            **kwargs: Forwarded to `list_fn` (agent_state, actor, search_field, timezone_str, ...)
+
+        Returns:
+            The fused items, best first
+        """
+        kwargs.pop('search_method', None)
+        kwargs.pop('embedded_text', None)
+
+        retrievers = self.retrievers()
+        if not query or len(retrievers) == 1:
+            # Nothing to fuse: the query is not embedded when there are no memory embeddings to compare it with
+            return list_fn(query=query, search_method='bm25', limit=limit, **kwargs)
+
+        # The embedding retriever embeds the query itself, concurrently with the BM25 query
+        futures = {
+            _executor.submit(list_fn, query=query, search_method=search_method, limit=limit, **kwargs): search_method
+            for search_method in retrievers
+        }
+
+        start = time.monotonic()
+        done, pending = wait(futures, timeout=latency_budget)
+        while not any(future.exception() is None for future in done) and pending:
+            more, pending = wait(pending, return_when=FIRST_COMPLETED)
+            done |= more
+        if pending:
+            logger.debug(
+                "Hybrid search skipped %s after %.3fs",
+                ", ".join(futures[future] for future in pending), time.monotonic() - start,
+            )
+
+        rankings = {}
+        for future in done:
+            if future.exception() is not None:
+                logger.warning("Hybrid search retriever %s failed: %s", futures[future], future.exception())
+                continue
+            rankings[futures[future]] = future.result()
+
+        if not rankings:
+            # Every retriever failed: surface one of their errors
+            return next(iter(done)).result()
+
+        return self.reciprocal_rank_fusion(
+            [rankings[search_method] for search_method in retrievers if search_method in rankings], limit
+        )
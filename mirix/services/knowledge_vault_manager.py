@@ -11,24 +11,28 @@ from mirix.orm.errors import NoResultFound
 from mirix.orm.knowledge_vault import KnowledgeVaultItem
 from mirix.schemas.user import User as PydanticUser
 from mirix.schemas.knowledge_vault import KnowledgeVaultItem as PydanticKnowledgeVaultItem
-from mirix.utils import enforce_types
+from mirix.utils import enforce_types, generate_unique_short_ids
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func, text
 from mirix.schemas.agent import AgentState
-from mirix.embeddings import embedding_model
+from mirix.embeddings import embedding_model, get_text_embeddings
 from difflib import SequenceMatcher
 from mirix.services.utils import build_query, update_timezone
+from mirix.services.helpers.memory_write_hooks import MemoryWriteHooksMixin
 from mirix.settings import settings
 from mirix.helpers.converters import deserialize_vector
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
 
-class KnowledgeVaultManager:
+class KnowledgeVaultManager(MemoryWriteHooksMixin):
     """Manager class to handle business logic related to Knowledge Vault Items."""
 
+    memory_type = "knowledge_vault"
+
     def __init__(self):
         from mirix.server.server import db_context
         self.session_maker = db_context
+        self._init_memory_indexes()
 
     def _clean_text_for_search(self, text: str) -> str:
         """
@@ -423,6 +427,17 @@ class KnowledgeVaultManager:
             from mirix.utils import generate_unique_short_id
             knowledge_vault_item.id = generate_unique_short_id(self.session_maker, KnowledgeVaultItem, "kv")
 
+        # Create the knowledge vault item
+        with self.session_maker() as session:
+            knowledge_item = self._build_item(knowledge_vault_item, actor)
+            knowledge_item.create(session)
+            self._on_items_written([knowledge_item])
+            
+            # Return the created item as a Pydantic model
+            return knowledge_item.to_pydantic()
+
+    def _build_item(self, knowledge_vault_item: PydanticKnowledgeVaultItem, actor: PydanticUser) -> KnowledgeVaultItem:
+        """Validate a knowledge vault item and convert it to its ORM model, owned by `actor`."""
         item_data = knowledge_vault_item.model_dump()
         
         # Validate required fields
@@ -435,19 +450,19 @@ class KnowledgeVaultManager:
         
         # Set user_id from actor for multi-user support
         item_data["user_id"] = actor.id
-        
-        # Create the knowledge vault item
-        with self.session_maker() as session:
-            knowledge_item = KnowledgeVaultItem(**item_data)
-            knowledge_item.create(session)
-            
-            # Return the created item as a Pydantic model
-            return knowledge_item.to_pydantic()
+        return KnowledgeVaultItem(**item_data)
 
     @enforce_types
     def create_many_items(self, knowledge_vault: List[PydanticKnowledgeVaultItem], actor: PydanticUser) -> List[PydanticKnowledgeVaultItem]:
-        """Create multiple knowledge vault items."""
-        return [self.create_item(k, actor) for k in knowledge_vault]
+        """Create multiple knowledge vault items in one transaction."""
+        without_id = [k for k in knowledge_vault if not k.id]
+        for k, item_id in zip(without_id, generate_unique_short_ids(self.session_maker, KnowledgeVaultItem, len(without_id), "kv")):
+            k.id = item_id
+
+        with self.session_maker() as session:
+            knowledge_items = KnowledgeVaultItem.batch_create([self._build_item(k, actor) for k in knowledge_vault], session)
+            self._on_items_written(knowledge_items)
+            return [knowledge_item.to_pydantic() for knowledge_item in knowledge_items]
     
     @enforce_types
     def insert_knowledge(self, 
@@ -460,35 +475,52 @@ class KnowledgeVaultManager:
                          caption: str,
                          organization_id: str):
         """Insert knowledge into the knowledge vault."""
-        try:
+        return self.insert_knowledge_items(
+            actor=actor,
+            agent_state=agent_state,
+            items=[dict(entry_type=entry_type, source=source, sensitivity=sensitivity, secret_value=secret_value, caption=caption)],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                embed_model = embedding_model(agent_state.embedding_config)
-                caption_embedding = embed_model.get_text_embedding(caption)
-                embedding_config = agent_state.embedding_config
-            else:
-                caption_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_knowledge_items(self,
+                               actor: PydanticUser,
+                               agent_state: AgentState,
+                               items: List[dict],
+                               organization_id: str) -> List[PydanticKnowledgeVaultItem]:
+        """
+        Insert several items into the knowledge vault, embedding all of them in one batch and writing them in one transaction.
+
+        Args:
+            items: The arguments of `insert_knowledge` for each item (entry_type, source, sensitivity,
+                secret_value and caption)
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            embed_model = embedding_model(agent_state.embedding_config)
+            caption_embeddings = get_text_embeddings(embed_model, [item["caption"] for item in items])
+            embedding_config = agent_state.embedding_config
+        else:
+            caption_embeddings = [None] * len(items)
+            embedding_config = None
 
-            knowledge = self.create_item(
+        return self.create_many_items(
+            [
                 PydanticKnowledgeVaultItem(
                     user_id=actor.id,
-                    entry_type=entry_type,
-                    source=source,
-                    caption=caption,
-                    sensitivity=sensitivity,
-                    secret_value=secret_value,
+                    entry_type=item["entry_type"],
+                    source=item["source"],
+                    caption=item["caption"],
+                    sensitivity=item["sensitivity"],
+                    secret_value=item["secret_value"],
                     organization_id=organization_id,
                     caption_embedding=caption_embedding,
                     embedding_config=embedding_config,
-                ),
-                actor=actor
-            )
-            return knowledge
-
-        except Exception as e:
-            raise e
+                )
+                for item, caption_embedding in zip(items, caption_embeddings)
+            ],
+            actor=actor
+        )
 
     def get_total_number_of_items(self, actor: PydanticUser) -> int:
         """Get the total number of items in the knowledge vault for the user."""
@@ -523,7 +555,7 @@ class KnowledgeVaultManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the trigger-maintained FTS5 index on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
             timezone_str: Timezone string for timestamp conversion
             limit: Maximum number of results to return
@@ -585,20 +617,37 @@ class KnowledgeVaultManager:
                 if sensitivity is not None:
                     base_query = base_query.where(KnowledgeVaultItem.sensitivity.in_(sensitivity))
 
+                ranked_ids = None
+
                 if search_method == 'embedding':
                     embed_query = True
                     embedding_config = agent_state.embedding_config
 
-                    main_query = build_query(
-                        base_query=base_query,
+                    # On SQLite, rank with the in-process ANN index and only hydrate the top-k rows.
+                    # The index is not aware of sensitivity levels, so over-fetch when filtering on them.
+                    ranked_ids = self.vector_index_manager.search(
+                        target_class=KnowledgeVaultItem,
+                        field_name=search_field + "_embedding",
+                        actor=actor,
                         query_text=query,
                         embedded_text=embedded_text,
-                        embed_query=embed_query,
                         embedding_config=embedding_config,
-                        search_field=getattr(KnowledgeVaultItem, search_field + "_embedding"),
-                        target_class=KnowledgeVaultItem,
+                        limit=limit * 4 if limit and sensitivity is not None else limit,
                     )
 
+                    if ranked_ids is not None:
+                        main_query = base_query.where(KnowledgeVaultItem.id.in_(ranked_ids))
+                    else:
+                        main_query = build_query(
+                            base_query=base_query,
+                            query_text=query,
+                            embedded_text=embedded_text,
+                            embed_query=embed_query,
+                            embedding_config=embedding_config,
+                            search_field=getattr(KnowledgeVaultItem, search_field + "_embedding"),
+                            target_class=KnowledgeVaultItem,
+                        )
+
                 elif search_method == 'string_match':
 
                     search_field = getattr(KnowledgeVaultItem, search_field)
@@ -613,7 +662,22 @@ class KnowledgeVaultManager:
                             session, base_query, query, search_field, limit, sensitivity, actor
                         )
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
+                        # Rank with the FTS5 index kept in sync by triggers, reading only the query terms' postings.
+                        # Over-fetch when filtering by sensitivity so the filter still leaves `limit` items.
+                        ranked_ids = self.fulltext_index_manager.search(
+                            session, KnowledgeVaultItem, search_field, query, actor.id,
+                            limit * 4 if (limit and sensitivity is not None) else limit
+                        )
+                        if ranked_ids is not None:
+                            fts_query = select(KnowledgeVaultItem).where(KnowledgeVaultItem.id.in_(ranked_ids))
+                            if sensitivity is not None:
+                                fts_query = fts_query.where(KnowledgeVaultItem.sensitivity.in_(sensitivity))
+                            result = session.execute(fts_query)
+                            rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                            top_items = sorted(result.scalars().all(), key=lambda item: rank[item.id])
+                            return [item.to_pydantic() for item in top_items[:limit]]
+
+                        # Fallback to in-memory BM25 (legacy method) when the FTS5 index is unavailable
                         # Load all candidate items (memory-intensive, kept for compatibility)
                         fuzzy_query = select(KnowledgeVaultItem).where(
                             KnowledgeVaultItem.user_id == actor.id
@@ -709,7 +773,7 @@ class KnowledgeVaultManager:
                     top_items = [item for score, item in scored_items[:limit]]
                     return [item.to_pydantic() for item in top_items]
 
-                if limit:
+                if limit and ranked_ids is None:
                     main_query = main_query.limit(limit)
 
                 knowledge_vault = []
@@ -719,6 +783,11 @@ class KnowledgeVaultManager:
                     data = dict(row._mapping)
                     knowledge_vault.append(KnowledgeVaultItem(**data))
 
+                if ranked_ids is not None:
+                    rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                    knowledge_vault.sort(key=lambda item: rank[item.id])
+                    knowledge_vault = knowledge_vault[:limit]
+
                 return [item.to_pydantic() for item in knowledge_vault]
 
     @enforce_types
@@ -730,3 +799,4 @@ class KnowledgeVaultManager:
                 item.hard_delete(session)
             except NoResultFound:
                 raise NoResultFound(f"Knowledge vault item with id {knowledge_vault_item_id} not found.")
+        self._on_item_deleted(KnowledgeVaultItem, knowledge_vault_item_id, actor.id)
@@ -0,0 +1,236 @@
+import csv
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from mirix.constants import MEMORY_EXPORT_CHUNK_SIZE
+from mirix.log import get_logger
+from mirix.schemas.user import User as PydanticUser
+from mirix.services.memory_stats_manager import MEMORY_TABLES
+from mirix.utils import enforce_types
+
+logger = get_logger(__name__)
+
+# Exported columns of each memory type, in sheet order. "metadata_" is exported as "metadata".
+MEMORY_EXPORT_FIELDS = {
+    "episodic": ["id", "created_at", "occurred_at", "event_type", "actor", "summary", "details", "organization_id", "tree_path"],
+    "semantic": ["id", "created_at", "name", "summary", "details", "source", "organization_id", "tree_path"],
+    "procedural": ["id", "created_at", "entry_type", "summary", "steps", "organization_id", "tree_path"],
+    "resource": ["id", "created_at", "title", "summary", "content", "resource_type", "organization_id", "tree_path"],
+    "knowledge_vault": ["id", "created_at", "entry_type", "source", "sensitivity", "secret_value", "caption", "organization_id"],
+}
+MEMORY_EXPORT_COMMON_FIELDS = ["metadata_", "last_modify", "user_id"]
+MEMORY_EXPORT_EMBEDDING_FIELDS = {
+    "episodic": ["summary_embedding", "details_embedding"],
+    "semantic": ["name_embedding", "summary_embedding", "details_embedding"],
+    "procedural": ["summary_embedding", "steps_embedding"],
+    "resource": ["summary_embedding"],
+    "knowledge_vault": ["caption_embedding"],
+}
+
+
+def _column_names(memory_type: str, include_embeddings: bool) -> List[str]:
+    fields = MEMORY_EXPORT_FIELDS[memory_type] + MEMORY_EXPORT_COMMON_FIELDS
+    if include_embeddings:
+        fields = fields + MEMORY_EXPORT_EMBEDDING_FIELDS[memory_type]
+    return fields
+
+
+def get_export_columns(memory_type: str, include_embeddings: bool = False) -> List[str]:
+    """Header of the rows yielded by `MemoryExportManager.iter_memories` for a memory type."""
+    return ["metadata" if name == "metadata_" else name for name in _column_names(memory_type, include_embeddings)]
+
+
+def _combined_columns(memory_types: List[str], include_embeddings: bool) -> List[str]:
+    """Columns of a file holding several memory types: `memory_type`, then the union of their columns."""
+    columns = ["memory_type"]
+    for memory_type in memory_types:
+        if memory_type in MEMORY_TABLES:
+            columns += [c for c in get_export_columns(memory_type, include_embeddings) if c not in columns]
+    return columns
+
+
+def _serialize_value(value: Any) -> Any:
+    """Turn a column value into a scalar every writer accepts (JSON for lists, dicts and vectors)."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    return json.dumps(value, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+class MemoryExportManager:
+    """Manager class to export the memory tables of a user in constant memory."""
+
+    def __init__(self):
+        from mirix.server.server import db_context
+
+        self.session_maker = db_context
+
+    @enforce_types
+    def iter_memories(
+        self,
+        memory_type: str,
+        actor: PydanticUser,
+        include_embeddings: bool = False,
+        chunk_size: int = MEMORY_EXPORT_CHUNK_SIZE,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the memories of a type for the user, newest first, in chunks of at most `chunk_size` rows.
+
+        Only the exported columns are selected (embeddings only if requested) and rows are fetched with
+        `yield_per`, which uses a server-side cursor on PostgreSQL, so neither the ORM objects nor the
+        whole result set are ever held in memory.
+        """
+        memory_class = MEMORY_TABLES[memory_type]
+        names = _column_names(memory_type, include_embeddings)
+        headers = get_export_columns(memory_type, include_embeddings)
+        query = (
+            select(*[getattr(memory_class, name) for name in names])
+            .where(memory_class.user_id == actor.id)
+            .order_by(memory_class.created_at.desc(), memory_class.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        with self.session_maker() as session:
+            for partition in session.execute(query).partitions():
+                yield [{header: _serialize_value(value) for header, value in zip(headers, row)} for row in partition]
+
+    def export(
+        self,
+        actor: PydanticUser,
+        writer: "MemoryExportWriter",
+        memory_types: List[str],
+        include_embeddings: bool = False,
+        chunk_size: int = MEMORY_EXPORT_CHUNK_SIZE,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+    ) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Stream the memories of each type to `writer`, one chunk at a time.
+
+        `progress_callback(memory_type, exported_so_far)` is called after each chunk. A memory type that
+        fails is logged and the export goes on with the next type; the rows written before the failure
+        stay in the file. Returns the count of rows written per type, and the error of each failed type.
+        """
+        counts = {}
+        errors = {}
+        for memory_type in memory_types:
+            if memory_type not in MEMORY_TABLES:
+                logger.warning(f"Unknown memory type: {memory_type}")
+                continue
+            count = 0
+            try:
+                writer.start(memory_type, get_export_columns(memory_type, include_embeddings))
+                for rows in self.iter_memories(memory_type, actor, include_embeddings, chunk_size):
+                    writer.write_rows(memory_type, rows)
+                    count += len(rows)
+                    logger.debug(f"Exported {count} {memory_type} memories so far")
+                    if progress_callback is not None:
+                        progress_callback(memory_type, count)
+                logger.info(f"Exported {count} {memory_type} memories")
+            except Exception as e:
+                logger.error(f"Error exporting {memory_type} memories after {count} rows: {e}")
+                errors[memory_type] = str(e)
+            counts[memory_type] = count
+        return counts, errors
+
+
+class MemoryExportWriter:
+    """Incremental writer of export rows: `start` is called once per memory type, then `write_rows` per chunk."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def start(self, memory_type: str, columns: List[str]) -> None:
+        pass
+
+    def write_rows(self, memory_type: str, rows: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvMemoryExportWriter(MemoryExportWriter):
+    """All memory types in a single CSV file, with a `memory_type` column and the union of the columns."""
+
+    def __init__(self, file_path: str, memory_types: List[str], include_embeddings: bool = False):
+        super().__init__(file_path)
+        self.columns = _combined_columns(memory_types, include_embeddings)
+        self._file = open(file_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+        self._writer.writeheader()
+
+    def write_rows(self, memory_type: str, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows({"memory_type": memory_type, **row} for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ExcelMemoryExportWriter(MemoryExportWriter):
+    """One sheet per memory type, written with openpyxl's write-only mode, which streams rows to disk."""
+
+    def __init__(self, file_path: str):
+        from openpyxl import Workbook
+
+        super().__init__(file_path)
+        self._workbook = Workbook(write_only=True)
+        self._sheets = {}
+
+    def start(self, memory_type: str, columns: List[str]) -> None:
+        sheet = self._workbook.create_sheet(title=memory_type.capitalize())
+        sheet.append(columns)
+        self._sheets[memory_type] = (sheet, columns)
+
+    def write_rows(self, memory_type: str, rows: List[Dict[str, Any]]) -> None:
+        sheet, columns = self._sheets[memory_type]
+        for row in rows:
+            sheet.append([row.get(column) for column in columns])
+
+    def close(self) -> None:
+        if not self._sheets:
+            self._workbook.create_sheet(title="Memories")
+        self._workbook.save(self.file_path)
+
+
+class ParquetMemoryExportWriter(MemoryExportWriter):
+    """All memory types in a single Parquet file (string columns), one row group per chunk. Requires pyarrow."""
+
+    def __init__(self, file_path: str, memory_types: List[str], include_embeddings: bool = False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires the 'pyarrow' package. Please install it with `pip install pyarrow`.")
+
+        super().__init__(file_path)
+        self.columns = _combined_columns(memory_types, include_embeddings)
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self._writer = pq.ParquetWriter(file_path, self._schema)
+
+    def write_rows(self, memory_type: str, rows: List[Dict[str, Any]]) -> None:
+        table = self._pa.Table.from_pylist(
+            [
+                {
+                    "memory_type": memory_type,
+                    **{column: None if value is None else str(value) for column, value in row.items()},
+                }
+                for row in rows
+            ],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._writer.close()
@@ -0,0 +1,39 @@
+from typing import Dict
+
+from sqlalchemy import func, select
+
+from mirix.orm.episodic_memory import EpisodicEvent
+from mirix.orm.knowledge_vault import KnowledgeVaultItem
+from mirix.orm.procedural_memory import ProceduralMemoryItem
+from mirix.orm.resource_memory import ResourceMemoryItem
+from mirix.orm.semantic_memory import SemanticMemoryItem
+from mirix.schemas.user import User as PydanticUser
+from mirix.utils import enforce_types
+
+# Keys match the memory types used in the retrieved_memories dict of the agent
+MEMORY_TABLES = {
+    "episodic": EpisodicEvent,
+    "semantic": SemanticMemoryItem,
+    "procedural": ProceduralMemoryItem,
+    "resource": ResourceMemoryItem,
+    "knowledge_vault": KnowledgeVaultItem,
+}
+
+
+class MemoryStatsManager:
+    """Manager class for aggregate statistics across the memory tables."""
+
+    def __init__(self):
+        from mirix.server.server import db_context
+        self.session_maker = db_context
+
+    @enforce_types
+    def get_total_number_of_items(self, actor: PydanticUser) -> Dict[str, int]:
+        """Get the number of items of every memory type for the user in a single query."""
+        counts = [
+            select(func.count(memory_class.id)).where(memory_class.user_id == actor.id).scalar_subquery().label(memory_type)
+            for memory_type, memory_class in MEMORY_TABLES.items()
+        ]
+        with self.session_maker() as session:
+            row = session.execute(select(*counts)).one()
+            return dict(row._mapping)
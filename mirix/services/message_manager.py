@@ -1,8 +1,12 @@
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from sqlalchemy import select
+
+from mirix.log import get_logger
 from mirix.orm.errors import NoResultFound
 from mirix.orm.message import Message as MessageModel
+from mirix.orm.messages_agents import MessagesAgents as MessagesAgentsModel
 from mirix.schemas.enums import MessageRole
 from mirix.schemas.message import Message as PydanticMessage
 from mirix.schemas.message import MessageUpdate
@@ -10,6 +14,8 @@ from mirix.schemas.user import User as PydanticUser
 from mirix.utils import enforce_types
 from mirix.services.utils import update_timezone
 
+logger = get_logger(__name__)
+
 
 class MessageManager:
     """Manager class to handle business logic related to Messages."""
@@ -46,6 +52,18 @@ class MessageManager:
             result_dict = {msg.id: msg.to_pydantic() for msg in results}
             return [result_dict[msg_id] for msg_id in message_ids]
 
+    @staticmethod
+    def _count_tokens(pydantic_msg: PydanticMessage) -> Optional[dict]:
+        """Count the tokens of a message once, for the default tokenizer and the one of its model."""
+        try:
+            pydantic_msg.get_token_count()
+            if pydantic_msg.model:
+                pydantic_msg.get_token_count(pydantic_msg.model)
+        except Exception as e:
+            # Not fatal: the counts are computed again when they are first needed
+            logger.warning(f"Could not count the tokens of message {pydantic_msg.id}: {e}")
+        return pydantic_msg.token_counts
+
     @enforce_types
     def create_message(self, pydantic_msg: PydanticMessage, actor: PydanticUser) -> PydanticMessage:
         """Create a new message."""
@@ -53,6 +71,7 @@ class MessageManager:
             # Set the organization id and user id of the Pydantic message
             pydantic_msg.organization_id = actor.organization_id
             pydantic_msg.user_id = actor.id
+            self._count_tokens(pydantic_msg)
             msg_data = pydantic_msg.model_dump()
             msg = MessageModel(**msg_data)
             msg.create(session, actor=actor)  # Persist to database
@@ -60,8 +79,16 @@ class MessageManager:
 
     @enforce_types
     def create_many_messages(self, pydantic_msgs: List[PydanticMessage], actor: PydanticUser) -> List[PydanticMessage]:
-        """Create multiple messages."""
-        return [self.create_message(m, actor=actor) for m in pydantic_msgs]
+        """Create multiple messages in one transaction."""
+        msgs = []
+        for pydantic_msg in pydantic_msgs:
+            pydantic_msg.organization_id = actor.organization_id
+            pydantic_msg.user_id = actor.id
+            self._count_tokens(pydantic_msg)
+            msgs.append(MessageModel(**pydantic_msg.model_dump()))
+        with self.session_maker() as session:
+            msgs = MessageModel.batch_create(msgs, session, actor=actor)
+            return [msg.to_pydantic() for msg in msgs]
 
     @enforce_types
     def update_message_by_id(self, message_id: str, message_update: MessageUpdate, actor: PydanticUser) -> PydanticMessage:
@@ -93,6 +120,11 @@ class MessageManager:
 
             for key, value in update_data.items():
                 setattr(message, key, value)
+            if update_data:
+                # The stored token counts are stale once the content changed
+                updated_msg = message.to_pydantic()
+                updated_msg.token_counts = None
+                message.token_counts = self._count_tokens(updated_msg)
             message.update(db_session=session, actor=actor)
 
             return message.to_pydantic()
@@ -218,6 +250,11 @@ class MessageManager:
 
             return [msg.to_pydantic() for msg in results]
 
+    @staticmethod
+    def _get_windowed_message_ids(session, agent_id: str) -> set:
+        """Ids of the messages in the in-context window of any user of the agent."""
+        return set(session.execute(select(MessagesAgentsModel.message_id).where(MessagesAgentsModel.agent_id == agent_id)).scalars())
+
     @enforce_types
     def delete_detached_messages_for_agent(self, agent_id: str, actor: PydanticUser) -> int:
         """
@@ -241,8 +278,8 @@ class MessageManager:
             except NoResultFound:
                 raise ValueError(f"Agent with id {agent_id} not found.")
             
-            # Get current message_ids (messages that should be kept)
-            current_message_ids = set(agent.message_ids or [])
+            # Get current message_ids (messages that should be kept): the system message and the windows of all users
+            current_message_ids = set(agent.message_ids or []) | self._get_windowed_message_ids(session, agent_id)
             
             # Find all messages for this agent
             all_messages = MessageModel.list(
@@ -293,7 +330,7 @@ class MessageManager:
             
             for agent in agents:
                 # Get current message_ids for this agent
-                current_message_ids = set(agent.message_ids or [])
+                current_message_ids = set(agent.message_ids or []) | self._get_windowed_message_ids(session, agent.id)
                 
                 # Find all messages for this agent
                 all_messages = MessageModel.list(
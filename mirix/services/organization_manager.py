@@ -67,6 +67,11 @@ class OrganizationManager:
             organization = OrganizationModel.read(db_session=session, identifier=org_id)
             organization.hard_delete(session)
 
+        # The users of the organization are deleted with it
+        from mirix.services.user_manager import UserManager
+
+        UserManager.invalidate_user_cache()
+
     @enforce_types
     def list_organizations(self, cursor: Optional[str] = None, limit: Optional[int] = 50) -> List[PydanticOrganization]:
         """List organizations with pagination based on cursor (org_id) and limit."""
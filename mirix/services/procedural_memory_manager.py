@@ -14,25 +14,29 @@ from mirix.schemas.procedural_memory import (
     ProceduralMemoryItem as PydanticProceduralMemoryItem,
     ProceduralMemoryItemUpdate
 )
-from mirix.utils import enforce_types
+from mirix.utils import enforce_types, generate_unique_short_ids
 from pydantic import BaseModel, Field
 from sqlalchemy import select, text
 
 from mirix.schemas.agent import AgentState
-from mirix.embeddings import embedding_model, parse_and_chunk_text
+from mirix.embeddings import embedding_model, get_text_embeddings, parse_and_chunk_text
 from mirix.schemas.embedding_config import EmbeddingConfig
 from sqlalchemy import Select, func, literal, select, union_all
 from mirix.services.utils import build_query, update_timezone
+from mirix.services.helpers.memory_write_hooks import MemoryWriteHooksMixin
 from rapidfuzz import fuzz
 from mirix.settings import settings
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
-class ProceduralMemoryManager:
+class ProceduralMemoryManager(MemoryWriteHooksMixin):
     """Manager class to handle business logic related to Procedural Memory Items."""
 
+    memory_type = "procedural"
+
     def __init__(self):
         from mirix.server.server import db_context
         self.session_maker = db_context
+        self._init_memory_indexes()
 
     def _clean_text_for_search(self, text: str) -> str:
         """
@@ -405,7 +409,15 @@ class ProceduralMemoryManager:
         if not item_data.id:
             from mirix.utils import generate_unique_short_id
             item_data.id = generate_unique_short_id(self.session_maker, ProceduralMemoryItem, "proc")
-        
+
+        with self.session_maker() as session:
+            item = self._build_item(item_data, actor)
+            item.create(session)
+            self._on_items_written([item])
+            return item.to_pydantic()
+
+    def _build_item(self, item_data: PydanticProceduralMemoryItem, actor: PydanticUser) -> ProceduralMemoryItem:
+        """Validate a procedural memory item and convert it to its ORM model, owned by `actor`."""
         data_dict = item_data.model_dump()
 
         # Validate required fields
@@ -418,11 +430,7 @@ class ProceduralMemoryManager:
         
         # Set user_id from actor for multi-user support
         data_dict["user_id"] = actor.id
-
-        with self.session_maker() as session:
-            item = ProceduralMemoryItem(**data_dict)
-            item.create(session)
-            return item.to_pydantic()
+        return ProceduralMemoryItem(**data_dict)
 
     @enforce_types
     def update_item(self, item_update: ProceduralMemoryItemUpdate, actor: PydanticUser) -> PydanticProceduralMemoryItem:
@@ -435,12 +443,20 @@ class ProceduralMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at  # or get_utc_time
             item.update(session, actor=actor)
+            self._on_items_written([item])
             return item.to_pydantic()
 
     @enforce_types
     def create_many_items(self, items: List[PydanticProceduralMemoryItem], actor: PydanticUser) -> List[PydanticProceduralMemoryItem]:
-        """Create multiple procedural memory items."""
-        return [self.create_item(i, actor) for i in items]
+        """Create multiple procedural memory items in one transaction."""
+        without_id = [i for i in items if not i.id]
+        for i, item_id in zip(without_id, generate_unique_short_ids(self.session_maker, ProceduralMemoryItem, len(without_id), "proc")):
+            i.id = item_id
+
+        with self.session_maker() as session:
+            created_items = ProceduralMemoryItem.batch_create([self._build_item(i, actor) for i in items], session)
+            self._on_items_written(created_items)
+            return [item.to_pydantic() for item in created_items]
 
     def get_total_number_of_items(self, actor: PydanticUser) -> int:
         """Get the total number of items in the procedural memory for the user."""
@@ -474,7 +490,7 @@ class ProceduralMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the trigger-maintained FTS5 index on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
@@ -526,18 +542,34 @@ class ProceduralMemoryManager:
                     ProceduralMemoryItem.user_id == actor.id
                 )
 
+                ranked_ids = None
+
                 if search_method == 'embedding':
 
-                    main_query = build_query(
-                        base_query=base_query,
+                    # On SQLite, rank with the in-process ANN index and only hydrate the top-k rows
+                    ranked_ids = self.vector_index_manager.search(
+                        target_class=ProceduralMemoryItem,
+                        field_name=search_field + "_embedding",
+                        actor=actor,
                         query_text=query,
                         embedded_text=embedded_text,
-                        embed_query=True,
                         embedding_config=agent_state.embedding_config,
-                        search_field = eval("ProceduralMemoryItem." + search_field + "_embedding"),
-                        target_class=ProceduralMemoryItem,
+                        limit=limit,
                     )
 
+                    if ranked_ids is not None:
+                        main_query = base_query.where(ProceduralMemoryItem.id.in_(ranked_ids))
+                    else:
+                        main_query = build_query(
+                            base_query=base_query,
+                            query_text=query,
+                            embedded_text=embedded_text,
+                            embed_query=True,
+                            embedding_config=agent_state.embedding_config,
+                            search_field = eval("ProceduralMemoryItem." + search_field + "_embedding"),
+                            target_class=ProceduralMemoryItem,
+                        )
+
                 elif search_method == 'string_match':
 
                     if search_field == 'steps':
@@ -563,7 +595,17 @@ class ProceduralMemoryManager:
                             session, base_query, query, search_field, limit, actor
                         )
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
+                        # Rank with the FTS5 index kept in sync by triggers, reading only the query terms' postings
+                        ranked_ids = self.fulltext_index_manager.search(
+                            session, ProceduralMemoryItem, search_field, query, actor.id, limit
+                        )
+                        if ranked_ids is not None:
+                            result = session.execute(select(ProceduralMemoryItem).where(ProceduralMemoryItem.id.in_(ranked_ids)))
+                            rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                            top_items = sorted(result.scalars().all(), key=lambda item: rank[item.id])
+                            return [item.to_pydantic() for item in top_items]
+
+                        # Fallback to in-memory BM25 (legacy method) when the FTS5 index is unavailable
                         # Load all candidate items (memory-intensive, kept for compatibility)
                         result = session.execute(select(ProceduralMemoryItem).where(
                             ProceduralMemoryItem.user_id == actor.id
@@ -662,7 +704,7 @@ class ProceduralMemoryManager:
                     top_items = [item for score, item in scored_items[:limit]]
                     return [item.to_pydantic() for item in top_items]
 
-                if limit:
+                if limit and ranked_ids is None:
                     main_query = main_query.limit(limit)
 
                 results = list(session.execute(main_query))
@@ -671,6 +713,10 @@ class ProceduralMemoryManager:
                 for row in results:
                     data = dict(row._mapping)
                     procedures.append(ProceduralMemoryItem(**data))
+
+                if ranked_ids is not None:
+                    rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                    procedures.sort(key=lambda procedure: rank[procedure.id])
                 
                 return [procedure.to_pydantic() for procedure in procedures]
 
@@ -683,39 +729,56 @@ class ProceduralMemoryManager:
                          actor: PydanticUser,
                          organization_id: str,
                          tree_path: Optional[List[str]] = None) -> PydanticProceduralMemoryItem:
-        
-        try:
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                steps_embedding = embed_model.get_text_embedding("\n".join(steps))
-                embedding_config = agent_state.embedding_config
-            else:
-                summary_embedding = None
-                steps_embedding = None
-                embedding_config = None
-
-            procedure = self.create_item(
-                item_data=PydanticProceduralMemoryItem(
-                    entry_type=entry_type,
-                    summary=summary,
-                    steps=steps,
+        return self.insert_procedures(
+            agent_state=agent_state,
+            procedures=[dict(entry_type=entry_type, summary=summary, steps=steps, tree_path=tree_path)],
+            actor=actor,
+            organization_id=organization_id,
+        )[0]
+
+    @enforce_types
+    def insert_procedures(self,
+                          agent_state: AgentState,
+                          procedures: List[dict],
+                          actor: PydanticUser,
+                          organization_id: str) -> List[PydanticProceduralMemoryItem]:
+        """
+        Insert several procedures, embedding all of them in one batch and writing them in one transaction.
+
+        Args:
+            procedures: The arguments of `insert_procedure` for each procedure (entry_type, summary,
+                steps and optionally tree_path)
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            # TODO: need to check if we need to chunk the text
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = get_text_embeddings(
+                embed_model, [text for procedure in procedures for text in (procedure["summary"], "\n".join(procedure["steps"]))]
+            )
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = [None] * (2 * len(procedures))
+            embedding_config = None
+
+        return self.create_many_items(
+            [
+                PydanticProceduralMemoryItem(
+                    entry_type=procedure["entry_type"],
+                    summary=procedure["summary"],
+                    steps=procedure["steps"],
                     user_id=actor.id,
-                    tree_path=tree_path or [],
+                    tree_path=procedure.get("tree_path") or [],
                     organization_id=organization_id,
-                    summary_embedding=summary_embedding,
-                    steps_embedding=steps_embedding,
+                    summary_embedding=embeddings[2 * i],
+                    steps_embedding=embeddings[2 * i + 1],
                     embedding_config=embedding_config,
-                ),
-                actor=actor
-            )
-            return procedure
-        
-        except Exception as e:
-            raise e     
+                )
+                for i, procedure in enumerate(procedures)
+            ],
+            actor=actor
+        )
         
     def delete_procedure_by_id(self, procedure_id: str, actor: PydanticUser) -> None:
         """Delete a procedural memory item by ID."""
@@ -725,3 +788,4 @@ class ProceduralMemoryManager:
                 item.hard_delete(session)
             except NoResultFound:
                 raise NoResultFound(f"Procedural memory item with id {procedure_id} not found.")
+        self._on_item_deleted(ProceduralMemoryItem, procedure_id, actor.id)
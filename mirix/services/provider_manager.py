@@ -1,4 +1,5 @@
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional
 
 from mirix.orm.provider import Provider as ProviderModel
 from mirix.schemas.providers import Provider as PydanticProvider
@@ -6,6 +7,13 @@ from mirix.schemas.providers import ProviderUpdate
 from mirix.schemas.user import User as PydanticUser
 from mirix.utils import enforce_types
 
+# Override providers resolved from the database, by provider name (None when there is none).
+# Shared by every ProviderManager so that LLM calls do not query the database on every turn;
+# cleared whenever a provider is created, updated or deleted in this process.
+_override_providers: Dict[str, Optional[PydanticProvider]] = {}
+_override_providers_generation = 0
+_override_providers_lock = threading.Lock()
+
 
 class ProviderManager:
 
@@ -61,6 +69,7 @@ class ProviderManager:
 
             new_provider = ProviderModel(**provider.model_dump(exclude_unset=True))
             new_provider.create(session, actor=actor)
+            self.invalidate_override_providers()
             return new_provider.to_pydantic()
 
     @enforce_types
@@ -77,6 +86,7 @@ class ProviderManager:
 
             # Commit the updated provider
             existing_provider.update(session, actor=actor)
+            self.invalidate_override_providers()
             return existing_provider.to_pydantic()
 
     @enforce_types
@@ -92,6 +102,7 @@ class ProviderManager:
             existing_provider.delete(session, actor=actor)
 
             session.commit()
+            self.invalidate_override_providers()
 
     @enforce_types
     def list_providers(self, after: Optional[str] = None, limit: Optional[int] = 50, actor: PydanticUser = None) -> List[PydanticProvider]:
@@ -105,66 +116,72 @@ class ProviderManager:
             )
             return [provider.to_pydantic() for provider in providers]
 
+    @staticmethod
+    def invalidate_override_providers() -> None:
+        """Forget the cached override providers, so that the next lookup reads the database."""
+        global _override_providers_generation
+        with _override_providers_lock:
+            _override_providers.clear()
+            _override_providers_generation += 1
+
+    def get_override_provider(self, name: str) -> Optional[PydanticProvider]:
+        """Get the override provider with this name, reading the database only on the first lookup."""
+        with _override_providers_lock:
+            if name in _override_providers:
+                return _override_providers[name]
+            generation = _override_providers_generation
+        providers = [provider for provider in self.list_providers() if provider.name == name]
+        provider = providers[0] if providers else None
+        with _override_providers_lock:
+            # Do not cache a value read before a concurrent write invalidated the cache
+            if generation == _override_providers_generation:
+                _override_providers[name] = provider
+        return provider
+
     @enforce_types
     def get_anthropic_override_provider_id(self) -> Optional[str]:
         """Helper function to fetch custom anthropic provider id for v0 BYOK feature"""
-        anthropic_provider = [provider for provider in self.list_providers() if provider.name == "anthropic"]
-        if len(anthropic_provider) != 0:
-            return anthropic_provider[0].id
-        return None
+        anthropic_provider = self.get_override_provider("anthropic")
+        return anthropic_provider.id if anthropic_provider else None
 
     @enforce_types
     def get_anthropic_override_key(self) -> Optional[str]:
         """Helper function to fetch custom anthropic key for v0 BYOK feature"""
-        anthropic_provider = [provider for provider in self.list_providers() if provider.name == "anthropic"]
-        if len(anthropic_provider) != 0:
-            return anthropic_provider[0].api_key
-        return None
+        anthropic_provider = self.get_override_provider("anthropic")
+        return anthropic_provider.api_key if anthropic_provider else None
 
     @enforce_types
     def get_gemini_override_provider_id(self) -> Optional[str]:
         """Helper function to fetch custom gemini provider id for v0 BYOK feature"""
-        gemini_provider = [provider for provider in self.list_providers() if provider.name == "google_ai"]
-        if len(gemini_provider) != 0:
-            return gemini_provider[0].id
-        return None
+        gemini_provider = self.get_override_provider("google_ai")
+        return gemini_provider.id if gemini_provider else None
 
     @enforce_types
     def get_gemini_override_key(self) -> Optional[str]:
         """Helper function to fetch custom gemini key for v0 BYOK feature"""
-        gemini_provider = [provider for provider in self.list_providers() if provider.name == "google_ai"]
-        if len(gemini_provider) != 0:
-            return gemini_provider[0].api_key
-        return None
+        gemini_provider = self.get_override_provider("google_ai")
+        return gemini_provider.api_key if gemini_provider else None
 
     @enforce_types
     def get_openai_override_provider_id(self) -> Optional[str]:
         """Helper function to fetch custom openai provider id for v0 BYOK feature"""
-        openai_provider = [provider for provider in self.list_providers() if provider.name == "openai"]
-        if len(openai_provider) != 0:
-            return openai_provider[0].id
-        return None
+        openai_provider = self.get_override_provider("openai")
+        return openai_provider.id if openai_provider else None
 
     @enforce_types
     def get_openai_override_key(self) -> Optional[str]:
         """Helper function to fetch custom openai key for v0 BYOK feature"""
-        openai_provider = [provider for provider in self.list_providers() if provider.name == "openai"]
-        if len(openai_provider) != 0:
-            return openai_provider[0].api_key
-        return None
+        openai_provider = self.get_override_provider("openai")
+        return openai_provider.api_key if openai_provider else None
 
     @enforce_types
     def get_azure_openai_override_provider_id(self) -> Optional[str]:
         """Helper function to fetch custom azure openai provider id for v0 BYOK feature"""
-        azure_openai_provider = [provider for provider in self.list_providers() if provider.name == "azure_openai"]
-        if len(azure_openai_provider) != 0:
-            return azure_openai_provider[0].id
-        return None
+        azure_openai_provider = self.get_override_provider("azure_openai")
+        return azure_openai_provider.id if azure_openai_provider else None
 
     @enforce_types
     def get_azure_openai_override_key(self) -> Optional[str]:
         """Helper function to fetch custom azure openai key for v0 BYOK feature"""
-        azure_openai_provider = [provider for provider in self.list_providers() if provider.name == "azure_openai"]
-        if len(azure_openai_provider) != 0:
-            return azure_openai_provider[0].api_key
-        return None
\ No newline at end of file
+        azure_openai_provider = self.get_override_provider("azure_openai")
+        return azure_openai_provider.api_key if azure_openai_provider else None
\ No newline at end of file
@@ -7,7 +7,7 @@ import time
 
 from rank_bm25 import BM25Okapi
 from mirix.orm.errors import NoResultFound
-from mirix.embeddings import embedding_model, parse_and_chunk_text
+from mirix.embeddings import embedding_model, get_text_embeddings, parse_and_chunk_text
 from mirix.orm.resource_memory import ResourceMemoryItem
 from mirix.schemas.user import User as PydanticUser
 from mirix.schemas.resource_memory import (
@@ -15,20 +15,24 @@ from mirix.schemas.resource_memory import (
     ResourceMemoryItemUpdate
 )
 from mirix.schemas.agent import AgentState
-from mirix.utils import enforce_types
+from mirix.utils import enforce_types, generate_unique_short_ids
 from pydantic import BaseModel, Field
 from sqlalchemy import select, func, text
 from mirix.services.utils import build_query, update_timezone
+from mirix.services.helpers.memory_write_hooks import MemoryWriteHooksMixin
 from mirix.settings import settings
 from mirix.helpers.converters import deserialize_vector
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
-class ResourceMemoryManager:
+class ResourceMemoryManager(MemoryWriteHooksMixin):
     """Manager class to handle logic related to Resource/Workspace Memory Items."""
 
+    memory_type = "resource"
+
     def __init__(self):
         from mirix.server.server import db_context
         self.session_maker = db_context
+        self._init_memory_indexes()
 
     def _clean_text_for_search(self, text: str) -> str:
         """
@@ -357,7 +361,15 @@ class ResourceMemoryManager:
         if not item_data.id:
             from mirix.utils import generate_unique_short_id
             item_data.id = generate_unique_short_id(self.session_maker, ResourceMemoryItem, "res")
-        
+
+        with self.session_maker() as session:
+            item = self._build_item(item_data, actor)
+            item.create(session)
+            self._on_items_written([item])
+            return item.to_pydantic()
+
+    def _build_item(self, item_data: PydanticResourceMemoryItem, actor: PydanticUser) -> ResourceMemoryItem:
+        """Validate a resource memory item and convert it to its ORM model, owned by `actor`."""
         data_dict = item_data.model_dump()
 
         # Validate required fields
@@ -370,11 +382,7 @@ class ResourceMemoryManager:
         
         # Set user_id from actor for multi-user support
         data_dict["user_id"] = actor.id
-
-        with self.session_maker() as session:
-            item = ResourceMemoryItem(**data_dict)
-            item.create(session)
-            return item.to_pydantic()
+        return ResourceMemoryItem(**data_dict)
 
     @enforce_types
     def update_item(self, item_update: ResourceMemoryItemUpdate, actor: PydanticUser) -> PydanticResourceMemoryItem:
@@ -387,12 +395,20 @@ class ResourceMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at
             item.update(session, actor=actor)
+            self._on_items_written([item])
             return item.to_pydantic()
 
     @enforce_types
     def create_many_items(self, items: List[PydanticResourceMemoryItem], actor: PydanticUser, limit: Optional[int] = 50) -> List[PydanticResourceMemoryItem]:
-        """Create multiple resource memory items."""
-        return [self.create_item(i, actor) for i in items]
+        """Create multiple resource memory items in one transaction."""
+        without_id = [i for i in items if not i.id]
+        for i, item_id in zip(without_id, generate_unique_short_ids(self.session_maker, ResourceMemoryItem, len(without_id), "res")):
+            i.id = item_id
+
+        with self.session_maker() as session:
+            created_items = ResourceMemoryItem.batch_create([self._build_item(i, actor) for i in items], session)
+            self._on_items_written(created_items)
+            return [item.to_pydantic() for item in created_items]
 
     def get_total_number_of_items(self, actor: PydanticUser) -> int:
         """Get the total number of items in the resource memory for the user."""
@@ -426,7 +442,7 @@ class ResourceMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the trigger-maintained FTS5 index on SQLite
                 - 'fuzzy_match': Fuzzy string matching (not implemented)
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
@@ -481,6 +497,8 @@ class ResourceMemoryManager:
                 ResourceMemoryItem.user_id == actor.id
             )
 
+            ranked_ids = None
+
             if search_method == 'string_match':
                 main_query = base_query.where(func.lower(getattr(ResourceMemoryItem, search_field)).contains(query.lower()))
             
@@ -488,16 +506,30 @@ class ResourceMemoryManager:
                 embed_query = True
                 embedding_config = agent_state.embedding_config
 
-                main_query = build_query(
-                    base_query=base_query,
+                # On SQLite, rank with the in-process ANN index and only hydrate the top-k rows
+                ranked_ids = self.vector_index_manager.search(
+                    target_class=ResourceMemoryItem,
+                    field_name=search_field + "_embedding",
+                    actor=actor,
                     query_text=query,
-                    embed_query=embed_query,
                     embedded_text=embedded_text,
                     embedding_config=embedding_config,
-                    search_field = eval("ResourceMemoryItem." + search_field + "_embedding"),
-                    target_class=ResourceMemoryItem,
+                    limit=limit,
                 )
 
+                if ranked_ids is not None:
+                    main_query = base_query.where(ResourceMemoryItem.id.in_(ranked_ids))
+                else:
+                    main_query = build_query(
+                        base_query=base_query,
+                        query_text=query,
+                        embed_query=embed_query,
+                        embedded_text=embedded_text,
+                        embedding_config=embedding_config,
+                        search_field = eval("ResourceMemoryItem." + search_field + "_embedding"),
+                        target_class=ResourceMemoryItem,
+                    )
+
             elif search_method == 'bm25':
                 
                 # Check if we're using PostgreSQL - use native full-text search if available
@@ -507,7 +539,17 @@ class ResourceMemoryManager:
                         session, base_query, query, search_field, limit, actor
                     )
                 else:
-                    # Fallback to in-memory BM25 for SQLite (legacy method)
+                    # Rank with the FTS5 index kept in sync by triggers, reading only the query terms' postings
+                    ranked_ids = self.fulltext_index_manager.search(
+                        session, ResourceMemoryItem, search_field, query, actor.id, limit
+                    )
+                    if ranked_ids is not None:
+                        result = session.execute(select(ResourceMemoryItem).where(ResourceMemoryItem.id.in_(ranked_ids)))
+                        rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                        top_items = sorted(result.scalars().all(), key=lambda item: rank[item.id])
+                        return [item.to_pydantic() for item in top_items]
+
+                    # Fallback to in-memory BM25 (legacy method) when the FTS5 index is unavailable
                     # Load all candidate items (memory-intensive, kept for compatibility)
                     result = session.execute(select(ResourceMemoryItem).where(
                         ResourceMemoryItem.user_id == actor.id
@@ -578,6 +620,10 @@ class ResourceMemoryManager:
             for row in results:
                 data = dict(row._mapping)
                 resource_memory.append(ResourceMemoryItem(**data))
+
+            if ranked_ids is not None:
+                rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                resource_memory.sort(key=lambda item: rank[item.id])
             
             return [item.to_pydantic() for item in resource_memory]
 
@@ -593,35 +639,52 @@ class ResourceMemoryManager:
                         tree_path: Optional[List[str]] = None
                         ) -> PydanticResourceMemoryItem:
         """Create a new resource memory item."""
-        try:
+        return self.insert_resources(
+            actor=actor,
+            agent_state=agent_state,
+            resources=[dict(title=title, summary=summary, resource_type=resource_type, content=content, tree_path=tree_path)],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                embed_model = embedding_model(agent_state.embedding_config)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                embedding_config = agent_state.embedding_config
-            else:
-                summary_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_resources(self,
+                         actor: PydanticUser,
+                         agent_state: AgentState,
+                         resources: List[dict],
+                         organization_id: str) -> List[PydanticResourceMemoryItem]:
+        """
+        Create several resource memory items, embedding all of them in one batch and writing them in one transaction.
 
-            resource = self.create_item(
-                item_data=PydanticResourceMemoryItem(
+        Args:
+            resources: The arguments of `insert_resource` for each item (title, summary, resource_type,
+                content and optionally tree_path)
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            embed_model = embedding_model(agent_state.embedding_config)
+            summary_embeddings = get_text_embeddings(embed_model, [resource["summary"] for resource in resources])
+            embedding_config = agent_state.embedding_config
+        else:
+            summary_embeddings = [None] * len(resources)
+            embedding_config = None
+
+        return self.create_many_items(
+            [
+                PydanticResourceMemoryItem(
                     user_id=actor.id,
-                    title=title,
-                    summary=summary,
-                    content=content,
-                    resource_type=resource_type,
-                    tree_path=tree_path or [],
+                    title=resource["title"],
+                    summary=resource["summary"],
+                    content=resource["content"],
+                    resource_type=resource["resource_type"],
+                    tree_path=resource.get("tree_path") or [],
                     organization_id=organization_id,
                     summary_embedding=summary_embedding,
                     embedding_config=embedding_config,
-                ),
-                actor=actor
-            )
-            return resource
-        
-        except Exception as e:
-            raise e     
+                )
+                for resource, summary_embedding in zip(resources, summary_embeddings)
+            ],
+            actor=actor
+        )
 
     @enforce_types
     def delete_resource_by_id(self, resource_id: str, actor: PydanticUser) -> None:
@@ -632,3 +695,4 @@ class ResourceMemoryManager:
                 item.hard_delete(session)
             except NoResultFound:
                 raise NoResultFound(f"Resource Memory record with id {resource_id} not found.")
+        self._on_item_deleted(ResourceMemoryItem, resource_id, actor.id)
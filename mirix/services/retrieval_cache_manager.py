@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+# Process-wide state shared by every RetrievalCacheManager instance, so that all the memory
+# agents triggered during one absorption cycle (each running in its own thread) share entries
+_lock = threading.Lock()
+_active_cycles = 0
+_versions: Dict[Tuple[str, str], int] = {}
+_entries: Dict[Tuple[str, str, int, Hashable], Future] = {}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+# Pseudo memory type for retrievals that span every memory type (e.g. the item counts)
+ALL_MEMORY_TYPES = "*"
+
+
+class RetrievalCacheManager:
+    """
+    Cache of memory retrievals that lives for one absorption cycle.
+
+    Entries are keyed by (user, memory type, data version, search arguments). Every write
+    through a memory manager bumps the data version of its (user, memory type), so an entry
+    computed before the write is never served after it. Concurrent identical retrievals wait
+    for the first one instead of querying the database again. Outside of a cycle, retrievals
+    are not cached at all.
+    """
+
+    @staticmethod
+    @contextmanager
+    def cycle():
+        """Enable caching for the duration of the block. Entries are dropped when the last cycle ends."""
+        global _active_cycles
+        with _lock:
+            _active_cycles += 1
+        try:
+            yield
+        finally:
+            with _lock:
+                _active_cycles -= 1
+                if _active_cycles == 0:
+                    _entries.clear()
+
+    @staticmethod
+    def is_active() -> bool:
+        return _active_cycles > 0
+
+    @staticmethod
+    def invalidate(user_id: str, memory_type: str) -> None:
+        """Record a write to `memory_type` for `user_id`, making its cached retrievals unreachable."""
+        with _lock:
+            for invalidated_type in (memory_type, ALL_MEMORY_TYPES):
+                _versions[(user_id, invalidated_type)] = _versions.get((user_id, invalidated_type), 0) + 1
+            _stats["invalidations"] += 1
+            for key in [key for key in _entries if key[0] == user_id and key[1] in (memory_type, ALL_MEMORY_TYPES)]:
+                del _entries[key]
+
+    @staticmethod
+    def get_or_fetch(user_id: str, memory_type: str, params: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return the cached result of `fetch` for these arguments, running it on a miss."""
+        if not _active_cycles:
+            return fetch()
+
+        with _lock:
+            key = (user_id, memory_type, _versions.get((user_id, memory_type), 0), params)
+            future = _entries.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                _entries[key] = future
+                _stats["misses"] += 1
+            else:
+                _stats["hits"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = fetch()
+        except Exception as e:
+            with _lock:
+                _entries.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def get_stats() -> Dict[str, int]:
+        with _lock:
+            return dict(_stats, entries=len(_entries))
@@ -0,0 +1,204 @@
+import os
+import pickle
+import select
+import struct
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from mirix.constants import SANDBOX_MAX_POOLS, SANDBOX_POOL_MAX_WORKERS, SANDBOX_WORKER_MAX_CALLS
+from mirix.log import get_logger
+
+logger = get_logger(__name__)
+
+HEADER = struct.Struct(">Q")
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "helpers", "sandbox_worker.py")
+
+
+class SandboxWorkerCrashed(RuntimeError):
+    """The worker process exited or broke the protocol while running a tool."""
+
+
+class SandboxWorker:
+    """A long-lived interpreter of the sandbox venv running `helpers/sandbox_worker.py`."""
+
+    def __init__(self, python_executable: str, cwd: str, env: Dict[str, str]):
+        self.calls = 0
+        self.process = subprocess.Popen(
+            [python_executable, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            env=env,
+        )
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _read_exactly(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                raise SandboxWorkerCrashed(f"Sandbox worker exited with code {self.process.wait()}")
+            data += chunk
+        return data
+
+    def call(self, request: dict, timeout: float) -> dict:
+        self.calls += 1
+        payload = pickle.dumps(request)
+        try:
+            self.process.stdin.write(HEADER.pack(len(payload)) + payload)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SandboxWorkerCrashed(f"Sandbox worker is not accepting requests: {e}")
+
+        deadline = time.monotonic() + timeout
+        size = HEADER.unpack(self._read_exactly(HEADER.size, deadline))[0]
+        try:
+            return pickle.loads(self._read_exactly(size, deadline))
+        except pickle.UnpicklingError as e:
+            raise SandboxWorkerCrashed(f"Sandbox worker sent an invalid response: {e}")
+
+    def terminate(self) -> None:
+        if self.is_alive():
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class SandboxWorkerPool:
+    """
+    Pool of pre-started sandbox workers for one (sandbox config, venv interpreter, user) triple.
+
+    Workers import their dependencies once and then run tool calls sent over a pipe, so a
+    call costs a round trip instead of an interpreter start. Each call still runs in a
+    separate process from the server. A worker is replaced after SANDBOX_WORKER_MAX_CALLS
+    calls, when it crashes or times out, or when the tool raised or imported new modules,
+    and the replacement is started right away so that it is warm by the next call.
+    """
+
+    def __init__(self, python_executable: str, cwd: str, env: Dict[str, str], max_workers: int = SANDBOX_POOL_MAX_WORKERS):
+        self.python_executable = python_executable
+        self.cwd = cwd
+        self.env = env
+        self.max_workers = max_workers
+        self._idle: List[SandboxWorker] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._size = 1
+        self._release(self._spawn())
+
+    def _spawn(self) -> SandboxWorker:
+        """Start a worker in a slot that was already reserved by incrementing `_size`."""
+        try:
+            return SandboxWorker(self.python_executable, self.cwd, self.env)
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _acquire(self) -> SandboxWorker:
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._size -= 1
+                    worker.terminate()
+                if self._size < self.max_workers:
+                    self._size += 1
+                    break
+                self._condition.wait()
+        return self._spawn()
+
+    def _release(self, worker: SandboxWorker) -> None:
+        with self._condition:
+            if not self._closed:
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+            self._size -= 1
+        worker.terminate()
+
+    def _retire(self, worker: SandboxWorker) -> None:
+        worker.terminate()
+        # The retired worker's slot goes to its replacement
+        try:
+            self._release(self._spawn())
+        except Exception as e:
+            logger.warning(f"Could not start a replacement sandbox worker: {e}")
+
+    def call(self, request: dict, timeout: float) -> dict:
+        """Run one tool call on a worker. Raises TimeoutError or SandboxWorkerCrashed, after recycling the worker."""
+        worker = self._acquire()
+        try:
+            response = worker.call(request, timeout)
+        except BaseException:
+            self._retire(worker)
+            raise
+        if response.get("recycle") or worker.calls >= SANDBOX_WORKER_MAX_CALLS or not worker.is_alive():
+            self._retire(worker)
+        else:
+            self._release(worker)
+        return response
+
+    def close(self) -> None:
+        """Terminate the idle workers. Workers still running a call are terminated when they finish."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for worker in idle:
+            worker.terminate()
+
+
+# Pools by (sandbox config fingerprint, venv interpreter, user id), least recently used first
+_pools: "OrderedDict[Tuple[str, str, str], SandboxWorkerPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_worker_pool(
+    config_fingerprint: str, python_executable: str, user_id: str, cwd: str, env: Dict[str, str]
+) -> SandboxWorkerPool:
+    """
+    Get the worker pool of a sandbox config and venv for a user, starting it on first use.
+
+    Workers are never shared between users. At most SANDBOX_MAX_POOLS pools are kept, closing the
+    least recently used one.
+    """
+    key = (config_fingerprint, python_executable, user_id)
+    evicted = None
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SandboxWorkerPool(python_executable, cwd, env)
+            _pools[key] = pool
+            if len(_pools) > SANDBOX_MAX_POOLS:
+                evicted = _pools.popitem(last=False)[1]
+        else:
+            _pools.move_to_end(key)
+    if evicted is not None:
+        evicted.close()
+    return pool
+
+
+def close_sandbox_worker_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -17,25 +17,29 @@ from mirix.schemas.semantic_memory import (
     SemanticMemoryItem as PydanticSemanticMemoryItem,
     SemanticMemoryItemUpdate
 )
-from mirix.utils import enforce_types, generate_short_id, generate_unique_short_id
+from mirix.utils import enforce_types, generate_short_id, generate_unique_short_id, generate_unique_short_ids
 from pydantic import BaseModel
 from sqlalchemy import select, func, text
 from rapidfuzz import fuzz
 from rank_bm25 import BM25Okapi
 
 from mirix.schemas.agent import AgentState
-from mirix.embeddings import embedding_model, parse_and_chunk_text
+from mirix.embeddings import embedding_model, get_text_embeddings, parse_and_chunk_text
 from mirix.schemas.embedding_config import EmbeddingConfig
 from mirix.services.utils import build_query, update_timezone
+from mirix.services.helpers.memory_write_hooks import MemoryWriteHooksMixin
 from mirix.settings import settings
 from mirix.constants import BUILD_EMBEDDINGS_FOR_MEMORY
 
-class SemanticMemoryManager:
+class SemanticMemoryManager(MemoryWriteHooksMixin):
     """Manager class to handle business logic related to Semantic Memory Items."""
 
+    memory_type = "semantic"
+
     def __init__(self):
         from mirix.server.server import db_context
         self.session_maker = db_context
+        self._init_memory_indexes()
 
     def _clean_text_for_search(self, text: str) -> str:
         """
@@ -413,7 +417,15 @@ class SemanticMemoryManager:
         # Ensure ID is set before model_dump
         if not item_data.id:
             item_data.id = generate_unique_short_id(self.session_maker, SemanticMemoryItem, "sem")
-        
+
+        with self.session_maker() as session:
+            item = self._build_item(item_data, actor)
+            item.create(session)
+            self._on_items_written([item])
+            return item.to_pydantic()
+
+    def _build_item(self, item_data: PydanticSemanticMemoryItem, actor: PydanticUser) -> SemanticMemoryItem:
+        """Validate a semantic memory item and convert it to its ORM model, owned by `actor`."""
         data_dict = item_data.model_dump()
 
         # Validate required fields
@@ -426,11 +438,7 @@ class SemanticMemoryManager:
         
         # Set user_id from actor for multi-user support
         data_dict["user_id"] = actor.id
-
-        with self.session_maker() as session:
-            item = SemanticMemoryItem(**data_dict)
-            item.create(session)
-            return item.to_pydantic()
+        return SemanticMemoryItem(**data_dict)
 
     @enforce_types
     def update_item(self, item_update: SemanticMemoryItemUpdate, actor: PydanticUser) -> PydanticSemanticMemoryItem:
@@ -443,12 +451,20 @@ class SemanticMemoryManager:
                     setattr(item, k, v)
             item.updated_at = item_update.updated_at
             item.update(session, actor=actor)
+            self._on_items_written([item])
             return item.to_pydantic()
 
     @enforce_types
     def create_many_items(self, items: List[PydanticSemanticMemoryItem], actor: PydanticUser) -> List[PydanticSemanticMemoryItem]:
-        """Create multiple semantic memory items."""
-        return [self.create_item(i, actor) for i in items]
+        """Create multiple semantic memory items in one transaction."""
+        without_id = [i for i in items if not i.id]
+        for i, item_id in zip(without_id, generate_unique_short_ids(self.session_maker, SemanticMemoryItem, len(without_id), "sem")):
+            i.id = item_id
+
+        with self.session_maker() as session:
+            created_items = SemanticMemoryItem.batch_create([self._build_item(i, actor) for i in items], session)
+            self._on_items_written(created_items)
+            return [item.to_pydantic() for item in created_items]
 
     def get_total_number_of_items(self, actor: PydanticUser) -> int:
         """Get the total number of items in the semantic memory for the user."""
@@ -482,7 +498,7 @@ class SemanticMemoryManager:
                 - 'embedding': Vector similarity search using embeddings
                 - 'string_match': Simple string containment search
                 - 'bm25': **RECOMMENDED** - PostgreSQL native full-text search (ts_rank_cd) when using PostgreSQL, 
-                               falls back to in-memory BM25 for SQLite
+                               uses the trigger-maintained FTS5 index on SQLite
                 - 'fuzzy_match': Fuzzy string matching (legacy, kept for compatibility)
             limit: Maximum number of results to return
             timezone_str: Timezone string for timestamp conversion
@@ -540,20 +556,36 @@ class SemanticMemoryManager:
                     SemanticMemoryItem.user_id == actor.id
                 )
 
+                ranked_ids = None
+
                 if search_method == 'embedding':
                     embed_query = True
                     embedding_config = agent_state.embedding_config
 
-                    main_query = build_query(
-                        base_query=base_query,
+                    # On SQLite, rank with the in-process ANN index and only hydrate the top-k rows
+                    ranked_ids = self.vector_index_manager.search(
+                        target_class=SemanticMemoryItem,
+                        field_name=search_field + "_embedding",
+                        actor=actor,
                         query_text=query,
                         embedded_text=embedded_text,
-                        embed_query=embed_query,
                         embedding_config=embedding_config,
-                        search_field=eval("SemanticMemoryItem." + search_field + "_embedding"),
-                        target_class=SemanticMemoryItem,
+                        limit=limit,
                     )
 
+                    if ranked_ids is not None:
+                        main_query = base_query.where(SemanticMemoryItem.id.in_(ranked_ids))
+                    else:
+                        main_query = build_query(
+                            base_query=base_query,
+                            query_text=query,
+                            embedded_text=embedded_text,
+                            embed_query=embed_query,
+                            embedding_config=embedding_config,
+                            search_field=eval("SemanticMemoryItem." + search_field + "_embedding"),
+                            target_class=SemanticMemoryItem,
+                        )
+
                 elif search_method == 'string_match':
 
                     search_field = eval("SemanticMemoryItem." + search_field)
@@ -568,7 +600,17 @@ class SemanticMemoryManager:
                             session, base_query, query, search_field, limit, actor
                         )
                     else:
-                        # Fallback to in-memory BM25 for SQLite (legacy method)
+                        # Rank with the FTS5 index kept in sync by triggers, reading only the query terms' postings
+                        ranked_ids = self.fulltext_index_manager.search(
+                            session, SemanticMemoryItem, search_field, query, actor.id, limit
+                        )
+                        if ranked_ids is not None:
+                            result = session.execute(select(SemanticMemoryItem).where(SemanticMemoryItem.id.in_(ranked_ids)))
+                            rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                            top_items = sorted(result.scalars().all(), key=lambda item: rank[item.id])
+                            return [item.to_pydantic() for item in top_items]
+
+                        # Fallback to in-memory BM25 (legacy method) when the FTS5 index is unavailable
                         # Load all candidate items (memory-intensive, kept for compatibility)
                         result = session.execute(select(SemanticMemoryItem).where(
                             SemanticMemoryItem.user_id == actor.id
@@ -650,7 +692,7 @@ class SemanticMemoryManager:
                     top_items = [item for score, item in scored_items[:limit]]
                     return [item.to_pydantic() for item in top_items]
 
-                if limit:
+                if limit and ranked_ids is None:
                     main_query = main_query.limit(limit)
 
                 results = list(session.execute(main_query))
@@ -660,6 +702,10 @@ class SemanticMemoryManager:
                     data = dict(row._mapping)
                     semantic_items.append(SemanticMemoryItem(**data))
 
+                if ranked_ids is not None:
+                    rank = {item_id: position for position, item_id in enumerate(ranked_ids)}
+                    semantic_items.sort(key=lambda item: rank[item.id])
+
                 return [item.to_pydantic() for item in semantic_items]
 
     @enforce_types
@@ -677,43 +723,57 @@ class SemanticMemoryManager:
         """
         Create a new semantic memory entry using provided parameters.
         """
-        try:
+        return self.insert_semantic_items(
+            actor=actor,
+            agent_state=agent_state,
+            items=[dict(name=name, summary=summary, details=details, source=source, tree_path=tree_path)],
+            organization_id=organization_id,
+        )[0]
 
-            # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
-            if BUILD_EMBEDDINGS_FOR_MEMORY:
-                # TODO: need to check if we need to chunk the text
-                embed_model = embedding_model(agent_state.embedding_config)
-                name_embedding = embed_model.get_text_embedding(name)
-                summary_embedding = embed_model.get_text_embedding(summary)
-                details_embedding = embed_model.get_text_embedding(details)
-                embedding_config = agent_state.embedding_config
-            else:
-                name_embedding = None
-                summary_embedding = None
-                details_embedding = None
-                embedding_config = None
+    @enforce_types
+    def insert_semantic_items(
+        self,
+        actor: PydanticUser,
+        agent_state: AgentState,
+        items: List[dict],
+        organization_id: str
+    ) -> List[PydanticSemanticMemoryItem]:
+        """
+        Create several semantic memory entries, embedding all of them in one batch and writing them in one transaction.
+
+        Args:
+            items: The arguments of `insert_semantic_item` for each entry (name, summary, details,
+                source and tree_path)
+        """
+        # Conditionally calculate embeddings based on BUILD_EMBEDDINGS_FOR_MEMORY flag
+        if BUILD_EMBEDDINGS_FOR_MEMORY:
+            # TODO: need to check if we need to chunk the text
+            embed_model = embedding_model(agent_state.embedding_config)
+            embeddings = get_text_embeddings(embed_model, [text for item in items for text in (item["name"], item["summary"], item["details"])])
+            embedding_config = agent_state.embedding_config
+        else:
+            embeddings = [None] * (3 * len(items))
+            embedding_config = None
 
-            semantic_item = self.create_item(
-                item_data=PydanticSemanticMemoryItem(
+        return self.create_many_items(
+            [
+                PydanticSemanticMemoryItem(
                     user_id=actor.id,
-                    name=name,
-                    summary=summary,
-                    details=details,
-                    source=source,
+                    name=item["name"],
+                    summary=item["summary"],
+                    details=item["details"],
+                    source=item["source"],
                     organization_id=organization_id,
-                    details_embedding=details_embedding,
-                    name_embedding=name_embedding,
-                    summary_embedding=summary_embedding,
+                    details_embedding=embeddings[3 * i + 2],
+                    name_embedding=embeddings[3 * i],
+                    summary_embedding=embeddings[3 * i + 1],
                     embedding_config=embedding_config,
-                    tree_path=tree_path,
-                ),
-                actor=actor
-            )
-            
-            # Note: Item is already added to clustering tree in create_item()
-            return semantic_item
-        except Exception as e:
-            raise e
+                    tree_path=item["tree_path"],
+                )
+                for i, item in enumerate(items)
+            ],
+            actor=actor
+        )
 
 
     def delete_semantic_item_by_id(self, semantic_memory_id: str, actor: PydanticUser) -> None:
@@ -724,3 +784,4 @@ class SemanticMemoryManager:
                 item.hard_delete(session)
             except NoResultFound:
                 raise NoResultFound(f"Semantic memory item with id {semantic_memory_id} not found.")
+        self._on_item_deleted(SemanticMemoryItem, semantic_memory_id, actor.id)
@@ -12,12 +12,14 @@ import uuid
 import venv
 from typing import Any, Dict, Optional
 
+from mirix.constants import USE_SANDBOX_WORKER_POOL
 from mirix.log import get_logger
 from mirix.schemas.agent import AgentState
 from mirix.schemas.sandbox_config import SandboxConfig, SandboxRunResult, SandboxType
 from mirix.schemas.tool import Tool
 from mirix.schemas.user import User
 from mirix.services.sandbox_config_manager import SandboxConfigManager
+from mirix.services.sandbox_worker_pool import get_sandbox_worker_pool
 from mirix.services.tool_manager import ToolManager
 from mirix.settings import tool_settings
 from mirix.utils import get_friendly_error_msg
@@ -123,6 +125,10 @@ class ToolExecutionSandbox:
             logger.warning(f"Sandbox directory does not exist, creating: {local_configs.sandbox_dir}")
             os.makedirs(local_configs.sandbox_dir)
 
+        # Run on a warm worker of the venv instead of starting a new interpreter for every call
+        if local_configs.use_venv and USE_SANDBOX_WORKER_POOL:
+            return self.run_local_dir_sandbox_pooled(sbx_config, env, agent_state)
+
         # Write the code to a temp file in the sandbox_dir
         with tempfile.NamedTemporaryFile(mode="w", dir=local_configs.sandbox_dir, suffix=".py", delete=False) as temp_file:
             if local_configs.use_venv:
@@ -148,7 +154,8 @@ class ToolExecutionSandbox:
             # Clean up the temp file
             os.remove(temp_file_path)
 
-    def run_local_dir_sandbox_venv(self, sbx_config: SandboxConfig, env: Dict[str, str], temp_file_path: str) -> SandboxRunResult:
+    def prepare_venv(self, sbx_config: SandboxConfig, env: Dict[str, str]) -> str:
+        """Create the sandbox venv if needed, point `env` at it and return its python interpreter."""
         local_configs = sbx_config.get_local_config()
         venv_path = os.path.join(local_configs.sandbox_dir, local_configs.venv_name)
 
@@ -168,10 +175,57 @@ class ToolExecutionSandbox:
         # Suppress all warnings
         env["PYTHONWARNINGS"] = "ignore"
 
+        return python_executable
+
+    def run_local_dir_sandbox_pooled(
+        self, sbx_config: SandboxConfig, env: Dict[str, str], agent_state: Optional[AgentState] = None
+    ) -> SandboxRunResult:
+        local_configs = sbx_config.get_local_config()
+        python_executable = self.prepare_venv(sbx_config, env)
+        pool = get_sandbox_worker_pool(sbx_config.fingerprint(), python_executable, self.user.id, local_configs.sandbox_dir, env)
+
+        inject_agent_state = "agent_state" in self.parse_function_arguments(self.tool.source_code, self.tool.name)
+        request = {
+            "agent_state": pickle.dumps(agent_state) if agent_state else None,
+            "params": "".join(self.initialize_param(param, self.args[param]) for param in self.args),
+            "tool_source": self.tool.source_code,
+            "call": self.invoke_function_call(inject_agent_state=inject_agent_state),
+            "env": env,
+        }
+
+        try:
+            response = pool.call(request, timeout=60)
+        except TimeoutError:
+            raise TimeoutError(f"Executing tool {self.tool_name} has timed out.")
+        except Exception as e:
+            logger.error(f"Executing tool {self.tool_name} has an unexpected error: {e}")
+            raise e
+
+        if "error" in response:
+            exception_name, exception_message = response["error"]
+            func_return = get_friendly_error_msg(function_name=self.tool_name, exception_name=exception_name, exception_message=exception_message)
+            agent_state, status = None, "error"
+        else:
+            func_return, agent_state = self.parse_best_effort(response["result"])
+            status = "success"
+
+        return SandboxRunResult(
+            func_return=func_return,
+            agent_state=agent_state,
+            stdout=[response["stdout"]] if response["stdout"] else [],
+            stderr=[response["stderr"]] if response["stderr"] else [],
+            status=status,
+            sandbox_config_fingerprint=sbx_config.fingerprint(),
+        )
+
+    def run_local_dir_sandbox_venv(self, sbx_config: SandboxConfig, env: Dict[str, str], temp_file_path: str) -> SandboxRunResult:
+        local_configs = sbx_config.get_local_config()
+        python_executable = self.prepare_venv(sbx_config, env)
+
         # Execute the code in a restricted subprocess
         try:
             result = subprocess.run(
-                [os.path.join(venv_path, "bin", "python3"), temp_file_path],
+                [python_executable, temp_file_path],
                 env=env,
                 cwd=local_configs.sandbox_dir,  # Restrict execution to sandbox_dir
                 timeout=60,
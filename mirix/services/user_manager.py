@@ -1,4 +1,5 @@
-from typing import List, Optional, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 
 from mirix.orm.errors import NoResultFound
 from mirix.orm.organization import Organization as OrganizationModel
@@ -8,6 +9,14 @@ from mirix.schemas.user import UserUpdate
 from mirix.services.organization_manager import OrganizationManager
 from mirix.utils import enforce_types
 
+# Users read from the database, by user id, and the results of `list_users`, by (cursor, limit).
+# Shared by every UserManager so that reading e.g. the timezone of the acting user does not query the
+# database every time; cleared whenever a user is created, updated or deleted in this process.
+_users: Dict[str, PydanticUser] = {}
+_user_lists: Dict[Tuple[Optional[str], Optional[int]], List[PydanticUser]] = {}
+_users_generation = 0
+_users_lock = threading.Lock()
+
 
 class UserManager:
     """Manager class to handle business logic related to Users."""
@@ -39,6 +48,7 @@ class UserManager:
                 # If it doesn't exist, make it
                 user = UserModel(id=self.DEFAULT_USER_ID, name=self.DEFAULT_USER_NAME, status="active", timezone=self.DEFAULT_TIME_ZONE, organization_id=org_id)
                 user.create(session)
+                self.invalidate_user_cache()
 
             return user.to_pydantic()
 
@@ -48,6 +58,7 @@ class UserManager:
         with self.session_maker() as session:
             new_user = UserModel(**pydantic_user.model_dump())
             new_user.create(session)
+            self.invalidate_user_cache()
             return new_user.to_pydantic()
 
     @enforce_types
@@ -64,6 +75,7 @@ class UserManager:
 
             # Commit the updated user
             existing_user.update(session)
+            self.invalidate_user_cache()
             return existing_user.to_pydantic()
 
     @enforce_types
@@ -78,6 +90,7 @@ class UserManager:
 
             # Commit the updated user
             existing_user.update(session)
+            self.invalidate_user_cache()
             return existing_user.to_pydantic()
 
     @enforce_types
@@ -92,6 +105,7 @@ class UserManager:
 
             # Commit the updated user
             existing_user.update(session)
+            self.invalidate_user_cache()
             return existing_user.to_pydantic()
 
     @enforce_types
@@ -103,13 +117,31 @@ class UserManager:
             user.hard_delete(session)
 
             session.commit()
+            self.invalidate_user_cache()
+
+    @staticmethod
+    def invalidate_user_cache() -> None:
+        """Forget the cached users, so that the next lookups read the database."""
+        global _users_generation
+        with _users_lock:
+            _users.clear()
+            _user_lists.clear()
+            _users_generation += 1
 
     @enforce_types
     def get_user_by_id(self, user_id: str) -> PydanticUser:
-        """Fetch a user by ID."""
+        """Fetch a user by ID, reading the database only on the first lookup."""
+        with _users_lock:
+            if user_id in _users:
+                return _users[user_id]
+            generation = _users_generation
         with self.session_maker() as session:
-            user = UserModel.read(db_session=session, identifier=user_id)
-            return user.to_pydantic()
+            user = UserModel.read(db_session=session, identifier=user_id).to_pydantic()
+        with _users_lock:
+            # Do not cache a value read before a concurrent write invalidated the cache
+            if generation == _users_generation:
+                _users[user_id] = user
+        return user
 
     @enforce_types
     def get_default_user(self) -> PydanticUser:
@@ -130,6 +162,14 @@ class UserManager:
     @enforce_types
     def list_users(self, cursor: Optional[str] = None, limit: Optional[int] = 50) -> Tuple[Optional[str], List[PydanticUser]]:
         """List users with pagination using cursor (id) and limit."""
+        with _users_lock:
+            if (cursor, limit) in _user_lists:
+                return list(_user_lists[(cursor, limit)])
+            generation = _users_generation
         with self.session_maker() as session:
             results = UserModel.list(db_session=session, cursor=cursor, limit=limit)
-            return [user.to_pydantic() for user in results]
+            users = [user.to_pydantic() for user in results]
+        with _users_lock:
+            if generation == _users_generation:
+                _user_lists[(cursor, limit)] = users
+        return list(users)
@@ -0,0 +1,386 @@
+import atexit
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from mirix.constants import (
+    USE_VECTOR_INDEX,
+    VECTOR_INDEX_FLUSH_INTERVAL,
+    VECTOR_INDEX_MIN_TRAIN_SIZE,
+    VECTOR_INDEX_NPROBE_FRACTION,
+)
+from mirix.embeddings import embedding_model
+from mirix.log import get_logger
+from mirix.schemas.embedding_config import EmbeddingConfig
+from mirix.schemas.user import User as PydanticUser
+from mirix.services.helpers.index_registry import IndexRegistry
+from mirix.settings import settings
+
+logger = get_logger(__name__)
+
+
+def _format_timestamp(timestamp) -> str:
+    """Normalize a timestamp into the string form stored alongside an index snapshot."""
+    if timestamp is None:
+        return ""
+    if hasattr(timestamp, "isoformat"):
+        return timestamp.isoformat()
+    return str(timestamp)
+
+
+class VectorIndex:
+    """
+    In-process IVF (inverted file) index over L2-normalized float32 vectors.
+
+    Small indexes are searched exhaustively with a single matrix product. Once the index
+    holds VECTOR_INDEX_MIN_TRAIN_SIZE vectors, a k-means coarse quantizer splits it into
+    ~sqrt(N) lists and a query only scores the vectors assigned to the closest lists.
+    Zero padding at the end of stored embeddings is trimmed, so the index works at the
+    native dimensionality of the embedding model.
+    """
+
+    def __init__(self, dim: int = 0):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self.max_updated_at = ""
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _grow_dim(self, dim: int) -> None:
+        pad = dim - self.dim
+        self._vectors = np.pad(self._vectors, ((0, 0), (0, pad)))
+        if self.centroids is not None:
+            self.centroids = np.pad(self.centroids, ((0, 0), (0, pad)))
+        self.dim = dim
+
+    def _reserve(self, size: int) -> None:
+        capacity = self._vectors.shape[0]
+        if size <= capacity:
+            return
+        new_capacity = max(size, 2 * capacity, 64)
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:capacity] = self._vectors
+        assignments = np.zeros(new_capacity, dtype=np.int32)
+        assignments[:capacity] = self._assignments
+        self._vectors, self._assignments = vectors, assignments
+
+    def _normalize(self, vector, grow: bool) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        nonzero = np.flatnonzero(vec)
+        length = int(nonzero[-1]) + 1 if nonzero.size else 0
+        if grow and length > self.dim:
+            self._grow_dim(length)
+        out = np.zeros(self.dim, dtype=np.float32)
+        width = min(vec.shape[0], self.dim)
+        out[:width] = vec[:width]
+        norm = np.linalg.norm(out)
+        return out / norm if norm > 0 else out
+
+    def _assign(self, matrix: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        labels = np.empty(matrix.shape[0], dtype=np.int32)
+        for start in range(0, matrix.shape[0], chunk_size):
+            block = matrix[start:start + chunk_size]
+            labels[start:start + chunk_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def upsert(self, item_id: str, vector, updated_at: str = "", train: bool = True) -> None:
+        """Insert or replace the vector stored for `item_id`."""
+        with self.lock:
+            vec = self._normalize(vector, grow=True)
+            row = self.id_to_row.get(item_id)
+            if row is None:
+                row = len(self.ids)
+                self._reserve(row + 1)
+                self.ids.append(item_id)
+                self.id_to_row[item_id] = row
+            self._vectors[row] = vec
+            self._assignments[row] = self._assign(vec[None, :])[0] if self.centroids is not None else 0
+            if updated_at > self.max_updated_at:
+                self.max_updated_at = updated_at
+            if train:
+                self.maybe_train()
+
+    def remove(self, item_id: str) -> bool:
+        """Remove `item_id` from the index. Returns False if it was not indexed."""
+        with self.lock:
+            row = self.id_to_row.pop(item_id, None)
+            if row is None:
+                return False
+            last = len(self.ids) - 1
+            if row != last:
+                moved_id = self.ids[last]
+                self.ids[row] = moved_id
+                self.id_to_row[moved_id] = row
+                self._vectors[row] = self._vectors[last]
+                self._assignments[row] = self._assignments[last]
+            self.ids.pop()
+            return True
+
+    def maybe_train(self) -> None:
+        """(Re)train the coarse quantizer whenever the index has doubled since the last training."""
+        size = len(self.ids)
+        if size < VECTOR_INDEX_MIN_TRAIN_SIZE:
+            return
+        if self.centroids is not None and size < 2 * self.trained_size:
+            return
+        self.train()
+
+    def train(self, iterations: int = 10) -> None:
+        """Run a few rounds of spherical k-means on a sample and reassign every vector."""
+        with self.lock:
+            size = len(self.ids)
+            if size == 0:
+                return
+            nlist = max(1, int(np.sqrt(size)))
+            rng = np.random.default_rng(0)
+            sample_size = min(size, nlist * 64)
+            sample = self._vectors[rng.choice(size, sample_size, replace=False)]
+            centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                counts = np.bincount(labels, minlength=nlist)
+                nonempty = counts > 0
+                norms = np.linalg.norm(sums[nonempty], axis=1, keepdims=True)
+                centroids[nonempty] = sums[nonempty] / np.maximum(norms, 1e-12)
+
+            self.centroids = centroids
+            self._assignments[:size] = self._assign(self._vectors[:size])
+            self.trained_size = size
+
+    def search(self, query, k: int, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return up to `k` (id, cosine distance) pairs, closest first."""
+        with self.lock:
+            size = len(self.ids)
+            if size == 0 or k <= 0:
+                return []
+            q = self._normalize(query, grow=False)
+            vectors = self._vectors[:size]
+
+            candidates = None
+            if self.centroids is not None:
+                nlist = self.centroids.shape[0]
+                nprobe = min(nlist, nprobe or max(1, int(np.ceil(nlist * VECTOR_INDEX_NPROBE_FRACTION))))
+                centroid_scores = self.centroids @ q
+                probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+                candidates = np.flatnonzero(np.isin(self._assignments[:size], probe))
+                if candidates.size < k:
+                    candidates = None
+
+            scores = vectors @ q if candidates is None else vectors[candidates] @ q
+            top = min(k, scores.shape[0])
+            order = np.argpartition(-scores, top - 1)[:top]
+            order = order[np.argsort(-scores[order], kind="stable")]
+            rows = order if candidates is None else candidates[order]
+            return [(self.ids[row], float(1.0 - score)) for row, score in zip(rows, scores[order])]
+
+    def save(self, path: str) -> None:
+        """Atomically write a snapshot of the index to `path`."""
+        with self.lock:
+            size = len(self.ids)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    ids=np.array(self.ids, dtype=str),
+                    vectors=self._vectors[:size],
+                    assignments=self._assignments[:size],
+                    centroids=self.centroids if self.centroids is not None else np.zeros((0, self.dim), dtype=np.float32),
+                    trained_size=np.array(self.trained_size),
+                    max_updated_at=np.array(self.max_updated_at),
+                )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """Load a snapshot written by `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"].astype(np.float32)
+            index = cls(dim=vectors.shape[1])
+            index.ids = data["ids"].tolist()
+            index.id_to_row = {item_id: row for row, item_id in enumerate(index.ids)}
+            index._vectors = vectors
+            index._assignments = data["assignments"].astype(np.int32)
+            centroids = data["centroids"]
+            index.centroids = centroids.astype(np.float32) if centroids.shape[0] > 0 else None
+            index.trained_size = int(data["trained_size"])
+            index.max_updated_at = str(data["max_updated_at"])
+        return index
+
+
+# Indexes are shared by every manager instance in the process. Unsaved write counts are guarded by the registry lock.
+_registry: IndexRegistry[VectorIndex] = IndexRegistry()
+_pending_writes: Dict[Tuple[str, str, str], int] = {}
+
+
+class VectorIndexManager:
+    """Manager class that keeps per-user, per-memory-type ANN indexes in sync with the SQLite memory tables."""
+
+    def __init__(self):
+        from mirix.server.server import config, db_context
+
+        self.session_maker = db_context
+        self.index_dir = os.path.join(config.recall_storage_path, "vector_index")
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """PostgreSQL uses pgvector indexes, so the in-process index only serves SQLite."""
+        return USE_VECTOR_INDEX and not settings.mirix_pg_uri_no_default
+
+    @staticmethod
+    def embedding_fields(target_class) -> List[str]:
+        return [column.key for column in target_class.__table__.columns if column.key.endswith("_embedding")]
+
+    def _index_path(self, key: Tuple[str, str, str]) -> str:
+        table_name, field_name, user_id = key
+        return os.path.join(self.index_dir, user_id, f"{table_name}.{field_name}.npz")
+
+    def _db_fingerprint(self, target_class, field_name: str, user_id: str) -> Tuple[int, str]:
+        column = getattr(target_class, field_name)
+        with self.session_maker() as session:
+            count, max_updated_at = session.execute(
+                select(func.count(target_class.id), func.max(target_class.updated_at)).where(
+                    target_class.user_id == user_id, column.isnot(None)
+                )
+            ).one()
+        return int(count), _format_timestamp(max_updated_at)
+
+    def _build_from_db(self, target_class, field_name: str, user_id: str) -> VectorIndex:
+        column = getattr(target_class, field_name)
+        index = VectorIndex()
+        with self.session_maker() as session:
+            rows = session.execute(
+                select(target_class.id, column, target_class.updated_at).where(
+                    target_class.user_id == user_id, column.isnot(None)
+                )
+            )
+            for item_id, vector, updated_at in rows:
+                index.upsert(item_id, vector, _format_timestamp(updated_at), train=False)
+        index.maybe_train()
+        return index
+
+    def _load_or_build(self, target_class, field_name: str, user_id: str) -> VectorIndex:
+        key = (target_class.__tablename__, field_name, user_id)
+        path = self._index_path(key)
+        index = None
+        if os.path.exists(path):
+            try:
+                index = VectorIndex.load(path)
+                if (len(index), index.max_updated_at) != self._db_fingerprint(target_class, field_name, user_id):
+                    logger.info(f"Vector index snapshot {path} is stale, rebuilding")
+                    index = None
+            except Exception as e:
+                logger.warning(f"Failed to load vector index snapshot {path}: {e}")
+                index = None
+
+        if index is None:
+            index = self._build_from_db(target_class, field_name, user_id)
+            index.save(path)
+        return index
+
+    def get_index(self, target_class, field_name: str, user_id: str) -> VectorIndex:
+        """
+        Return the live index, loading the snapshot from disk or rebuilding it from the DB on first use.
+        The load runs outside the registry lock, so it does not hold up the other indexes.
+        """
+        key = (target_class.__tablename__, field_name, user_id)
+        return _registry.get_or_build(key, lambda: self._load_or_build(target_class, field_name, user_id))
+
+    def _record_write(self, key: Tuple[str, str, str]) -> None:
+        with _registry.lock:
+            _pending_writes[key] = _pending_writes.get(key, 0) + 1
+            index = _registry.indexes.get(key)
+            # Writes queued on an index being built are saved by a later flush
+            if index is None or _pending_writes[key] < VECTOR_INDEX_FLUSH_INTERVAL:
+                return
+            _pending_writes[key] = 0
+        index.save(self._index_path(key))
+
+    def _write(self, target_class, field_name: str, user_id: str, write: Callable[[VectorIndex], bool]) -> None:
+        """
+        Apply `write` to an index, loading it first if needed, or queue it while the index is being built.
+        The write counts towards the next snapshot unless it returned False.
+        """
+        key = (target_class.__tablename__, field_name, user_id)
+        changed = []
+        if not _registry.apply(key, lambda index: changed.append(write(index))):
+            changed.append(write(self.get_index(target_class, field_name, user_id)))
+        if not changed or changed[0]:
+            self._record_write(key)
+
+    def index_item(self, item) -> None:
+        """Upsert every embedding of a freshly created or updated ORM memory item."""
+        if not self.is_enabled():
+            return
+        target_class = type(item)
+        item_id, updated_at = item.id, _format_timestamp(item.updated_at)
+        for field_name in self.embedding_fields(target_class):
+            vector = getattr(item, field_name, None)
+            if vector is None:
+                write = lambda index: index.remove(item_id) or True
+            else:
+                write = lambda index, vector=vector: index.upsert(item_id, vector, updated_at) or True
+            self._write(target_class, field_name, item.user_id, write)
+
+    def remove_item(self, target_class, item_id: str, user_id: str) -> None:
+        """Drop a deleted memory item from every index of its memory type."""
+        if not self.is_enabled():
+            return
+        for field_name in self.embedding_fields(target_class):
+            self._write(target_class, field_name, user_id, lambda index: index.remove(item_id))
+
+    def search(
+        self,
+        target_class,
+        field_name: str,
+        actor: PydanticUser,
+        query_text: Optional[str] = None,
+        embedded_text: Optional[List[float]] = None,
+        embedding_config: Optional[EmbeddingConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[List[str]]:
+        """
+        Return the ids of the nearest items, closest first, or None when the index does not
+        apply (PostgreSQL or USE_VECTOR_INDEX disabled) and the caller should fall back to `build_query`.
+        """
+        if not self.is_enabled():
+            return None
+        if embedded_text is None:
+            assert embedding_config is not None, "embedding_config must be specified for vector search"
+            assert query_text is not None, "query_text must be specified for vector search"
+            embedded_text = embedding_model(embedding_config).get_text_embedding(query_text)
+
+        index = self.get_index(target_class, field_name, actor.id)
+        return [item_id for item_id, _ in index.search(embedded_text, k=limit or len(index))]
+
+    @staticmethod
+    def flush_all() -> None:
+        """Write a snapshot of every index with unsaved writes."""
+        with _registry.lock:
+            dirty = [(key, _registry.indexes[key]) for key, count in _pending_writes.items() if count > 0 and key in _registry.indexes]
+            for key, _ in dirty:
+                _pending_writes[key] = 0
+        if not dirty:
+            return
+        manager = VectorIndexManager()
+        for key, index in dirty:
+            try:
+                index.save(manager._index_path(key))
+            except Exception as e:
+                logger.warning(f"Failed to save vector index {key}: {e}")
+
+
+atexit.register(VectorIndexManager.flush_all)
@@ -15,7 +15,7 @@ import sys
 import uuid
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import List, Union, _GenericAlias, get_args, get_origin, get_type_hints
 from urllib.parse import urljoin, urlparse
 
@@ -34,6 +34,8 @@ from mirix.constants import (
     CORE_MEMORY_PERSONA_CHAR_LIMIT,
     ERROR_MESSAGE_PREFIX,
     MIRIX_DIR,
+    IMAGE_TOKEN_ESTIMATE,
+    IMAGE_TOKEN_ESTIMATE_LOW_DETAIL,
     MAX_FILENAME_LENGTH,
     TOOL_CALL_ID_MAX_LEN,
 )
@@ -808,9 +810,17 @@ class OpenAIBackcompatUnpickler(pickle.Unpickler):
         return super().find_class(module, name)
 
 
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4") -> tiktoken.Encoding:
+    """Get the (cached) tiktoken encoding of a model, falling back to cl100k_base for unknown models."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
 def count_tokens(s: str, model: str = "gpt-4") -> int:
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(s))
+    return len(get_encoding(model).encode(s))
 
 
 def printd(*args, **kwargs):
@@ -1192,13 +1202,7 @@ def num_tokens_from_functions(functions: List[dict], model: str = "gpt-4"):
 
     Copied from https://community.openai.com/t/how-to-calculate-the-tokens-when-using-function-call/266573/11
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        from mirix.utils import printd
-
-        printd(f"Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = get_encoding(model)
 
     num_tokens = 0
     for function in functions:
@@ -1256,11 +1260,7 @@ def num_tokens_from_tool_calls(tool_calls: Union[List[dict], List[ToolCall]], mo
         }
     }]
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        # print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = get_encoding(model)
 
     num_tokens = 0
     for tool_call in tool_calls:
@@ -1291,23 +1291,8 @@ def num_tokens_from_tool_calls(tool_calls: Union[List[dict], List[ToolCall]], mo
     return num_tokens
 
 
-def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
-    """Return the number of tokens used by a list of messages.
-
-    From: https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
-
-    For counting tokens in function calling RESPONSES, see:
-        https://hmarr.com/blog/counting-openai-tokens/, https://github.com/hmarr/openai-chat-tokens
-
-    For counting tokens in function calling REQUESTS, see:
-        https://community.openai.com/t/how-to-calculate-the-tokens-when-using-function-call/266573/11
-    """
-    try:
-        # Attempt to search for the encoding based on the model string
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        # print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+def _message_token_overheads(model: str):
+    """Return (tokenizer model, tokens per message, tokens per name) of the chat format of a model."""
     if model in {
         "gpt-3.5-turbo-0613",
         "gpt-3.5-turbo-16k-0613",
@@ -1316,55 +1301,91 @@ def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
         "gpt-4-0613",
         "gpt-4-32k-0613",
     }:
-        tokens_per_message = 3
-        tokens_per_name = 1
+        return model, 3, 1
     elif model == "gpt-3.5-turbo-0301":
-        tokens_per_message = 4  # every message follows <|start|>{role/name}\n{content}<|end|>\n
-        tokens_per_name = -1  # if there's a name, the role is omitted
+        # every message follows <|start|>{role/name}\n{content}<|end|>\n; if there's a name, the role is omitted
+        return model, 4, -1
     elif "gpt-3.5-turbo" in model:
         # print("Warning: gpt-3.5-turbo may update over time. Returning num tokens assuming gpt-3.5-turbo-0613.")
-        return num_tokens_from_messages(messages, model="gpt-3.5-turbo-0613")
+        return _message_token_overheads("gpt-3.5-turbo-0613")
     elif "gpt-4" in model:
         # print("Warning: gpt-4 may update over time. Returning num tokens assuming gpt-4-0613.")
-        return num_tokens_from_messages(messages, model="gpt-4-0613")
+        return _message_token_overheads("gpt-4-0613")
     else:
-        from mirix.utils import printd
-
         printd(
             f"num_tokens_from_messages() is not implemented for model {model}. See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."
         )
-        return num_tokens_from_messages(messages, model="gpt-4-0613")
-        # raise NotImplementedError(
-        # f"""num_tokens_from_messages() is not implemented for model {model}. See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."""
-        # )
+        return _message_token_overheads("gpt-4-0613")
+
+
+def get_message_encoding(model: str = "gpt-4") -> tiktoken.Encoding:
+    """The encoding num_tokens_from_message actually counts with for `model`."""
+    return get_encoding(_message_token_overheads(model)[0])
+
+
+def _num_tokens_from_content_parts(parts: list, encoding: tiktoken.Encoding) -> int:
+    """Tokens of multimodal content: text parts are encoded, images and files are estimated."""
     num_tokens = 0
-    for message in messages:
-        num_tokens += tokens_per_message
-        for key, value in message.items():
-            try:
+    for part in parts:
+        if isinstance(part, dict) and part.get("type") == "text":
+            num_tokens += len(encoding.encode(part.get("text") or ""))
+        elif isinstance(part, dict) and part.get("type") in ("image", "image_url"):
+            num_tokens += IMAGE_TOKEN_ESTIMATE_LOW_DETAIL if part.get("detail") == "low" else IMAGE_TOKEN_ESTIMATE
+        else:
+            num_tokens += len(encoding.encode(str(part)))
+    return num_tokens
+
+
+def num_tokens_from_message(message: dict, model: str = "gpt-4") -> int:
+    """Return the number of tokens used by a single message, without the reply priming of num_tokens_from_messages."""
+    model, tokens_per_message, tokens_per_name = _message_token_overheads(model)
+    encoding = get_encoding(model)
 
-                if isinstance(value, list) and key == "tool_calls":
-                    num_tokens += num_tokens_from_tool_calls(tool_calls=value, model=model)
-                    # special case for tool calling (list)
-                    # num_tokens += len(encoding.encode(value["name"]))
-                    # num_tokens += len(encoding.encode(value["arguments"]))
+    num_tokens = tokens_per_message
+    for key, value in message.items():
+        try:
 
+            if isinstance(value, list) and key == "tool_calls":
+                num_tokens += num_tokens_from_tool_calls(tool_calls=value, model=model)
+                # special case for tool calling (list)
+                # num_tokens += len(encoding.encode(value["name"]))
+                # num_tokens += len(encoding.encode(value["arguments"]))
+
+            elif isinstance(value, list):
+                # multimodal content, e.g. text + screenshots
+                num_tokens += _num_tokens_from_content_parts(value, encoding)
+
+            else:
+                if value is None:
+                    # raise ValueError(f"Message has null value: {key} with value: {value} - message={message}")
+                    warnings.warn(f"Message has null value: {key} with value: {value} - message={message}")
                 else:
-                    if value is None:
-                        # raise ValueError(f"Message has null value: {key} with value: {value} - message={message}")
-                        warnings.warn(f"Message has null value: {key} with value: {value} - message={message}")
-                    else:
-                        if not isinstance(value, str):
-                            raise ValueError(f"Message has non-string value: {key} with value: {value} - message={message}")
-                        num_tokens += len(encoding.encode(value))
+                    if not isinstance(value, str):
+                        value = str(value)
+                    num_tokens += len(encoding.encode(value))
+
+            if key == "name":
+                num_tokens += tokens_per_name
+
+        except TypeError as e:
+            print(f"tiktoken encoding failed on: {value}")
+            raise e
+
+    return num_tokens
+
+
+def num_tokens_from_messages(messages: List[dict], model: str = "gpt-4") -> int:
+    """Return the number of tokens used by a list of messages.
 
-                if key == "name":
-                    num_tokens += tokens_per_name
+    From: https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
 
-            except TypeError as e:
-                print(f"tiktoken encoding failed on: {value}")
-                raise e
+    For counting tokens in function calling RESPONSES, see:
+        https://hmarr.com/blog/counting-openai-tokens/, https://github.com/hmarr/openai-chat-tokens
 
+    For counting tokens in function calling REQUESTS, see:
+        https://community.openai.com/t/how-to-calculate-the-tokens-when-using-function-call/266573/11
+    """
+    num_tokens = sum(num_tokens_from_message(message, model=model) for message in messages)
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
     return num_tokens
 
@@ -1420,8 +1441,7 @@ def clean_json_string_extra_backslash(s):
 
 
 def count_tokens(s: str, model: str = "gpt-4") -> int:
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(s))
+    return len(get_encoding(model).encode(s))
 
 def generate_short_id(prefix="id", length=4):
     """
@@ -1477,4 +1497,24 @@ def generate_unique_short_id(session_maker, model_class, prefix="id", length=4,
                 return candidate_id
     
     # If we can't find a unique ID after max_attempts, fall back to longer ID
-    return generate_short_id(prefix, length + 2) 
\ No newline at end of file
+    return generate_short_id(prefix, length + 2) 
+
+def generate_unique_short_ids(session_maker, model_class, count, prefix="id", length=4, max_attempts=10):
+    """
+    Generate `count` unique short IDs at once, checking them against the database with one query per attempt.
+
+    See generate_unique_short_id; IDs that still collide after max_attempts fall back to longer IDs.
+    """
+    from sqlalchemy import select
+
+    ids = []
+    for _ in range(max_attempts):
+        candidates = {generate_short_id(prefix, length) for _ in range(count - len(ids))} - set(ids)
+        if candidates:
+            with session_maker() as temp_session:
+                existing = set(temp_session.execute(select(model_class.id).where(model_class.id.in_(candidates))).scalars())
+            ids.extend(candidates - existing)
+        if len(ids) == count:
+            return ids
+
+    return ids + [generate_short_id(prefix, length + 2) for _ in range(count - len(ids))]
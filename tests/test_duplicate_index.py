@@ -0,0 +1,140 @@
+"""
+Tests of MinHashLSHIndex, the in-memory near-duplicate index used to find redundant memories, and of the
+IndexRegistry that builds such indexes on first use.
+
+Usage:
+    pytest tests/test_duplicate_index.py
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+# Add the project root to Python path so we can import mirix
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mirix.services.duplicate_index_manager import MinHashLSHIndex, memory_text
+from mirix.services.helpers.index_registry import IndexRegistry
+
+
+def words(start: int, count: int) -> str:
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def jaccard(text_a: str, text_b: str) -> float:
+    a, b = set(text_a.lower().split()), set(text_b.lower().split())
+    return len(a & b) / len(a | b)
+
+
+@pytest.fixture
+def index():
+    index = MinHashLSHIndex()
+    index.upsert("original", words(0, 40))
+    index.upsert("near_copy", words(0, 39) + " changed")
+    index.upsert("unrelated", words(1000, 40))
+    return index
+
+
+def test_signature_is_case_and_order_insensitive():
+    index = MinHashLSHIndex()
+
+    np.testing.assert_array_equal(index.signature("Alpha beta GAMMA"), index.signature("gamma alpha Beta beta"))
+    assert index.signature("   ") is None
+
+
+def test_similarity_estimates_jaccard():
+    index = MinHashLSHIndex()
+    text_a, text_b = words(0, 100), words(30, 100)
+    index.upsert("a", text_a)
+    index.upsert("b", text_b)
+
+    assert index.similarity("a", "b") == pytest.approx(jaccard(text_a, text_b), abs=0.15)
+
+
+def test_candidates_find_near_duplicates_only(index):
+    candidates = index.candidates("original", threshold=0.7)
+
+    assert [item_id for item_id, _ in candidates] == ["near_copy"]
+    assert candidates[0][1] >= 0.7
+    assert index.candidates("missing") == []
+
+
+def test_pairs_are_deduplicated_and_sorted(index):
+    index.upsert("exact_copy", words(0, 40))
+
+    pairs = index.pairs(threshold=0.7)
+
+    assert pairs[0] == ("exact_copy", "original", 1.0)
+    # near_copy is equally similar to the two identical items
+    assert {(a, b) for a, b, _ in pairs[1:]} == {("exact_copy", "near_copy"), ("near_copy", "original")}
+    assert [score for _, _, score in pairs] == sorted((score for _, _, score in pairs), reverse=True)
+
+
+def test_upsert_replaces_and_remove_forgets(index):
+    index.upsert("near_copy", words(2000, 40))
+    assert index.candidates("original", threshold=0.7) == []
+
+    assert index.remove("near_copy")
+    assert not index.remove("near_copy")
+    assert len(index) == 2
+    # Buckets left empty by the removal are dropped
+    assert all(all(bucket for bucket in buckets.values()) for buckets in index._buckets)
+
+
+def test_items_without_words_are_not_indexed():
+    index = MinHashLSHIndex()
+    index.upsert("empty", "")
+
+    assert len(index) == 0
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(AssertionError):
+        MinHashLSHIndex(num_perm=100, bands=24)
+
+
+def test_memory_text_joins_columns_and_lists():
+    assert memory_text(["Summary", None, "", ["step one", "step two"]]) == "Summary step one step two"
+
+
+def test_registry_replays_writes_that_arrive_during_a_build():
+    registry = IndexRegistry()
+    building, release = threading.Event(), threading.Event()
+
+    def build():
+        building.set()
+        release.wait(5)
+        index = MinHashLSHIndex()
+        index.upsert("from_db", words(0, 10))
+        return index
+
+    results = []
+    builder = threading.Thread(target=lambda: results.append(registry.get_or_build("key", build)))
+    builder.start()
+    building.wait(5)
+
+    # Writes neither block on the build nor get lost; writes to unknown keys are not applied
+    assert registry.apply("key", lambda index: index.upsert("written", words(100, 10)))
+    assert not registry.apply("other", lambda index: index.upsert("lost", "text"))
+    assert registry.get("key") is None
+    release.set()
+    builder.join(5)
+
+    index = results[0]
+    assert registry.get_or_build("key", build) is index
+    assert set(index.signatures) == {"from_db", "written"}
+
+
+def test_registry_build_errors_are_not_cached():
+    registry = IndexRegistry()
+
+    def failing_build():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        registry.get_or_build("key", failing_build)
+    assert registry.get_or_build("key", MinHashLSHIndex) is registry.get("key")
@@ -0,0 +1,159 @@
+"""
+Tests of the compact embedding storage format used on SQLite: vector round trips in every storage dtype,
+legacy base64 rows, cosine distance across encodings, and the migration of legacy rows.
+
+Usage:
+    pytest tests/test_embedding_storage.py
+"""
+
+import base64
+import importlib.util
+import os
+import sqlite3
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+# Add the project root to Python path so we can import mirix
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+
+from mirix.constants import MAX_EMBEDDING_DIM
+from mirix.helpers.converters import deserialize_vector, serialize_vector
+from mirix.orm.sqlite_functions import (
+    COMPACT_VECTOR_MAGIC,
+    cosine_distance,
+    decode_vector_with_norm,
+    encode_vector,
+)
+
+DIALECT = sqlite_dialect.dialect()
+DIM = 1536
+
+
+def random_vector(seed: int, dim: int = DIM) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def legacy_encode(vector: np.ndarray) -> bytes:
+    """Format of the rows written before the compact format: base64 of the zero-padded float32 vector."""
+    padded = np.pad(vector.astype(np.float32), (0, MAX_EMBEDDING_DIM - vector.shape[0]))
+    return base64.b64encode(padded.tobytes())
+
+
+def load_migration_module():
+    path = os.path.join(project_root, 'database', 'run_sqlite_migration.py')
+    spec = importlib.util.spec_from_file_location('run_sqlite_migration', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_float32_round_trip_is_exact_and_trims_padding():
+    vector = random_vector(0)
+    padded = np.pad(vector, (0, MAX_EMBEDDING_DIM - DIM))
+
+    data = serialize_vector(padded)
+    decoded = deserialize_vector(data, DIALECT)
+
+    assert data.startswith(COMPACT_VECTOR_MAGIC)
+    assert len(data) < DIM * 4 + 16
+    np.testing.assert_array_equal(decoded, vector)
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float16", 1e-3), ("int8", 1e-2)])
+def test_quantized_round_trip(dtype, tolerance):
+    vector = random_vector(1)
+
+    decoded, _ = decode_vector_with_norm(encode_vector(vector, dtype=dtype))
+
+    assert decoded.dtype == np.float32
+    assert decoded.shape == vector.shape
+    assert cosine_distance(vector, decoded) < tolerance
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_stored_norm_matches_decoded_vector(dtype):
+    data = encode_vector(random_vector(2), dtype=dtype)
+
+    decoded, norm = decode_vector_with_norm(data)
+
+    # Upper-case dtype codes carry the norm right after the header
+    assert data[3:4].isupper()
+    assert norm == pytest.approx(float(np.linalg.norm(decoded)), rel=1e-5)
+
+
+def test_legacy_base64_rows_are_still_read():
+    vector = random_vector(3)
+
+    decoded = deserialize_vector(legacy_encode(vector), DIALECT)
+
+    assert decoded.shape == (MAX_EMBEDDING_DIM,)
+    np.testing.assert_array_equal(decoded[:DIM], vector)
+    assert not decoded[DIM:].any()
+
+
+def test_empty_and_zero_vectors():
+    assert serialize_vector(None) is None
+    assert deserialize_vector(None, DIALECT) is None
+
+    decoded, norm = decode_vector_with_norm(encode_vector(np.zeros(DIM, dtype=np.float32)))
+    assert decoded.shape == (0,)
+    assert norm == 0.0
+
+
+def test_unsupported_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        encode_vector(random_vector(4), dtype="float64")
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16", "int8"])
+def test_cosine_distance_across_encodings(dtype):
+    stored, query = random_vector(5), random_vector(6)
+    expected = 1.0 - np.dot(stored, query) / (np.linalg.norm(stored) * np.linalg.norm(query))
+
+    # Compact stored column against a legacy padded query, and the other way around
+    assert cosine_distance(encode_vector(stored, dtype=dtype), legacy_encode(query)) == pytest.approx(expected, abs=2e-2)
+    assert cosine_distance(legacy_encode(stored), encode_vector(query, dtype=dtype)) == pytest.approx(expected, abs=2e-2)
+    assert cosine_distance(encode_vector(stored), encode_vector(stored, dtype=dtype)) == pytest.approx(0.0, abs=2e-2)
+
+
+def test_cosine_distance_of_missing_vectors():
+    assert cosine_distance(None, encode_vector(random_vector(7))) == 0.0
+    assert cosine_distance(encode_vector(np.zeros(4, dtype=np.float32)), encode_vector(random_vector(7))) == 1.0
+
+
+def test_compact_embeddings_migration(tmp_path):
+    migration = load_migration_module()
+    conn = sqlite3.connect(str(tmp_path / "sqlite.db"))
+    conn.execute("CREATE TABLE episodic_memory (id TEXT PRIMARY KEY, details_embedding BLOB, summary_embedding BLOB)")
+
+    vectors = {f"ep-{i}": random_vector(10 + i) for i in range(7)}
+    rows = [(item_id, legacy_encode(vector), None) for item_id, vector in vectors.items()]
+    compact = random_vector(99)
+    rows.append(("ep-compact", sqlite3.Binary(encode_vector(compact)), None))
+    conn.executemany("INSERT INTO episodic_memory VALUES (?, ?, ?)", rows)
+    conn.commit()
+    assert migration.count_legacy_embeddings(conn) == len(vectors)
+
+    # A small batch size exercises several batches
+    migration.compact_embeddings(conn, batch_size=3)
+
+    assert migration.count_legacy_embeddings(conn) == 0
+    stored = dict(conn.execute("SELECT id, details_embedding FROM episodic_memory").fetchall())
+    for item_id, vector in vectors.items():
+        data = bytes(stored[item_id])
+        assert data.startswith(migration.COMPACT_FLOAT32_HEADER)
+        assert struct.unpack('<f', data[4:8])[0] == pytest.approx(float(np.linalg.norm(vector)), rel=1e-5)
+        np.testing.assert_array_equal(decode_vector_with_norm(data)[0], vector)
+    np.testing.assert_array_equal(decode_vector_with_norm(stored["ep-compact"])[0], compact)
+    assert conn.execute("SELECT COUNT(*) FROM episodic_memory WHERE summary_embedding IS NOT NULL").fetchone()[0] == 0
+
+    # Running it again leaves the rows unchanged
+    migration.compact_embeddings(conn, batch_size=3)
+    assert dict(conn.execute("SELECT id, details_embedding FROM episodic_memory").fetchall()) == stored
+    conn.close()
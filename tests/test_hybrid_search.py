@@ -0,0 +1,123 @@
+"""
+Tests of the hybrid memory search: reciprocal rank fusion of the BM25 and embedding rankings, and the
+retrievers run by HybridSearchManager.search.
+
+Usage:
+    pytest tests/test_hybrid_search.py
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add the project root to Python path so we can import mirix
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import mirix.services.hybrid_search_manager as hybrid_search_manager
+from mirix.services.hybrid_search_manager import HybridSearchManager
+
+fuse = HybridSearchManager.reciprocal_rank_fusion
+
+
+def items(*ids):
+    return [SimpleNamespace(id=item_id) for item_id in ids]
+
+
+def ids(results):
+    return [item.id for item in results]
+
+
+def test_items_ranked_by_both_retrievers_come_first():
+    assert ids(fuse([items("a", "b", "c"), items("c", "d", "a")], limit=None, k=60)) == ["a", "c", "b", "d"]
+
+
+def test_scores_sum_reciprocal_ranks():
+    # b: 1/(1+2) + 1/(1+1) beats a: 1/(1+1) + 1/(1+3)
+    assert ids(fuse([items("a", "b"), items("b", "x", "a")], limit=None, k=1)) == ["b", "a", "x"]
+
+
+def test_ties_keep_the_order_of_the_earlier_ranking():
+    assert ids(fuse([items("a", "b"), items("c", "d")], limit=None)) == ["a", "c", "b", "d"]
+
+
+def test_limit_and_empty_rankings():
+    assert ids(fuse([items("a", "b", "c"), []], limit=2)) == ["a", "b"]
+    assert fuse([[], []], limit=10) == []
+
+
+def test_items_are_deduplicated_by_id_keeping_the_first_object():
+    first, second = items("a"), items("a")
+
+    fused = fuse([first, second], limit=None)
+
+    assert len(fused) == 1
+    assert fused[0] is first[0]
+
+
+class FakeMemoryManager:
+    """Stands in for the `list_*` method of a memory manager, recording the search methods it ran."""
+
+    def __init__(self, rankings, delays=None, errors=()):
+        self.rankings = rankings
+        self.delays = delays or {}
+        self.errors = errors
+        self.calls = []
+
+    def list_memories(self, query, search_method, limit, **kwargs):
+        self.calls.append(search_method)
+        time.sleep(self.delays.get(search_method, 0))
+        if search_method in self.errors:
+            raise RuntimeError(f"{search_method} failed")
+        return self.rankings[search_method][:limit]
+
+
+@pytest.fixture
+def embeddings_enabled(monkeypatch):
+    monkeypatch.setattr(hybrid_search_manager, "BUILD_EMBEDDINGS_FOR_MEMORY", True)
+
+
+@pytest.mark.usefixtures("embeddings_enabled")
+def test_search_fuses_both_retrievers():
+    manager = FakeMemoryManager({"bm25": items("a", "b"), "embedding": items("b", "c")})
+
+    results = HybridSearchManager().search(manager.list_memories, query="q", limit=10, embedded_text=[0.1])
+
+    assert sorted(manager.calls) == ["bm25", "embedding"]
+    assert ids(results) == ["b", "a", "c"]
+
+
+@pytest.mark.usefixtures("embeddings_enabled")
+def test_search_uses_the_retrievers_that_finished_in_time():
+    manager = FakeMemoryManager({"bm25": items("a"), "embedding": items("b")}, delays={"embedding": 1.0})
+
+    assert ids(HybridSearchManager().search(manager.list_memories, query="q", latency_budget=0.2)) == ["a"]
+
+
+@pytest.mark.usefixtures("embeddings_enabled")
+def test_search_ignores_a_failed_retriever_and_raises_if_all_fail():
+    manager = FakeMemoryManager({"bm25": items("a"), "embedding": items("b")}, errors=("embedding",))
+    assert ids(HybridSearchManager().search(manager.list_memories, query="q")) == ["a"]
+
+    manager = FakeMemoryManager({}, errors=("bm25", "embedding"))
+    with pytest.raises(RuntimeError):
+        HybridSearchManager().search(manager.list_memories, query="q")
+
+
+@pytest.mark.usefixtures("embeddings_enabled")
+def test_empty_query_lists_with_bm25_only():
+    manager = FakeMemoryManager({"bm25": items("recent"), "embedding": items("x")})
+
+    assert ids(HybridSearchManager().search(manager.list_memories, query="")) == ["recent"]
+    assert manager.calls == ["bm25"]
+
+
+def test_search_skips_embeddings_when_they_are_not_built(monkeypatch):
+    monkeypatch.setattr(hybrid_search_manager, "BUILD_EMBEDDINGS_FOR_MEMORY", False)
+    manager = FakeMemoryManager({"bm25": items("a", "b"), "embedding": items("c")})
+
+    assert ids(HybridSearchManager().search(manager.list_memories, query="q")) == ["a", "b"]
+    assert manager.calls == ["bm25"]
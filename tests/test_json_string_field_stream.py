@@ -0,0 +1,59 @@
+"""
+Tests of JSONStringFieldStream, which decodes a string field of a streamed JSON object (such as the `message`
+argument of a tool call) while the object is still being generated.
+
+Usage:
+    pytest tests/test_json_string_field_stream.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path so we can import mirix
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from mirix.llm_api.helpers import JSONStringFieldStream
+
+ARGUMENTS = {
+    "inner_thoughts": "The user said \"hi\" \\ greet back",
+    "message": "Hello!\nTab\there, quote \" backslash \\ unicode é 😀 done",
+    "request_heartbeat": False,
+}
+
+
+def stream(text: str, field: str, chunk_size: int) -> list:
+    field_stream = JSONStringFieldStream(field)
+    return [field_stream.feed(text[start:start + chunk_size]) for start in range(0, len(text), chunk_size)]
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 1000])
+@pytest.mark.parametrize("field", ["inner_thoughts", "message"])
+def test_chunks_decode_to_the_field_value(field, chunk_size, ensure_ascii):
+    # Every chunking splits escape sequences (\n, \", \\, \uXXXX and surrogate pairs) somewhere
+    text = json.dumps(ARGUMENTS, ensure_ascii=ensure_ascii)
+
+    assert "".join(stream(text, field, chunk_size)) == ARGUMENTS[field]
+
+
+def test_value_is_emitted_incrementally():
+    parts = stream('{"message": "abcdef"}', "message", 4)
+
+    assert [part for part in parts if part] == ["abc", "def"]
+
+
+def test_nothing_is_emitted_before_the_field_or_after_its_end():
+    field_stream = JSONStringFieldStream("message")
+
+    assert field_stream.feed('{"inner_thoughts": "message", "mess') == ""
+    assert field_stream.feed('age" :  "ok", "other": "no"}') == "ok"
+    assert field_stream.done
+    assert field_stream.feed('more') == ""
+
+
+def test_missing_field_emits_nothing():
+    assert "".join(stream(json.dumps({"other": "value"}), "message", 3)) == ""